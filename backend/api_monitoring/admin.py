@@ -14,6 +14,7 @@ from .utils import test_api_endpoint, discover_api_endpoints
 class APIEndpointAdmin(admin.ModelAdmin):
     list_display = ['name', 'url', 'method', 'expected_status_code', 'is_active', 'last_check_status', 'check_interval_minutes', 'created_at']
     list_filter = ['is_active', 'method', 'requires_auth']
+    list_select_related = ['last_check']
     search_fields = ['name', 'url']
     readonly_fields = ['created_at', 'updated_at']
     actions = ['test_selected_apis', 'discover_apis']
@@ -52,7 +53,7 @@ class APIEndpointAdmin(admin.ModelAdmin):
     
     def last_check_status(self, obj):
         """Show last check status"""
-        last_check = obj.checks.order_by('-checked_at').first()
+        last_check = obj.last_check
         if last_check:
             if last_check.is_success:
                 return format_html('<span style="color: green;">✅ {}ms</span>', int(last_check.response_time_ms))
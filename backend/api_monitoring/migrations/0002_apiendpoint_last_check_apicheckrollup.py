@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-17 10:05
+
+import django.db.models.deletion
+from datetime import timedelta, timezone as dt_timezone
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+def backfill_last_check_and_rollups(apps, schema_editor):
+    APIEndpoint = apps.get_model('api_monitoring', 'APIEndpoint')
+    APICheck = apps.get_model('api_monitoring', 'APICheck')
+    APICheckRollup = apps.get_model('api_monitoring', 'APICheckRollup')
+
+    latest_check = APICheck.objects.filter(endpoint=OuterRef('pk')).order_by('-checked_at', '-id').values('id')[:1]
+    APIEndpoint.objects.update(last_check_id=Subquery(latest_check))
+
+    # Only the last 24h of counters are ever read
+    since = timezone.now() - timedelta(hours=25)
+    buckets = (
+        APICheck.objects.filter(checked_at__gte=since)
+        .annotate(hour=TruncHour('checked_at', tzinfo=dt_timezone.utc))
+        .values('endpoint_id', 'hour')
+        .annotate(
+            success_count=Count('id', filter=Q(is_success=True)),
+            failure_count=Count('id', filter=Q(is_success=False)),
+        )
+    )
+    APICheckRollup.objects.bulk_create(
+        [APICheckRollup(**bucket) for bucket in buckets],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiendpoint',
+            name='last_check',
+            field=models.ForeignKey(blank=True, help_text='Most recent check (maintained when checks are saved)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api_monitoring.apicheck'),
+        ),
+        migrations.CreateModel(
+            name='APICheckRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour (UTC)')),
+                ('success_count', models.IntegerField(default=0, help_text='Successful checks in this hour')),
+                ('failure_count', models.IntegerField(default=0, help_text='Failed checks in this hour')),
+                ('endpoint', models.ForeignKey(help_text='API endpoint the counters belong to', on_delete=django.db.models.deletion.CASCADE, related_name='check_rollups', to='api_monitoring.apiendpoint')),
+            ],
+            options={
+                'verbose_name': 'API Check Rollup',
+                'verbose_name_plural': 'API Check Rollups',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='api_monitor_hour_269d60_idx')],
+                'unique_together': {('endpoint', 'hour')},
+            },
+        ),
+        migrations.RunPython(backfill_last_check_and_rollups, migrations.RunPython.noop),
+    ]
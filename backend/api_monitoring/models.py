@@ -31,6 +31,14 @@ class APIEndpoint(models.Model):
     auth_token = models.CharField(max_length=500, null=True, blank=True, help_text='Auth token if needed')
     headers = models.JSONField(null=True, blank=True, help_text='Custom headers as JSON')
     body = models.TextField(null=True, blank=True, help_text='Request body for POST/PUT')
+    last_check = models.ForeignKey(
+        'APICheck',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Most recent check (maintained when checks are saved)'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -118,3 +126,32 @@ class APIAlert(models.Model):
         status = '🔴' if not self.is_resolved else '✅'
         return f"{status} {self.endpoint.name} - {self.alert_type}"
 
+
+
+class APICheckRollup(models.Model):
+    """
+    Hourly success/failure counters per endpoint.
+    Maintained when checks are saved so 24h statistics need no scan of APICheck.
+    """
+    endpoint = models.ForeignKey(
+        APIEndpoint,
+        on_delete=models.CASCADE,
+        related_name='check_rollups',
+        help_text='API endpoint the counters belong to'
+    )
+    hour = models.DateTimeField(help_text='Start of the hour (UTC)')
+    success_count = models.IntegerField(default=0, help_text='Successful checks in this hour')
+    failure_count = models.IntegerField(default=0, help_text='Failed checks in this hour')
+    
+    class Meta:
+        ordering = ['-hour']
+        unique_together = [('endpoint', 'hour')]
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+        verbose_name = 'API Check Rollup'
+        verbose_name_plural = 'API Check Rollups'
+        app_label = 'api_monitoring'
+    
+    def __str__(self):
+        return f"{self.endpoint.name} - {self.hour} ({self.success_count} ok / {self.failure_count} failed)"
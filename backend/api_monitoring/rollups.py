@@ -0,0 +1,102 @@
+"""
+Rolling 24h success/failure counters for API monitoring.
+
+Checks are counted into hourly APICheckRollup buckets as they are saved, so
+the 24h statistics sum at most 24 rows per endpoint instead of scanning
+APICheck. The window is hour-granular: it covers the current hour and the
+23 full hours before it.
+"""
+
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+from .models import APICheckRollup
+
+
+WINDOW_HOURS = 24
+
+# Buckets are kept a little longer than the window they feed
+ROLLUP_RETENTION_HOURS = 48
+
+# Buckets per upsert statement (4 parameters each)
+UPSERT_BATCH_SIZE = 1000
+
+
+def truncate_to_hour(value):
+    """Start of the UTC hour containing value."""
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def record_check_rollups(checks):
+    """
+    Add saved checks to their endpoint's hourly counters with one upsert
+    per UPSERT_BATCH_SIZE buckets.
+
+    Args:
+        checks: Iterable of APICheck objects
+    """
+    counts = defaultdict(lambda: [0, 0])
+    for check in checks:
+        bucket = counts[(check.endpoint_id, truncate_to_hour(check.checked_at))]
+        bucket[0 if check.is_success else 1] += 1
+    if not counts:
+        return
+
+    table = connection.ops.quote_name(APICheckRollup._meta.db_table)
+    buckets = list(counts.items())
+    with connection.cursor() as cursor:
+        for offset in range(0, len(buckets), UPSERT_BATCH_SIZE):
+            batch = buckets[offset:offset + UPSERT_BATCH_SIZE]
+            params = []
+            for (endpoint_id, hour), (success_count, failure_count) in batch:
+                params.extend([endpoint_id, hour, success_count, failure_count])
+            cursor.execute(
+                f'INSERT INTO {table} (endpoint_id, hour, success_count, failure_count) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT (endpoint_id, hour) DO UPDATE SET '
+                f'success_count = {table}.success_count + EXCLUDED.success_count, '
+                f'failure_count = {table}.failure_count + EXCLUDED.failure_count',
+                params
+            )
+
+
+def get_window_start(now=None):
+    """First hour bucket inside the rolling 24h window."""
+    return truncate_to_hour(now or timezone.now()) - timedelta(hours=WINDOW_HOURS - 1)
+
+
+def get_recent_check_counts(endpoint=None, now=None):
+    """
+    Successful and failed checks in the rolling 24h window, in one query.
+
+    Args:
+        endpoint: Optional APIEndpoint to restrict the counts to
+
+    Returns:
+        dict with total, successful, failed
+    """
+    rollups = APICheckRollup.objects.filter(hour__gte=get_window_start(now))
+    if endpoint is not None:
+        rollups = rollups.filter(endpoint=endpoint)
+    totals = rollups.aggregate(successful=Sum('success_count'), failed=Sum('failure_count'))
+    successful = totals['successful'] or 0
+    failed = totals['failed'] or 0
+    return {
+        'total': successful + failed,
+        'successful': successful,
+        'failed': failed,
+    }
+
+
+def prune_check_rollups(now=None):
+    """
+    Delete hourly buckets older than ROLLUP_RETENTION_HOURS.
+
+    Returns:
+        Number of deleted buckets
+    """
+    cutoff = truncate_to_hour(now or timezone.now()) - timedelta(hours=ROLLUP_RETENTION_HOURS)
+    deleted, _ = APICheckRollup.objects.filter(hour__lt=cutoff).delete()
+    return deleted
@@ -22,7 +22,7 @@ class APIEndpointSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'last_check_status', 'context']
     
     def get_last_check_status(self, obj):
-        last_check = obj.checks.order_by('-checked_at').first()
+        last_check = obj.last_check
         if last_check:
             return {
                 'status_code': last_check.status_code,
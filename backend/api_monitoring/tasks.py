@@ -0,0 +1,80 @@
+"""
+Celery tasks for scheduled API endpoint checks.
+"""
+
+import logging
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from .models import APIEndpoint
+from .rollups import prune_check_rollups
+from .utils import test_api_endpoints
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+# Try to import Celery, fallback to no-op if not available
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    # Celery not installed - create a dummy decorator
+    CELERY_AVAILABLE = False
+    def shared_task(*args, **kwargs):
+        def decorator(func):
+            # Return function unchanged if Celery not available
+            return func
+        return decorator
+    logger.warning('Celery not available. API endpoint checks will not run automatically.')
+
+
+def get_due_endpoints(now=None):
+    """
+    Active endpoints whose check_interval_minutes has elapsed since their last check.
+    """
+    now = now or timezone.now()
+    endpoints = APIEndpoint.objects.filter(is_active=True).annotate(
+        last_checked_at=F('last_check__checked_at')
+    )
+    return [
+        endpoint for endpoint in endpoints
+        if endpoint.last_checked_at is None
+        or endpoint.last_checked_at <= now - timedelta(minutes=endpoint.check_interval_minutes)
+    ]
+
+
+@shared_task(name='api_monitoring.tasks.check_api_endpoints')
+def check_api_endpoints():
+    """
+    Check all active API endpoints that are due for checking.
+    Runs every minute via Celery Beat.
+    
+    Due endpoints are tested concurrently and their APICheck/APIAlert rows
+    are written in bulk. Expired 24h rollup buckets are pruned on each run.
+    """
+    logger.info('[CheckAPIEndpoints] Starting API endpoint checks')
+    
+    prune_check_rollups()
+    
+    endpoints = get_due_endpoints()
+    if not endpoints:
+        logger.info('[CheckAPIEndpoints] No endpoints to check')
+        return {
+            'status': 'success',
+            'endpoints_checked': 0,
+            'endpoints_ok': 0,
+            'endpoints_failed': 0
+        }
+    
+    logger.info(f'[CheckAPIEndpoints] Checking {len(endpoints)} endpoints')
+    checks = test_api_endpoints(endpoints)
+    endpoints_ok = sum(1 for check in checks if check.is_success)
+    
+    result = {
+        'status': 'success',
+        'endpoints_checked': len(checks),
+        'endpoints_ok': endpoints_ok,
+        'endpoints_failed': len(checks) - endpoints_ok
+    }
+    
+    logger.info(f'[CheckAPIEndpoints] Completed: {result}')
+    return result
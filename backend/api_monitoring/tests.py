@@ -0,0 +1,151 @@
+"""
+Tests for api_monitoring app
+"""
+import time
+import pytest
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api_monitoring import utils
+from api_monitoring.executor import APIRequestExecutor
+from api_monitoring.models import APIEndpoint, APICheck, APIAlert, APICheckRollup
+from api_monitoring.rollups import get_recent_check_counts, prune_check_rollups
+
+
+def make_result(status_code, expected=200, error_message=None):
+    return {
+        'status_code': status_code,
+        'response_time_ms': 42.0,
+        'is_success': status_code == expected,
+        'response_body': '{}' if status_code else None,
+        'error_message': error_message,
+        'checked_at': timezone.now(),
+    }
+
+
+def create_endpoints(count, **fields):
+    APIEndpoint.objects.bulk_create([
+        APIEndpoint(name=f'Endpoint {index}', url=f'https://api.example.com/v1/item-{index}/', **fields)
+        for index in range(count)
+    ])
+    return list(APIEndpoint.objects.order_by('id'))
+
+
+class TestRequestExecutor:
+    """Test the concurrent request executor"""
+    
+    def test_results_in_order_and_concurrent(self):
+        """Test that results keep input order and latency is the slowest request, not the sum"""
+        def slow_echo(item, session):
+            time.sleep(0.3 if item == 0 else 0.1)
+            return item
+        
+        started = time.monotonic()
+        with APIRequestExecutor(max_workers=8) as executor:
+            results = executor.map(slow_echo, range(8), url_for=lambda item: 'https://api.example.com/')
+        elapsed = time.monotonic() - started
+        
+        assert results == list(range(8))
+        assert elapsed < 0.8
+    
+    def test_one_session_per_origin(self):
+        """Test that requests to the same origin share a pooled session"""
+        with APIRequestExecutor() as executor:
+            first = executor.session_for('https://api.example.com/a/')
+            second = executor.session_for('https://API.example.com/b/?x=1')
+            other = executor.session_for('http://api.example.com/a/')
+        assert first is second
+        assert first is not other
+
+
+@pytest.mark.django_db
+class TestBulkEndpointResults:
+    """Test bulk persistence of endpoint test results"""
+    
+    def test_checks_and_alerts_in_constant_queries(self):
+        """Test that checks, alerts, last_check pointers and rollups are written in bulk"""
+        endpoints = create_endpoints(30)
+        endpoint_results = [
+            (endpoint, make_result(200 if index % 3 else 500))
+            for index, endpoint in enumerate(endpoints)
+        ]
+        endpoint_results[1] = (endpoints[1], make_result(None, error_message='Request timeout after 10s'))
+        
+        with CaptureQueriesContext(connection) as queries:
+            checks = utils.save_endpoint_results(endpoint_results)
+        
+        assert len(queries) <= 6
+        assert [check.endpoint_id for check in checks] == [endpoint.id for endpoint in endpoints]
+        assert APIEndpoint.objects.get(id=endpoints[5].id).last_check_id == checks[5].id
+        assert APICheck.objects.count() == 30
+        assert APIAlert.objects.filter(alert_type='unexpected_status').count() == 10
+        assert APIAlert.objects.get(endpoint=endpoints[1]).alert_type == 'timeout'
+    
+    def test_multiple_endpoints_view_keeps_request_order(self, admin_user, monkeypatch):
+        """Test that test-multiple returns results in the order of endpoint_ids"""
+        endpoints = create_endpoints(3)
+        monkeypatch.setattr(
+            utils, 'perform_endpoint_request',
+            lambda endpoint, session=None: make_result(200 if endpoint.id != endpoints[1].id else 503)
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        endpoint_ids = [endpoints[2].id, 999999, endpoints[0].id, endpoints[1].id]
+        
+        response = client.post('/api/admin-tools/endpoints/test-multiple/', {'endpoint_ids': endpoint_ids}, format='json')
+        
+        assert response.status_code == 200
+        results = response.data['results']
+        assert [result['endpoint_id'] for result in results] == endpoint_ids
+        assert results[1]['error'] == 'Endpoint not found'
+        assert results[0]['check']['is_success'] is True
+        assert results[3]['check']['is_success'] is False
+        assert APIAlert.objects.filter(endpoint=endpoints[1]).count() == 1
+
+
+@pytest.mark.django_db
+class TestMonitoringStats:
+    """Test last_check pointers and 24h rollup counters behind the stats endpoint"""
+    
+    def _stats_queries(self, admin_user, count):
+        APIEndpoint.objects.all().delete()
+        endpoints = create_endpoints(count)
+        utils.save_endpoint_results([
+            (endpoint, make_result(200 if index % 4 else 500))
+            for index, endpoint in enumerate(endpoints)
+        ])
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/admin-tools/stats/')
+        
+        assert response.status_code == 200
+        assert response.data['active_endpoints'] == count
+        assert response.data['recent_checks_24h']['total'] == count
+        assert response.data['recent_checks_24h']['failed'] == (count + 3) // 4
+        assert response.data['active_alerts'] == (count + 3) // 4
+        assert all(entry['last_check'] for entry in response.data['endpoints'])
+        return len(queries)
+    
+    def test_stats_queries_at_1000_endpoints(self, admin_user):
+        """Test that the stats endpoint runs three queries regardless of endpoint count"""
+        small = self._stats_queries(admin_user, 5)
+        large = self._stats_queries(admin_user, 1000)
+        assert small == large == 3
+    
+    def test_rolling_window_and_pruning(self):
+        """Test that rollup counters accumulate per hour and drop out of the window"""
+        (endpoint,) = create_endpoints(1)
+        now = timezone.now()
+        old = make_result(500)
+        old['checked_at'] = now - timedelta(hours=30)
+        utils.save_endpoint_results([(endpoint, make_result(200)), (endpoint, make_result(500)), (endpoint, old)])
+        
+        assert get_recent_check_counts(endpoint=endpoint, now=now) == {'total': 2, 'successful': 1, 'failed': 1}
+        assert APICheckRollup.objects.filter(endpoint=endpoint).count() == 2
+        
+        assert prune_check_rollups(now=now + timedelta(hours=20)) == 1
+        assert get_recent_check_counts(now=now + timedelta(hours=30)) == {'total': 0, 'successful': 0, 'failed': 0}
@@ -5,8 +5,11 @@ Utility functions for API monitoring
 import requests
 import time
 from urllib.parse import urlparse
+from django.db import transaction
 from django.utils import timezone
+from .executor import APIRequestExecutor
 from .models import APIEndpoint, APICheck, APIAlert
+from .rollups import record_check_rollups
 
 
 def extract_path_from_url(url: str) -> str:
@@ -85,11 +88,16 @@ def detect_context_from_url(url: str) -> str:
     return "API Endpoint"
 
 
-def test_api_endpoint(endpoint: APIEndpoint) -> APICheck:
+def perform_endpoint_request(endpoint: APIEndpoint, session=None) -> dict:
     """
-    Test an API endpoint and save the result.
+    Send the configured request for an endpoint (no database writes).
     
-    Returns APICheck object with the result.
+    Args:
+        endpoint: APIEndpoint to test
+        session: Optional requests.Session to reuse pooled connections
+    
+    Returns dict with status_code, response_time_ms, is_success, response_body,
+    error_message and checked_at.
     """
     start_time = time.time()
     status_code = None
@@ -118,7 +126,8 @@ def test_api_endpoint(endpoint: APIEndpoint) -> APICheck:
                 headers['Content-Type'] = 'application/json'
         
         # Make request
-        response = requests.request(**request_kwargs)
+        http = session if session is not None else requests
+        response = http.request(**request_kwargs)
         status_code = response.status_code
         response_time_ms = (time.time() - start_time) * 1000
         
@@ -144,31 +153,98 @@ def test_api_endpoint(endpoint: APIEndpoint) -> APICheck:
         error_message = str(e)
         is_success = False
     
-    # Create check record
-    check = APICheck.objects.create(
-        endpoint=endpoint,
-        status_code=status_code,
-        response_time_ms=response_time_ms,
-        is_success=is_success,
-        response_body=response_body,
-        error_message=error_message,
-        checked_at=timezone.now()
-    )
+    return {
+        'status_code': status_code,
+        'response_time_ms': response_time_ms,
+        'is_success': is_success,
+        'response_body': response_body,
+        'error_message': error_message,
+        'checked_at': timezone.now(),
+    }
+
+
+def get_alert_type(endpoint: APIEndpoint, result: dict) -> str:
+    """
+    Classify a failed request result as an APIAlert alert_type.
+    """
+    status_code = result['status_code']
+    if status_code and status_code != endpoint.expected_status_code:
+        return 'unexpected_status'
+    return 'timeout' if 'timeout' in (result['error_message'] or '').lower() else 'down'
+
+
+def save_endpoint_results(endpoint_results: list) -> list:
+    """
+    Persist request results as APICheck rows, plus an APIAlert for each failure.
+    
+    Uses one bulk_create per model regardless of the number of endpoints,
+    and keeps each endpoint's last_check pointer and 24h rollup counters
+    up to date.
+    
+    Args:
+        endpoint_results: list of (APIEndpoint, result dict) tuples
+    
+    Returns list of saved APICheck objects, in the same order.
+    """
+    checks = [
+        APICheck(endpoint=endpoint, **result)
+        for endpoint, result in endpoint_results
+    ]
+    if not checks:
+        return []
     
-    # Create alert if failed
-    if not is_success:
-        alert_type = 'timeout' if 'timeout' in (error_message or '').lower() else 'down'
-        if status_code and status_code != endpoint.expected_status_code:
-            alert_type = 'unexpected_status'
+    with transaction.atomic():
+        APICheck.objects.bulk_create(checks)
+        
+        # Create alert if failed
+        alerts = [
+            APIAlert(
+                endpoint=endpoint,
+                api_check=check,
+                alert_type=get_alert_type(endpoint, result),
+                message=result['error_message'] or f'Status {result["status_code"]} (expected {endpoint.expected_status_code})'
+            )
+            for check, (endpoint, result) in zip(checks, endpoint_results)
+            if not result['is_success']
+        ]
+        if alerts:
+            APIAlert.objects.bulk_create(alerts)
         
-        APIAlert.objects.create(
-            endpoint=endpoint,
-            api_check=check,
-            alert_type=alert_type,
-            message=error_message or f'Status {status_code} (expected {endpoint.expected_status_code})'
-        )
+        # Point each endpoint at its newest check in this batch
+        endpoints = {}
+        for check, (endpoint, _) in zip(checks, endpoint_results):
+            latest = endpoints.get(endpoint.pk)
+            if latest is None or check.checked_at >= latest.last_check.checked_at:
+                endpoint.last_check = check
+                endpoints[endpoint.pk] = endpoint
+        APIEndpoint.objects.bulk_update(endpoints.values(), ['last_check'])
+        record_check_rollups(checks)
     
-    return check
+    return checks
+
+
+def test_api_endpoint(endpoint: APIEndpoint) -> APICheck:
+    """
+    Test an API endpoint and save the result.
+    
+    Returns APICheck object with the result.
+    """
+    return save_endpoint_results([(endpoint, perform_endpoint_request(endpoint))])[0]
+
+
+def test_api_endpoints(endpoints: list) -> list:
+    """
+    Test several API endpoints concurrently and save the results in bulk.
+    
+    Requests share one pooled session per origin; total latency is that of
+    the slowest endpoint rather than the sum of all of them.
+    
+    Returns list of APICheck objects, in the same order as endpoints.
+    """
+    endpoints = list(endpoints)
+    with APIRequestExecutor() as executor:
+        results = executor.map(perform_endpoint_request, endpoints, url_for=lambda endpoint: endpoint.url)
+    return save_endpoint_results(list(zip(endpoints, results)))
 
 
 def discover_api_endpoints(base_url: str) -> list:
@@ -207,7 +283,6 @@ def discover_api_endpoints(base_url: str) -> list:
         '/api/token/refresh/',  # POST but might respond to GET with error
     ]
     
-    discovered = []
     base_url = base_url.rstrip('/')
     
     # Ensure base_url has scheme (http/https)
@@ -218,69 +293,23 @@ def discover_api_endpoints(base_url: str) -> list:
         else:
             base_url = f'https://{base_url}'
     
-    def try_request(url, method='GET', data=None):
+    def try_request(target, session):
         """Try a request and return response info"""
-        try:
+        url, method = target
+        
+        def send(verify):
             if method == 'POST':
                 # For POST endpoints, send empty JSON to test if endpoint exists
                 # Most will return 400 (bad request) which means endpoint exists
-                response = requests.post(
-                    url, 
-                    json={}, 
-                    timeout=5, 
-                    allow_redirects=False, 
-                    verify=True
-                )
-                # 400, 401, 403, 405 all indicate endpoint exists (just wrong data/method)
-                # 404 means endpoint doesn't exist
-                found = response.status_code != 404
-                return {
-                    'url': url,
-                    'method': 'POST',
-                    'status_code': response.status_code,
-                    'found': found
-                }
-            else:
-                response = requests.get(url, timeout=5, allow_redirects=False, verify=True)
-                return {
-                    'url': url,
-                    'method': 'GET',
-                    'status_code': response.status_code,
-                    'found': True
-                }
-        except requests.exceptions.SSLError:
-            # Try without SSL verification (for dev environments)
+                return session.post(url, json={}, timeout=5, allow_redirects=False, verify=verify)
+            return session.get(url, timeout=5, allow_redirects=False, verify=verify)
+        
+        try:
             try:
-                if method == 'POST':
-                    response = requests.post(
-                        url, 
-                        json={}, 
-                        timeout=5, 
-                        allow_redirects=False, 
-                        verify=False
-                    )
-                    found = response.status_code != 404
-                    return {
-                        'url': url,
-                        'method': 'POST',
-                        'status_code': response.status_code,
-                        'found': found
-                    }
-                else:
-                    response = requests.get(url, timeout=5, allow_redirects=False, verify=False)
-                    return {
-                        'url': url,
-                        'method': 'GET',
-                        'status_code': response.status_code,
-                        'found': True
-                    }
-            except requests.exceptions.RequestException:
-                return {
-                    'url': url,
-                    'method': method,
-                    'status_code': None,
-                    'found': False
-                }
+                response = send(verify=True)
+            except requests.exceptions.SSLError:
+                # Try without SSL verification (for dev environments)
+                response = send(verify=False)
         except requests.exceptions.RequestException:
             return {
                 'url': url,
@@ -288,18 +317,25 @@ def discover_api_endpoints(base_url: str) -> list:
                 'status_code': None,
                 'found': False
             }
+        
+        # 400, 401, 403, 405 all indicate a POST endpoint exists (just wrong data/method)
+        # 404 means endpoint doesn't exist
+        return {
+            'url': url,
+            'method': method,
+            'status_code': response.status_code,
+            'found': response.status_code != 404 if method == 'POST' else True
+        }
     
-    # Try POST-only endpoints with POST method
-    for path in post_only_paths:
-        url = f"{base_url}{path}"
-        result = try_request(url, method='POST')
-        discovered.append(result)
+    # POST-only endpoints with POST method, then GET endpoints with GET method
+    targets = (
+        [(f"{base_url}{path}", 'POST') for path in post_only_paths]
+        + [(f"{base_url}{path}", 'GET') for path in get_paths]
+    )
     
-    # Try GET endpoints with GET method
-    for path in get_paths:
-        url = f"{base_url}{path}"
-        result = try_request(url, method='GET')
-        discovered.append(result)
+    # Probe all paths concurrently over one pooled session; results keep path order
+    with APIRequestExecutor() as executor:
+        discovered = executor.map(try_request, targets, url_for=lambda target: target[0])
     
     return discovered
 
@@ -10,7 +10,8 @@ from django.utils import timezone
 from django.db import models
 from datetime import timedelta
 from .models import APIEndpoint, APICheck, APIAlert
-from .utils import test_api_endpoint, discover_api_endpoints, extract_path_from_url, detect_context_from_url
+from .rollups import get_recent_check_counts
+from .utils import test_api_endpoint, test_api_endpoints, discover_api_endpoints, extract_path_from_url, detect_context_from_url
 from .serializers import APIEndpointSerializer, APICheckSerializer, APIAlertSerializer
 
 
@@ -19,7 +20,7 @@ from .serializers import APIEndpointSerializer, APICheckSerializer, APIAlertSeri
 def api_endpoints_list(request):
     """List all API endpoints or create a new one"""
     if request.method == 'GET':
-        endpoints = APIEndpoint.objects.all().order_by('-created_at')
+        endpoints = APIEndpoint.objects.select_related('last_check').order_by('-created_at')
         serializer = APIEndpointSerializer(endpoints, many=True)
         return Response(serializer.data)
     
@@ -65,14 +66,8 @@ def api_endpoint_detail(request, pk):
         )['avg_time'] or 0
         
         # Get last 24h statistics
-        from django.utils import timezone
-        from datetime import timedelta
-        checks_24h = endpoint.checks.filter(
-            checked_at__gte=timezone.now() - timedelta(hours=24)
-        )
-        successful_24h = checks_24h.filter(is_success=True).count()
-        failed_24h = checks_24h.filter(is_success=False).count()
-        success_rate_24h = (successful_24h / checks_24h.count() * 100) if checks_24h.count() > 0 else 0
+        checks_24h = get_recent_check_counts(endpoint=endpoint)
+        success_rate_24h = (checks_24h['successful'] / checks_24h['total'] * 100) if checks_24h['total'] > 0 else 0
         
         # Active alerts count
         active_alerts_count = endpoint.alerts.filter(is_resolved=False).count()
@@ -88,9 +83,9 @@ def api_endpoint_detail(request, pk):
                 'success_rate': round(success_rate, 2),
                 'avg_response_time_ms': round(avg_response_time, 2),
                 'checks_24h': {
-                    'total': checks_24h.count(),
-                    'successful': successful_24h,
-                    'failed': failed_24h,
+                    'total': checks_24h['total'],
+                    'successful': checks_24h['successful'],
+                    'failed': checks_24h['failed'],
                     'success_rate': round(success_rate_24h, 2)
                 },
                 'active_alerts': active_alerts_count
@@ -126,23 +121,34 @@ def test_endpoint(request, pk):
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def test_multiple_endpoints(request):
-    """Test multiple API endpoints"""
+    """Test multiple API endpoints concurrently; results keep the order of endpoint_ids"""
     endpoint_ids = request.data.get('endpoint_ids', [])
-    results = []
+    # Keyed by str(pk) so ids sent as strings still match
+    endpoints_by_id = {
+        str(pk): endpoint
+        for pk, endpoint in APIEndpoint.objects.in_bulk(endpoint_ids).items()
+    }
+    
+    # Each distinct endpoint is tested once, even if it is listed several times
+    endpoints = list(endpoints_by_id.values())
+    checks_by_id = {
+        check.endpoint_id: check
+        for check in test_api_endpoints(endpoints)
+    }
     
+    results = []
     for endpoint_id in endpoint_ids:
-        try:
-            endpoint = APIEndpoint.objects.get(pk=endpoint_id)
-            check = test_api_endpoint(endpoint)
-            results.append({
-                'endpoint_id': endpoint_id,
-                'check': APICheckSerializer(check).data
-            })
-        except APIEndpoint.DoesNotExist:
+        endpoint = endpoints_by_id.get(str(endpoint_id))
+        if endpoint is None:
             results.append({
                 'endpoint_id': endpoint_id,
                 'error': 'Endpoint not found'
             })
+            continue
+        results.append({
+            'endpoint_id': endpoint_id,
+            'check': APICheckSerializer(checks_by_id[endpoint.pk]).data
+        })
     
     return Response({'results': results})
 
@@ -273,22 +279,25 @@ def resolve_alert(request, pk):
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def api_monitoring_stats(request):
-    """Get overall API monitoring statistics"""
-    total_endpoints = APIEndpoint.objects.count()
-    active_endpoints = APIEndpoint.objects.filter(is_active=True).count()
+    """
+    Get overall API monitoring statistics.
     
-    recent_checks = APICheck.objects.filter(
-        checked_at__gte=timezone.now() - timezone.timedelta(hours=24)
-    )
-    successful_checks = recent_checks.filter(is_success=True).count()
-    failed_checks = recent_checks.filter(is_success=False).count()
+    Served in three queries regardless of endpoint count: endpoints with
+    their last_check pointer, the 24h rollup counters, and open alerts.
+    """
+    endpoints = list(APIEndpoint.objects.select_related('last_check').order_by('name'))
+    active_endpoints = [endpoint for endpoint in endpoints if endpoint.is_active]
     
+    recent_checks = get_recent_check_counts()
     active_alerts = APIAlert.objects.filter(is_resolved=False).count()
     
-    # Get latest check for each endpoint
+    # Latest check for each endpoint
     endpoints_with_status = []
-    for endpoint in APIEndpoint.objects.filter(is_active=True):
-        last_check = endpoint.checks.order_by('-checked_at').first()
+    for endpoint in active_endpoints:
+        last_check = endpoint.last_check
+        if last_check:
+            # The serializer reads endpoint name/url through the check
+            last_check.endpoint = endpoint
         endpoints_with_status.append({
             'id': endpoint.id,
             'name': endpoint.name,
@@ -297,15 +306,14 @@ def api_monitoring_stats(request):
         })
     
     return Response({
-        'total_endpoints': total_endpoints,
-        'active_endpoints': active_endpoints,
+        'total_endpoints': len(endpoints),
+        'active_endpoints': len(active_endpoints),
         'recent_checks_24h': {
-            'total': recent_checks.count(),
-            'successful': successful_checks,
-            'failed': failed_checks,
-            'success_rate': (successful_checks / recent_checks.count() * 100) if recent_checks.count() > 0 else 0
+            'total': recent_checks['total'],
+            'successful': recent_checks['successful'],
+            'failed': recent_checks['failed'],
+            'success_rate': (recent_checks['successful'] / recent_checks['total'] * 100) if recent_checks['total'] > 0 else 0
         },
         'active_alerts': active_alerts,
         'endpoints': endpoints_with_status
     })
-
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ComplianceControlsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'compliance_controls'
+
+    def ready(self):
+        from .signals import connect_index_signals
+        connect_index_signals()
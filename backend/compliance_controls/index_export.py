@@ -0,0 +1,601 @@
+"""
+Export of compliance data to the JSONL file behind compliance_chat.
+
+Records are grouped by owner: a framework, control (with its evidence
+requirements), evidence item, policy (with its versions), audit (with its
+findings) or report. A state file next to the export
+(``compliance_index.jsonl.state.json``) keeps, per owner in file order, a hash
+of its lines and their count, plus the time of the last export.
+
+An incremental export only rebuilds owners that changed since then (updated_at
+or created_at watermarks, owners passed in by the change signals, and owners
+added or deleted), compares their hashes and, if anything differs, writes a
+compacted copy of the file (unchanged owners are copied verbatim) that
+replaces the old one with an atomic rename. Querysets are read with
+``.iterator(chunk_size=...)``, so memory does not grow with the tenant.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from compliance_frameworks.models import ComplianceFramework
+from compliance_controls.models import ComplianceControl
+from compliance_evidence.models import ComplianceEvidence
+from compliance_policies.models import CompliancePolicy
+from compliance_audits.models import ComplianceAudit
+from compliance_reports.models import ComplianceReport
+
+logger = logging.getLogger(__name__)
+
+
+STATE_VERSION = 1
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_TEXT = 4000
+
+# Watermark lookups are re-checked this far back, for rows saved by
+# transactions that committed after the previous export read them
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Record type -> key in the export counts
+COUNT_KEYS = {
+    "framework": "frameworks",
+    "control": "controls",
+    "evidence_requirement": "evidence_requirements",
+    "evidence": "evidence",
+    "policy": "policies",
+    "policy_version": "policy_versions",
+    "audit": "audits",
+    "audit_finding": "findings",
+    "report": "reports",
+}
+
+
+def get_default_output_path() -> Path:
+    return Path(settings.BASE_DIR) / "exports" / "compliance_index.jsonl"
+
+
+def get_state_path(output_file: Path) -> Path:
+    return output_file.with_name(f"{output_file.name}.state.json")
+
+
+def truncate_text(value: str, limit: int) -> str:
+    if not value:
+        return ""
+    if len(value) <= limit:
+        return value
+    return value[: limit - 1] + "…"
+
+
+def model_has_org(model) -> bool:
+    return any(field.name == "organization_id" for field in model._meta.fields)
+
+
+def filter_by_org(qs, model, org_id):
+    if not org_id or not model_has_org(model):
+        return qs
+    return qs.filter(organization_id=org_id)
+
+
+def _org(value):
+    return str(value) if value else None
+
+
+def framework_records(fw, max_text):
+    text = "\n".join(
+        [
+            f"Framework: {fw.name}",
+            f"Code: {fw.code}",
+            f"Category: {fw.category}",
+            f"Status: {fw.status}",
+            f"Enabled: {fw.enabled}",
+            f"Description: {fw.description or ''}",
+            f"Compliance score: {fw.compliance_score}",
+            f"Controls: total={fw.total_controls}, pass={fw.passing_controls}, fail={fw.failing_controls}, not_evaluated={fw.not_evaluated_controls}",
+            f"Last evaluated: {fw.last_evaluated or ''}",
+            f"Next audit date: {fw.next_audit_date or ''}",
+        ]
+    )
+    yield {
+        "type": "framework",
+        "id": str(fw.id),
+        "title": f"{fw.name} ({fw.code})",
+        "text": truncate_text(text, max_text),
+        "metadata": {
+            "code": fw.code,
+            "category": fw.category,
+            "status": fw.status,
+            "enabled": fw.enabled,
+            "organization_id": _org(fw.organization_id),
+        },
+    }
+
+
+def control_records(control, max_text):
+    frameworks_list = [mapping.framework_name for mapping in control.framework_mappings.all()]
+    requirements = list(control.evidence_requirements.all())
+    requirement_summaries = [
+        f"{req.evidence_type} ({req.source_app or 'Unknown'}) - {req.description or ''}".strip()
+        for req in requirements
+    ]
+    text = "\n".join(
+        [
+            f"Control: {control.control_id} - {control.name}",
+            f"Description: {control.description}",
+            f"Category: {control.category or ''}",
+            f"Type: {control.control_type}",
+            f"Severity: {control.severity}",
+            f"Status: {control.status}",
+            f"Evaluation method: {control.evaluation_method}",
+            f"Frequency: {control.frequency}",
+            f"Failure reason: {control.failure_reason or ''}",
+            f"Recommendations: {', '.join(control.fix_recommendations or [])}",
+            f"Frameworks: {', '.join(frameworks_list)}",
+            f"Evidence requirements: {', '.join(requirement_summaries)}",
+        ]
+    )
+    yield {
+        "type": "control",
+        "id": str(control.id),
+        "title": f"{control.control_id} - {control.name}",
+        "text": truncate_text(text, max_text),
+        "metadata": {
+            "control_id": control.control_id,
+            "status": control.status,
+            "severity": control.severity,
+            "frameworks": frameworks_list,
+            "organization_id": _org(control.organization_id),
+        },
+    }
+
+    for req in requirements:
+        req_text = "\n".join(
+            [
+                f"Control: {control.control_id} - {control.name}",
+                f"Evidence type: {req.evidence_type}",
+                f"Source app: {req.source_app or ''}",
+                f"Collection method: {req.collection_method or ''}",
+                f"Evidence category: {req.evidence_category or ''}",
+                f"Freshness (days): {req.freshness_days}",
+                f"Required: {req.required}",
+                f"Description: {req.description or ''}",
+            ]
+        )
+        yield {
+            "type": "evidence_requirement",
+            "id": str(req.id),
+            "title": f"{control.control_id} evidence requirement",
+            "text": truncate_text(req_text, max_text),
+            "metadata": {
+                "control_id": control.control_id,
+                "evidence_type": req.evidence_type,
+                "collection_method": req.collection_method,
+                "evidence_category": req.evidence_category,
+                "source_app": req.source_app,
+                "organization_id": _org(req.organization_id),
+            },
+        }
+
+
+def evidence_records(evidence, max_text):
+    mappings = list(evidence.control_mappings.all())
+    controls_list = [mapping.control_name for mapping in mappings]
+    frameworks_list = [mapping.framework_name for mapping in mappings]
+    text = "\n".join(
+        [
+            f"Evidence: {evidence.evidence_id} - {evidence.name}",
+            f"Description: {evidence.description or ''}",
+            f"Source: {evidence.source} / {evidence.source_type} / {evidence.source_name}",
+            f"Status: {evidence.status}",
+            f"Category: {evidence.category or ''}",
+            f"Tags: {', '.join(evidence.tags or [])}",
+            f"Controls: {', '.join(controls_list)}",
+            f"Frameworks: {', '.join(frameworks_list)}",
+            f"Content: {evidence.content or ''}",
+        ]
+    )
+    yield {
+        "type": "evidence",
+        "id": str(evidence.id),
+        "title": f"{evidence.evidence_id} - {evidence.name}",
+        "text": truncate_text(text, max_text),
+        "metadata": {
+            "evidence_id": evidence.evidence_id,
+            "source": evidence.source,
+            "source_type": evidence.source_type,
+            "status": evidence.status,
+            "file_url": evidence.file_url,
+            "organization_id": _org(evidence.organization_id),
+        },
+    }
+
+
+def policy_records(policy, max_text):
+    text = "\n".join(
+        [
+            f"Policy: {policy.policy_id} - {policy.name}",
+            f"Description: {policy.description or ''}",
+            f"Type: {policy.type} ({policy.category or ''})",
+            f"Status: {policy.status} / Approval: {policy.approval_status}",
+            f"Version: {policy.version}",
+            f"Summary: {policy.summary or ''}",
+            f"Content: {policy.content or ''}",
+        ]
+    )
+    yield {
+        "type": "policy",
+        "id": str(policy.id),
+        "title": f"{policy.policy_id} - {policy.name}",
+        "text": truncate_text(text, max_text),
+        "metadata": {
+            "policy_id": policy.policy_id,
+            "type": policy.type,
+            "status": policy.status,
+            "approval_status": policy.approval_status,
+            "organization_id": _org(policy.organization_id),
+        },
+    }
+
+    for version in policy.versions.all():
+        version_text = "\n".join(
+            [
+                f"Policy: {policy.policy_id} - {policy.name}",
+                f"Version: {version.version}",
+                f"Summary: {version.summary or ''}",
+                f"Changes: {version.changes or ''}",
+                f"Content: {version.content or ''}",
+            ]
+        )
+        yield {
+            "type": "policy_version",
+            "id": str(version.id),
+            "title": f"{policy.policy_id} v{version.version}",
+            "text": truncate_text(version_text, max_text),
+            "metadata": {
+                "policy_id": policy.policy_id,
+                "version": version.version,
+                "organization_id": _org(policy.organization_id),
+            },
+        }
+
+
+def audit_records(audit, max_text):
+    text = "\n".join(
+        [
+            f"Audit: {audit.audit_id} - {audit.name}",
+            f"Description: {audit.description or ''}",
+            f"Type: {audit.type}",
+            f"Status: {audit.status}",
+            f"Summary: {audit.summary or ''}",
+            f"Conclusion: {audit.conclusion or ''}",
+            f"Controls: total={audit.total_controls}, pass={audit.controls_passed}, fail={audit.controls_failed}, partial={audit.controls_partial}, not_evaluated={audit.controls_not_evaluated}",
+            f"Findings: {audit.findings_count} (critical={audit.critical_findings}, high={audit.high_findings}, medium={audit.medium_findings}, low={audit.low_findings})",
+        ]
+    )
+    yield {
+        "type": "audit",
+        "id": str(audit.id),
+        "title": f"{audit.audit_id} - {audit.name}",
+        "text": truncate_text(text, max_text),
+        "metadata": {
+            "audit_id": audit.audit_id,
+            "type": audit.type,
+            "status": audit.status,
+            "organization_id": _org(audit.organization_id),
+        },
+    }
+
+    for finding in audit.findings.all():
+        finding_text = "\n".join(
+            [
+                f"Audit: {audit.audit_id} - {audit.name}",
+                f"Finding: {finding.finding_id} - {finding.title}",
+                f"Severity: {finding.severity}",
+                f"Status: {finding.status}",
+                f"Description: {finding.description}",
+                f"Remediation: {finding.remediation_plan or ''}",
+                f"Control: {finding.control_name or ''}",
+                f"Framework: {finding.framework_name or ''}",
+            ]
+        )
+        yield {
+            "type": "audit_finding",
+            "id": str(finding.id),
+            "title": f"{finding.finding_id} - {finding.title}",
+            "text": truncate_text(finding_text, max_text),
+            "metadata": {
+                "audit_id": audit.audit_id,
+                "severity": finding.severity,
+                "status": finding.status,
+                "organization_id": _org(audit.organization_id),
+            },
+        }
+
+
+def report_records(report, max_text):
+    text = "\n".join(
+        [
+            f"Report: {report.report_id} - {report.name}",
+            f"Description: {report.description or ''}",
+            f"Type: {report.type}",
+            f"Status: {report.status}",
+            f"View: {report.view}",
+            f"Summary: {json.dumps(report.summary, ensure_ascii=False)}",
+        ]
+    )
+    yield {
+        "type": "report",
+        "id": str(report.id),
+        "title": f"{report.report_id} - {report.name}",
+        "text": truncate_text(text, max_text),
+        "metadata": {
+            "report_id": report.report_id,
+            "type": report.type,
+            "status": report.status,
+            "organization_id": _org(report.organization_id),
+        },
+    }
+
+
+class IndexSource:
+    """
+    One kind of record owner.
+
+    Args:
+        name: Owner key prefix in the state file
+        model: Owner model
+        build: Callable(obj, max_text) yielding the owner's records
+        prefetch: Relations the records read
+        watermarks: Lookups whose value changes when the owner's records do
+            (on the owner or its children); rows past the last export's
+            watermark are re-exported
+    """
+
+    def __init__(self, name, model, build, prefetch=(), watermarks=("updated_at",)):
+        self.name = name
+        self.model = model
+        self.build = build
+        self.prefetch = list(prefetch)
+        self.watermarks = list(watermarks)
+
+    def queryset(self, org_id=None):
+        qs = self.model.objects.all()
+        if self.prefetch:
+            qs = qs.prefetch_related(*self.prefetch)
+        return filter_by_org(qs, self.model, org_id)
+
+    def pks(self, org_id=None):
+        """Unordered primary-key queryset (no prefetching) for change detection."""
+        return filter_by_org(self.model.objects.order_by(), self.model, org_id).values_list("pk", flat=True)
+
+    def changed_since(self, since):
+        condition = Q()
+        for lookup in self.watermarks:
+            condition |= Q(**{f"{lookup}__gte": since})
+        return condition
+
+    def key(self, pk):
+        return f"{self.name}:{pk}"
+
+
+# In export order
+INDEX_SOURCES = [
+    IndexSource("framework", ComplianceFramework, framework_records),
+    IndexSource(
+        "control", ComplianceControl, control_records,
+        prefetch=["evidence_requirements", "framework_mappings"],
+        watermarks=["updated_at", "evidence_requirements__updated_at", "framework_mappings__created_at"],
+    ),
+    # Evidence and its control mappings have no updated_at; edits arrive through the change signals
+    IndexSource(
+        "evidence", ComplianceEvidence, evidence_records,
+        prefetch=["control_mappings"],
+        watermarks=["created_at", "control_mappings__created_at"],
+    ),
+    IndexSource(
+        "policy", CompliancePolicy, policy_records,
+        prefetch=["versions"],
+        watermarks=["updated_at", "versions__created_at"],
+    ),
+    IndexSource(
+        "audit", ComplianceAudit, audit_records,
+        prefetch=["findings"],
+        watermarks=["updated_at", "findings__created_at"],
+    ),
+    IndexSource("report", ComplianceReport, report_records),
+]
+INDEX_SOURCES_BY_NAME = {source.name: source for source in INDEX_SOURCES}
+
+
+def _render(source, obj, max_text, counts):
+    """Serialized lines of one owner and a hash of them."""
+    lines = []
+    for record in source.build(obj, max_text):
+        lines.append((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        counts[COUNT_KEYS[record["type"]]] += 1
+    digest = hashlib.blake2b(b"".join(lines), digest_size=16).hexdigest()
+    return digest, lines
+
+
+def _lock_export(output_file):
+    """Serialize exports of the same file; the caller holds a transaction."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [zlib.crc32(f"compliance_index:{output_file}".encode())])
+
+
+def _load_state(output_file):
+    try:
+        with get_state_path(output_file).open("r", encoding="utf-8") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def _write_state(output_file, state):
+    state_path = get_state_path(output_file)
+    tmp_state = state_path.with_name(f"{state_path.name}.tmp")
+    with tmp_state.open("w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp_state, state_path)
+
+
+def _replace(output_file, tmp_file, state):
+    """Swap in the new export, then its state; a state left stale by a crash forces a full export."""
+    state["file_size"] = tmp_file.stat().st_size
+    os.replace(tmp_file, output_file)
+    _write_state(output_file, state)
+
+
+def _new_counts():
+    return {key: 0 for key in COUNT_KEYS.values()}
+
+
+def export_full(output_file: Path = None, org_id=None, max_text=DEFAULT_MAX_TEXT, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write every record and a new state file.
+
+    Returns:
+        dict with mode 'full' and per-type record counts
+    """
+    output_file = Path(output_file or get_default_output_path())
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    counts = _new_counts()
+    owners = {}
+
+    with transaction.atomic():
+        _lock_export(output_file)
+        started = timezone.now()
+        # Written next to the target and swapped in, so readers of the index
+        # (compliance_chat reloads it on change) never see a partial file
+        tmp_file = output_file.with_name(f"{output_file.name}.tmp")
+        with tmp_file.open("wb") as fh:
+            for source in INDEX_SOURCES:
+                for obj in source.queryset(org_id).iterator(chunk_size=chunk_size):
+                    digest, lines = _render(source, obj, max_text, counts)
+                    fh.writelines(lines)
+                    owners[source.key(obj.pk)] = [digest, len(lines)]
+
+        _replace(output_file, tmp_file, {
+            "version": STATE_VERSION,
+            "org_id": org_id,
+            "max_text": max_text,
+            "watermark": started.isoformat(),
+            "owners": owners,
+        })
+
+    logger.info(f"[ComplianceIndex] Full export of {len(owners)} owners to {output_file}")
+    return {"mode": "full", "counts": counts}
+
+
+def export_incremental(output_file: Path = None, org_id=None, max_text=DEFAULT_MAX_TEXT,
+                       chunk_size=DEFAULT_CHUNK_SIZE, changed=None):
+    """
+    Re-export owners that changed since the last export.
+
+    Falls back to export_full when there is no usable state (first run,
+    different org_id/max_text, or a file that no longer matches the state).
+
+    Args:
+        changed: Optional {source name: [pk, ...]} of owners known to have
+            changed, e.g. from the change signals
+
+    Returns:
+        dict with mode ('full', 'incremental' or 'unchanged'), per-type counts
+        of the rebuilt records and the number of owners written/removed
+    """
+    output_file = Path(output_file or get_default_output_path())
+    state = _load_state(output_file)
+    if (
+        state is None
+        or state.get("org_id") != org_id
+        or state.get("max_text") != max_text
+        or not output_file.exists()
+        or output_file.stat().st_size != state.get("file_size")
+    ):
+        return export_full(output_file, org_id=org_id, max_text=max_text, chunk_size=chunk_size)
+
+    changed = changed or {}
+    counts = _new_counts()
+
+    with transaction.atomic():
+        _lock_export(output_file)
+        # Re-read under the lock: another export may have just finished
+        state = _load_state(output_file) or state
+        owners = state["owners"]
+        started = timezone.now()
+        since = parse_datetime(state["watermark"]) - WATERMARK_OVERLAP
+
+        replacements = {}
+        removed = set()
+        for source in INDEX_SOURCES:
+            prefix = f"{source.name}:"
+            known = {key[len(prefix):] for key in owners if key.startswith(prefix)}
+            existing = {str(pk) for pk in source.pks(org_id).iterator(chunk_size=chunk_size)}
+            removed.update(source.key(pk) for pk in known - existing)
+
+            candidates = existing - known
+            candidates.update(str(pk) for pk in changed.get(source.name, []))
+            candidates.update(
+                str(pk) for pk in source.pks(org_id).filter(source.changed_since(since)).distinct()
+            )
+            candidates &= existing
+
+            qs = source.queryset(org_id)
+            candidates = sorted(candidates)
+            for start in range(0, len(candidates), chunk_size):
+                chunk = candidates[start:start + chunk_size]
+                for obj in qs.filter(pk__in=chunk).iterator(chunk_size=chunk_size):
+                    digest, lines = _render(source, obj, max_text, counts)
+                    key = source.key(obj.pk)
+                    if owners.get(key, [None])[0] != digest:
+                        replacements[key] = (digest, lines)
+
+        state["watermark"] = started.isoformat()
+        if not replacements and not removed:
+            _write_state(output_file, state)
+            return {"mode": "unchanged", "counts": _new_counts(), "updated": 0, "removed": 0}
+
+        updated = len(replacements)
+        # Compact: copy unchanged owners verbatim, write changed ones in place,
+        # drop removed ones and append new ones
+        new_owners = {}
+        tmp_file = output_file.with_name(f"{output_file.name}.tmp")
+        with output_file.open("rb") as old, tmp_file.open("wb") as fh:
+            for key, (digest, line_count) in owners.items():
+                old_lines = [old.readline() for _ in range(line_count)]
+                if key in removed:
+                    continue
+                if key in replacements:
+                    digest, lines = replacements.pop(key)
+                    fh.writelines(lines)
+                    new_owners[key] = [digest, len(lines)]
+                else:
+                    fh.writelines(old_lines)
+                    new_owners[key] = [digest, line_count]
+            for key, (digest, lines) in replacements.items():
+                fh.writelines(lines)
+                new_owners[key] = [digest, len(lines)]
+
+        state["owners"] = new_owners
+        _replace(output_file, tmp_file, state)
+
+    logger.info(
+        f"[ComplianceIndex] Incremental export to {output_file}: "
+        f"{sum(counts.values())} records rebuilt, {len(removed)} owners removed"
+    )
+    return {"mode": "incremental", "counts": counts, "updated": updated, "removed": len(removed)}
@@ -0,0 +1,143 @@
+"""
+Django management command to benchmark compliance_chat retrieval.
+
+Writes a synthetic compliance_index.jsonl (records shaped like the output of
+export_compliance_index, spread across several organizations) to a temporary
+file, builds the inverted index and reports build time and p50/p99 query
+latency. ``--linear`` also times the previous strategy (re-read the JSONL
+and substring-match every record on each question) for comparison.
+
+Usage:
+    python manage.py benchmark_compliance_chat
+    python manage.py benchmark_compliance_chat --records 100000 --queries 200 --linear
+"""
+
+import json
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from compliance_controls.search_index import ComplianceIndex, tokenize
+
+
+VOCABULARY = [
+    "access", "review", "encryption", "backup", "incident", "response", "vendor", "risk",
+    "assessment", "password", "policy", "logging", "monitoring", "change", "management",
+    "firewall", "vulnerability", "scanning", "training", "awareness", "retention", "privacy",
+    "audit", "evidence", "control", "approval", "onboarding", "offboarding", "availability",
+    "confidentiality", "integrity", "segregation", "duties", "recovery", "continuity",
+    "penetration", "test", "mfa", "sso", "key", "rotation", "asset", "inventory", "data",
+    "classification", "endpoint", "patching", "network", "segmentation", "soc2", "iso27001",
+    "hipaa", "gdpr", "pci", "quarterly", "annual", "remediation", "finding", "exception",
+]
+
+QUESTIONS = [
+    "Which controls cover quarterly access review?",
+    "Show evidence for encryption key rotation",
+    "What is our incident response policy?",
+    "vendor risk assessment findings",
+    "backup and recovery testing evidence",
+    "password policy mfa sso",
+    "open vulnerability scanning remediation",
+    "gdpr privacy data retention",
+]
+
+RECORD_TYPES = ["control", "evidence", "evidence_requirement", "policy", "audit_finding"]
+
+
+def _linear_search(path: Path, question: str, org_id: str | None, limit: int = 8):
+    """Previous strategy: parse every line and count substring hits per token."""
+    tokens = tokenize(question)
+    scored = []
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            record = json.loads(line)
+            record_org = (record.get("metadata") or {}).get("organization_id")
+            if org_id and record_org and record_org != org_id:
+                continue
+            lowered = f"{record.get('title', '')}\n{record.get('text', '')}".lower()
+            score = sum(1 for token in tokens if token in lowered)
+            if score > 0:
+                scored.append((score, record))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:limit]
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark compliance_chat retrieval (BM25 inverted index vs. linear JSONL scan)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=100000, help='Synthetic records (default: 100000)')
+        parser.add_argument('--orgs', type=int, default=20, help='Organizations to spread records over (default: 20)')
+        parser.add_argument('--words', type=int, default=120, help='Words per record text (default: 120)')
+        parser.add_argument('--queries', type=int, default=200, help='Questions to time (default: 200)')
+        parser.add_argument('--linear', action='store_true', help='Also time the previous linear scan')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        org_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(options['orgs'])]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'compliance_index.jsonl'
+            start = time.perf_counter()
+            self._write_records(path, rng, org_ids, options['records'], options['words'])
+            self.stdout.write(
+                f"records={options['records']}  size={path.stat().st_size / 1e6:.1f}MB  "
+                f"write={time.perf_counter() - start:.2f}s"
+            )
+
+            start = time.perf_counter()
+            index = ComplianceIndex.build(path)
+            self.stdout.write(
+                f"index    build={time.perf_counter() - start:.2f}s  terms={len(index.postings)}"
+            )
+
+            workload = [
+                (rng.choice(QUESTIONS), rng.choice(org_ids + [None]))
+                for _ in range(options['queries'])
+            ]
+            self._report('index', workload, lambda question, org_id: index.search(question, org_id, limit=8))
+            if options['linear']:
+                # The linear scan is orders of magnitude slower; time a sample
+                self._report(
+                    'linear', workload[:max(1, len(workload) // 10)],
+                    lambda question, org_id: _linear_search(path, question, org_id)
+                )
+
+    def _write_records(self, path, rng, org_ids, count, words):
+        with path.open('w', encoding='utf-8') as fh:
+            for number in range(count):
+                record_type = rng.choice(RECORD_TYPES)
+                # A share of records (frameworks, shared controls) belong to no organization
+                org_id = rng.choice(org_ids) if rng.random() > 0.1 else None
+                text = ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+                record = {
+                    'type': record_type,
+                    'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                    'title': f'{record_type.upper()}-{number} - {" ".join(rng.sample(VOCABULARY, 3))}',
+                    'text': text,
+                    'metadata': {'organization_id': org_id},
+                }
+                fh.write(json.dumps(record) + '\n')
+
+    def _report(self, mode, workload, search):
+        latencies = []
+        for question, org_id in workload:
+            start = time.perf_counter()
+            search(question, org_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f'{mode:<8} queries={len(latencies):>5}  p50={_percentile(latencies, 50):9.2f}ms  '
+            f'p99={_percentile(latencies, 99):9.2f}ms  mean={statistics.mean(latencies):9.2f}ms'
+        )
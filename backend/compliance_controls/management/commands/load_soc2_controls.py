@@ -6,6 +6,7 @@ import os
 from django.core.management.base import BaseCommand, CommandError
 from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
 from compliance_frameworks.models import ComplianceFramework
+from compliance_frameworks.rollups import rollup_frameworks, rollup_summaries
 
 
 class Command(BaseCommand):
@@ -177,21 +178,12 @@ class Command(BaseCommand):
 
         # Update framework metrics
         if not dry_run:
-            for framework in soc2_frameworks:
-                # Count controls for this framework
-                control_count = ComplianceControlFrameworkMapping.objects.filter(
-                    framework_id=framework.id
-                ).count()
-                
-                # Update framework metrics
-                framework.total_controls = control_count
-                framework.not_evaluated_controls = control_count
-                framework.passing_controls = 0
-                framework.failing_controls = 0
-                framework.save()
-                
+            # Counters and scores come from the controls' current statuses
+            rollup_frameworks([framework.id for framework in soc2_frameworks])
+            rollup_summaries()
+            for framework in soc2_frameworks.all():
                 self.stdout.write(
-                    self.style.SUCCESS(f'Updated {framework.name}: {control_count} controls')
+                    self.style.SUCCESS(f'Updated {framework.name}: {framework.total_controls} controls')
                 )
 
         # Summary
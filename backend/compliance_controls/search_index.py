@@ -0,0 +1,205 @@
+"""
+In-memory inverted index over exports/compliance_index.jsonl for compliance_chat.
+
+The JSONL file is read once into posting lists (token -> documents and term
+frequencies, split by organization) and queried with BM25. Only byte offsets
+are kept for the records themselves; the top-k matches are read back from the
+file when a question is answered. The index is rebuilt when the file's mtime
+or size changes.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Posting-list key for records without an organization; visible to every tenant
+SHARED_ORG = 0
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased alphanumeric tokens of at least 3 characters.
+
+    Used for both questions and indexed records so they match term for term.
+    """
+    tokens = []
+    for raw in text.lower().split():
+        cleaned = "".join(ch for ch in raw if ch.isalnum())
+        if len(cleaned) >= 3:
+            tokens.append(cleaned)
+    return tokens
+
+
+def get_index_path() -> Path:
+    return Path(settings.BASE_DIR) / "exports" / "compliance_index.jsonl"
+
+
+class ComplianceIndex:
+    """
+    BM25 inverted index built from one version of the compliance JSONL file.
+
+    Usage:
+        index = ComplianceIndex.build(path)
+        for score, record in index.search("access review evidence", org_id, limit=8):
+            ...
+    """
+
+    def __init__(self, path: Path, signature: tuple):
+        self.path = path
+        self.signature = signature
+        # token -> {org key -> (doc ids, term frequencies)}
+        self.postings: dict[str, dict[int, tuple[array, array]]] = {}
+        self.offsets = array("q")
+        # Per-record BM25 length normalisation, k1 * (1 - b + b * length / avg length)
+        self.norms = array("d")
+        self.org_keys: dict[str, int] = {}
+        self._file = None
+        self._file_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, path: Path) -> "ComplianceIndex":
+        # Keep the handle open: offsets stay valid for this version of the file
+        # even after the export replaces it
+        fh = path.open("rb")
+        stat = os.fstat(fh.fileno())
+        index = cls(path, (stat.st_mtime_ns, stat.st_size))
+        index._file = fh
+        doc_lengths = []
+        offset = 0
+        for line in index._file:
+            line_offset = offset
+            offset += len(line)
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if not isinstance(record, dict):
+                continue
+            doc_id = len(index.offsets)
+            index.offsets.append(line_offset)
+
+            record_org = (record.get("metadata") or {}).get("organization_id")
+            org_key = index.org_keys.setdefault(record_org, len(index.org_keys) + 1) if record_org else SHARED_ORG
+
+            tokens = tokenize(f"{record.get('title', '')}\n{record.get('text', '')}")
+            doc_lengths.append(len(tokens))
+
+            frequencies: dict[str, int] = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, frequency in frequencies.items():
+                by_org = index.postings.setdefault(token, {})
+                posting = by_org.get(org_key)
+                if posting is None:
+                    posting = by_org[org_key] = (array("I"), array("I"))
+                posting[0].append(doc_id)
+                posting[1].append(frequency)
+
+        avg_doc_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0
+        for length in doc_lengths:
+            relative_length = length / avg_doc_length if avg_doc_length else 0
+            index.norms.append(BM25_K1 * (1 - BM25_B + BM25_B * relative_length))
+        logger.info(f"[ComplianceIndex] Indexed {len(index.offsets)} records, {len(index.postings)} terms from {path}")
+        return index
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _read_record(self, doc_id: int) -> dict:
+        with self._file_lock:
+            self._file.seek(self.offsets[doc_id])
+            line = self._file.readline()
+        return json.loads(line)
+
+    def search(self, question: str, org_id: str | None = None, limit: int = 8) -> list[tuple[float, dict]]:
+        """
+        Top ``limit`` records for ``question`` by BM25 score, best first.
+
+        With ``org_id``, only that organization's records and records without an
+        organization are considered; without it, every record is.
+        """
+        count = len(self.offsets)
+        if not count:
+            return []
+        if org_id:
+            org_keys = [SHARED_ORG]
+            if org_id in self.org_keys:
+                org_keys.append(self.org_keys[org_id])
+        else:
+            org_keys = None
+
+        scores: dict[int, float] = {}
+        norms = self.norms
+        for token in dict.fromkeys(tokenize(question)):
+            by_org = self.postings.get(token)
+            if not by_org:
+                continue
+            document_frequency = sum(len(doc_ids) for doc_ids, _ in by_org.values())
+            idf = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+            postings = by_org.values() if org_keys is None else [by_org[key] for key in org_keys if key in by_org]
+            weight = idf * (BM25_K1 + 1)
+            for doc_ids, frequencies in postings:
+                for doc_id, frequency in zip(doc_ids, frequencies):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * frequency / (frequency + norms[doc_id])
+
+        # Ties keep file order, as the previous linear scan did
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, self._read_record(doc_id)) for doc_id, score in top]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_compliance_index(path: Path = None) -> ComplianceIndex | None:
+    """
+    Shared index for ``path`` (default: exports/compliance_index.jsonl), or None
+    if the file does not exist.
+
+    The file is stat'ed on every call and the index rebuilt when it changed.
+    While one thread rebuilds, other threads keep answering from the previous
+    index instead of waiting.
+    """
+    global _index
+    path = path or get_index_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    current = _index
+    if current is not None and current.path == path:
+        if current.signature == signature:
+            return current
+        if not _index_lock.acquire(blocking=False):
+            return current
+    else:
+        _index_lock.acquire()
+    try:
+        current = _index
+        if current is None or current.path != path or current.signature != signature:
+            try:
+                rebuilt = ComplianceIndex.build(path)
+            except FileNotFoundError:
+                return None
+            # The previous index (and its file handle) is released once the
+            # searches still using it finish
+            _index = rebuilt
+        return _index
+    finally:
+        _index_lock.release()
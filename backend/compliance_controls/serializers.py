@@ -1,6 +1,7 @@
 """
 Serializers for Compliance Controls
 """
+from django.db.models import Count
 from rest_framework import serializers
 from .models import ComplianceControl, ComplianceControlFrameworkMapping, ControlEvidenceRequirement
 
@@ -77,6 +78,14 @@ class ComplianceControlSerializer(serializers.ModelSerializer):
             'frameworks',
         ]
     
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Load everything the serializer reads in a constant number of queries"""
+        return queryset.select_related('evaluated_by', 'created_by').prefetch_related(
+            'framework_mappings',
+            'evidence_requirements',
+        )
+    
     def get_frameworks(self, obj):
         """Get list of frameworks this control belongs to"""
         return [
@@ -111,6 +120,16 @@ class ComplianceControlListSerializer(serializers.ModelSerializer):
             'evidence_requirements',  # Include evidence requirements
         ]
     
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Annotate framework_count and prefetch the mappings and requirements the serializer reads"""
+        return queryset.annotate(
+            framework_count=Count('framework_mappings', distinct=True),
+        ).prefetch_related(
+            'framework_mappings',
+            'evidence_requirements',
+        )
+    
     def get_frameworks(self, obj):
         """Get list of framework names and IDs"""
         return [
@@ -122,6 +141,9 @@ class ComplianceControlListSerializer(serializers.ModelSerializer):
         ]
     
     def get_framework_count(self, obj):
-        """Get count of frameworks"""
-        return obj.framework_mappings.count()
+        """Get count of frameworks (annotated by setup_queryset, else from the mappings)"""
+        count = getattr(obj, 'framework_count', None)
+        if count is None:
+            count = len(obj.framework_mappings.all())
+        return count
 
@@ -0,0 +1,88 @@
+"""
+Change signals that keep the compliance chat index fresh.
+
+Saves and deletes of the models that feed export_compliance_index mark the
+owning record (e.g. a control for one of its evidence requirements) as
+changed once the transaction commits. Changes are batched per process for
+COMPLIANCE_INDEX_REFRESH_DELAY_SECONDS, so a bulk load triggers one refresh
+instead of one per row.
+"""
+
+import logging
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+_timer = None
+
+
+def get_tracked_models():
+    """{model: (index source name, attribute holding the owner's pk)}"""
+    from compliance_audits.models import ComplianceAudit, ComplianceAuditFinding
+    from compliance_evidence.models import ComplianceEvidence, ComplianceEvidenceControlMapping
+    from compliance_frameworks.models import ComplianceFramework
+    from compliance_policies.models import CompliancePolicy, CompliancePolicyVersion
+    from compliance_reports.models import ComplianceReport
+    from .models import ComplianceControl, ComplianceControlFrameworkMapping, ControlEvidenceRequirement
+
+    return {
+        ComplianceFramework: ('framework', 'pk'),
+        ComplianceControl: ('control', 'pk'),
+        ControlEvidenceRequirement: ('control', 'control_id'),
+        ComplianceControlFrameworkMapping: ('control', 'control_id'),
+        ComplianceEvidence: ('evidence', 'pk'),
+        ComplianceEvidenceControlMapping: ('evidence', 'evidence_id'),
+        CompliancePolicy: ('policy', 'pk'),
+        CompliancePolicyVersion: ('policy', 'policy_id'),
+        ComplianceAudit: ('audit', 'pk'),
+        ComplianceAuditFinding: ('audit', 'audit_id'),
+        ComplianceReport: ('report', 'pk'),
+    }
+
+
+def _flush():
+    global _timer
+    with _pending_lock:
+        changed = {source: sorted(pks) for source, pks in _pending.items()}
+        _pending.clear()
+        _timer = None
+    if changed:
+        from .tasks import dispatch_index_refresh
+        try:
+            dispatch_index_refresh(changed)
+        except Exception as e:
+            logger.error(f"[ComplianceIndex] Error dispatching index refresh: {str(e)}")
+
+
+def mark_changed(source, pk):
+    """Queue one owner for the next batched index refresh."""
+    global _timer
+    with _pending_lock:
+        _pending.setdefault(source, set()).add(str(pk))
+        if _timer is None:
+            _timer = threading.Timer(getattr(settings, 'COMPLIANCE_INDEX_REFRESH_DELAY_SECONDS', 10), _flush)
+            _timer.start()
+
+
+def _make_handler(source, attname):
+    def handler(sender, instance, **kwargs):
+        if kwargs.get('raw') or not getattr(settings, 'COMPLIANCE_INDEX_AUTO_REFRESH', True):
+            return
+        pk = getattr(instance, attname)
+        if pk is not None:
+            transaction.on_commit(lambda: mark_changed(source, pk))
+    return handler
+
+
+def connect_index_signals():
+    for model, (source, attname) in get_tracked_models().items():
+        handler = _make_handler(source, attname)
+        dispatch_uid = f'compliance_index:{model._meta.label}'
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=dispatch_uid)
@@ -0,0 +1,54 @@
+"""
+Background refresh of the compliance chat index (exports/compliance_index.jsonl).
+
+Model changes are collected by compliance_controls.signals and handed to
+refresh_compliance_index in batches; the periodic run picks up changes that
+bypassed the signals (queryset.update(), raw SQL) through the updated_at
+watermarks.
+"""
+
+import logging
+import threading
+from django.conf import settings
+from .index_export import DEFAULT_CHUNK_SIZE, export_incremental
+
+logger = logging.getLogger(__name__)
+
+# Try to import Celery, fallback to no-op if not available
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    # Celery not installed - create a dummy decorator
+    CELERY_AVAILABLE = False
+    def shared_task(*args, **kwargs):
+        def decorator(func):
+            # Return function unchanged if Celery not available
+            return func
+        return decorator
+    logger.warning('Celery not available. Compliance index refreshes will run in background threads.')
+
+
+@shared_task(name='compliance_controls.tasks.refresh_compliance_index')
+def refresh_compliance_index(changed=None):
+    """
+    Incrementally re-export the compliance index.
+
+    Args:
+        changed: Optional {source name: [pk, ...]} of owners known to have changed
+    """
+    result = export_incremental(
+        changed=changed,
+        chunk_size=getattr(settings, 'COMPLIANCE_INDEX_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+    )
+    return {'status': 'success', **result}
+
+
+def dispatch_index_refresh(changed):
+    if CELERY_AVAILABLE:
+        try:
+            refresh_compliance_index.delay(changed)
+            return
+        except Exception as e:
+            logger.warning(f"[ComplianceIndex] Could not queue index refresh, running it in a thread: {str(e)}")
+    threading.Thread(target=refresh_compliance_index, args=(changed,), daemon=True).start()
@@ -1,3 +1,230 @@
-from django.test import TestCase
+import json
+import os
 
-# Create your tests here.
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from compliance_controls import signals
+from compliance_controls.index_export import export_full, export_incremental, get_state_path
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping, ControlEvidenceRequirement
+from compliance_controls.search_index import ComplianceIndex, get_compliance_index, tokenize
+from compliance_controls.serializers import ComplianceControlListSerializer
+from compliance_evidence.models import ComplianceEvidence, ComplianceEvidenceControlMapping
+from compliance_evidence.serializers import ComplianceEvidenceListSerializer
+from compliance_frameworks.models import ComplianceFramework
+from compliance_frameworks.serializers import ComplianceFrameworkSerializer
+
+
+def write_index(path, records):
+    with path.open("w", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record) + "\n")
+
+
+def record(title, text, org_id=None, record_type="control"):
+    return {"type": record_type, "id": title, "title": title, "text": text, "metadata": {"organization_id": org_id}}
+
+
+class TestComplianceSearchIndex:
+    def test_tokenize_matches_question_rules(self):
+        assert tokenize("Who owns CC6.1 access-review? (SOC 2)") == ["who", "owns", "cc61", "accessreview", "soc"]
+
+    def test_bm25_ranks_rarer_and_denser_terms_higher(self, tmp_path):
+        path = tmp_path / "compliance_index.jsonl"
+        write_index(path, [
+            record("Backup policy", "backup schedule and retention for production data"),
+            record("Encryption control", "encryption keys rotated yearly; encryption at rest for data"),
+            record("Access review", "quarterly access review of production data"),
+            "not a record",
+        ])
+        index = ComplianceIndex.build(path)
+
+        assert len(index) == 3
+        results = index.search("encryption of production data", limit=2)
+        assert [match["title"] for _, match in results] == ["Encryption control", "Access review"]
+        assert results[0][0] > results[1][0] > 0
+        assert index.search("nothing matches here") == []
+
+    def test_organization_filter_keeps_shared_records(self, tmp_path):
+        path = tmp_path / "compliance_index.jsonl"
+        write_index(path, [
+            record("Shared access control", "access review", org_id=None),
+            record("Org A access control", "access review", org_id="org-a"),
+            record("Org B access control", "access review", org_id="org-b"),
+        ])
+        index = ComplianceIndex.build(path)
+
+        titles = {match["title"] for _, match in index.search("access review", "org-a")}
+        assert titles == {"Shared access control", "Org A access control"}
+        assert {match["title"] for _, match in index.search("access review", "org-unknown")} == {"Shared access control"}
+        assert len(index.search("access review")) == 3
+
+    def test_index_reloads_when_file_changes(self, tmp_path):
+        path = tmp_path / "compliance_index.jsonl"
+        assert get_compliance_index(path) is None
+
+        write_index(path, [record("Backup policy", "backup schedule")])
+        first = get_compliance_index(path)
+        assert get_compliance_index(path) is first
+
+        replacement = tmp_path / "compliance_index.jsonl.tmp"
+        write_index(replacement, [record("Backup policy", "backup schedule"), record("Backup evidence", "backup logs")])
+        os.replace(replacement, path)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        second = get_compliance_index(path)
+        assert second is not first
+        assert len(second.search("backup")) == 2
+        # Searches still holding the previous index read from the old file
+        assert [match["title"] for _, match in first.search("backup")] == ["Backup policy"]
+
+
+def read_records(path):
+    with path.open("r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+@pytest.mark.django_db
+class TestIncrementalIndexExport:
+    @pytest.fixture
+    def data(self):
+        framework = ComplianceFramework.objects.create(name="SOC 2", code="SOC2", category="security")
+        control = ComplianceControl.objects.create(control_id="CC6.1", name="Logical access", description="Access control")
+        requirement = ControlEvidenceRequirement.objects.create(
+            control=control, evidence_type="dast", source_app="ZAP", description="Weekly DAST scan"
+        )
+        other = ComplianceControl.objects.create(control_id="CC7.1", name="Monitoring", description="System monitoring")
+        return framework, control, requirement, other
+
+    def test_unchanged_data_keeps_file(self, tmp_path, data):
+        path = tmp_path / "compliance_index.jsonl"
+        assert export_incremental(path)["mode"] == "full"
+        before = path.read_bytes()
+        mtime = path.stat().st_mtime_ns
+
+        assert export_incremental(path)["mode"] == "unchanged"
+        assert path.read_bytes() == before
+        assert path.stat().st_mtime_ns == mtime
+
+    def test_changed_owner_is_rewritten_in_place(self, tmp_path, data):
+        framework, control, requirement, other = data
+        path = tmp_path / "compliance_index.jsonl"
+        export_full(path)
+
+        requirement.description = "Daily DAST scan"
+        requirement.save()
+        framework.delete()
+        new_control = ComplianceControl.objects.create(control_id="CC8.1", name="Change management", description="Changes")
+
+        result = export_incremental(path, changed={"control": [str(control.id)]})
+        assert result["mode"] == "incremental"
+        assert result["removed"] == 1
+        assert result["updated"] == 2
+
+        records = read_records(path)
+        assert [record["id"] for record in records] == [
+            str(control.id), str(requirement.id), str(other.id), str(new_control.id)
+        ]
+        assert "Daily DAST scan" in records[1]["text"]
+
+        # Same content as a full export of the current data
+        full_path = tmp_path / "full.jsonl"
+        export_full(full_path)
+        assert sorted(path.read_bytes().splitlines()) == sorted(full_path.read_bytes().splitlines())
+
+    def test_stale_state_falls_back_to_full_export(self, tmp_path, data):
+        path = tmp_path / "compliance_index.jsonl"
+        export_full(path)
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write("{}\n")
+
+        assert export_incremental(path)["mode"] == "full"
+        assert json.loads(get_state_path(path).read_text())["file_size"] == path.stat().st_size
+
+    def test_signals_batch_changes_by_owner(self, monkeypatch, settings, django_capture_on_commit_callbacks, data):
+        framework, control, requirement, other = data
+        settings.COMPLIANCE_INDEX_REFRESH_DELAY_SECONDS = 60
+        framework_id = str(framework.id)
+        dispatched = []
+        monkeypatch.setattr("compliance_controls.tasks.dispatch_index_refresh", dispatched.append)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            requirement.save()
+            other.save()
+            framework.delete()
+        signals._timer.cancel()
+        signals._flush()
+
+        assert dispatched == [{
+            "control": sorted([str(control.id), str(other.id)]),
+            "framework": [framework_id],
+        }]
+
+
+@pytest.mark.django_db
+class TestSerializerQueryCounts:
+    """List serializers read prefetched data only, so query counts do not grow with the rows"""
+
+    @pytest.fixture
+    def catalog(self):
+        frameworks = ComplianceFramework.objects.bulk_create([
+            ComplianceFramework(name=f"Framework {i}", code=f"FW{i}", category="security") for i in range(20)
+        ])
+        controls = ComplianceControl.objects.bulk_create([
+            ComplianceControl(control_id=f"CTL-{i:04d}", name=f"Control {i}", description="Control") for i in range(1000)
+        ])
+        ComplianceControlFrameworkMapping.objects.bulk_create([
+            ComplianceControlFrameworkMapping(control=control, framework_id=framework.id, framework_name=framework.name)
+            for i, control in enumerate(controls)
+            for framework in (frameworks[i % 20], frameworks[(i + 1) % 20])
+        ])
+        ControlEvidenceRequirement.objects.bulk_create([
+            ControlEvidenceRequirement(control=control, evidence_type="dast", source_app="ZAP") for control in controls
+        ])
+        evidence = ComplianceEvidence.objects.bulk_create([
+            ComplianceEvidence(evidence_id=f"EV-{i:04d}", name=f"Evidence {i}", source="automated",
+                               source_type="dast", source_name="ZAP")
+            for i in range(200)
+        ])
+        ComplianceEvidenceControlMapping.objects.bulk_create([
+            ComplianceEvidenceControlMapping(evidence=item, control_id=control.id, control_name=control.name,
+                                             framework_id=frameworks[0].id, framework_name=frameworks[0].name)
+            for i, item in enumerate(evidence)
+            for control in controls[i * 3:i * 3 + 3]
+        ])
+        return frameworks, controls
+
+    def test_framework_list(self, catalog):
+        with CaptureQueriesContext(connection) as queries:
+            data = ComplianceFrameworkSerializer(ComplianceFramework.objects.order_by("name"), many=True).data
+
+        # frameworks, mappings, controls (annotated), their mappings, their requirements
+        assert len(queries) == 5
+        assert len(data) == 20
+        assert sum(len(framework["controls"]) for framework in data) == 2000
+        assert all(control["framework_count"] == 2 for control in data[0]["controls"])
+
+    def test_control_list(self, catalog):
+        with CaptureQueriesContext(connection) as queries:
+            data = ComplianceControlListSerializer(
+                ComplianceControlListSerializer.setup_queryset(ComplianceControl.objects.order_by("control_id")),
+                many=True,
+            ).data
+
+        assert len(queries) == 3
+        assert len(data) == 1000
+        assert data[0]["framework_count"] == 2
+        assert len(data[0]["evidence_requirements"]) == 1
+
+    def test_evidence_list(self, catalog):
+        with CaptureQueriesContext(connection) as queries:
+            data = ComplianceEvidenceListSerializer(
+                ComplianceEvidenceListSerializer.setup_queryset(ComplianceEvidence.objects.all()),
+                many=True,
+            ).data
+
+        assert len(queries) == 2
+        assert len(data) == 200
+        assert all(item["control_count"] == 3 == len(item["controls"]) for item in data)
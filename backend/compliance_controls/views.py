@@ -1,59 +1,17 @@
 """
 API Views for Compliance Controls
 """
-import json
-from pathlib import Path
-
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
-from django.conf import settings
 from .models import ComplianceControl, ComplianceControlFrameworkMapping
+from .search_index import get_compliance_index
 from .serializers import ComplianceControlSerializer, ComplianceControlListSerializer
 from users.permission_classes import HasFeaturePermission
 
 
-def _tokenize_question(question: str) -> list[str]:
-    tokens = []
-    for raw in question.lower().split():
-        cleaned = "".join(ch for ch in raw if ch.isalnum())
-        if len(cleaned) >= 3:
-            tokens.append(cleaned)
-    return tokens
-
-
-def _score_text(text: str, tokens: list[str]) -> int:
-    if not text or not tokens:
-        return 0
-    lowered = text.lower()
-    score = 0
-    for token in tokens:
-        if token in lowered:
-            score += 1
-    return score
-
-
-def _load_index_records(org_id: str | None):
-    index_path = Path(settings.BASE_DIR) / "exports" / "compliance_index.jsonl"
-    if not index_path.exists():
-        return []
-    records = []
-    with index_path.open("r", encoding="utf-8") as fh:
-        for line in fh:
-            try:
-                record = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            metadata = record.get("metadata") or {}
-            record_org = metadata.get("organization_id")
-            if org_id and record_org and record_org != org_id:
-                continue
-            records.append(record)
-    return records
-
-
 @api_view(["POST"])
 @permission_classes([IsAuthenticated, HasFeaturePermission("compliance.chat.view")])
 def compliance_chat(request):
@@ -62,10 +20,9 @@ def compliance_chat(request):
         return Response({"error": "Question is required."}, status=status.HTTP_400_BAD_REQUEST)
 
     org_id = request.data.get("organization_id")
-    tokens = _tokenize_question(question)
-    records = _load_index_records(org_id)
+    index = get_compliance_index()
 
-    if not records:
+    if index is None or not len(index):
         return Response(
             {
                 "answer": "Compliance index is empty. Run export_compliance_index to generate it.",
@@ -74,15 +31,7 @@ def compliance_chat(request):
             }
         )
 
-    scored = []
-    for record in records:
-        text = f"{record.get('title', '')}\n{record.get('text', '')}"
-        score = _score_text(text, tokens)
-        if score > 0:
-            scored.append((score, record))
-
-    scored.sort(key=lambda item: item[0], reverse=True)
-    top = scored[:8]
+    top = index.search(question, org_id, limit=8)
 
     matches = []
     for score, record in top:
@@ -92,7 +41,7 @@ def compliance_chat(request):
             {
                 "type": record.get("type"),
                 "title": record.get("title"),
-                "score": score,
+                "score": round(score, 3),
                 "snippet": snippet,
                 "detail": record.get("text", ""),
                 "metadata": record.get("metadata", {}),
@@ -156,7 +105,7 @@ class ComplianceControlViewSet(viewsets.ModelViewSet):
                 Q(description__icontains=search)
             )
         
-        return queryset
+        return self.get_serializer_class().setup_queryset(queryset)
     
     @action(detail=True, methods=['get'])
     def evidence(self, request, pk=None):
@@ -165,11 +114,14 @@ class ComplianceControlViewSet(viewsets.ModelViewSet):
         from compliance_evidence.models import ComplianceEvidenceControlMapping
         from compliance_evidence.serializers import ComplianceEvidenceListSerializer
         
-        mappings = ComplianceEvidenceControlMapping.objects.filter(control_id=control.id)
-        evidence_ids = [mapping.evidence_id for mapping in mappings]
-        
         from compliance_evidence.models import ComplianceEvidence
-        evidence = ComplianceEvidence.objects.filter(id__in=evidence_ids)
+        
+        evidence_ids = ComplianceEvidenceControlMapping.objects.filter(
+            control_id=control.id
+        ).values('evidence_id')
+        evidence = ComplianceEvidenceListSerializer.setup_queryset(
+            ComplianceEvidence.objects.filter(id__in=evidence_ids)
+        )
         
         serializer = ComplianceEvidenceListSerializer(evidence, many=True)
         return Response(serializer.data)
@@ -184,8 +136,12 @@ class ComplianceControlViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        mappings = ComplianceControlFrameworkMapping.objects.filter(framework_id=framework_id)
-        controls = [mapping.control for mapping in mappings]
+        control_ids = ComplianceControlFrameworkMapping.objects.filter(
+            framework_id=framework_id
+        ).values('control_id')
+        controls = ComplianceControlListSerializer.setup_queryset(
+            ComplianceControl.objects.filter(id__in=control_ids).order_by('control_id')
+        )
         
         serializer = ComplianceControlListSerializer(controls, many=True)
         return Response(serializer.data)
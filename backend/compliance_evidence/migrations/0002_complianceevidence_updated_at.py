@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_evidence', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complianceevidence',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
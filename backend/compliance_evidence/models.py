@@ -52,6 +52,7 @@ class ComplianceEvidence(models.Model):
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_evidence')
     uploaded_by = models.ForeignKey(
         User,
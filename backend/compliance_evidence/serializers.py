@@ -1,6 +1,7 @@
 """
 Serializers for Compliance Evidence
 """
+from django.db.models import Count
 from rest_framework import serializers
 from .models import ComplianceEvidence, ComplianceEvidenceControlMapping
 
@@ -54,6 +55,7 @@ class ComplianceEvidenceSerializer(serializers.ModelSerializer):
             'audit_id',
             'organization_id',
             'created_at',
+            'updated_at',
             'created_by',
             'created_by_username',
             'uploaded_by',
@@ -64,10 +66,16 @@ class ComplianceEvidenceSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id',
             'created_at',
+            'updated_at',
             'control_mappings',
             'controls',
         ]
     
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Load everything the serializer reads in a constant number of queries"""
+        return queryset.select_related('created_by', 'uploaded_by').prefetch_related('control_mappings')
+    
     def get_controls(self, obj):
         """Get list of controls this evidence satisfies"""
         return [
@@ -106,6 +114,13 @@ class ComplianceEvidenceListSerializer(serializers.ModelSerializer):
             'control_count',
         ]
     
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Annotate control_count and prefetch the mappings the serializer reads"""
+        return queryset.annotate(
+            control_count=Count('control_mappings', distinct=True),
+        ).prefetch_related('control_mappings')
+    
     def get_controls(self, obj):
         """Get list of controls linked to this evidence"""
         return [
@@ -119,6 +134,9 @@ class ComplianceEvidenceListSerializer(serializers.ModelSerializer):
         ]
     
     def get_control_count(self, obj):
-        """Get count of controls"""
-        return obj.control_mappings.count()
+        """Get count of controls (annotated by setup_queryset, else from the mappings)"""
+        count = getattr(obj, 'control_count', None)
+        if count is None:
+            count = len(obj.control_mappings.all())
+        return count
 
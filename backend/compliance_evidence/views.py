@@ -69,19 +69,22 @@ class ComplianceEvidenceViewSet(viewsets.ModelViewSet):
                 Q(source_name__icontains=search)
             )
         
-        return queryset
+        return self.get_serializer_class().setup_queryset(queryset)
     
     @action(detail=True, methods=['get'])
     def controls(self, request, pk=None):
         """Get all controls for a specific evidence"""
         evidence = self.get_object()
-        mappings = ComplianceEvidenceControlMapping.objects.filter(evidence_id=evidence.id)
         
         from compliance_controls.models import ComplianceControl
         from compliance_controls.serializers import ComplianceControlListSerializer
         
-        control_ids = [mapping.control_id for mapping in mappings]
-        controls = ComplianceControl.objects.filter(id__in=control_ids)
+        control_ids = ComplianceEvidenceControlMapping.objects.filter(
+            evidence_id=evidence.id
+        ).values('control_id')
+        controls = ComplianceControlListSerializer.setup_queryset(
+            ComplianceControl.objects.filter(id__in=control_ids)
+        )
         
         serializer = ComplianceControlListSerializer(controls, many=True)
         return Response(serializer.data)
@@ -96,9 +99,12 @@ class ComplianceEvidenceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        mappings = ComplianceEvidenceControlMapping.objects.filter(control_id=control_id)
-        evidence_ids = [mapping.evidence_id for mapping in mappings]
-        evidence = ComplianceEvidence.objects.filter(id__in=evidence_ids)
+        evidence_ids = ComplianceEvidenceControlMapping.objects.filter(
+            control_id=control_id
+        ).values('evidence_id')
+        evidence = ComplianceEvidenceListSerializer.setup_queryset(
+            ComplianceEvidence.objects.filter(id__in=evidence_ids)
+        )
         
         serializer = ComplianceEvidenceListSerializer(evidence, many=True)
         return Response(serializer.data)
@@ -113,9 +119,12 @@ class ComplianceEvidenceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        mappings = ComplianceEvidenceControlMapping.objects.filter(framework_id=framework_id)
-        evidence_ids = [mapping.evidence_id for mapping in mappings]
-        evidence = ComplianceEvidence.objects.filter(id__in=evidence_ids).distinct()
+        evidence_ids = ComplianceEvidenceControlMapping.objects.filter(
+            framework_id=framework_id
+        ).values('evidence_id')
+        evidence = ComplianceEvidenceListSerializer.setup_queryset(
+            ComplianceEvidence.objects.filter(id__in=evidence_ids)
+        )
         
         serializer = ComplianceEvidenceListSerializer(evidence, many=True)
         return Response(serializer.data)
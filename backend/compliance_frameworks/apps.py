@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ComplianceFrameworksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'compliance_frameworks'
+
+    def ready(self):
+        from .signals import connect_rollup_signals
+        connect_rollup_signals()
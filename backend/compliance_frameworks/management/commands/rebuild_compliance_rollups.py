@@ -0,0 +1,22 @@
+"""
+Django management command to recompute compliance score rollups
+
+Recomputes every framework's control counters and compliance score and the
+per-organization summary rows. Run it after bulk changes that bypass model
+signals (queryset.update(), raw SQL, fixtures).
+"""
+from django.core.management.base import BaseCommand
+from compliance_frameworks.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute framework compliance scores and dashboard rollups from control statuses'
+
+    def handle(self, *args, **options):
+        result = rebuild_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt compliance rollups: {result['frameworks_changed']} frameworks changed, "
+                f"{result['summary_rows']} summary rows"
+            )
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:10
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_frameworks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceScoreRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('scope', models.CharField(help_text="Organization ID, or 'all' for every organization", max_length=64, unique=True)),
+                ('organization_id', models.UUIDField(blank=True, help_text='Organization/tenant ID (null for the global row)', null=True)),
+                ('total_frameworks', models.IntegerField(default=0)),
+                ('enabled_frameworks', models.IntegerField(default=0)),
+                ('ready_frameworks', models.IntegerField(default=0)),
+                ('avg_compliance', models.IntegerField(default=0, help_text='Average score of enabled frameworks with a score')),
+                ('total_controls', models.IntegerField(default=0)),
+                ('passing_controls', models.IntegerField(default=0)),
+                ('failing_controls', models.IntegerField(default=0)),
+                ('partial_controls', models.IntegerField(default=0)),
+                ('not_evaluated_controls', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Compliance Score Rollup',
+                'verbose_name_plural': 'Compliance Score Rollups',
+                'db_table': 'compliance_score_rollups',
+            },
+        ),
+    ]
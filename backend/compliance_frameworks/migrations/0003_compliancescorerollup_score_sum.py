@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_frameworks', '0002_compliancescorerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compliancescorerollup',
+            name='scored_frameworks',
+            field=models.IntegerField(default=0, help_text='Enabled frameworks with a score'),
+        ),
+        migrations.AddField(
+            model_name='compliancescorerollup',
+            name='score_sum',
+            field=models.IntegerField(default=0, help_text='Sum of their scores, so the global average can be derived from the organization rows'),
+        ),
+    ]
@@ -73,3 +73,43 @@ class ComplianceFramework(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.code})"
+
+
+class ComplianceScoreRollup(models.Model):
+    """
+    Precomputed framework and control totals for one organization (or for all
+    organizations), maintained by compliance_frameworks.rollups so dashboards
+    read one row instead of scanning frameworks and controls.
+    """
+    GLOBAL_SCOPE = 'all'
+    # Frameworks and controls without an organization; counted in the global row only
+    UNASSIGNED_SCOPE = 'unassigned'
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    scope = models.CharField(max_length=64, unique=True, help_text="Organization ID, or 'all' for every organization")
+    organization_id = models.UUIDField(null=True, blank=True, help_text='Organization/tenant ID (null for the global row)')
+    
+    # Frameworks
+    total_frameworks = models.IntegerField(default=0)
+    enabled_frameworks = models.IntegerField(default=0)
+    ready_frameworks = models.IntegerField(default=0)
+    avg_compliance = models.IntegerField(default=0, help_text='Average score of enabled frameworks with a score')
+    scored_frameworks = models.IntegerField(default=0, help_text='Enabled frameworks with a score')
+    score_sum = models.IntegerField(default=0, help_text='Sum of their scores, so the global average can be derived from the organization rows')
+    
+    # Controls (each control counted once, whatever the number of frameworks it maps to)
+    total_controls = models.IntegerField(default=0)
+    passing_controls = models.IntegerField(default=0)
+    failing_controls = models.IntegerField(default=0)
+    partial_controls = models.IntegerField(default=0)
+    not_evaluated_controls = models.IntegerField(default=0)
+    
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'compliance_score_rollups'
+        verbose_name = 'Compliance Score Rollup'
+        verbose_name_plural = 'Compliance Score Rollups'
+    
+    def __str__(self):
+        return f"Compliance rollup ({self.scope})"
@@ -0,0 +1,275 @@
+"""
+Set-based compliance score rollups.
+
+Framework counters (total/passing/failing/not_evaluated controls) and
+compliance scores are recomputed from one grouped query over
+ComplianceControlFrameworkMapping joined to ComplianceControl.status, and
+dashboard totals per organization are stored in ComplianceScoreRollup. The
+global row is the sum of the organization rows, so a change in one
+organization only recomputes that organization's row.
+compliance_frameworks.signals refreshes the affected frameworks and
+organizations when a control's status or mappings change; the
+rebuild_compliance_rollups command recomputes everything.
+"""
+
+import logging
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
+from .models import ComplianceFramework, ComplianceScoreRollup
+
+logger = logging.getLogger(__name__)
+
+
+FRAMEWORK_COUNTER_FIELDS = [
+    'total_controls',
+    'passing_controls',
+    'failing_controls',
+    'not_evaluated_controls',
+    'compliance_score',
+]
+
+ROLLUP_FIELDS = [
+    'organization_id',
+    'total_frameworks',
+    'enabled_frameworks',
+    'ready_frameworks',
+    'avg_compliance',
+    'scored_frameworks',
+    'score_sum',
+    'total_controls',
+    'passing_controls',
+    'failing_controls',
+    'partial_controls',
+    'not_evaluated_controls',
+    'computed_at',
+]
+
+
+def compute_compliance_score(passing, partial, total):
+    """Percentage of mapped controls passing, partial controls counting half."""
+    if not total:
+        return 0
+    return round(100 * (passing + partial / 2) / total)
+
+
+def _status_counts(prefix=''):
+    return {
+        'total': Count('id'),
+        'passing': Count('id', filter=Q(**{f'{prefix}status': 'pass'})),
+        'failing': Count('id', filter=Q(**{f'{prefix}status': 'fail'})),
+        'partial': Count('id', filter=Q(**{f'{prefix}status': 'partial'})),
+        'not_evaluated': Count('id', filter=Q(**{f'{prefix}status': 'not_evaluated'})),
+    }
+
+
+def rollup_frameworks(framework_ids=None, batch_size=500):
+    """
+    Recompute the control counters and compliance score of frameworks.
+
+    Args:
+        framework_ids: Frameworks to refresh (default: all)
+
+    Returns:
+        Number of frameworks whose values changed
+    """
+    mappings = ComplianceControlFrameworkMapping.objects.all()
+    frameworks = ComplianceFramework.objects.all()
+    if framework_ids is not None:
+        framework_ids = list(framework_ids)
+        if not framework_ids:
+            return 0
+        mappings = mappings.filter(framework_id__in=framework_ids)
+        frameworks = frameworks.filter(id__in=framework_ids)
+
+    counts = {
+        row['framework_id']: row
+        for row in mappings.values('framework_id').annotate(**_status_counts('control__')).order_by()
+    }
+
+    now = timezone.now()
+    changed = []
+    for framework in frameworks.only('id', *FRAMEWORK_COUNTER_FIELDS).order_by().iterator(chunk_size=batch_size):
+        row = counts.get(framework.id, {})
+        values = {
+            'total_controls': row.get('total', 0),
+            'passing_controls': row.get('passing', 0),
+            'failing_controls': row.get('failing', 0),
+            'not_evaluated_controls': row.get('not_evaluated', 0),
+            'compliance_score': compute_compliance_score(row.get('passing', 0), row.get('partial', 0), row.get('total', 0)),
+        }
+        if any(getattr(framework, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(framework, field, value)
+            # Bumped so updated_at-driven consumers (compliance index export) see the new counters
+            framework.updated_at = now
+            changed.append(framework)
+
+    if changed:
+        ComplianceFramework.objects.bulk_update(changed, FRAMEWORK_COUNTER_FIELDS + ['updated_at'], batch_size=batch_size)
+    return len(changed)
+
+
+def _scope(organization_id):
+    return str(organization_id) if organization_id else ComplianceScoreRollup.UNASSIGNED_SCOPE
+
+
+def rollup_summaries(organization_ids=None):
+    """
+    Recompute the ComplianceScoreRollup rows of organizations from two
+    grouped queries (frameworks and controls by organization), then derive
+    the global row from the stored organization rows.
+
+    Args:
+        organization_ids: Organizations to refresh, None standing for
+            frameworks and controls without one (default: all)
+
+    Returns:
+        Number of organization rows written
+    """
+    frameworks = ComplianceFramework.objects.all()
+    controls = ComplianceControl.objects.all()
+    totals = {}
+    if organization_ids is not None:
+        organization_ids = set(organization_ids)
+        if not organization_ids:
+            return 0
+        scope_filter = Q(organization_id__in=[org for org in organization_ids if org is not None])
+        if None in organization_ids:
+            scope_filter |= Q(organization_id__isnull=True)
+        frameworks = frameworks.filter(scope_filter)
+        controls = controls.filter(scope_filter)
+        totals = {org: _empty_totals() for org in organization_ids}
+
+    framework_rows = frameworks.values('organization_id').annotate(
+        # Named apart from the model fields the filters refer to
+        total=Count('id'),
+        enabled_count=Count('id', filter=Q(enabled=True)),
+        ready_count=Count('id', filter=Q(status='ready')),
+        scored_count=Count('id', filter=Q(enabled=True, compliance_score__gt=0)),
+        score_sum=Sum('compliance_score', filter=Q(enabled=True, compliance_score__gt=0)),
+    ).order_by()
+    control_rows = controls.values('organization_id').annotate(**_status_counts()).order_by()
+
+    for row in framework_rows:
+        entry = totals.setdefault(row['organization_id'], _empty_totals())
+        entry['total_frameworks'] += row['total']
+        entry['enabled_frameworks'] += row['enabled_count']
+        entry['ready_frameworks'] += row['ready_count']
+        entry['scored_frameworks'] += row['scored_count']
+        entry['score_sum'] += row['score_sum'] or 0
+    for row in control_rows:
+        entry = totals.setdefault(row['organization_id'], _empty_totals())
+        entry['total_controls'] += row['total']
+        entry['passing_controls'] += row['passing']
+        entry['failing_controls'] += row['failing']
+        entry['partial_controls'] += row['partial']
+        entry['not_evaluated_controls'] += row['not_evaluated']
+
+    now = timezone.now()
+    empty = _empty_totals()
+    rollups = [
+        _build_rollup(_scope(org), org, entry, now)
+        for org, entry in totals.items() if entry != empty
+    ]
+    written = [rollup.scope for rollup in rollups]
+    if rollups:
+        _save_rollups(rollups)
+
+    # Organizations left without frameworks or controls lose their row
+    stale = ComplianceScoreRollup.objects.exclude(scope=ComplianceScoreRollup.GLOBAL_SCOPE).exclude(scope__in=written)
+    if organization_ids is not None:
+        stale = stale.filter(scope__in=[_scope(org) for org in organization_ids])
+    stale.delete()
+
+    _rollup_global(now)
+    return len(rollups)
+
+
+def _rollup_global(now):
+    """Sum the organization rows into the global row."""
+    summed = ComplianceScoreRollup.objects.exclude(scope=ComplianceScoreRollup.GLOBAL_SCOPE).aggregate(
+        **{field: Sum(field) for field in _empty_totals()}
+    )
+    entry = {field: value or 0 for field, value in summed.items()}
+    _save_rollups([_build_rollup(ComplianceScoreRollup.GLOBAL_SCOPE, None, entry, now)])
+
+
+def _build_rollup(scope, organization_id, entry, now):
+    return ComplianceScoreRollup(
+        scope=scope,
+        organization_id=organization_id,
+        avg_compliance=round(entry['score_sum'] / entry['scored_frameworks']) if entry['scored_frameworks'] else 0,
+        computed_at=now,
+        **entry,
+    )
+
+
+def _save_rollups(rollups):
+    ComplianceScoreRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['scope'],
+        update_fields=ROLLUP_FIELDS,
+    )
+
+
+def _empty_totals():
+    return {
+        'total_frameworks': 0,
+        'enabled_frameworks': 0,
+        'ready_frameworks': 0,
+        'scored_frameworks': 0,
+        'score_sum': 0,
+        'total_controls': 0,
+        'passing_controls': 0,
+        'failing_controls': 0,
+        'partial_controls': 0,
+        'not_evaluated_controls': 0,
+    }
+
+
+def refresh_rollups(control_ids=(), framework_ids=(), organization_ids=()):
+    """
+    Incremental refresh: recompute the frameworks mapped to ``control_ids``
+    plus ``framework_ids``, then the summary rows of their organizations and
+    of ``organization_ids``.
+    """
+    framework_ids = set(framework_ids)
+    organization_ids = set(organization_ids)
+    if control_ids:
+        framework_ids.update(
+            ComplianceControlFrameworkMapping.objects.filter(
+                control_id__in=list(control_ids)
+            ).values_list('framework_id', flat=True).distinct()
+        )
+    changed = 0
+    if framework_ids:
+        changed = rollup_frameworks(framework_ids)
+        # Framework scores feed their organization's average
+        organization_ids.update(
+            ComplianceFramework.objects.filter(id__in=list(framework_ids)).values_list('organization_id', flat=True).distinct()
+        )
+    rollup_summaries(organization_ids)
+    return changed
+
+
+def rebuild_rollups():
+    """Full rebuild of every framework's counters and every summary row."""
+    changed = rollup_frameworks()
+    rows = rollup_summaries()
+    logger.info(f"[ComplianceRollups] Rebuilt rollups: {changed} frameworks changed, {rows} summary rows")
+    return {'frameworks_changed': changed, 'summary_rows': rows}
+
+
+def get_score_rollup(organization_id=None):
+    """
+    The precomputed summary for an organization (or the global one),
+    computing the summaries first if they have never been built.
+    """
+    scope = str(organization_id) if organization_id else ComplianceScoreRollup.GLOBAL_SCOPE
+    rollup = ComplianceScoreRollup.objects.filter(scope=scope).first()
+    if rollup is None and not ComplianceScoreRollup.objects.exists():
+        rollup_summaries()
+        rollup = ComplianceScoreRollup.objects.filter(scope=scope).first()
+    return rollup
@@ -1,12 +1,51 @@
 """
 Serializers for Compliance Frameworks
 """
+from django.db.models import Prefetch
+from django.db.models.manager import BaseManager
 from rest_framework import serializers
 from .models import ComplianceFramework
-from compliance_controls.models import ComplianceControlFrameworkMapping
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
 from compliance_controls.serializers import ComplianceControlListSerializer
 
 
+def get_controls_by_framework(framework_ids):
+    """
+    Controls mapped to each framework, ready for ComplianceControlListSerializer.
+
+    Mappings reference frameworks by UUID rather than a foreign key, so they
+    are loaded for all frameworks at once instead of per framework; the
+    number of queries does not depend on how many frameworks or controls
+    there are.
+
+    Returns:
+        dict of framework_id -> list of ComplianceControl
+    """
+    controls_by_framework = {framework_id: [] for framework_id in framework_ids}
+    if not framework_ids:
+        return controls_by_framework
+    mappings = ComplianceControlFrameworkMapping.objects.filter(
+        framework_id__in=framework_ids
+    ).prefetch_related(
+        Prefetch('control', queryset=ComplianceControlListSerializer.setup_queryset(ComplianceControl.objects.all()))
+    )
+    for mapping in mappings:
+        controls_by_framework[mapping.framework_id].append(mapping.control)
+    return controls_by_framework
+
+
+class ComplianceFrameworkListSerializer(serializers.ListSerializer):
+    """Loads the nested controls of every framework in the list up front"""
+
+    def to_representation(self, data):
+        frameworks = list(data.all() if isinstance(data, BaseManager) else data)
+        self.child.controls_by_framework = get_controls_by_framework([framework.id for framework in frameworks])
+        try:
+            return super().to_representation(frameworks)
+        finally:
+            self.child.controls_by_framework = None
+
+
 class ComplianceFrameworkSerializer(serializers.ModelSerializer):
     """Serializer for ComplianceFramework model with nested controls"""
     
@@ -47,10 +86,15 @@ class ComplianceFrameworkSerializer(serializers.ModelSerializer):
             'not_evaluated_controls',
             'controls',
         ]
+        list_serializer_class = ComplianceFrameworkListSerializer
+    
+    controls_by_framework = None
     
     def get_controls(self, obj):
         """Get all controls for this framework"""
-        mappings = ComplianceControlFrameworkMapping.objects.filter(framework_id=obj.id)
-        controls = [mapping.control for mapping in mappings]
+        controls_by_framework = self.controls_by_framework
+        if controls_by_framework is None:
+            controls_by_framework = get_controls_by_framework([obj.id])
+        controls = controls_by_framework.get(obj.id, [])
         return ComplianceControlListSerializer(controls, many=True).data
 
@@ -0,0 +1,105 @@
+"""
+Signals that keep the compliance score rollups current.
+
+A control whose status changes, a mapping that is added or removed, and a
+framework or control that is created or deleted mark the affected rollups
+(frameworks and organizations) dirty; they are recomputed once the
+transaction commits (one refresh per transaction, however many rows it
+touched).
+"""
+
+import logging
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+logger = logging.getLogger(__name__)
+
+
+# Per thread, like the transactions whose commit flushes it
+_pending = threading.local()
+
+
+def _get_pending():
+    if not hasattr(_pending, 'controls'):
+        _pending.controls, _pending.frameworks, _pending.organizations = set(), set(), set()
+    return _pending
+
+
+def _flush():
+    pending = _get_pending()
+    if not (pending.controls or pending.frameworks or pending.organizations):
+        return
+    control_ids, framework_ids, organization_ids = pending.controls, pending.frameworks, pending.organizations
+    pending.controls, pending.frameworks, pending.organizations = set(), set(), set()
+    from .rollups import refresh_rollups
+    try:
+        refresh_rollups(control_ids=control_ids, framework_ids=framework_ids, organization_ids=organization_ids)
+    except Exception as e:
+        logger.error(f"[ComplianceRollups] Error refreshing rollups: {str(e)}")
+
+
+def mark_dirty(control_id=None, framework_id=None, organization_ids=()):
+    """
+    Queue a rollup refresh for when the current transaction commits.
+
+    organization_ids may contain None for records without an organization.
+    """
+    if not getattr(settings, 'COMPLIANCE_ROLLUPS_AUTO_REFRESH', True):
+        return
+    pending = _get_pending()
+    if control_id is not None:
+        pending.controls.add(control_id)
+    if framework_id is not None:
+        pending.frameworks.add(framework_id)
+    pending.organizations.update(organization_ids)
+    transaction.on_commit(_flush)
+
+
+def remember_rollup_state(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not loaded just for this
+    instance._rollup_status = instance.__dict__.get('status')
+    instance._rollup_organization_id = instance.__dict__.get('organization_id')
+
+
+def control_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_org = instance._rollup_organization_id
+    if created or instance.status != instance._rollup_status or instance.organization_id != previous_org:
+        mark_dirty(control_id=instance.pk, organization_ids={instance.organization_id, previous_org})
+    instance._rollup_status = instance.status
+    instance._rollup_organization_id = instance.organization_id
+
+
+def control_deleted(sender, instance, **kwargs):
+    # Its mappings are deleted with it and refresh their frameworks
+    mark_dirty(organization_ids={instance.organization_id})
+
+
+def mapping_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark_dirty(framework_id=instance.framework_id)
+
+
+def framework_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark_dirty(organization_ids={instance.organization_id, instance._rollup_organization_id})
+    instance._rollup_organization_id = instance.organization_id
+
+
+def connect_rollup_signals():
+    from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
+    from .models import ComplianceFramework
+
+    post_init.connect(remember_rollup_state, sender=ComplianceControl, dispatch_uid='compliance_rollups:control_init')
+    post_init.connect(remember_rollup_state, sender=ComplianceFramework, dispatch_uid='compliance_rollups:framework_init')
+    post_save.connect(control_saved, sender=ComplianceControl, dispatch_uid='compliance_rollups:control_saved')
+    post_delete.connect(control_deleted, sender=ComplianceControl, dispatch_uid='compliance_rollups:control_deleted')
+    post_save.connect(mapping_changed, sender=ComplianceControlFrameworkMapping, dispatch_uid='compliance_rollups:mapping_saved')
+    post_delete.connect(mapping_changed, sender=ComplianceControlFrameworkMapping, dispatch_uid='compliance_rollups:mapping_deleted')
+    post_save.connect(framework_changed, sender=ComplianceFramework, dispatch_uid='compliance_rollups:framework_saved')
+    post_delete.connect(framework_changed, sender=ComplianceFramework, dispatch_uid='compliance_rollups:framework_deleted')
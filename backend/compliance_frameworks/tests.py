@@ -1,3 +1,136 @@
-from django.test import TestCase
+import uuid
 
-# Create your tests here.
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
+from compliance_frameworks.models import ComplianceFramework, ComplianceScoreRollup
+from compliance_frameworks.rollups import (
+    compute_compliance_score, get_score_rollup, rebuild_rollups, rollup_frameworks, rollup_summaries
+)
+
+
+ORG_A = uuid.uuid4()
+ORG_B = uuid.uuid4()
+
+
+def map_controls(framework, controls):
+    ComplianceControlFrameworkMapping.objects.bulk_create([
+        ComplianceControlFrameworkMapping(control=control, framework_id=framework.id, framework_name=framework.name)
+        for control in controls
+    ])
+
+
+@pytest.mark.django_db
+class TestComplianceScoreRollups:
+    @pytest.fixture
+    def catalog(self, settings):
+        # Built without the signals so each test starts from stale counters
+        settings.COMPLIANCE_ROLLUPS_AUTO_REFRESH = False
+        settings.COMPLIANCE_INDEX_AUTO_REFRESH = False
+        soc2 = ComplianceFramework.objects.create(name="SOC 2", code="SOC2", category="security", organization_id=ORG_A)
+        iso = ComplianceFramework.objects.create(name="ISO 27001", code="ISO27001", category="security",
+                                                 organization_id=ORG_B, status="ready")
+        controls = ComplianceControl.objects.bulk_create([
+            ComplianceControl(control_id=f"CTL-{status}", name=status, description=status, status=status,
+                              organization_id=ORG_A)
+            for status in ("pass", "partial", "fail", "not_evaluated")
+        ])
+        map_controls(soc2, controls)
+        map_controls(iso, controls[:2])
+        settings.COMPLIANCE_ROLLUPS_AUTO_REFRESH = True
+        return soc2, iso, controls
+
+    def test_compute_compliance_score_counts_partial_as_half(self):
+        assert compute_compliance_score(1, 1, 4) == 38
+        assert compute_compliance_score(2, 0, 2) == 100
+        assert compute_compliance_score(0, 0, 0) == 0
+
+    def test_rebuild_sets_framework_counters(self, catalog):
+        soc2, iso, controls = catalog
+        assert rebuild_rollups()["frameworks_changed"] == 2
+
+        soc2.refresh_from_db()
+        iso.refresh_from_db()
+        assert (soc2.total_controls, soc2.passing_controls, soc2.failing_controls, soc2.not_evaluated_controls) == (4, 1, 1, 1)
+        assert soc2.compliance_score == 38
+        assert (iso.total_controls, iso.passing_controls, iso.compliance_score) == (2, 1, 75)
+
+        # Nothing left to change
+        assert rebuild_rollups()["frameworks_changed"] == 0
+
+    def test_summary_rows_per_organization_and_global(self, catalog):
+        rebuild_rollups()
+
+        org_a = get_score_rollup(ORG_A)
+        assert (org_a.total_frameworks, org_a.enabled_frameworks, org_a.ready_frameworks) == (1, 1, 0)
+        assert org_a.avg_compliance == 38
+        assert (org_a.total_controls, org_a.passing_controls, org_a.partial_controls) == (4, 1, 1)
+
+        org_b = get_score_rollup(str(ORG_B))
+        assert (org_b.total_frameworks, org_b.ready_frameworks, org_b.total_controls) == (1, 1, 0)
+
+        overall = get_score_rollup()
+        assert overall.scope == ComplianceScoreRollup.GLOBAL_SCOPE
+        assert (overall.total_frameworks, overall.ready_frameworks, overall.avg_compliance) == (2, 1, 56)
+        assert get_score_rollup(uuid.uuid4()) is None
+
+    def test_summary_refresh_limited_to_affected_organizations(self, catalog):
+        soc2, iso, controls = catalog
+        rebuild_rollups()
+        # Changed without the signals, so only an explicit refresh picks it up
+        ComplianceControl.objects.filter(id=controls[2].id).update(status="pass")
+        ComplianceFramework.objects.create(name="Internal", code="INT", category="security", compliance_score=80)
+
+        assert rollup_summaries([ORG_B]) == 1
+        assert get_score_rollup(ORG_A).passing_controls == 1
+        assert get_score_rollup().avg_compliance == 56
+
+        rollup_summaries([ORG_A, None])
+        assert get_score_rollup(ORG_A).passing_controls == 2
+        overall = get_score_rollup()
+        assert (overall.total_frameworks, overall.passing_controls, overall.avg_compliance) == (3, 2, 64)
+
+        # The global row derived from the organization rows matches a full recompute
+        fields = ["total_frameworks", "enabled_frameworks", "ready_frameworks", "avg_compliance",
+                  "total_controls", "passing_controls", "failing_controls", "partial_controls"]
+        derived = [getattr(overall, field) for field in fields]
+        rollup_summaries()
+        overall = get_score_rollup()
+        assert [getattr(overall, field) for field in fields] == derived
+
+    def test_status_change_refreshes_on_commit(self, catalog, django_capture_on_commit_callbacks):
+        soc2, iso, controls = catalog
+        rebuild_rollups()
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            failing = controls[2]
+            failing.status = "pass"
+            failing.save()
+            failing.save()
+        assert callbacks
+
+        soc2.refresh_from_db()
+        assert (soc2.passing_controls, soc2.failing_controls, soc2.compliance_score) == (2, 0, 62)
+        assert get_score_rollup(ORG_A).passing_controls == 2
+
+        # Unmapping a control rescores its framework
+        with django_capture_on_commit_callbacks(execute=True):
+            ComplianceControlFrameworkMapping.objects.get(framework_id=iso.id, control=controls[1]).delete()
+        iso.refresh_from_db()
+        assert (iso.total_controls, iso.compliance_score) == (1, 100)
+
+    def test_rollup_query_count_does_not_grow_with_frameworks(self, catalog):
+        soc2, iso, controls = catalog
+        frameworks = ComplianceFramework.objects.bulk_create([
+            ComplianceFramework(name=f"Framework {i}", code=f"FW{i}", category="security") for i in range(50)
+        ])
+        for framework in frameworks:
+            map_controls(framework, controls)
+
+        with CaptureQueriesContext(connection) as queries:
+            assert rollup_frameworks() == 52
+
+        # grouped counts, frameworks, one bulk update
+        assert len(queries) == 3
@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
 from .models import ComplianceFramework
+from .rollups import get_score_rollup
 from .serializers import ComplianceFrameworkSerializer
 from users.permission_classes import HasFeaturePermission
 
@@ -120,24 +121,32 @@ def update_framework(request, framework_id):
 def framework_stats(request):
     """
     Get summary statistics for compliance frameworks
+
+    Served from the precomputed ComplianceScoreRollup row.
+
+    Query params:
+        - organization_id: Statistics for one organization (default: all)
     """
-    total = ComplianceFramework.objects.count()
-    enabled = ComplianceFramework.objects.filter(enabled=True).count()
-    ready = ComplianceFramework.objects.filter(status='ready').count()
-    
-    # Calculate average compliance score for enabled frameworks
-    enabled_frameworks = ComplianceFramework.objects.filter(
-        enabled=True,
-        compliance_score__gt=0
-    )
-    avg_compliance = 0
-    if enabled_frameworks.exists():
-        total_score = sum(f.compliance_score for f in enabled_frameworks)
-        avg_compliance = round(total_score / enabled_frameworks.count())
-    
+    rollup = get_score_rollup(request.GET.get('organization_id') or None)
+    if rollup is None:
+        return Response({
+            'total': 0,
+            'enabled': 0,
+            'ready': 0,
+            'avgCompliance': 0,
+        }, status=status.HTTP_200_OK)
+
     return Response({
-        'total': total,
-        'enabled': enabled,
-        'ready': ready,
-        'avgCompliance': avg_compliance,
+        'total': rollup.total_frameworks,
+        'enabled': rollup.enabled_frameworks,
+        'ready': rollup.ready_frameworks,
+        'avgCompliance': rollup.avg_compliance,
+        'controls': {
+            'total': rollup.total_controls,
+            'passing': rollup.passing_controls,
+            'failing': rollup.failing_controls,
+            'partial': rollup.partial_controls,
+            'notEvaluated': rollup.not_evaluated_controls,
+        },
+        'computedAt': rollup.computed_at,
     }, status=status.HTTP_200_OK)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ComplianceReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'compliance_reports'
+
+    def ready(self):
+        from .signals import connect_artifact_signals
+        connect_artifact_signals()
@@ -0,0 +1,418 @@
+"""
+Compliance report generation.
+
+generate_report() streams the controls, evidence and policies in a report's
+scope (selected frameworks, organization, and date range) from server-side
+cursors into a writer from compliance_reports.writers, so the artifact is
+written to COMPLIANCE_REPORTS_DIR row by row and never held in memory.
+Status and progress are kept on the ComplianceReport row as it goes.
+
+Artifacts are content-addressed: the file name is a hash of the report
+parameters and a fingerprint of the source data (row counts per status and
+the latest change time of each section). An identical request made while
+the data is unchanged reuses the existing file instead of regenerating it,
+so an artifact only contains what the hash covers; per-report identity
+(report ID, name, generation time) lives on the ComplianceReport row and in
+the download's file name.
+
+An artifact is deleted once no report points at its hash: when the last
+such report is deleted (compliance_reports.signals), and by the periodic
+prune_artifacts sweep, which also removes abandoned partial writes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
+from compliance_evidence.models import ComplianceEvidence, ComplianceEvidenceControlMapping
+from compliance_policies.models import CompliancePolicy
+from .models import ComplianceReport
+from .writers import WRITERS
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Output buffer of the artifact file
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class ReportSection:
+    """
+    One kind of row in a report.
+
+    Args:
+        name: Section name in the artifact and the summary
+        include_flag: ComplianceReport field that selects the section
+        count_field: ComplianceReport field receiving the number of rows written
+        columns: Fields streamed, in output order
+        order_by: Stable output order
+        changed_field: Latest-change field used in the data fingerprint
+    """
+
+    def __init__(self, name, include_flag, count_field, columns, order_by, changed_field):
+        self.name = name
+        self.include_flag = include_flag
+        self.count_field = count_field
+        self.columns = list(columns)
+        self.order_by = order_by
+        self.changed_field = changed_field
+
+
+SECTIONS = [
+    ReportSection(
+        'controls', 'includes_controls', 'control_count',
+        ['control_id', 'name', 'status', 'severity', 'category', 'frequency', 'last_evaluated', 'failing_count'],
+        order_by='control_id', changed_field='updated_at',
+    ),
+    ReportSection(
+        'evidence', 'includes_evidence', 'evidence_count',
+        ['evidence_id', 'name', 'source', 'source_type', 'source_name', 'status', 'category', 'created_at', 'expires_at'],
+        order_by='evidence_id', changed_field='updated_at',
+    ),
+    ReportSection(
+        'policies', 'includes_policies', 'policy_count',
+        ['policy_id', 'name', 'type', 'status', 'approval_status', 'version', 'effective_date', 'review_date'],
+        order_by='policy_id', changed_field='updated_at',
+    ),
+]
+
+
+class ReportScope:
+    """The rows a report covers, one queryset per section."""
+
+    def __init__(self, report):
+        self.report = report
+        mappings = list(report.framework_mappings.order_by('framework_name').values_list('framework_id', 'framework_name'))
+        self.framework_ids = [framework_id for framework_id, _ in mappings]
+        self.framework_names = [name for _, name in mappings]
+
+    def _filter_org(self, queryset):
+        if self.report.organization_id:
+            queryset = queryset.filter(organization_id=self.report.organization_id)
+        return queryset
+
+    def controls(self):
+        queryset = self._filter_org(ComplianceControl.objects.all())
+        if self.framework_ids:
+            queryset = queryset.filter(id__in=ComplianceControlFrameworkMapping.objects.filter(
+                framework_id__in=self.framework_ids
+            ).values('control_id'))
+        return queryset
+
+    def evidence(self):
+        queryset = self._filter_org(ComplianceEvidence.objects.all())
+        if self.framework_ids:
+            queryset = queryset.filter(id__in=ComplianceEvidenceControlMapping.objects.filter(
+                framework_id__in=self.framework_ids
+            ).values('evidence_id'))
+        if self.report.date_range_start:
+            queryset = queryset.filter(created_at__gte=self.report.date_range_start)
+        if self.report.date_range_end:
+            queryset = queryset.filter(created_at__lte=self.report.date_range_end)
+        return queryset
+
+    def policies(self):
+        queryset = self._filter_org(CompliancePolicy.objects.all())
+        if self.framework_ids:
+            # Policies covering any control of the selected frameworks
+            queryset = queryset.filter(control_ids__overlap=list(self.controls().values_list('id', flat=True)))
+        return queryset
+
+    def queryset(self, section):
+        return getattr(self, section.name)()
+
+    def sections(self):
+        return [section for section in SECTIONS if getattr(self.report, section.include_flag)]
+
+
+def summarize(scope):
+    """
+    Per-section totals and status breakdowns (one grouped query per
+    section), plus the latest change time used to fingerprint the data.
+    """
+    summary = {}
+    for section in SECTIONS:
+        rows = scope.queryset(section).order_by().values('status').annotate(
+            count=Count('id'), last_changed=Max(section.changed_field)
+        )
+        by_status = {}
+        last_changed = None
+        for row in rows:
+            by_status[row['status']] = row['count']
+            if row['last_changed'] and (last_changed is None or row['last_changed'] > last_changed):
+                last_changed = row['last_changed']
+        summary[section.name] = {
+            'total': sum(by_status.values()),
+            'by_status': dict(sorted(by_status.items())),
+            'last_changed': last_changed.isoformat() if last_changed else None,
+        }
+    return summary
+
+
+def compute_content_hash(report, scope, summary):
+    """Identical for reports with the same parameters over the same data."""
+    payload = {
+        'type': report.type,
+        'view': report.view,
+        'file_format': report.file_format,
+        'organization_id': report.organization_id,
+        'frameworks': sorted(str(framework_id) for framework_id in scope.framework_ids),
+        'framework_names': scope.framework_names,
+        'date_range': [report.date_range_start, report.date_range_end],
+        'sections': [section.name for section in scope.sections()],
+        'data': summary,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def is_generation_stale(report):
+    """
+    Whether a 'generating' report was abandoned by its worker (killed by the
+    task time limit, OOM, or a redeploy): progress writes bump updated_at,
+    so a live generation is never quiet for longer than a task may run.
+    """
+    limit = getattr(settings, 'CELERY_TASK_TIME_LIMIT', 30 * 60)
+    return report.status == 'generating' and report.updated_at < timezone.now() - timedelta(seconds=limit)
+
+
+def get_reports_dir():
+    # Not under MEDIA_ROOT: artifacts are only served by the permission-checked download action
+    return Path(getattr(settings, 'COMPLIANCE_REPORTS_DIR', Path(settings.BASE_DIR) / 'exports' / 'compliance_reports'))
+
+
+def get_artifact_path(report):
+    """Local artifact of a generated report (None before generation)."""
+    writer_class = WRITERS.get(report.file_format)
+    if not report.content_hash or writer_class is None:
+        return None
+    return get_reports_dir() / f'{report.content_hash}.{writer_class.extension}'
+
+
+@contextmanager
+def _artifact_lock(content_hash):
+    """
+    Serialize generation of one artifact across workers; a duplicate
+    request waits for the first one and then reuses its file. Session-level
+    so progress updates commit while the lock is held.
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    key = zlib.crc32(f'compliance_report:{content_hash}'.encode())
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [key])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+
+
+def _is_reusable(path):
+    max_age = getattr(settings, 'COMPLIANCE_REPORT_REUSE_SECONDS', 3600)
+    try:
+        return time.time() - path.stat().st_mtime < max_age
+    except OSError:
+        return False
+
+
+def delete_unreferenced_artifact(content_hash):
+    """
+    Delete the artifact of a content hash unless a report still points at it.
+
+    Checked under the artifact lock: generation records the hash on its
+    report before taking the lock, so a file about to be reused is kept.
+
+    Returns:
+        Number of files deleted
+    """
+    if not content_hash:
+        return 0
+    deleted = 0
+    with _artifact_lock(content_hash):
+        if ComplianceReport.objects.filter(content_hash=content_hash).exists():
+            return 0
+        for path in get_reports_dir().glob(f'{content_hash}.*'):
+            if path.suffix != '.tmp':
+                path.unlink(missing_ok=True)
+                deleted += 1
+    return deleted
+
+
+def prune_artifacts():
+    """
+    Delete artifacts no report points at, and partial writes older than a
+    task may run.
+
+    Returns:
+        Number of files deleted
+    """
+    reports_dir = get_reports_dir()
+    if not reports_dir.is_dir():
+        return 0
+    referenced = set(ComplianceReport.objects.exclude(content_hash='').values_list('content_hash', flat=True).distinct())
+    abandoned_before = time.time() - getattr(settings, 'CELERY_TASK_TIME_LIMIT', 30 * 60)
+    deleted = 0
+    for path in reports_dir.iterdir():
+        if not path.is_file():
+            continue
+        if path.suffix == '.tmp':
+            try:
+                if path.stat().st_mtime < abandoned_before:
+                    path.unlink(missing_ok=True)
+                    deleted += 1
+            except OSError:
+                pass
+            continue
+        content_hash = path.name.split('.', 1)[0]
+        if content_hash not in referenced:
+            deleted += delete_unreferenced_artifact(content_hash)
+    if deleted:
+        logger.info(f"[ComplianceReports] Pruned {deleted} unreferenced artifact files")
+    return deleted
+
+
+class _Progress:
+    """Writes the progress percentage to the report row when it changes."""
+
+    def __init__(self, report_id, total):
+        self.report_id = report_id
+        self.total = max(total, 1)
+        self.done = 0
+        self.percent = 0
+
+    def advance(self, rows=1):
+        self.done += rows
+        # 99 at most; 100 is written with the final status
+        percent = min(99, self.done * 100 // self.total)
+        if percent != self.percent:
+            self.percent = percent
+            ComplianceReport.objects.filter(pk=self.report_id).update(progress=percent, updated_at=timezone.now())
+
+
+def _write_artifact(report, scope, summary, path, chunk_size):
+    """Stream every selected section into ``path``; returns {section: rows written}."""
+    writer_class = WRITERS[report.file_format]
+    sections = scope.sections()
+    progress = _Progress(report.pk, sum(summary[section.name]['total'] for section in sections))
+    # Only hashed inputs: the file is shared by every identical report
+    data_as_of = max((summary[section.name]['last_changed'] or '' for section in sections), default='')
+    meta = [
+        ('Type', report.get_type_display()),
+        ('View', report.get_view_display()),
+        ('Frameworks', scope.framework_names or 'All'),
+        ('Date range start', report.date_range_start),
+        ('Date range end', report.date_range_end),
+        ('Data as of', data_as_of or None),
+    ]
+    title = f"{report.get_type_display()} report"
+
+    counts = {}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+    try:
+        with tmp_path.open('wb', buffering=WRITE_BUFFER_SIZE) as fh:
+            writer = writer_class(fh, title, meta)
+            for section in sections:
+                writer.begin_section(section.name, section.columns)
+                rows = scope.queryset(section).order_by(section.order_by).values_list(*section.columns)
+                written = 0
+                for values in rows.iterator(chunk_size=chunk_size):
+                    writer.write_row(values)
+                    written += 1
+                    if written % chunk_size == 0:
+                        progress.advance(chunk_size)
+                progress.advance(written % chunk_size)
+                writer.end_section()
+                counts[section.name] = written
+            writer.close(summary)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return counts
+
+
+def generate_report(report_id, chunk_size=None):
+    """
+    Generate (or reuse) the artifact of a report and mark it ready.
+
+    Args:
+        report_id: ComplianceReport primary key
+        chunk_size: Rows fetched per server-side cursor round trip
+
+    Returns:
+        Dict with the final status, and whether an existing artifact was reused
+    """
+    chunk_size = chunk_size or getattr(settings, 'COMPLIANCE_REPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    report = ComplianceReport.objects.get(pk=report_id)
+    if report.status == 'ready':
+        return {'status': 'ready', 'report_id': report.report_id, 'reused': True}
+
+    if report.file_format not in WRITERS:
+        _mark_failed(report, f"Report format '{report.get_file_format_display()}' is not supported")
+        return {'status': 'failed', 'report_id': report.report_id, 'error': report.error_message}
+
+    try:
+        scope = ReportScope(report)
+        summary = summarize(scope)
+        report.content_hash = compute_content_hash(report, scope, summary)
+        ComplianceReport.objects.filter(pk=report.pk).update(
+            status='generating', progress=0, content_hash=report.content_hash, error_message='', updated_at=timezone.now()
+        )
+        path = get_artifact_path(report)
+
+        with _artifact_lock(report.content_hash):
+            reused = _is_reusable(path)
+            if reused:
+                counts = {section.name: summary[section.name]['total'] for section in scope.sections()}
+            else:
+                started = time.monotonic()
+                counts = _write_artifact(report, scope, summary, path, chunk_size)
+                logger.info(
+                    f"[ComplianceReports] Generated {report.report_id}: {sum(counts.values())} rows, "
+                    f"{path.stat().st_size} bytes in {time.monotonic() - started:.1f}s"
+                )
+    except Exception as e:
+        logger.error(f"[ComplianceReports] Error generating report {report.report_id}: {str(e)}")
+        _mark_failed(report, str(e))
+        return {'status': 'failed', 'report_id': report.report_id, 'error': str(e)}
+
+    now = timezone.now()
+    updates = {
+        'status': 'ready',
+        'progress': 100,
+        'generated_at': now,
+        'generated_by_id': report.created_by_id,
+        'file_size': path.stat().st_size,
+        'file_url': '',
+        'download_url': '',
+        'summary': {**summary, 'reused_artifact': reused},
+        'updated_at': now,
+    }
+    for section in SECTIONS:
+        updates[section.count_field] = counts.get(section.name)
+    ComplianceReport.objects.filter(pk=report.pk).update(**updates)
+    return {'status': 'ready', 'report_id': report.report_id, 'reused': reused, 'rows': sum(counts.values())}
+
+
+def _mark_failed(report, message):
+    ComplianceReport.objects.filter(pk=report.pk).update(
+        status='failed', error_message=message, retry_count=F('retry_count') + 1, updated_at=timezone.now()
+    )
+    report.status, report.error_message = 'failed', message
@@ -0,0 +1,152 @@
+"""
+Django management command to benchmark compliance report generation.
+
+Seeds a synthetic tenant (one framework, its controls, evidence mapped to
+them, and policies) inside a transaction, generates a report with every
+section in each requested format, reports throughput and artifact size, and
+rolls everything back. ``--memory`` adds a second pass under tracemalloc to
+report the peak Python memory of each format (slower).
+
+Usage:
+    python manage.py benchmark_report_generation
+    python manage.py benchmark_report_generation --evidence 50000 --formats pdf,csv --memory
+"""
+
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
+from compliance_evidence.models import ComplianceEvidence, ComplianceEvidenceControlMapping
+from compliance_frameworks.models import ComplianceFramework
+from compliance_policies.models import CompliancePolicy
+from compliance_reports.generation import generate_report, get_artifact_path
+from compliance_reports.models import ComplianceReport, ComplianceReportFrameworkMapping
+from compliance_reports.writers import WRITERS
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark streamed compliance report generation on a synthetic tenant (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evidence', type=int, default=50000, help='Evidence items (default: 50000)')
+        parser.add_argument('--controls', type=int, default=500, help='Controls (default: 500)')
+        parser.add_argument('--policies', type=int, default=100, help='Policies (default: 100)')
+        parser.add_argument('--formats', default='json,csv,html,pdf,zip', help='Comma-separated formats')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows per cursor round trip')
+        parser.add_argument('--memory', action='store_true', help='Also measure peak Python memory per format')
+
+    def handle(self, *args, **options):
+        formats = [fmt.strip() for fmt in options['formats'].split(',') if fmt.strip()]
+        unknown = [fmt for fmt in formats if fmt not in WRITERS]
+        if unknown:
+            raise CommandError(f"Unsupported formats: {', '.join(unknown)}")
+
+        try:
+            with tempfile.TemporaryDirectory() as reports_dir, override_settings(COMPLIANCE_REPORTS_DIR=reports_dir):
+                with transaction.atomic():
+                    framework = self._seed(options)
+                    for fmt in formats:
+                        self._run(framework, fmt, options)
+                    raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _seed(self, options):
+        started = time.monotonic()
+        org_id = uuid.uuid4()
+        tag = uuid.uuid4().hex[:8]
+        framework = ComplianceFramework.objects.create(
+            name=f'Benchmark {tag}', code=f'BENCH-{tag}', category='security', organization_id=org_id
+        )
+        controls = ComplianceControl.objects.bulk_create([
+            ComplianceControl(
+                control_id=f'BENCH-{tag}-{i:05d}', name=f'Benchmark control {i}', description='Synthetic control',
+                status=('pass', 'fail', 'partial', 'not_evaluated')[i % 4], organization_id=org_id,
+            )
+            for i in range(options['controls'])
+        ], batch_size=1000)
+        ComplianceControlFrameworkMapping.objects.bulk_create([
+            ComplianceControlFrameworkMapping(control=control, framework_id=framework.id, framework_name=framework.name)
+            for control in controls
+        ], batch_size=1000)
+
+        batch_size = 5000
+        for start in range(0, options['evidence'], batch_size):
+            evidence = ComplianceEvidence.objects.bulk_create([
+                ComplianceEvidence(
+                    evidence_id=f'BENCH-{tag}-EV-{i:07d}', name=f'Benchmark evidence {i}',
+                    description='Synthetic evidence', source='automated', source_type='dast',
+                    source_name='ZAP', organization_id=org_id,
+                )
+                for i in range(start, min(start + batch_size, options['evidence']))
+            ])
+            ComplianceEvidenceControlMapping.objects.bulk_create([
+                ComplianceEvidenceControlMapping(
+                    evidence=item, control_id=controls[i % len(controls)].id,
+                    control_name=controls[i % len(controls)].name,
+                    framework_id=framework.id, framework_name=framework.name,
+                )
+                for i, item in enumerate(evidence, start)
+            ])
+
+        CompliancePolicy.objects.bulk_create([
+            CompliancePolicy(
+                policy_id=f'BENCH-{tag}-POL-{i:04d}', name=f'Benchmark policy {i}', type='security',
+                content='Synthetic policy', control_ids=[controls[i % len(controls)].id], organization_id=org_id,
+            )
+            for i in range(options['policies'])
+        ])
+        self.stdout.write(
+            f"Seeded {options['controls']} controls, {options['evidence']} evidence, "
+            f"{options['policies']} policies in {time.monotonic() - started:.1f}s"
+        )
+        return framework
+
+    def _create_report(self, framework, fmt):
+        report = ComplianceReport.objects.create(
+            report_id=f'BENCH-{uuid.uuid4().hex[:12].upper()}', name='Benchmark report', type='auditor_report',
+            view='auditor', includes_controls=True, includes_evidence=True, includes_policies=True,
+            file_format=fmt, organization_id=framework.organization_id,
+        )
+        ComplianceReportFrameworkMapping.objects.create(
+            report=report, framework_id=framework.id, framework_name=framework.name
+        )
+        return report
+
+    def _generate(self, framework, fmt, options):
+        report = self._create_report(framework, fmt)
+        started = time.monotonic()
+        result = generate_report(report.pk, chunk_size=options['chunk_size'])
+        elapsed = time.monotonic() - started
+        if result['status'] != 'ready':
+            raise CommandError(f"{fmt} report failed: {result.get('error')}")
+        report.refresh_from_db()
+        path = get_artifact_path(report)
+        path.unlink()
+        return result, elapsed, report.file_size
+
+    def _run(self, framework, fmt, options):
+        result, elapsed, size = self._generate(framework, fmt, options)
+        self.stdout.write(
+            f"{fmt:>5}: {result['rows']} rows in {elapsed:.2f}s "
+            f"({result['rows'] / elapsed:,.0f} rows/s, {size / elapsed / 1e6:.1f} MB/s), {size / 1e6:.1f} MB"
+        )
+
+        if options['memory']:
+            tracemalloc.start()
+            try:
+                self._generate(framework, fmt, options)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.stdout.write(f"{fmt:>5}: peak Python memory {peak / 1e6:.1f} MB")
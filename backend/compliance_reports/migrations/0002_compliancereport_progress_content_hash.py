@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compliancereport',
+            name='progress',
+            field=models.IntegerField(default=0, help_text='Generation progress (0-100)'),
+        ),
+        migrations.AddField(
+            model_name='compliancereport',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of the report parameters and source data, shared by identical reports', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='compliancereport',
+            name='file_format',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('docx', 'DOCX'), ('html', 'HTML'), ('json', 'JSON'), ('csv', 'CSV'), ('zip', 'ZIP'), ('readonly_link', 'Read-only Link')], default='pdf', help_text='Report file format', max_length=20),
+        ),
+    ]
@@ -31,6 +31,8 @@ class ComplianceReport(models.Model):
         ('pdf', 'PDF'),
         ('docx', 'DOCX'),
         ('html', 'HTML'),
+        ('json', 'JSON'),
+        ('csv', 'CSV'),
         ('zip', 'ZIP'),
         ('readonly_link', 'Read-only Link'),
     ]
@@ -52,6 +54,7 @@ class ComplianceReport(models.Model):
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', help_text='Report status')
+    progress = models.IntegerField(default=0, help_text='Generation progress (0-100)')
     
     # Content & Scope
     view = models.CharField(max_length=20, choices=VIEW_CHOICES, help_text='Report view type')
@@ -82,6 +85,7 @@ class ComplianceReport(models.Model):
     file_size = models.BigIntegerField(null=True, blank=True, help_text='File size in bytes')
     file_url = models.URLField(max_length=500, blank=True, help_text='URL to report file')
     download_url = models.URLField(max_length=500, blank=True, help_text='Download URL')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text='Hash of the report parameters and source data, shared by identical reports')
     
     # Summary stats (stored as JSON)
     summary = models.JSONField(default=dict, blank=True, help_text='Report summary statistics')
@@ -35,6 +35,7 @@ class ComplianceReportSerializer(serializers.ModelSerializer):
             'description',
             'type',
             'status',
+            'progress',
             'view',
             'date_range_start',
             'date_range_end',
@@ -67,6 +68,11 @@ class ComplianceReportSerializer(serializers.ModelSerializer):
             'is_public',
         ]
 
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Prefetch the mappings and shares the serializer reads"""
+        return queryset.prefetch_related('framework_mappings', 'shares')
+
     def get_framework_ids(self, obj):
         return [str(mapping.framework_id) for mapping in obj.framework_mappings.all()]
 
@@ -74,7 +80,8 @@ class ComplianceReportSerializer(serializers.ModelSerializer):
         return [mapping.framework_name for mapping in obj.framework_mappings.all()]
 
     def get_share_count(self, obj):
-        return obj.shares.count()
+        # Reads the prefetched shares instead of a COUNT query per report
+        return len(obj.shares.all())
 
     def get_is_public(self, obj):
         return False
@@ -0,0 +1,22 @@
+"""
+Deletes a report's artifact with the last report that points at it.
+
+Artifacts are shared by identical reports (see compliance_reports.generation),
+so the file is only removed once no other report has the same content hash,
+after the delete commits.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+
+def _report_deleted(sender, instance, **kwargs):
+    from .generation import delete_unreferenced_artifact
+    content_hash = instance.content_hash
+    if content_hash:
+        transaction.on_commit(lambda: delete_unreferenced_artifact(content_hash))
+
+
+def connect_artifact_signals():
+    from .models import ComplianceReport
+    post_delete.connect(_report_deleted, sender=ComplianceReport, dispatch_uid='compliance_reports:artifact_cleanup')
@@ -0,0 +1,57 @@
+"""
+Background generation of compliance report artifacts.
+
+ComplianceReportViewSet queues generate_compliance_report once a report is
+created; see compliance_reports.generation for how the artifact is built.
+prune_compliance_report_artifacts runs daily from beat.
+"""
+
+import logging
+import threading
+from .generation import generate_report, prune_artifacts
+
+logger = logging.getLogger(__name__)
+
+# Try to import Celery, fallback to no-op if not available
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    # Celery not installed - create a dummy decorator
+    CELERY_AVAILABLE = False
+    def shared_task(*args, **kwargs):
+        def decorator(func):
+            # Return function unchanged if Celery not available
+            return func
+        return decorator
+    logger.warning('Celery not available. Compliance reports will be generated in background threads.')
+
+
+@shared_task(name='compliance_reports.tasks.generate_compliance_report')
+def generate_compliance_report(report_id):
+    """
+    Generate the artifact of one compliance report.
+
+    Args:
+        report_id: ComplianceReport primary key (as a string)
+    """
+    return generate_report(report_id)
+
+
+@shared_task(name='compliance_reports.tasks.prune_compliance_report_artifacts')
+def prune_compliance_report_artifacts():
+    """
+    Periodic task: delete report artifacts that no report points at.
+    """
+    return {'status': 'success', 'deleted': prune_artifacts()}
+
+
+def dispatch_report_generation(report_id):
+    report_id = str(report_id)
+    if CELERY_AVAILABLE:
+        try:
+            generate_compliance_report.delay(report_id)
+            return
+        except Exception as e:
+            logger.warning(f"[ComplianceReports] Could not queue report generation, running it in a thread: {str(e)}")
+    threading.Thread(target=generate_compliance_report, args=(report_id,), daemon=True).start()
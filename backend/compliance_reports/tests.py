@@ -1,3 +1,216 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import zipfile
+from datetime import timedelta
 
-# Create your tests here.
+import pytest
+from django.utils import timezone
+
+from compliance_controls.models import ComplianceControl, ComplianceControlFrameworkMapping
+from compliance_evidence.models import ComplianceEvidence, ComplianceEvidenceControlMapping
+from compliance_frameworks.models import ComplianceFramework
+from compliance_policies.models import CompliancePolicy
+from compliance_reports.generation import generate_report, get_artifact_path, is_generation_stale, prune_artifacts
+from compliance_reports.models import ComplianceReport, ComplianceReportFrameworkMapping
+from compliance_reports.writers import WRITERS, PdfReportWriter
+
+
+def write_artifact(writer_class, rows=200):
+    fh = io.BytesIO()
+    writer = writer_class(fh, "Readiness (Q1)", [("Report ID", "RPT-1"), ("Frameworks", ["SOC 2"])])
+    writer.begin_section("controls", ["control_id", "name", "status"])
+    for i in range(rows):
+        writer.write_row((f"CC{i}", "Access (review) \\ MFA", "pass"))
+    writer.end_section()
+    writer.close({"controls": {"total": rows, "by_status": {"pass": rows}}})
+    return fh.getvalue()
+
+
+class TestReportWriters:
+    def test_pdf_cross_reference_points_at_objects(self):
+        data = write_artifact(PdfReportWriter)
+
+        assert data.startswith(b"%PDF-1.4") and data.endswith(b"%EOF\n")
+        xref = int(re.search(rb"startxref\n(\d+)\n", data).group(1))
+        lines = data[xref:].split(b"\n")
+        size = int(lines[1].split()[1])
+        for obj_id, entry in enumerate(lines[3:size + 2], start=1):
+            assert data[int(entry[:10]):].startswith(b"%d 0 obj" % obj_id)
+        assert data.count(b"/Type /Page ") > 1
+        assert b"Access \\(review\\) \\\\ MFA" in data
+
+    def test_json_and_zip_artifacts(self):
+        report = json.loads(write_artifact(WRITERS["json"]))
+        assert len(report["sections"]["controls"]) == 200
+        assert report["sections"]["controls"][0] == {"control_id": "CC0", "name": "Access (review) \\ MFA", "status": "pass"}
+        assert report["summary"]["controls"]["total"] == 200
+
+        archive = zipfile.ZipFile(io.BytesIO(write_artifact(WRITERS["zip"])))
+        assert archive.namelist() == ["controls.csv", "report.json"]
+        assert archive.read("controls.csv").decode().splitlines()[0] == "control_id,name,status"
+
+
+@pytest.mark.django_db
+class TestReportGeneration:
+    @pytest.fixture
+    def report_dir(self, settings, tmp_path):
+        settings.COMPLIANCE_REPORTS_DIR = str(tmp_path)
+        settings.COMPLIANCE_INDEX_AUTO_REFRESH = False
+        settings.COMPLIANCE_ROLLUPS_AUTO_REFRESH = False
+        return tmp_path
+
+    @pytest.fixture
+    def framework(self):
+        framework = ComplianceFramework.objects.create(name="SOC 2", code="SOC2", category="security")
+        other = ComplianceFramework.objects.create(name="HIPAA", code="HIPAA", category="industry")
+        controls = ComplianceControl.objects.bulk_create([
+            ComplianceControl(control_id=f"CC{i}", name=f"Control {i}", description="Control",
+                              status="pass" if i % 2 else "fail")
+            for i in range(10)
+        ])
+        ComplianceControlFrameworkMapping.objects.bulk_create([
+            ComplianceControlFrameworkMapping(control=control, framework_id=framework.id if i < 8 else other.id,
+                                              framework_name="SOC 2")
+            for i, control in enumerate(controls)
+        ])
+        evidence = ComplianceEvidence.objects.bulk_create([
+            ComplianceEvidence(evidence_id=f"EV-{i:03d}", name=f"Evidence {i}", source="automated",
+                               source_type="dast", source_name="ZAP")
+            for i in range(25)
+        ])
+        ComplianceEvidenceControlMapping.objects.bulk_create([
+            ComplianceEvidenceControlMapping(evidence=item, control_id=controls[i % 10].id, control_name="Control",
+                                             framework_id=framework.id if i % 10 < 8 else other.id,
+                                             framework_name="SOC 2")
+            for i, item in enumerate(evidence)
+        ])
+        CompliancePolicy.objects.create(policy_id="POL-1", name="Access policy", type="security",
+                                        content="Policy", control_ids=[controls[0].id])
+        CompliancePolicy.objects.create(policy_id="POL-2", name="HIPAA policy", type="security",
+                                        content="Policy", control_ids=[controls[9].id])
+        return framework
+
+    def create_report(self, framework, report_id, file_format="json"):
+        report = ComplianceReport.objects.create(
+            report_id=report_id, name="SOC 2 readiness", type="readiness", view="auditor",
+            includes_controls=True, includes_evidence=True, includes_policies=True, file_format=file_format,
+        )
+        ComplianceReportFrameworkMapping.objects.create(report=report, framework_id=framework.id, framework_name="SOC 2")
+        return report
+
+    def test_generates_artifact_for_selected_frameworks(self, report_dir, framework):
+        report = self.create_report(framework, "RPT-1")
+
+        result = generate_report(report.pk, chunk_size=7)
+        assert result == {"status": "ready", "report_id": "RPT-1", "reused": False, "rows": 30}
+
+        report.refresh_from_db()
+        assert (report.status, report.progress) == ("ready", 100)
+        assert (report.control_count, report.evidence_count, report.policy_count) == (8, 21, 1)
+        assert report.summary["controls"]["by_status"] == {"fail": 4, "pass": 4}
+
+        path = get_artifact_path(report)
+        assert path.parent == report_dir and report.file_size == path.stat().st_size
+        # Served only through the download action, never by URL
+        assert report.file_url == ""
+        artifact = json.loads(path.read_text())
+        assert [row["control_id"] for row in artifact["sections"]["controls"]] == [f"CC{i}" for i in range(8)]
+        assert [row["policy_id"] for row in artifact["sections"]["policies"]] == ["POL-1"]
+        assert list(report_dir.iterdir()) == [path]
+
+    def test_identical_request_reuses_artifact(self, report_dir, framework, monkeypatch):
+        first = self.create_report(framework, "RPT-1")
+        generate_report(first.pk)
+        first.refresh_from_db()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("artifact regenerated")
+
+        monkeypatch.setattr("compliance_reports.generation._write_artifact", fail)
+        second = self.create_report(framework, "RPT-2")
+        assert generate_report(second.pk)["reused"] is True
+        second.refresh_from_db()
+        assert second.status == "ready"
+        assert second.content_hash == first.content_hash
+        assert second.evidence_count == 21
+        # The shared file carries nothing specific to the report that generated it
+        artifact = get_artifact_path(second).read_text()
+        assert "RPT-1" not in artifact and "SOC 2 readiness" not in artifact
+
+        # Changed data is a different artifact
+        ComplianceControl.objects.filter(control_id="CC0").update(status="pass")
+        third = self.create_report(framework, "RPT-3")
+        assert generate_report(third.pk)["status"] == "failed"
+        third.refresh_from_db()
+        assert third.content_hash != first.content_hash
+        assert third.error_message == "artifact regenerated"
+
+    def test_edited_evidence_not_reused(self, report_dir, framework):
+        first = self.create_report(framework, "RPT-1")
+        generate_report(first.pk)
+        first.refresh_from_db()
+
+        evidence = ComplianceEvidence.objects.get(evidence_id="EV-001")
+        evidence.name = "Renamed evidence"
+        evidence.save()
+        second = self.create_report(framework, "RPT-2")
+        assert generate_report(second.pk)["reused"] is False
+        second.refresh_from_db()
+        assert second.content_hash != first.content_hash
+        assert "Renamed evidence" in get_artifact_path(second).read_text()
+
+    def test_artifact_deleted_with_last_report(self, report_dir, framework, django_capture_on_commit_callbacks):
+        first = self.create_report(framework, "RPT-1")
+        second = self.create_report(framework, "RPT-2")
+        generate_report(first.pk)
+        generate_report(second.pk)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        path = get_artifact_path(first)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert path.exists()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.delete()
+        assert not path.exists()
+
+    def test_prune_removes_unreferenced_artifacts(self, report_dir, framework, settings):
+        settings.CELERY_TASK_TIME_LIMIT = 60
+        report = self.create_report(framework, "RPT-1")
+        generate_report(report.pk)
+        report.refresh_from_db()
+        orphan = report_dir / f"{'0' * 64}.json"
+        orphan.write_text("{}")
+        partial = report_dir / f"{'1' * 64}.json.abc.tmp"
+        partial.write_text("{")
+        fresh_partial = report_dir / f"{'2' * 64}.json.def.tmp"
+        fresh_partial.write_text("{")
+        stale = (timezone.now() - timedelta(minutes=5)).timestamp()
+        os.utime(partial, (stale, stale))
+
+        assert prune_artifacts() == 2
+        assert sorted(report_dir.iterdir()) == sorted([get_artifact_path(report), fresh_partial])
+
+    def test_unsupported_format_fails(self, report_dir, framework):
+        report = self.create_report(framework, "RPT-1", file_format="docx")
+
+        assert generate_report(report.pk)["status"] == "failed"
+        report.refresh_from_db()
+        assert report.status == "failed"
+        assert report.retry_count == 1
+        assert "DOCX" in report.error_message
+
+    def test_abandoned_generation_is_stale(self, report_dir, framework, settings):
+        settings.CELERY_TASK_TIME_LIMIT = 60
+        report = self.create_report(framework, "RPT-1")
+        ComplianceReport.objects.filter(pk=report.pk).update(status="generating", updated_at=timezone.now())
+        report.refresh_from_db()
+        assert not is_generation_stale(report)
+
+        ComplianceReport.objects.filter(pk=report.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        report.refresh_from_db()
+        assert is_generation_stale(report)
@@ -3,7 +3,9 @@ API Views for Compliance Reports
 """
 import uuid
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from django.http import FileResponse
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
 from rest_framework import viewsets, status
@@ -17,6 +19,9 @@ from .models import (
     ComplianceReportShare,
 )
 from .serializers import ComplianceReportSerializer, ComplianceReportCreateSerializer
+from .generation import get_artifact_path, is_generation_stale
+from .tasks import dispatch_report_generation
+from .writers import WRITERS
 from compliance_frameworks.models import ComplianceFramework
 from users.permission_classes import HasFeaturePermission
 
@@ -41,7 +46,7 @@ class ComplianceReportViewSet(viewsets.ModelViewSet):
     queryset = ComplianceReport.objects.all().order_by('-created_at')
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy', 'download', 'share']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'download', 'share', 'generate']:
             permission_classes = [IsAuthenticated, HasFeaturePermission('compliance.reports.export')]
         else:
             permission_classes = [IsAuthenticated, HasFeaturePermission('compliance.reports.view')]
@@ -53,9 +58,8 @@ class ComplianceReportViewSet(viewsets.ModelViewSet):
         return ComplianceReportSerializer
 
     def get_queryset(self):
-        queryset = ComplianceReport.objects.all().prefetch_related(
-            'framework_mappings',
-            'shares',
+        queryset = ComplianceReportSerializer.setup_queryset(
+            ComplianceReport.objects.all()
         ).order_by('-created_at')
 
         search = (self.request.query_params.get('search') or '').strip()
@@ -124,17 +128,43 @@ class ComplianceReportViewSet(viewsets.ModelViewSet):
             if mappings:
                 ComplianceReportFrameworkMapping.objects.bulk_create(mappings)
 
+        transaction.on_commit(lambda: dispatch_report_generation(report.id))
+
         response_serializer = ComplianceReportSerializer(report)
         headers = self.get_success_headers(response_serializer.data)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
+        """Stream the generated artifact (only ever served here, behind the export permission)."""
         report = self.get_object()
-        url = report.download_url or report.file_url
-        if not url:
+        path = get_artifact_path(report) if report.status == 'ready' else None
+        if path is None or not path.exists():
             return Response({'error': 'Report file not available'}, status=status.HTTP_404_NOT_FOUND)
-        return Response({'download_url': url}, status=status.HTTP_200_OK)
+        return FileResponse(
+            path.open('rb'),
+            as_attachment=True,
+            filename=f"{report.report_id}.{path.suffix.lstrip('.')}",
+            content_type=WRITERS[report.file_format].content_type,
+        )
+
+    @action(detail=True, methods=['post'])
+    def generate(self, request, pk=None):
+        """Queue (re)generation of a pending or failed report, or of one whose worker died."""
+        report = self.get_object()
+        if report.status == 'ready':
+            return Response({'error': 'Report is already generated'}, status=status.HTTP_409_CONFLICT)
+        if report.status == 'generating' and not is_generation_stale(report):
+            return Response({'error': 'Report is already being generated'}, status=status.HTTP_409_CONFLICT)
+
+        report.status = 'pending'
+        report.progress = 0
+        report.error_message = ''
+        report.updated_by = request.user
+        report.save(update_fields=['status', 'progress', 'error_message', 'updated_by', 'updated_at'])
+        transaction.on_commit(lambda: dispatch_report_generation(report.id))
+
+        return Response(ComplianceReportSerializer(report).data, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['post'])
     def share(self, request, pk=None):
@@ -0,0 +1,312 @@
+"""
+Streaming writers for compliance report artifacts.
+
+Each writer is fed one section at a time (begin_section, write_row for each
+row, end_section) and finished with close(summary), writing to a binary file
+handle as it goes so a report never has to fit in memory. Rows are value
+tuples in the order of the section's columns.
+"""
+
+import csv
+import html
+import io
+import json
+import zipfile
+from datetime import date, datetime
+
+
+def format_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return ', '.join(format_cell(item) for item in value)
+    return str(value)
+
+
+def flatten_summary(summary, prefix=''):
+    """{'controls': {'by_status': {'pass': 3}}} -> [('controls.by_status.pass', 3)]"""
+    items = []
+    for key, value in summary.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            items.extend(flatten_summary(value, f'{name}.'))
+        else:
+            items.append((name, value))
+    return items
+
+
+class ReportWriter:
+    """Base class; ``meta`` is a list of (label, value) pairs describing the report."""
+
+    extension = None
+    content_type = 'application/octet-stream'
+
+    def __init__(self, fh, title, meta):
+        self.fh = fh
+        self.title = title
+        self.meta = meta
+
+    def begin_section(self, name, columns):
+        raise NotImplementedError
+
+    def write_row(self, values):
+        raise NotImplementedError
+
+    def end_section(self):
+        pass
+
+    def close(self, summary):
+        raise NotImplementedError
+
+
+class JsonReportWriter(ReportWriter):
+    extension = 'json'
+    content_type = 'application/json'
+
+    def __init__(self, fh, title, meta):
+        super().__init__(fh, title, meta)
+        self.out = io.TextIOWrapper(fh, encoding='utf-8')
+        report = {'title': title, **{label: format_cell(value) for label, value in meta}}
+        self.out.write('{"report": %s, "sections": {' % json.dumps(report))
+        self.sections = 0
+
+    def begin_section(self, name, columns):
+        self.columns = columns
+        self.rows = 0
+        self.out.write('%s%s: [' % (', ' if self.sections else '', json.dumps(name)))
+        self.sections += 1
+
+    def write_row(self, values):
+        row = dict(zip(self.columns, values))
+        self.out.write('%s\n%s' % (',' if self.rows else '', json.dumps(row, default=format_cell)))
+        self.rows += 1
+
+    def end_section(self):
+        self.out.write(']')
+
+    def close(self, summary):
+        self.out.write('}, "summary": %s}\n' % json.dumps(summary, default=format_cell))
+        self.out.flush()
+        self.out.detach()
+
+
+class CsvReportWriter(ReportWriter):
+    """One CSV; each section starts with its own header row, the first column names the section."""
+
+    extension = 'csv'
+    content_type = 'text/csv'
+
+    def __init__(self, fh, title, meta):
+        super().__init__(fh, title, meta)
+        self.out = io.TextIOWrapper(fh, encoding='utf-8', newline='')
+        self.csv = csv.writer(self.out)
+        self.csv.writerow(['report', title])
+        for label, value in meta:
+            self.csv.writerow(['report', label, format_cell(value)])
+
+    def begin_section(self, name, columns):
+        self.section = name
+        self.csv.writerow([])
+        self.csv.writerow(['section', *columns])
+
+    def write_row(self, values):
+        self.csv.writerow([self.section, *(format_cell(value) for value in values)])
+
+    def close(self, summary):
+        self.csv.writerow([])
+        self.csv.writerow(['summary', 'metric', 'value'])
+        for metric, value in flatten_summary(summary):
+            self.csv.writerow(['summary', metric, format_cell(value)])
+        self.out.flush()
+        self.out.detach()
+
+
+class ZipReportWriter(ReportWriter):
+    """A ZIP with one CSV per section plus report.json (metadata and summary)."""
+
+    extension = 'zip'
+    content_type = 'application/zip'
+
+    def __init__(self, fh, title, meta):
+        super().__init__(fh, title, meta)
+        self.archive = zipfile.ZipFile(fh, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.member = None
+
+    def begin_section(self, name, columns):
+        self.member = io.TextIOWrapper(
+            self.archive.open(f'{name}.csv', 'w', force_zip64=True), encoding='utf-8', newline=''
+        )
+        self.csv = csv.writer(self.member)
+        self.csv.writerow(columns)
+
+    def write_row(self, values):
+        self.csv.writerow([format_cell(value) for value in values])
+
+    def end_section(self):
+        self.member.close()
+        self.member = None
+
+    def close(self, summary):
+        report = {'title': self.title, **{label: format_cell(value) for label, value in self.meta}}
+        self.archive.writestr('report.json', json.dumps({'report': report, 'summary': summary}, indent=2, default=format_cell))
+        self.archive.close()
+
+
+class HtmlReportWriter(ReportWriter):
+    extension = 'html'
+    content_type = 'text/html'
+
+    def __init__(self, fh, title, meta):
+        super().__init__(fh, title, meta)
+        self.out = io.TextIOWrapper(fh, encoding='utf-8')
+        self.out.write(
+            '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title>'
+            '<style>body{font-family:sans-serif;font-size:13px}table{border-collapse:collapse}'
+            'th,td{border:1px solid #ccc;padding:2px 6px;text-align:left}</style>'
+            f'</head><body>\n<h1>{html.escape(title)}</h1>\n<dl>'
+        )
+        for label, value in meta:
+            self.out.write(f'<dt>{html.escape(label)}</dt><dd>{html.escape(format_cell(value))}</dd>')
+        self.out.write('</dl>\n')
+
+    def begin_section(self, name, columns):
+        header = ''.join(f'<th>{html.escape(column)}</th>' for column in columns)
+        self.out.write(f'<h2>{html.escape(name.title())}</h2>\n<table><thead><tr>{header}</tr></thead><tbody>\n')
+
+    def write_row(self, values):
+        cells = ''.join(f'<td>{html.escape(format_cell(value))}</td>' for value in values)
+        self.out.write(f'<tr>{cells}</tr>\n')
+
+    def end_section(self):
+        self.out.write('</tbody></table>\n')
+
+    def close(self, summary):
+        self.out.write('<h2>Summary</h2>\n<table><tbody>\n')
+        for metric, value in flatten_summary(summary):
+            self.out.write(f'<tr><th>{html.escape(metric)}</th><td>{html.escape(format_cell(value))}</td></tr>\n')
+        self.out.write('</tbody></table>\n</body></html>\n')
+        self.out.flush()
+        self.out.detach()
+
+
+def _pdf_text(text, max_chars):
+    text = ' '.join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars - 3] + '...'
+    data = text.encode('cp1252', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class PdfReportWriter(ReportWriter):
+    """
+    Plain-text PDF (A4 landscape, Helvetica), one line per row.
+
+    Each page is written as soon as it is full; only the byte offsets of the
+    objects written so far are kept for the cross-reference table.
+    """
+
+    extension = 'pdf'
+    content_type = 'application/pdf'
+
+    PAGE_WIDTH = 842
+    PAGE_HEIGHT = 595
+    MARGIN = 36
+    FONT_SIZE = 7
+    LEADING = 9
+    MAX_CHARS = 220
+
+    # Fixed object numbers; pages and their content streams follow
+    CATALOG_ID, PAGES_ID, FONT_ID, BOLD_FONT_ID = 1, 2, 3, 4
+
+    def __init__(self, fh, title, meta):
+        super().__init__(fh, title, meta)
+        self.position = 0
+        self.offsets = {}
+        self.next_id = self.BOLD_FONT_ID + 1
+        self.page_ids = []
+        self.lines = []
+        self.lines_per_page = (self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._line(title, bold=True)
+        for label, value in meta:
+            self._line(f'{label}: {format_cell(value)}')
+
+    def _write(self, data):
+        self.fh.write(data)
+        self.position += len(data)
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        self._write(b'%d 0 obj\n%s\nendobj\n' % (obj_id, body))
+
+    def _line(self, text, bold=False):
+        self.lines.append((bold, text))
+        if len(self.lines) >= self.lines_per_page:
+            self._flush_page()
+
+    def _flush_page(self):
+        if not self.lines:
+            return
+        top = self.PAGE_HEIGHT - self.MARGIN - self.FONT_SIZE
+        parts = [b'BT', b'%d TL' % self.LEADING, b'%d %d Td' % (self.MARGIN, top)]
+        font = None
+        for bold, text in self.lines:
+            if bold is not font:
+                parts.append(b'/%s %d Tf' % (b'F2' if bold else b'F1', self.FONT_SIZE))
+                font = bold
+            parts.append(b'(%s) Tj T*' % _pdf_text(text, self.MAX_CHARS))
+        parts.append(b'ET')
+        stream = b'\n'.join(parts)
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        self._object(page_id, (
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>'
+        ) % (self.PAGES_ID, self.PAGE_WIDTH, self.PAGE_HEIGHT, self.FONT_ID, self.BOLD_FONT_ID, content_id))
+        self.page_ids.append(page_id)
+        self.lines = []
+
+    def begin_section(self, name, columns):
+        self._line('')
+        self._line(name.title(), bold=True)
+        self._line(' | '.join(columns), bold=True)
+
+    def write_row(self, values):
+        self._line(' | '.join(format_cell(value) for value in values))
+
+    def close(self, summary):
+        self._line('')
+        self._line('Summary', bold=True)
+        for metric, value in flatten_summary(summary):
+            self._line(f'{metric}: {format_cell(value)}')
+        self._flush_page()
+
+        for font_id, base_font in ((self.FONT_ID, b'Helvetica'), (self.BOLD_FONT_ID, b'Helvetica-Bold')):
+            self._object(font_id, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % base_font)
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        self._object(self.PAGES_ID, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.page_ids)))
+        self._object(self.CATALOG_ID, b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES_ID)
+
+        xref_position = self.position
+        entries = [b'xref\n0 %d\n' % self.next_id, b'0000000000 65535 f \n']
+        entries.extend(b'%010d 00000 n \n' % self.offsets[obj_id] for obj_id in range(1, self.next_id))
+        self._write(b''.join(entries))
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%EOF\n' % (
+            self.next_id, self.CATALOG_ID, xref_position
+        ))
+
+
+WRITERS = {
+    'pdf': PdfReportWriter,
+    'html': HtmlReportWriter,
+    # Read-only links render the same self-contained page
+    'readonly_link': HtmlReportWriter,
+    'json': JsonReportWriter,
+    'csv': CsvReportWriter,
+    'zip': ZipReportWriter,
+}
@@ -67,6 +67,31 @@ if app is not None:
                 'task': 'monitoring.tasks.cleanup_monitoring_data',
                 'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
             },
+            # Check active admin API endpoints every minute (each endpoint honours its own interval)
+            'check-api-endpoints': {
+                'task': 'api_monitoring.tasks.check_api_endpoints',
+                'schedule': 60.0,  # Every 60 seconds (1 minute)
+            },
+            # Requeue security scans whose worker went away, advance running audits and start queued scans every minute
+            'resume-security-audits': {
+                'task': 'security_monitoring.tasks.resume_security_audits',
+                'schedule': 60.0,  # Every 60 seconds (1 minute)
+            },
+            # Re-export compliance records the change signals missed every 15 minutes
+            'refresh-compliance-index': {
+                'task': 'compliance_controls.tasks.refresh_compliance_index',
+                'schedule': 900.0,  # Every 900 seconds (15 minutes)
+            },
+            # Delete compliance report artifacts no report points at daily at 4 AM
+            'prune-compliance-report-artifacts': {
+                'task': 'compliance_reports.tasks.prune_compliance_report_artifacts',
+                'schedule': crontab(hour=4, minute=0),  # Daily at 4 AM
+            },
+            # Requeue sitemap crawl sessions whose worker went away every 2 minutes
+            'resume-sitemap-crawl-sessions': {
+                'task': 'users.tasks.resume_sitemap_crawl_sessions',
+                'schedule': 120.0,  # Every 120 seconds (2 minutes)
+            },
         }
 
         @app.task(bind=True)
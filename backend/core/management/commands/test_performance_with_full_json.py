@@ -11,6 +11,242 @@ from performance_analysis.models import PerformanceAnalysis, NetworkRequest, Res
 
 TEST_URL = "https://example.com"
 
+
+def build_full_lighthouse_json():
+    """
+    Full Lighthouse JSON structure (realistic), shared with benchmark_lighthouse_parsing.
+    """
+    return {
+        'lighthouseResult': {
+            'networkRequests': [
+                {
+                    'url': 'https://example.com/',
+                    'resourceType': 'Document',
+                    'mimeType': 'text/html',
+                    'transferSize': 15234,
+                    'resourceSize': 45678,
+                    'statusCode': 200,
+                    'protocol': 'http/2',
+                    'timing': {
+                        'startTime': 0.0,
+                        'endTime': 0.523,
+                        'dnsStart': 0.0,
+                        'dnsEnd': 0.012,
+                        'connectStart': 0.012,
+                        'connectEnd': 0.045,
+                        'sslStart': 0.045,
+                        'sslEnd': 0.082,
+                        'sendStart': 0.082,
+                        'sendEnd': 0.085,
+                        'receiveHeadersEnd': 0.201,
+                    },
+                    'priority': 'VeryHigh',
+                    'renderBlockingStatus': 'blocking',
+                    'initiator': {'type': 'parser', 'url': ''},
+                    'fromCache': False,
+                    'fromServiceWorker': False,
+                },
+                {
+                    'url': 'https://example.com/style.css',
+                    'resourceType': 'Stylesheet',
+                    'mimeType': 'text/css',
+                    'transferSize': 25432,
+                    'resourceSize': 80123,
+                    'statusCode': 200,
+                    'protocol': 'http/2',
+                    'timing': {
+                        'startTime': 0.105,
+                        'endTime': 0.312,
+                        'dnsStart': 0.105,
+                        'dnsEnd': 0.107,
+                        'connectStart': 0.107,
+                        'connectEnd': 0.108,
+                        'sendStart': 0.108,
+                        'sendEnd': 0.109,
+                        'receiveHeadersEnd': 0.152,
+                    },
+                    'priority': 'High',
+                    'renderBlockingStatus': 'blocking',
+                    'initiator': {'type': 'parser', 'url': 'https://example.com/'},
+                    'fromCache': False,
+                    'fromServiceWorker': False,
+                },
+                {
+                    'url': 'https://example.com/script.js',
+                    'resourceType': 'Script',
+                    'mimeType': 'application/javascript',
+                    'transferSize': 50123,
+                    'resourceSize': 152345,
+                    'statusCode': 200,
+                    'protocol': 'http/2',
+                    'timing': {
+                        'startTime': 0.208,
+                        'endTime': 0.612,
+                        'dnsStart': 0.208,
+                        'dnsEnd': 0.210,
+                        'connectStart': 0.210,
+                        'connectEnd': 0.211,
+                        'sendStart': 0.211,
+                        'sendEnd': 0.212,
+                        'receiveHeadersEnd': 0.305,
+                    },
+                    'priority': 'High',
+                    'renderBlockingStatus': 'non-blocking',
+                    'initiator': {'type': 'parser', 'url': 'https://example.com/'},
+                    'fromCache': False,
+                    'fromServiceWorker': False,
+                },
+                {
+                    'url': 'https://example.com/image.jpg',
+                    'resourceType': 'Image',
+                    'mimeType': 'image/jpeg',
+                    'transferSize': 125432,
+                    'resourceSize': 125432,
+                    'statusCode': 200,
+                    'protocol': 'http/2',
+                    'timing': {
+                        'startTime': 0.315,
+                        'endTime': 0.823,
+                        'dnsStart': 0.315,
+                        'dnsEnd': 0.317,
+                        'connectStart': 0.317,
+                        'connectEnd': 0.318,
+                        'sendStart': 0.318,
+                        'sendEnd': 0.319,
+                        'receiveHeadersEnd': 0.425,
+                    },
+                    'priority': 'Medium',
+                    'renderBlockingStatus': 'non-blocking',
+                    'initiator': {'type': 'parser', 'url': 'https://example.com/'},
+                    'fromCache': False,
+                    'fromServiceWorker': False,
+                },
+            ],
+            'traceEvents': [
+                {
+                    'name': 'navigationStart',
+                    'cat': 'navigation',
+                    'ts': 0,
+                    'dur': 0,
+                    'ph': 'B',
+                    'pid': 1,
+                    'tid': 1,
+                    'args': {'frame': 'ABC123', 'url': 'https://example.com/'},
+                },
+                {
+                    'name': 'firstPaint',
+                    'cat': 'paint',
+                    'ts': 500000,
+                    'dur': 0,
+                    'ph': 'I',
+                    'pid': 1,
+                    'tid': 1,
+                    'args': {},
+                },
+                {
+                    'name': 'firstContentfulPaint',
+                    'cat': 'paint',
+                    'ts': 600000,
+                    'dur': 0,
+                    'ph': 'I',
+                    'pid': 1,
+                    'tid': 1,
+                    'args': {},
+                },
+                {
+                    'name': 'largestContentfulPaint',
+                    'cat': 'paint',
+                    'ts': 1200000,
+                    'dur': 0,
+                    'ph': 'I',
+                    'pid': 1,
+                    'tid': 1,
+                    'args': {},
+                },
+                {
+                    'name': 'domContentLoaded',
+                    'cat': 'navigation',
+                    'ts': 800000,
+                    'dur': 0,
+                    'ph': 'I',
+                    'pid': 1,
+                    'tid': 1,
+                    'args': {},
+                },
+                {
+                    'name': 'load',
+                    'cat': 'navigation',
+                    'ts': 1500000,
+                    'dur': 0,
+                    'ph': 'I',
+                    'pid': 1,
+                    'tid': 1,
+                    'args': {},
+                },
+            ],
+            'audits': {
+                'network-requests': {
+                    'details': {
+                        'items': [
+                            {
+                                'url': 'https://example.com/',
+                                'resourceType': 'Document',
+                                'transferSize': 15234,
+                                'resourceSize': 45678,
+                            },
+                            {
+                                'url': 'https://example.com/style.css',
+                                'resourceType': 'Stylesheet',
+                                'transferSize': 25432,
+                                'resourceSize': 80123,
+                            },
+                            {
+                                'url': 'https://example.com/script.js',
+                                'resourceType': 'Script',
+                                'transferSize': 50123,
+                                'resourceSize': 152345,
+                            },
+                        ]
+                    }
+                },
+                'unused-css-rules': {
+                    'details': {
+                        'items': [
+                            {
+                                'url': 'https://example.com/style.css',
+                                'wastedBytes': 15000,
+                                'wastedMs': 50.5,
+                            }
+                        ]
+                    }
+                },
+                'unused-javascript': {
+                    'details': {
+                        'items': [
+                            {
+                                'url': 'https://example.com/script.js',
+                                'wastedBytes': 30000,
+                                'wastedMs': 120.3,
+                            }
+                        ]
+                    }
+                },
+                'uses-long-cache-ttl': {
+                    'details': {
+                        'items': [
+                            {
+                                'url': 'https://example.com/image.jpg',
+                                'cacheLifetime': 31536000,
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+    }
+    
+
+
 class Command(BaseCommand):
     help = 'Test Performance Analysis save with full Lighthouse JSON'
 
@@ -32,235 +268,7 @@ class Command(BaseCommand):
         from performance_analysis.views import save_performance_analysis
         factory = APIRequestFactory()
         
-        # Full Lighthouse JSON structure (realistic)
-        full_lighthouse_json = {
-            'lighthouseResult': {
-                'networkRequests': [
-                    {
-                        'url': 'https://example.com/',
-                        'resourceType': 'Document',
-                        'mimeType': 'text/html',
-                        'transferSize': 15234,
-                        'resourceSize': 45678,
-                        'statusCode': 200,
-                        'protocol': 'http/2',
-                        'timing': {
-                            'startTime': 0.0,
-                            'endTime': 0.523,
-                            'dnsStart': 0.0,
-                            'dnsEnd': 0.012,
-                            'connectStart': 0.012,
-                            'connectEnd': 0.045,
-                            'sslStart': 0.045,
-                            'sslEnd': 0.082,
-                            'sendStart': 0.082,
-                            'sendEnd': 0.085,
-                            'receiveHeadersEnd': 0.201,
-                        },
-                        'priority': 'VeryHigh',
-                        'renderBlockingStatus': 'blocking',
-                        'initiator': {'type': 'parser', 'url': ''},
-                        'fromCache': False,
-                        'fromServiceWorker': False,
-                    },
-                    {
-                        'url': 'https://example.com/style.css',
-                        'resourceType': 'Stylesheet',
-                        'mimeType': 'text/css',
-                        'transferSize': 25432,
-                        'resourceSize': 80123,
-                        'statusCode': 200,
-                        'protocol': 'http/2',
-                        'timing': {
-                            'startTime': 0.105,
-                            'endTime': 0.312,
-                            'dnsStart': 0.105,
-                            'dnsEnd': 0.107,
-                            'connectStart': 0.107,
-                            'connectEnd': 0.108,
-                            'sendStart': 0.108,
-                            'sendEnd': 0.109,
-                            'receiveHeadersEnd': 0.152,
-                        },
-                        'priority': 'High',
-                        'renderBlockingStatus': 'blocking',
-                        'initiator': {'type': 'parser', 'url': 'https://example.com/'},
-                        'fromCache': False,
-                        'fromServiceWorker': False,
-                    },
-                    {
-                        'url': 'https://example.com/script.js',
-                        'resourceType': 'Script',
-                        'mimeType': 'application/javascript',
-                        'transferSize': 50123,
-                        'resourceSize': 152345,
-                        'statusCode': 200,
-                        'protocol': 'http/2',
-                        'timing': {
-                            'startTime': 0.208,
-                            'endTime': 0.612,
-                            'dnsStart': 0.208,
-                            'dnsEnd': 0.210,
-                            'connectStart': 0.210,
-                            'connectEnd': 0.211,
-                            'sendStart': 0.211,
-                            'sendEnd': 0.212,
-                            'receiveHeadersEnd': 0.305,
-                        },
-                        'priority': 'High',
-                        'renderBlockingStatus': 'non-blocking',
-                        'initiator': {'type': 'parser', 'url': 'https://example.com/'},
-                        'fromCache': False,
-                        'fromServiceWorker': False,
-                    },
-                    {
-                        'url': 'https://example.com/image.jpg',
-                        'resourceType': 'Image',
-                        'mimeType': 'image/jpeg',
-                        'transferSize': 125432,
-                        'resourceSize': 125432,
-                        'statusCode': 200,
-                        'protocol': 'http/2',
-                        'timing': {
-                            'startTime': 0.315,
-                            'endTime': 0.823,
-                            'dnsStart': 0.315,
-                            'dnsEnd': 0.317,
-                            'connectStart': 0.317,
-                            'connectEnd': 0.318,
-                            'sendStart': 0.318,
-                            'sendEnd': 0.319,
-                            'receiveHeadersEnd': 0.425,
-                        },
-                        'priority': 'Medium',
-                        'renderBlockingStatus': 'non-blocking',
-                        'initiator': {'type': 'parser', 'url': 'https://example.com/'},
-                        'fromCache': False,
-                        'fromServiceWorker': False,
-                    },
-                ],
-                'traceEvents': [
-                    {
-                        'name': 'navigationStart',
-                        'cat': 'navigation',
-                        'ts': 0,
-                        'dur': 0,
-                        'ph': 'B',
-                        'pid': 1,
-                        'tid': 1,
-                        'args': {'frame': 'ABC123', 'url': 'https://example.com/'},
-                    },
-                    {
-                        'name': 'firstPaint',
-                        'cat': 'paint',
-                        'ts': 500000,
-                        'dur': 0,
-                        'ph': 'I',
-                        'pid': 1,
-                        'tid': 1,
-                        'args': {},
-                    },
-                    {
-                        'name': 'firstContentfulPaint',
-                        'cat': 'paint',
-                        'ts': 600000,
-                        'dur': 0,
-                        'ph': 'I',
-                        'pid': 1,
-                        'tid': 1,
-                        'args': {},
-                    },
-                    {
-                        'name': 'largestContentfulPaint',
-                        'cat': 'paint',
-                        'ts': 1200000,
-                        'dur': 0,
-                        'ph': 'I',
-                        'pid': 1,
-                        'tid': 1,
-                        'args': {},
-                    },
-                    {
-                        'name': 'domContentLoaded',
-                        'cat': 'navigation',
-                        'ts': 800000,
-                        'dur': 0,
-                        'ph': 'I',
-                        'pid': 1,
-                        'tid': 1,
-                        'args': {},
-                    },
-                    {
-                        'name': 'load',
-                        'cat': 'navigation',
-                        'ts': 1500000,
-                        'dur': 0,
-                        'ph': 'I',
-                        'pid': 1,
-                        'tid': 1,
-                        'args': {},
-                    },
-                ],
-                'audits': {
-                    'network-requests': {
-                        'details': {
-                            'items': [
-                                {
-                                    'url': 'https://example.com/',
-                                    'resourceType': 'Document',
-                                    'transferSize': 15234,
-                                    'resourceSize': 45678,
-                                },
-                                {
-                                    'url': 'https://example.com/style.css',
-                                    'resourceType': 'Stylesheet',
-                                    'transferSize': 25432,
-                                    'resourceSize': 80123,
-                                },
-                                {
-                                    'url': 'https://example.com/script.js',
-                                    'resourceType': 'Script',
-                                    'transferSize': 50123,
-                                    'resourceSize': 152345,
-                                },
-                            ]
-                        }
-                    },
-                    'unused-css-rules': {
-                        'details': {
-                            'items': [
-                                {
-                                    'url': 'https://example.com/style.css',
-                                    'wastedBytes': 15000,
-                                    'wastedMs': 50.5,
-                                }
-                            ]
-                        }
-                    },
-                    'unused-javascript': {
-                        'details': {
-                            'items': [
-                                {
-                                    'url': 'https://example.com/script.js',
-                                    'wastedBytes': 30000,
-                                    'wastedMs': 120.3,
-                                }
-                            ]
-                        }
-                    },
-                    'uses-long-cache-ttl': {
-                        'details': {
-                            'items': [
-                                {
-                                    'url': 'https://example.com/image.jpg',
-                                    'cacheLifetime': 31536000,
-                                }
-                            ]
-                        }
-                    }
-                }
-            }
-        }
+        full_lighthouse_json = build_full_lighthouse_json()
         
         test_data = {
             'url': TEST_URL,
@@ -295,6 +303,11 @@ class Command(BaseCommand):
                 analysis_id = response.data.get('id')
                 self.stdout.write(self.style.SUCCESS(f"\nPerformance Analysis saved! ID: {analysis_id}"))
                 
+                # Parsing is normally queued to Celery; run it here (idempotent) so the
+                # detail tables can be verified without a worker
+                from performance_analysis.tasks import run_parse
+                run_parse(analysis_id)
+                
                 # Verify PerformanceAnalysis was saved
                 analysis = PerformanceAnalysis.objects.get(id=analysis_id)
                 self.stdout.write(f"\nPerformanceAnalysis:")
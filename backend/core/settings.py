@@ -641,4 +641,93 @@ CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 # Windows-specific: Use 'solo' pool instead of 'prefork' (multiprocessing doesn't work well on Windows)
 import sys
 if sys.platform == 'win32':
-    CELERY_WORKER_POOL = 'solo'  # Single-process pool for Windows compatibility
\ No newline at end of file
+    CELERY_WORKER_POOL = 'solo'  # Single-process pool for Windows compatibility
+# Monitoring Configuration
+# Concurrency and deadline for the per-minute site check tick (monitoring.probe_engine)
+MONITORING_PROBE_MAX_WORKERS = int(config('MONITORING_PROBE_MAX_WORKERS', default='50'))  # Global in-flight probe cap
+MONITORING_PROBE_PER_HOST_LIMIT = int(config('MONITORING_PROBE_PER_HOST_LIMIT', default='4'))  # In-flight probes per host
+MONITORING_TICK_DEADLINE_SECONDS = float(config('MONITORING_TICK_DEADLINE_SECONDS', default='50'))  # Must stay below the 60s beat interval
+MONITORING_BULK_BATCH_SIZE = int(config('MONITORING_BULK_BATCH_SIZE', default='1000'))  # Rows per bulk_create/bulk_update statement
+MONITORING_DUE_SITES_LIMIT = int(config('MONITORING_DUE_SITES_LIMIT', default='1000'))  # Max sites claimed per tick
+MONITORING_CHECK_LEASE_SECONDS = int(config('MONITORING_CHECK_LEASE_SECONDS', default='120'))  # How long a claimed site stays hidden from other workers
+MONITORING_SHARD_SIZE = int(config('MONITORING_SHARD_SIZE', default='200'))  # Sites per check_site_shard sub-task
+MONITORING_SHARD_QUEUES = get_env_list('MONITORING_SHARD_QUEUES', default=[])  # Queues shards are routed to round-robin (empty = default queue)
+MONITORING_SHARD_BY_REGION = get_env_bool('MONITORING_SHARD_BY_REGION', default=False)  # Route to monitoring.<region_code> queues of healthy locations
+MONITORING_TENANT_MAX_SITES_PER_TICK = int(config('MONITORING_TENANT_MAX_SITES_PER_TICK', default='0'))  # Per-user fairness cap per sweep (0 = no cap)
+MONITORING_HISTORY_RAW_MAX_SPAN_HOURS = int(config('MONITORING_HISTORY_RAW_MAX_SPAN_HOURS', default='48'))  # Chart windows up to this span are served from raw checks
+MONITORING_RETENTION_DAYS = int(config('MONITORING_RETENTION_DAYS', default='30'))  # Raw StatusCheck/LinkCheck retention (plans may override)
+MONITORING_PARTITION_INTERVAL = config('MONITORING_PARTITION_INTERVAL', default='daily')  # 'daily' or 'weekly' partitions once converted
+MONITORING_PARTITIONS_AHEAD = int(config('MONITORING_PARTITIONS_AHEAD', default='7'))  # Future partitions kept ready
+MONITORING_RETENTION_DELETE_CHUNK_SIZE = int(config('MONITORING_RETENTION_DELETE_CHUNK_SIZE', default='5000'))  # Rows per chunked retention DELETE
+# Conditional revalidation of discovered links (monitoring.link_checks)
+MONITORING_LINK_CHECK_INTERVAL_MINUTES = int(config('MONITORING_LINK_CHECK_INTERVAL_MINUTES', default='15'))  # Must match the check_discovered_pages beat interval
+MONITORING_LINK_CHECK_MIN_BUDGET = int(config('MONITORING_LINK_CHECK_MIN_BUDGET', default='100'))  # Links checked per pass, at least
+MONITORING_LINK_CHECK_MAX_BUDGET = int(config('MONITORING_LINK_CHECK_MAX_BUDGET', default='2000'))  # Links checked per pass, at most
+MONITORING_LINK_RECHECK_WINDOW_HOURS = int(config('MONITORING_LINK_RECHECK_WINDOW_HOURS', default='24'))  # Budget drains the due backlog within this window
+MONITORING_LINK_RECENT_CHANGE_HOURS = int(config('MONITORING_LINK_RECENT_CHANGE_HOURS', default='24'))  # Links whose status changed more recently are checked first
+MONITORING_LINK_MAX_FRESHNESS_SECONDS = int(config('MONITORING_LINK_MAX_FRESHNESS_SECONDS', default='86400'))  # Cap on Cache-Control max-age skips
+# Admin API monitoring (api_monitoring.executor)
+API_MONITORING_MAX_WORKERS = int(config('API_MONITORING_MAX_WORKERS', default='16'))  # Concurrent endpoint tests/discovery probes
+# Security audit orchestration (security_monitoring.orchestrator)
+SECURITY_SCAN_TOOL_LIMITS = {  # Max running scans per external tool across all workers
+    'zap': int(config('SECURITY_SCAN_MAX_ZAP', default='2')),
+    'nmap': int(config('SECURITY_SCAN_MAX_NMAP', default='4')),
+    'amass': int(config('SECURITY_SCAN_MAX_AMASS', default='2')),
+}
+SECURITY_SCAN_MAX_ATTEMPTS = int(config('SECURITY_SCAN_MAX_ATTEMPTS', default='2'))  # Claims before a scan whose worker keeps disappearing is failed
+# Shared tool result cache (security_monitoring.scan_cache), seconds a successful result is reused; 0 disables
+SECURITY_SCAN_CACHE_TTLS = {
+    'headers': int(config('SECURITY_SCAN_CACHE_TTL_HEADERS', default='900')),
+    'ssl': int(config('SECURITY_SCAN_CACHE_TTL_SSL', default='3600')),
+    'dns': int(config('SECURITY_SCAN_CACHE_TTL_DNS', default='3600')),
+    'nmap': int(config('SECURITY_SCAN_CACHE_TTL_NMAP', default='21600')),
+    'amass': int(config('SECURITY_SCAN_CACHE_TTL_AMASS', default='86400')),
+    'zap': int(config('SECURITY_SCAN_CACHE_TTL_ZAP', default='0')),
+}
+SECURITY_SCAN_CACHE_POLL_SECONDS = int(config('SECURITY_SCAN_CACHE_POLL_SECONDS', default='2'))  # How often identical requests check an in-flight run
+# Streaming nmap/amass runs (security_monitoring.tools.streaming)
+SECURITY_NMAP_TIMEOUT = int(config('SECURITY_NMAP_TIMEOUT', default='1200'))  # Seconds before nmap is stopped; ports found so far are kept. Keep below the port_scan task soft time limit (nmap lease minus 2 minutes)
+SECURITY_AMASS_TIMEOUT = int(config('SECURITY_AMASS_TIMEOUT', default='300'))  # Seconds before amass is stopped; subdomains found so far are kept
+SECURITY_FINDING_BATCH_SIZE = int(config('SECURITY_FINDING_BATCH_SIZE', default='50'))  # Findings per streamed insert
+SECURITY_STREAM_FLUSH_SECONDS = int(config('SECURITY_STREAM_FLUSH_SECONDS', default='5'))  # Max seconds between scan progress updates
+# OWASP ZAP daemon pool (security_monitoring.tools.zap_pool), one per host in ZAP_PATH mode
+ZAP_PATH = config('ZAP_PATH', default='')  # ZAP launcher; when set, the pool starts and recycles its own daemons
+ZAP_POOL_URLS = [url.strip() for url in config('ZAP_POOL_URLS', default='').split(',') if url.strip()]  # External daemons (default: ZAP_API_URL)
+ZAP_POOL_SIZE = int(config('ZAP_POOL_SIZE', default='0'))  # Warm daemons started per host in ZAP_PATH mode (0 = SECURITY_SCAN_TOOL_LIMITS['zap'])
+ZAP_POOL_DIR = config('ZAP_POOL_DIR', default='')  # Host lock and published daemon URLs (default: <tmp>/zap-pool)
+ZAP_POOL_WAIT_SECONDS = int(config('ZAP_POOL_WAIT_SECONDS', default='600'))  # How long a scan waits for a free daemon
+ZAP_POOL_MAX_SCANS_PER_DAEMON = int(config('ZAP_POOL_MAX_SCANS_PER_DAEMON', default='25'))  # Restart a started daemon after this many scans
+ZAP_POOL_LEASE_SECONDS = int(config('ZAP_POOL_LEASE_SECONDS', default='300'))  # Lease of a shared daemon; renewed while its scan runs, freed this long after a worker dies
+ZAP_POOL_WARM_ON_START = get_env_bool('ZAP_POOL_WARM_ON_START', False)  # Start the pool when a Celery worker process starts
+# Subdomain brute-force (security_monitoring.tools.dns_discovery)
+DNS_DISCOVERY_CONCURRENCY = int(config('DNS_DISCOVERY_CONCURRENCY', default='100'))  # Lookups in flight per discovery
+DNS_DISCOVERY_TIMEOUT = float(config('DNS_DISCOVERY_TIMEOUT', default='3.0'))  # Seconds per lookup
+DNS_DISCOVERY_NEGATIVE_TTL = int(config('DNS_DISCOVERY_NEGATIVE_TTL', default='300'))  # Seconds NXDOMAIN answers stay cached
+DNS_DISCOVERY_WORDLIST = config('DNS_DISCOVERY_WORDLIST', default='common')  # Registered wordlist name or path to a wordlist file
+# Compliance chat index (compliance_controls.index_export), refreshed incrementally on model changes
+COMPLIANCE_INDEX_AUTO_REFRESH = get_env_bool('COMPLIANCE_INDEX_AUTO_REFRESH', default=True)  # Refresh the index when compliance models change
+COMPLIANCE_INDEX_REFRESH_DELAY_SECONDS = float(config('COMPLIANCE_INDEX_REFRESH_DELAY_SECONDS', default='10'))  # Changes within this window share one refresh
+COMPLIANCE_INDEX_CHUNK_SIZE = int(config('COMPLIANCE_INDEX_CHUNK_SIZE', default='500'))  # Rows fetched per database round trip during export
+# Compliance score rollups (compliance_frameworks.rollups)
+COMPLIANCE_ROLLUPS_AUTO_REFRESH = get_env_bool('COMPLIANCE_ROLLUPS_AUTO_REFRESH', default=True)  # Recompute framework scores when control statuses or mappings change
+# Compliance report generation (compliance_reports.generation)
+COMPLIANCE_REPORTS_DIR = config('COMPLIANCE_REPORTS_DIR', default=str(BASE_DIR / 'exports' / 'compliance_reports'))  # Where report artifacts are written; keep it out of MEDIA_ROOT, downloads go through the API
+COMPLIANCE_REPORT_CHUNK_SIZE = int(config('COMPLIANCE_REPORT_CHUNK_SIZE', default='2000'))  # Rows fetched per server-side cursor round trip
+COMPLIANCE_REPORT_REUSE_SECONDS = int(config('COMPLIANCE_REPORT_REUSE_SECONDS', default='3600'))  # Identical reports reuse an artifact this recent
+# Performance Analysis Configuration
+# Background parsing of Lighthouse full_results (performance_analysis.tasks.parse_performance_details)
+PERFORMANCE_PARSE_MAX_RETRIES = int(config('PERFORMANCE_PARSE_MAX_RETRIES', default='3'))  # Retries on transient database errors
+PERFORMANCE_PARSE_RETRY_BACKOFF_SECONDS = int(config('PERFORMANCE_PARSE_RETRY_BACKOFF_SECONDS', default='60'))  # Base of the exponential retry backoff
+# Sitemap Crawler Configuration
+# Concurrency and politeness for users.sitemap_crawler (sitemap generation)
+SITEMAP_CRAWL_MAX_WORKERS = int(config('SITEMAP_CRAWL_MAX_WORKERS', default='8'))  # Pages fetched concurrently per crawl
+SITEMAP_CRAWL_RATE_PER_HOST = float(config('SITEMAP_CRAWL_RATE_PER_HOST', default='5'))  # Requests per second per host (robots.txt Crawl-delay may lower it)
+SITEMAP_CRAWL_BURST = int(config('SITEMAP_CRAWL_BURST', default='5'))  # Token bucket size per host
+SITEMAP_CRAWL_TIMEOUT = float(config('SITEMAP_CRAWL_TIMEOUT', default='10'))  # Per-request timeout in seconds
+SITEMAP_CRAWL_OBEY_ROBOTS_DISALLOW = get_env_bool('SITEMAP_CRAWL_OBEY_ROBOTS_DISALLOW', default=False)  # Also skip URLs disallowed by robots.txt
+SITEMAP_CRAWL_MAX_PAGES_LIMIT = int(config('SITEMAP_CRAWL_MAX_PAGES_LIMIT', default='10000'))  # Upper bound for max_pages in sitemap requests
+SITEMAP_CRAWL_SESSION_BATCH_SIZE = int(config('SITEMAP_CRAWL_SESSION_BATCH_SIZE', default='50'))  # Pages per checkpoint of a background crawl session
+SITEMAP_CRAWL_SESSION_FLUSH_SECONDS = float(config('SITEMAP_CRAWL_SESSION_FLUSH_SECONDS', default='0.5'))  # Max delay before crawled pages become visible to streams
+SITEMAP_CRAWL_SESSION_STALE_SECONDS = int(config('SITEMAP_CRAWL_SESSION_STALE_SECONDS', default='120'))  # Sessions without a checkpoint for this long are requeued
+SITEMAP_STREAM_POLL_SECONDS = float(config('SITEMAP_STREAM_POLL_SECONDS', default='0.25'))  # Poll interval of the session stream
+SITEMAP_STREAM_MAX_SECONDS = int(config('SITEMAP_STREAM_MAX_SECONDS', default='300'))  # Streams end with a 'timeout' event after this long (clients reconnect with ?after=)
@@ -90,6 +90,9 @@ class SubscriptionPlanAdmin(admin.ModelAdmin):
         ('Display Settings', {
             'fields': ('is_active', 'is_featured', 'display_order')
         }),
+        ('Data Retention', {
+            'fields': ('monitoring_retention_days',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
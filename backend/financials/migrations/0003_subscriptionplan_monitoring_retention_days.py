@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0002_alter_usersubscription_promotional_deal_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionplan',
+            name='monitoring_retention_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Days of raw monitoring checks to keep for subscribers (blank = MONITORING_RETENTION_DAYS)', null=True),
+        ),
+    ]
@@ -147,6 +147,13 @@ class SubscriptionPlan(models.Model):
         help_text='Order in which to display plans (lower = first)'
     )
     
+    # Data retention
+    monitoring_retention_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Days of raw monitoring checks to keep for subscribers (blank = MONITORING_RETENTION_DAYS)'
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
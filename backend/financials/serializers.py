@@ -240,7 +240,8 @@ class SubscriptionPlanSerializer(serializers.ModelSerializer):
             'paypal_plan_id_monthly', 'paypal_plan_id_annual', 'paypal_product_id',
             'stripe_plan_id_monthly', 'stripe_plan_id_annual',
             'coinbase_plan_id_monthly', 'coinbase_plan_id_annual',
-            'is_active', 'is_featured', 'role', 'display_order', 'created_at', 'updated_at'
+            'is_active', 'is_featured', 'role', 'display_order', 'monitoring_retention_days',
+            'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -0,0 +1,204 @@
+"""
+Set-based ResponseTimeHistory aggregation.
+
+StatusCheck rows for a day are rolled up for all sites at once with grouped
+queries, using PostgreSQL's percentile_cont for p50/p95/p99:
+
+- one grouped query per day for the hourly rows (site, hour)
+- one grouped query per day for the daily rows (site, hour=NULL)
+
+Each rollup row records the highest StatusCheck id it covers (last_check_id),
+which doubles as the per-day watermark for re-aggregating days that received
+checks after they were rolled up.
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Min, Q
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+from monitoring.models import StatusCheck, ResponseTimeHistory
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+
+ROLLUP_UPDATE_FIELDS = [
+    'p50', 'p95', 'p99', 'avg', 'min_response_time', 'max_response_time', 'check_count', 'up_count', 'last_check_id'
+]
+
+
+class PercentileCont(Aggregate):
+    """
+    PostgreSQL ordered-set aggregate: percentile_cont(fraction) WITHIN GROUP (ORDER BY expression).
+    """
+    function = 'PERCENTILE_CONT'
+    name = 'PercentileCont'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        fraction = float(fraction)
+        if not 0 <= fraction <= 1:
+            raise ValueError('fraction must be between 0 and 1')
+        super().__init__(expression, fraction=fraction, **extra)
+
+
+def rollup_annotations():
+    """
+    Aggregate expressions shared by the nightly rollups and on-the-fly chart buckets.
+    """
+    return {
+        'p50_value': PercentileCont('response_time', 0.5),
+        'p95_value': PercentileCont('response_time', 0.95),
+        'p99_value': PercentileCont('response_time', 0.99),
+        'avg_value': Avg('response_time'),
+        'min_value': Min('response_time'),
+        'max_value': Max('response_time'),
+        'count_value': Count('id'),
+        'up_value': Count('id', filter=Q(status='up')),
+        'last_id_value': Max('id'),
+    }
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _build_rollup(row, day, hour):
+    return ResponseTimeHistory(
+        site_id=row['site_id'],
+        date=day,
+        hour=hour,
+        p50=row['p50_value'],
+        p95=row['p95_value'],
+        p99=row['p99_value'],
+        avg=float(row['avg_value']),
+        min_response_time=int(row['min_value']),
+        max_response_time=int(row['max_value']),
+        check_count=row['count_value'],
+        up_count=row['up_value'],
+        last_check_id=row['last_id_value'],
+    )
+
+
+def aggregate_day(day, site_ids=None):
+    """
+    Roll up one day of StatusCheck rows into hourly and daily ResponseTimeHistory rows.
+
+    Args:
+        day: date to aggregate
+        site_ids: Optional iterable of site ids to restrict the rollup to
+
+    Returns:
+        Number of ResponseTimeHistory rows written
+    """
+    start, end = _day_bounds(day)
+    checks = StatusCheck.objects.filter(checked_at__gte=start, checked_at__lt=end)
+    if site_ids is not None:
+        checks = checks.filter(site_id__in=list(site_ids))
+
+    hourly_rows = checks.annotate(
+        check_hour=ExtractHour('checked_at')
+    ).values('site_id', 'check_hour').annotate(**rollup_annotations()).order_by()
+    hourly = [_build_rollup(row, day, row['check_hour']) for row in hourly_rows]
+
+    daily_rows = checks.values('site_id').annotate(**rollup_annotations()).order_by()
+    daily = [_build_rollup(row, day, None) for row in daily_rows]
+
+    with transaction.atomic():
+        if hourly:
+            ResponseTimeHistory.objects.bulk_create(
+                hourly,
+                update_conflicts=True,
+                unique_fields=['site', 'date', 'hour'],
+                update_fields=ROLLUP_UPDATE_FIELDS,
+            )
+        if daily:
+            # hour IS NULL never conflicts under the (site, date, hour) unique
+            # constraint (NULLs are distinct), so daily rows are replaced instead
+            ResponseTimeHistory.objects.filter(
+                date=day,
+                hour__isnull=True,
+                site_id__in=[rollup.site_id for rollup in daily],
+            ).delete()
+            ResponseTimeHistory.objects.bulk_create(daily)
+
+    return len(hourly) + len(daily)
+
+
+def aggregate_date_range(start_date, end_date):
+    """
+    Backfill ResponseTimeHistory for every day from start_date to end_date (inclusive).
+
+    Returns:
+        Number of ResponseTimeHistory rows written
+    """
+    written = 0
+    day = start_date
+    while day <= end_date:
+        written += aggregate_day(day)
+        day += timedelta(days=1)
+    return written
+
+
+def find_late_check_days(before):
+    """
+    Find (day -> site ids) that received StatusCheck rows after they were rolled up.
+
+    Each day is compared against its own watermark (the highest StatusCheck id
+    covered by that day's daily rollups), so a late check for one day is not
+    hidden by a later rollup of another day. Only days strictly before
+    ``before`` that already have rollups are returned (days that were never
+    rolled up are left to the nightly run or a backfill).
+
+    Args:
+        before: date; days on or after it are ignored (incomplete)
+
+    Returns:
+        dict mapping date -> set of site ids
+    """
+    watermarks = dict(ResponseTimeHistory.objects.filter(
+        date__lt=before,
+        hour__isnull=True,
+    ).values('date').annotate(watermark=Max('last_check_id')).values_list('date', 'watermark').order_by())
+    if not watermarks:
+        return {}
+
+    first_start, _ = _day_bounds(min(watermarks))
+    before_start, _ = _day_bounds(before)
+    touched = StatusCheck.objects.filter(
+        id__gt=min(watermarks.values()),
+        checked_at__gte=first_start,
+        checked_at__lt=before_start,
+    ).annotate(
+        check_date=TruncDate('checked_at')
+    ).values('check_date', 'site_id').annotate(last_id=Max('id')).values_list(
+        'check_date', 'site_id', 'last_id'
+    ).order_by()
+
+    days = {}
+    for check_date, site_id, last_id in touched:
+        watermark = watermarks.get(check_date)
+        if watermark is not None and last_id > watermark:
+            days.setdefault(check_date, set()).add(site_id)
+    return days
+
+
+def reaggregate_late_checks(before=None):
+    """
+    Incrementally re-aggregate only the (day, site) pairs that received late checks.
+
+    Args:
+        before: date; only days before it are considered (default: today)
+
+    Returns:
+        Number of ResponseTimeHistory rows written
+    """
+    before = before or timezone.now().date()
+    written = 0
+    for day, site_ids in sorted(find_late_check_days(before).items()):
+        logger.info(f'[AggregateResponseTimeHistory] Re-aggregating {day} for {len(site_ids)} sites with late checks')
+        written += aggregate_day(day, site_ids=site_ids)
+    return written
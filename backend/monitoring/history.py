@@ -0,0 +1,290 @@
+"""
+Query layer for monitoring charts and uptime.
+
+Picks the cheapest data source that can answer a chart request:
+
+- raw:    StatusCheck rows, downsampled with LTTB when there are more than max_points
+- hourly: ResponseTimeHistory hourly rollups
+- daily:  ResponseTimeHistory daily rollups
+
+Rollups only exist up to the last nightly aggregation, so the most recent
+part of an hourly/daily window is bucketed on the fly with one grouped query.
+"""
+
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from monitoring.aggregation import rollup_annotations
+from monitoring.models import StatusCheck, ResponseTimeHistory, Incident
+
+
+RESOLUTIONS = ('raw', 'hourly', 'daily')
+
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+DEFAULT_RAW_MAX_SPAN_HOURS = 48
+
+UPTIME_PERIODS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+
+
+def select_resolution(start, end, max_points=DEFAULT_MAX_POINTS, check_interval=5):
+    """
+    Pick raw, hourly or daily resolution for a chart window.
+
+    Raw is used for short windows or when the expected number of checks
+    already fits in max_points; otherwise the finest rollup tier that fits.
+
+    Args:
+        start, end: Window bounds (datetimes)
+        max_points: Target maximum number of points
+        check_interval: Site check interval in minutes (estimates raw point count)
+
+    Returns:
+        'raw', 'hourly' or 'daily'
+    """
+    span_hours = max((end - start).total_seconds() / 3600.0, 0)
+    raw_max_span = getattr(settings, 'MONITORING_HISTORY_RAW_MAX_SPAN_HOURS', DEFAULT_RAW_MAX_SPAN_HOURS)
+    expected_raw_points = span_hours * 60 / max(check_interval or 1, 1)
+
+    if span_hours <= raw_max_span or expected_raw_points <= max_points:
+        return 'raw'
+    if span_hours <= max_points:
+        return 'hourly'
+    return 'daily'
+
+
+def lttb_downsample(points, threshold, value_key='response_time'):
+    """
+    Largest-Triangle-Three-Buckets downsampling that also keeps the extremes.
+
+    Standard LTTB keeps the first and last points and, per bucket, the point
+    forming the largest triangle with its neighbours. The series' global
+    minimum and maximum are then swapped into their buckets so spikes are
+    never smoothed away (both are kept when they share a bucket).
+
+    Args:
+        points: List of dicts in time order; x is the index, y is points[i][value_key]
+        threshold: Number of points to keep
+        value_key: Key holding the plotted value
+
+    Returns:
+        List of at most ``threshold`` points (the input if already small enough)
+    """
+    length = len(points)
+    if threshold >= length or threshold < 3:
+        return list(points)
+
+    values = [point[value_key] or 0 for point in points]
+    def bucket_bound(bucket):
+        # Integer arithmetic, so the last bucket always ends right before the last point
+        return bucket * (length - 2) // (threshold - 2) + 1
+
+    selected = [0]
+    previous = 0
+    bucket_bounds = []
+    for bucket in range(threshold - 2):
+        bucket_start = bucket_bound(bucket)
+        bucket_end = bucket_bound(bucket + 1)
+        bucket_bounds.append((bucket_start, bucket_end))
+
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = bucket_end
+        next_end = min(bucket_bound(bucket + 2), length)
+        next_count = max(next_end - next_start, 1)
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = sum(values[next_start:next_end]) / next_count if next_end > next_start else values[-1]
+
+        prev_x = previous
+        prev_y = values[previous]
+        best_index = bucket_start
+        best_area = -1.0
+        for index in range(bucket_start, bucket_end):
+            area = abs(
+                (prev_x - avg_x) * (values[index] - prev_y)
+                - (prev_x - index) * (avg_y - prev_y)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = index
+        selected.append(best_index)
+        previous = best_index
+    selected.append(length - 1)
+
+    # Swap the global min and max into their buckets; a bucket holding both
+    # keeps both (in time order) and a neighbouring bucket gives up its point
+    extremes_by_position = {}
+    for extreme in {values.index(min(values)), values.index(max(values))}:
+        for position, (bucket_start, bucket_end) in enumerate(bucket_bounds, start=1):
+            if bucket_start <= extreme < bucket_end:
+                extremes_by_position.setdefault(position, []).append(extreme)
+                break
+
+    slots = [[index] for index in selected]
+    for position, extremes in extremes_by_position.items():
+        slots[position] = sorted(extremes)
+        if len(extremes) > 1:
+            neighbours = [other for other in (position + 1, position - 1) if 1 <= other <= len(bucket_bounds)]
+            if neighbours:
+                slots[neighbours[0]] = []
+            else:
+                # A single bucket (threshold 3) only has room for the spike
+                slots[position] = [values.index(max(values))]
+
+    return [points[index] for slot in slots for index in slot]
+
+
+def _raw_points(site, start, end, max_points):
+    rows = StatusCheck.objects.filter(
+        site=site,
+        checked_at__gte=start,
+        checked_at__lte=end
+    ).order_by('checked_at').values_list(
+        'checked_at', 'status', 'response_time', 'status_code', 'error_message'
+    )
+
+    points = [
+        {
+            'checked_at': checked_at.isoformat(),
+            'status': check_status,
+            'response_time': response_time,
+            'status_code': status_code,
+            'error_message': error_message if error_message else None,
+        }
+        for checked_at, check_status, response_time, status_code, error_message in rows.iterator(chunk_size=2000)
+    ]
+    return lttb_downsample(points, max_points)
+
+
+def _rollup_point(bucket_start, avg, min_value, max_value, p50, p95, p99, check_count, up_count):
+    down = up_count is not None and up_count < check_count
+    return {
+        'checked_at': bucket_start.isoformat(),
+        'status': 'down' if down else 'up',
+        'response_time': round(avg or 0),
+        'status_code': None,
+        'error_message': None,
+        'min_response_time': min_value,
+        'max_response_time': max_value,
+        'p50': p50,
+        'p95': p95,
+        'p99': p99,
+        'check_count': check_count,
+        'up_count': up_count,
+    }
+
+
+def _rollup_points(site, start, end, resolution):
+    hourly = resolution == 'hourly'
+    rollups = ResponseTimeHistory.objects.filter(
+        site=site,
+        date__gte=start.date(),
+        date__lte=end.date(),
+        hour__isnull=not hourly,
+    ).order_by('date', 'hour')
+
+    points = []
+    last_rolled_date = None
+    for rollup in rollups:
+        bucket_start = timezone.make_aware(datetime.combine(rollup.date, time(hour=rollup.hour or 0)))
+        last_rolled_date = rollup.date
+        if hourly and not start <= bucket_start <= end:
+            continue
+        points.append(_rollup_point(
+            bucket_start, rollup.avg, rollup.min_response_time, rollup.max_response_time,
+            rollup.p50, rollup.p95, rollup.p99, rollup.check_count, rollup.up_count,
+        ))
+
+    # Bucket whatever the nightly aggregation has not rolled up yet in one grouped query
+    tail_start = start
+    if last_rolled_date is not None:
+        tail_start = max(start, timezone.make_aware(datetime.combine(last_rolled_date + timedelta(days=1), time.min)))
+    if tail_start <= end:
+        trunc = TruncHour('checked_at') if hourly else TruncDay('checked_at')
+        buckets = StatusCheck.objects.filter(
+            site=site,
+            checked_at__gte=tail_start,
+            checked_at__lte=end
+        ).annotate(bucket=trunc).values('bucket').annotate(**rollup_annotations()).order_by('bucket')
+        for row in buckets:
+            points.append(_rollup_point(
+                row['bucket'], row['avg_value'], row['min_value'], row['max_value'],
+                row['p50_value'], row['p95_value'], row['p99_value'], row['count_value'], row['up_value'],
+            ))
+
+    return points
+
+
+def get_site_history(site, start, end, max_points=DEFAULT_MAX_POINTS, resolution='auto'):
+    """
+    Chart points for a site between start and end.
+
+    Args:
+        site: MonitoredSite instance
+        start, end: Window bounds (datetimes)
+        max_points: Target maximum number of points
+        resolution: 'auto', 'raw', 'hourly' or 'daily'
+
+    Returns:
+        tuple(resolution, points)
+    """
+    max_points = max(3, min(int(max_points), MAX_POINTS_LIMIT))
+    if resolution not in RESOLUTIONS:
+        resolution = select_resolution(start, end, max_points, site.check_interval)
+
+    if resolution == 'raw':
+        return resolution, _raw_points(site, start, end, max_points)
+    return resolution, _rollup_points(site, start, end, resolution)
+
+
+def get_uptime_summary(site, periods=None, now=None):
+    """
+    Uptime, check and incident counts for several trailing periods.
+
+    All periods are computed with one conditional aggregate over StatusCheck
+    and one over Incident.
+
+    Args:
+        site: MonitoredSite instance
+        periods: Iterable of keys from UPTIME_PERIODS (default: all)
+        now: Reference time (default: now)
+
+    Returns:
+        dict with uptime_<p>, total_checks_<p>, successful_checks_<p>,
+        failed_checks_<p> and incidents_<p> for each period
+    """
+    now = now or timezone.now()
+    periods = [period for period in (periods or UPTIME_PERIODS.keys()) if period in UPTIME_PERIODS]
+    if not periods:
+        return {}
+    cutoffs = {period: now - UPTIME_PERIODS[period] for period in periods}
+    earliest = min(cutoffs.values())
+
+    check_aggregates = {}
+    incident_aggregates = {}
+    for period, cutoff in cutoffs.items():
+        check_aggregates[f'total_{period}'] = Count('id', filter=Q(checked_at__gte=cutoff))
+        check_aggregates[f'up_{period}'] = Count('id', filter=Q(checked_at__gte=cutoff, status='up'))
+        incident_aggregates[f'incidents_{period}'] = Count('id', filter=Q(started_at__gte=cutoff))
+
+    checks = StatusCheck.objects.filter(site=site, checked_at__gte=earliest).aggregate(**check_aggregates)
+    incidents = Incident.objects.filter(site=site, started_at__gte=earliest).aggregate(**incident_aggregates)
+
+    result = {}
+    for period in periods:
+        total_checks = checks[f'total_{period}']
+        successful_checks = checks[f'up_{period}']
+        if total_checks == 0:
+            result[f'uptime_{period}'] = 100.0
+        else:
+            result[f'uptime_{period}'] = round((successful_checks / total_checks) * 100.0, 3)
+        result[f'total_checks_{period}'] = total_checks
+        result[f'successful_checks_{period}'] = successful_checks
+        result[f'failed_checks_{period}'] = total_checks - successful_checks
+        result[f'incidents_{period}'] = incidents[f'incidents_{period}']
+    return result
@@ -0,0 +1,254 @@
+"""
+Conditional revalidation of discovered links (check_discovered_pages).
+
+Each DiscoveredLink keeps the validators of its latest successful response
+(ETag, Last-Modified) and a freshness deadline from Cache-Control max-age:
+
+- links still inside their freshness window are not requested at all
+- the others are checked with If-None-Match / If-Modified-Since, so an
+  unchanged page answers with an empty 304
+- the number of links per pass adapts to the size of the due backlog,
+  and links whose status recently changed are checked first
+- results are written with one bulk_create (LinkCheck) and one
+  bulk_update (DiscoveredLink)
+"""
+
+import logging
+import math
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from monitoring.models import DiscoveredLink, LinkCheck
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+
+DEFAULT_CHECK_INTERVAL_MINUTES = 15
+DEFAULT_MIN_BUDGET = 100
+DEFAULT_MAX_BUDGET = 2000
+DEFAULT_RECHECK_WINDOW_HOURS = 24
+DEFAULT_RECENT_CHANGE_HOURS = 24
+DEFAULT_MAX_FRESHNESS_SECONDS = 24 * 3600
+
+# Fields a link check writes back to DiscoveredLink
+LINK_UPDATE_FIELDS = [
+    'current_status', 'current_status_text', 'last_checked', 'status_changed_at',
+    'etag', 'last_modified', 'fresh_until'
+]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def parse_cache_control(value):
+    """
+    Parse a Cache-Control header into a dict of lowercased directives.
+
+    Directives without a value map to True, e.g.
+    'public, max-age=300' -> {'public': True, 'max-age': '300'}
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        name = name.strip().lower()
+        if name:
+            directives[name] = argument.strip().strip('"') if argument else True
+    return directives
+
+
+def get_fresh_until(cache_headers, checked_at):
+    """
+    Compute when a response stops being fresh.
+
+    Uses Cache-Control max-age minus the Age header, capped at
+    MONITORING_LINK_MAX_FRESHNESS_SECONDS so a long-lived page still gets
+    rechecked eventually. no-cache/no-store responses are never fresh.
+
+    Returns:
+        datetime, or None if the response must be revalidated every pass
+    """
+    directives = parse_cache_control(cache_headers.get('cache_control'))
+    if 'no-cache' in directives or 'no-store' in directives:
+        return None
+    try:
+        max_age = int(directives.get('max-age'))
+    except (TypeError, ValueError):
+        return None
+    try:
+        age = int(cache_headers.get('age') or 0)
+    except ValueError:
+        age = 0
+
+    lifetime = min(max_age - age, _setting('MONITORING_LINK_MAX_FRESHNESS_SECONDS', DEFAULT_MAX_FRESHNESS_SECONDS))
+    if lifetime <= 0:
+        return None
+    return checked_at + timedelta(seconds=lifetime)
+
+
+def get_conditional_headers(link):
+    """
+    Request headers that turn a link check into a conditional request.
+    """
+    headers = {}
+    if link.etag:
+        headers['If-None-Match'] = link.etag
+    if link.last_modified:
+        headers['If-Modified-Since'] = link.last_modified
+    return headers
+
+
+def get_check_budget(due_count):
+    """
+    Number of links to check in this pass.
+
+    Sized so the whole due backlog is drained within
+    MONITORING_LINK_RECHECK_WINDOW_HOURS at the beat interval, clamped to
+    [MONITORING_LINK_CHECK_MIN_BUDGET, MONITORING_LINK_CHECK_MAX_BUDGET].
+    """
+    interval = _setting('MONITORING_LINK_CHECK_INTERVAL_MINUTES', DEFAULT_CHECK_INTERVAL_MINUTES)
+    window_hours = _setting('MONITORING_LINK_RECHECK_WINDOW_HOURS', DEFAULT_RECHECK_WINDOW_HOURS)
+    min_budget = _setting('MONITORING_LINK_CHECK_MIN_BUDGET', DEFAULT_MIN_BUDGET)
+    max_budget = _setting('MONITORING_LINK_CHECK_MAX_BUDGET', DEFAULT_MAX_BUDGET)
+
+    passes_per_window = max(int(window_hours * 60 / max(interval, 1)), 1)
+    budget = math.ceil(due_count / passes_per_window)
+    return max(min_budget, min(budget, max_budget))
+
+
+def get_links_to_check(now=None, budget=None):
+    """
+    Select the discovered links due for a check in this pass.
+
+    A link is due when it has never been checked, or was last checked more
+    than one beat interval ago and its freshness window has expired.
+    Links whose status changed within MONITORING_LINK_RECENT_CHANGE_HOURS
+    come first, then never-checked links, then the least recently checked.
+
+    Args:
+        now: Reference time (default: now)
+        budget: Maximum number of links (default: get_check_budget of the due count)
+
+    Returns:
+        tuple(links, due_count) - links have ``site`` selected
+    """
+    now = now or timezone.now()
+    interval = _setting('MONITORING_LINK_CHECK_INTERVAL_MINUTES', DEFAULT_CHECK_INTERVAL_MINUTES)
+    recent_change_cutoff = now - timedelta(
+        hours=_setting('MONITORING_LINK_RECENT_CHANGE_HOURS', DEFAULT_RECENT_CHANGE_HOURS)
+    )
+
+    due_links = DiscoveredLink.objects.filter(
+        Q(last_checked__isnull=True) | Q(last_checked__lt=now - timedelta(minutes=interval)),
+        Q(fresh_until__isnull=True) | Q(fresh_until__lte=now),
+    )
+    due_count = due_links.count()
+    if due_count == 0:
+        return [], 0
+
+    if budget is None:
+        budget = get_check_budget(due_count)
+
+    links = list(
+        due_links.annotate(
+            check_priority=Case(
+                When(status_changed_at__gte=recent_change_cutoff, then=Value(0)),
+                When(last_checked__isnull=True, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            )
+        ).select_related('site')
+        .order_by('check_priority', F('last_checked').asc(nulls_first=True))[:budget]
+    )
+    return links, due_count
+
+
+def apply_check_to_link(link, check_result, checked_at):
+    """
+    Apply a conditional check result to a DiscoveredLink in memory (no save).
+
+    Returns:
+        Unsaved LinkCheck for the result
+    """
+    status_code = check_result.get('status_code')
+    cache_headers = check_result.get('cache_headers') or {}
+    metadata = dict(check_result.get('metadata', {}))
+
+    if status_code == 304:
+        # Unchanged since the stored validators: the page keeps its last status
+        status_code = link.current_status or 200
+        status_text = link.current_status_text or 'OK'
+        metadata['not_modified'] = True
+        link.etag = (cache_headers.get('etag') or link.etag)[:512]
+        link.last_modified = (cache_headers.get('last_modified') or link.last_modified)[:64]
+        link.fresh_until = get_fresh_until(cache_headers, checked_at)
+    elif check_result['status'] == 'up':
+        status_text = 'OK'
+        link.etag = cache_headers.get('etag', '')[:512]
+        link.last_modified = cache_headers.get('last_modified', '')[:64]
+        link.fresh_until = get_fresh_until(cache_headers, checked_at)
+    else:
+        # Broken links are rechecked unconditionally on every pass
+        status_text = check_result.get('error_message') or 'Error'
+        link.etag = ''
+        link.last_modified = ''
+        link.fresh_until = None
+
+    if link.last_checked is not None and status_code != link.current_status:
+        link.status_changed_at = checked_at
+    link.current_status = status_code
+    link.current_status_text = status_text[:255]
+    link.last_checked = checked_at
+
+    return LinkCheck(
+        link=link,
+        status=status_code or 0,
+        status_text=status_text[:255],
+        response_time=check_result['response_time'],
+        error_message=check_result.get('error_message', ''),
+        metadata=metadata
+    )
+
+
+def persist_link_check_results(check_results, checked_at=None):
+    """
+    Persist one pass of link check results in bulk.
+
+    Args:
+        check_results: list of (DiscoveredLink, check_result dict) tuples
+        checked_at: Timestamp recorded as the links' last_checked (default: now)
+
+    Returns:
+        dict with pages_ok, pages_error, pages_not_modified
+    """
+    summary = {
+        'pages_ok': 0,
+        'pages_error': 0,
+        'pages_not_modified': 0,
+    }
+    if not check_results:
+        return summary
+
+    checked_at = checked_at or timezone.now()
+    batch_size = _setting('MONITORING_BULK_BATCH_SIZE', 1000)
+
+    link_checks = []
+    links = []
+    for link, check_result in check_results:
+        link_checks.append(apply_check_to_link(link, check_result, checked_at))
+        links.append(link)
+
+        if check_result['status'] == 'up':
+            summary['pages_ok'] += 1
+        else:
+            summary['pages_error'] += 1
+        if check_result.get('status_code') == 304:
+            summary['pages_not_modified'] += 1
+
+    with transaction.atomic():
+        LinkCheck.objects.bulk_create(link_checks, batch_size=batch_size)
+        DiscoveredLink.objects.bulk_update(links, LINK_UPDATE_FIELDS, batch_size=batch_size)
+
+    return summary
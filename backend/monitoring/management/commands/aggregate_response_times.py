@@ -0,0 +1,54 @@
+"""
+Django management command to build ResponseTimeHistory rollups on demand.
+
+Usage:
+    python manage.py aggregate_response_times                      # yesterday + late checks (nightly run)
+    python manage.py aggregate_response_times --start-date 2025-01-01 --end-date 2025-01-31
+    python manage.py aggregate_response_times --incremental        # only days that received late checks
+"""
+
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from monitoring.aggregation import reaggregate_late_checks
+from monitoring.tasks import aggregate_response_time_history
+
+
+class Command(BaseCommand):
+    help = 'Aggregate StatusCheck records into ResponseTimeHistory (backfill or incremental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            help='First day to aggregate (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--end-date',
+            help='Last day to aggregate, inclusive (YYYY-MM-DD, default: start date)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only re-aggregate days that received checks after they were rolled up',
+        )
+
+    def handle(self, *args, **options):
+        start_date = options['start_date']
+        end_date = options['end_date']
+
+        if options['incremental']:
+            written = reaggregate_late_checks()
+            self.stdout.write(self.style.SUCCESS(f'✅ Re-aggregated {written} rollup rows'))
+            return
+
+        if end_date and not start_date:
+            raise CommandError('--end-date requires --start-date')
+        try:
+            if start_date:
+                date.fromisoformat(start_date)
+            if end_date:
+                date.fromisoformat(end_date)
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        result = aggregate_response_time_history(start_date=start_date, end_date=end_date)
+        self.stdout.write(self.style.SUCCESS(f'✅ Aggregated {result.get("aggregated_records", 0)} rollup rows'))
@@ -0,0 +1,158 @@
+"""
+Django management command to benchmark the concurrent probe engine.
+
+Starts local stub HTTP servers with fast, slow, failing and hanging endpoints
+and reports sites-per-second for the probe engine (and, optionally, the old
+serial loop) at increasing site counts. No database access is needed.
+
+Usage:
+    python manage.py benchmark_probe_engine
+    python manage.py benchmark_probe_engine --sizes 100 1000 10000 --hosts 20
+    python manage.py benchmark_probe_engine --sizes 100 --serial
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from monitoring.probe_engine import ProbeEngine
+from monitoring.utils import check_site_status
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Stub endpoints: /ok, /slow, /fail and /hang."""
+
+    protocol_version = 'HTTP/1.1'
+    slow_delay = 0.2
+    hang_delay = 30.0
+
+    def do_HEAD(self):
+        if self.path.startswith('/slow'):
+            time.sleep(self.slow_delay)
+            self._respond(200)
+        elif self.path.startswith('/fail'):
+            self._respond(500)
+        elif self.path.startswith('/hang'):
+            time.sleep(self.hang_delay)
+            self._respond(200)
+        else:
+            self._respond(200)
+
+    do_GET = do_HEAD
+
+    def _respond(self, status_code):
+        try:
+            self.send_response(status_code)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        return
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the concurrent site probe engine against local stub HTTP servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000, 10000],
+                            help='Site counts to benchmark (default: 100 1000 10000)')
+        parser.add_argument('--hosts', type=int, default=20,
+                            help='Number of stub servers (distinct hosts) to spread sites across')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Global concurrency cap (default: MONITORING_PROBE_MAX_WORKERS)')
+        parser.add_argument('--per-host', type=int, default=None,
+                            help='Per-host concurrency cap (default: MONITORING_PROBE_PER_HOST_LIMIT)')
+        parser.add_argument('--deadline', type=float, default=None,
+                            help='Tick deadline in seconds (default: MONITORING_TICK_DEADLINE_SECONDS)')
+        parser.add_argument('--timeout', type=float, default=2.0,
+                            help='Per-request timeout in seconds (default: 2)')
+        parser.add_argument('--slow-ratio', type=float, default=0.1,
+                            help='Fraction of sites pointing at the slow endpoint')
+        parser.add_argument('--fail-ratio', type=float, default=0.05,
+                            help='Fraction of sites pointing at the failing (HTTP 500) endpoint')
+        parser.add_argument('--hang-ratio', type=float, default=0.01,
+                            help='Fraction of sites pointing at the hanging endpoint (hits the timeout)')
+        parser.add_argument('--serial', action='store_true',
+                            help='Also run the old serial loop for comparison (slow at large sizes)')
+
+    def handle(self, *args, **options):
+        servers = self._start_servers(options['hosts'])
+        try:
+            self.stdout.write('=' * 60)
+            self.stdout.write('PROBE ENGINE BENCHMARK')
+            self.stdout.write('=' * 60)
+            for size in options['sizes']:
+                sites = self._build_sites(size, servers, options)
+                self._run_engine(size, sites, options)
+                if options['serial']:
+                    self._run_serial(size, sites, options['timeout'])
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+    def _start_servers(self, count):
+        servers = []
+        for _ in range(max(1, count)):
+            server = StubServer(('127.0.0.1', 0), StubHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+        return servers
+
+    def _build_sites(self, size, servers, options):
+        slow_cutoff = options['slow_ratio']
+        fail_cutoff = slow_cutoff + options['fail_ratio']
+        hang_cutoff = fail_cutoff + options['hang_ratio']
+
+        sites = []
+        for index in range(size):
+            position = (index % 100) / 100.0
+            if position < slow_cutoff:
+                path = 'slow'
+            elif position < fail_cutoff:
+                path = 'fail'
+            elif position < hang_cutoff:
+                path = 'hang'
+            else:
+                path = 'ok'
+            host, port = servers[index % len(servers)].server_address[:2]
+            sites.append(SimpleNamespace(id=index, url=f'http://{host}:{port}/{path}/{index}'))
+        return sites
+
+    def _run_engine(self, size, sites, options):
+        engine = ProbeEngine(
+            max_workers=options['workers'],
+            per_host_limit=options['per_host'],
+            tick_deadline=options['deadline'],
+            timeout=options['timeout'],
+        )
+        start = time.perf_counter()
+        with engine:
+            results, deferred = engine.probe(sites)
+        elapsed = time.perf_counter() - start
+
+        up = sum(1 for _, result in results if result['status'] == 'up')
+        self.stdout.write(
+            f'engine  sites={size:>6}  workers={engine.max_workers:<4} per_host={engine.per_host_limit:<3} '
+            f'time={elapsed:8.2f}s  rate={len(results) / elapsed:9.1f} sites/s  '
+            f'up={up} down={len(results) - up} deferred={len(deferred)}'
+        )
+
+    def _run_serial(self, size, sites, timeout):
+        start = time.perf_counter()
+        for site in sites:
+            check_site_status(site.url, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'serial  sites={size:>6}  time={elapsed:8.2f}s  rate={size / elapsed:9.1f} sites/s'
+        )
@@ -4,12 +4,17 @@ Django management command to clean up old monitoring data.
 Usage:
     python manage.py cleanup_monitoring_data
     python manage.py cleanup_monitoring_data --days 30
+
+Rows are removed with chunked deletes, or by dropping partitions once the
+tables are partitioned (see manage_monitoring_partitions). Plan retention
+overrides (SubscriptionPlan.monitoring_retention_days) are honoured.
 """
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from monitoring.models import StatusCheck, LinkCheck, Incident
+from monitoring.retention import apply_retention, get_default_retention_days
 
 
 class Command(BaseCommand):
@@ -19,8 +24,8 @@ class Command(BaseCommand):
         parser.add_argument(
             '--days',
             type=int,
-            default=30,
-            help='Number of days to keep (default: 30)',
+            default=None,
+            help='Number of days to keep for sites without a plan override (default: MONITORING_RETENTION_DAYS)',
         )
         parser.add_argument(
             '--resolve-old-incidents',
@@ -29,32 +34,23 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        days = options['days']
+        days = options['days'] or get_default_retention_days()
         resolve_incidents = options['resolve_old_incidents']
         
         cutoff_date = timezone.now() - timedelta(days=days)
         
         self.stdout.write(f"Cleaning up monitoring data older than {days} days (before {cutoff_date.date()})...")
         
-        # Delete old StatusCheck records
-        deleted_checks = StatusCheck.objects.filter(checked_at__lt=cutoff_date).count()
-        if deleted_checks > 0:
-            StatusCheck.objects.filter(checked_at__lt=cutoff_date).delete()
-            self.stdout.write(
-                self.style.SUCCESS(f'Deleted {deleted_checks} old StatusCheck records')
-            )
-        else:
-            self.stdout.write('No old StatusCheck records to delete')
-        
-        # Delete old LinkCheck records
-        deleted_link_checks = LinkCheck.objects.filter(checked_at__lt=cutoff_date).count()
-        if deleted_link_checks > 0:
-            LinkCheck.objects.filter(checked_at__lt=cutoff_date).delete()
-            self.stdout.write(
-                self.style.SUCCESS(f'Deleted {deleted_link_checks} old LinkCheck records')
-            )
-        else:
-            self.stdout.write('No old LinkCheck records to delete')
+        retention = apply_retention(default_days=days)
+        for model in (StatusCheck, LinkCheck):
+            stats = retention[model._meta.db_table]
+            if stats['deleted'] or stats['partitions_dropped']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Deleted {stats['deleted']} old {model.__name__} records, "
+                    f"dropped {stats['partitions_dropped']} partitions"
+                ))
+            else:
+                self.stdout.write(f'No old {model.__name__} records to delete')
         
         # Resolve old ongoing incidents (if requested)
         if resolve_incidents:
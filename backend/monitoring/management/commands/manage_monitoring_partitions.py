@@ -0,0 +1,66 @@
+"""
+Django management command to maintain time partitions of StatusCheck and LinkCheck.
+
+Usage:
+    python manage.py manage_monitoring_partitions --convert   # one-time: convert tables to range partitioning
+    python manage.py manage_monitoring_partitions             # create future partitions, enforce retention
+    python manage.py manage_monitoring_partitions --ahead 14 --skip-retention
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from monitoring.retention import (
+    apply_retention,
+    convert_to_partitioned,
+    ensure_future_partitions,
+    get_retention_models,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create future partitions and drop expired ones for StatusCheck and LinkCheck'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert unpartitioned tables to range partitioning on checked_at (takes an exclusive lock)',
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=None,
+            help='Number of future partitions to keep ready (default: MONITORING_PARTITIONS_AHEAD)',
+        )
+        parser.add_argument(
+            '--skip-retention',
+            action='store_true',
+            help='Only create partitions, do not drop or delete expired data',
+        )
+
+    def handle(self, *args, **options):
+        ahead = options['ahead']
+
+        for model in get_retention_models():
+            table = model._meta.db_table
+            if not is_partitioned(model):
+                if not options['convert']:
+                    self.stdout.write(f'{table} is not partitioned (run with --convert); using chunked deletes')
+                    continue
+                try:
+                    created = convert_to_partitioned(model, ahead=ahead)
+                except Exception as e:
+                    raise CommandError(f'Failed to convert {table}: {e}')
+                self.stdout.write(self.style.SUCCESS(f'✅ Converted {table} ({len(created)} future partitions)'))
+                continue
+
+            created = ensure_future_partitions(model, ahead=ahead)
+            self.stdout.write(f'{table}: created {len(created)} partitions')
+
+        if options['skip_retention']:
+            return
+
+        for table, stats in apply_retention().items():
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {table}: dropped {stats['partitions_dropped']} partitions, deleted {stats['deleted']} rows"
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responsetimehistory',
+            name='last_check_id',
+            field=models.BigIntegerField(blank=True, help_text='Highest StatusCheck id included (re-aggregation watermark)', null=True),
+        ),
+    ]
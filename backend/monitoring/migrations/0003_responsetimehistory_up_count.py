@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0002_responsetimehistory_last_check_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responsetimehistory',
+            name='up_count',
+            field=models.IntegerField(blank=True, help_text='Number of checks with status up in this period', null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_responsetimehistory_up_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discoveredlink',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, help_text='When current_status last changed', null=True),
+        ),
+        migrations.AddField(
+            model_name='discoveredlink',
+            name='etag',
+            field=models.CharField(blank=True, help_text='ETag sent back as If-None-Match', max_length=512),
+        ),
+        migrations.AddField(
+            model_name='discoveredlink',
+            name='last_modified',
+            field=models.CharField(blank=True, help_text='Last-Modified sent back as If-Modified-Since', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='discoveredlink',
+            name='fresh_until',
+            field=models.DateTimeField(blank=True, help_text='Cache-Control max-age expiry; not rechecked before this', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='discoveredlink',
+            index=models.Index(fields=['last_checked', 'fresh_until'], name='monitoring__last_ch_68337d_idx'),
+        ),
+    ]
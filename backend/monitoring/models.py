@@ -66,6 +66,8 @@ class ResponseTimeHistory(models.Model):
     min_response_time = models.IntegerField(help_text='Minimum response time')
     max_response_time = models.IntegerField(help_text='Maximum response time')
     check_count = models.IntegerField(help_text='Number of checks in this period')
+    up_count = models.IntegerField(null=True, blank=True, help_text='Number of checks with status up in this period')
+    last_check_id = models.BigIntegerField(null=True, blank=True, help_text='Highest StatusCheck id included (re-aggregation watermark)')
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -189,6 +191,12 @@ class DiscoveredLink(models.Model):
     current_status = models.IntegerField(null=True, blank=True, help_text='Latest HTTP status code')
     current_status_text = models.CharField(max_length=255, blank=True)
     last_checked = models.DateTimeField(null=True, blank=True)
+    status_changed_at = models.DateTimeField(null=True, blank=True, help_text='When current_status last changed')
+    
+    # Validator cache for conditional revalidation (from the latest successful response)
+    etag = models.CharField(max_length=512, blank=True, help_text='ETag sent back as If-None-Match')
+    last_modified = models.CharField(max_length=64, blank=True, help_text='Last-Modified sent back as If-Modified-Since')
+    fresh_until = models.DateTimeField(null=True, blank=True, help_text='Cache-Control max-age expiry; not rechecked before this')
     
     class Meta:
         ordering = ['-discovered_at']
@@ -196,6 +204,7 @@ class DiscoveredLink(models.Model):
         indexes = [
             models.Index(fields=['site', '-discovered_at']),
             models.Index(fields=['is_internal', 'current_status']),
+            models.Index(fields=['last_checked', 'fresh_until']),
         ]
     
     def __str__(self):
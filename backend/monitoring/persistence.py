@@ -0,0 +1,198 @@
+"""
+Batched persistence stage for monitored site checks.
+
+Collects one tick's probe results and writes them with a constant number of
+queries regardless of site count:
+
+- one bulk_create for StatusCheck
+- one bulk_update for MonitoredSite (only the fields a check changes)
+- up/down transitions computed in memory from each site's previous status
+- one lookup of ongoing incidents, then bulk create/resolve of Incident rows
+"""
+
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from monitoring.models import StatusCheck, Incident
+from users.models import MonitoredSite
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Fields a status check writes back to MonitoredSite
+SITE_UPDATE_FIELDS = [
+    'status', 'response_time', 'last_check', 'next_check_at', 'error_message', 'ssl_valid', 'updated_at'
+]
+
+INCIDENT_RESOLVE_FIELDS = ['status', 'resolved_at', 'duration_minutes', 'resolution_steps', 'updated_at']
+
+
+def _get_batch_size():
+    return getattr(settings, 'MONITORING_BULK_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def build_status_check(site, check_result):
+    """
+    Build an unsaved StatusCheck from a check_site_status result dict.
+    """
+    return StatusCheck(
+        site=site,
+        status=check_result['status'],
+        response_time=check_result['response_time'],
+        status_code=check_result.get('status_code'),
+        error_message=check_result.get('error_message', ''),
+        metadata=check_result.get('metadata', {})
+    )
+
+
+def apply_check_to_site(site, check_result, checked_at):
+    """
+    Apply a check result to a MonitoredSite in memory (no save).
+    """
+    site.status = check_result['status']
+    site.response_time = check_result['response_time']
+    site.last_check = checked_at
+    site.schedule_next_check(checked_at)
+    site.error_message = check_result.get('error_message', '')
+    site.updated_at = checked_at
+
+    # Update SSL info if available
+    if 'ssl_valid' in check_result.get('metadata', {}):
+        site.ssl_valid = check_result['metadata']['ssl_valid']
+
+
+def detect_transitions(check_results):
+    """
+    Compute up/down transitions in memory.
+
+    Must be called before the results are applied to the sites, since it
+    compares each site's stored (previous) status with the new result.
+
+    Args:
+        check_results: list of (site, check_result) tuples
+
+    Returns:
+        tuple(went_down, came_up) - lists of (site, check_result) tuples
+    """
+    went_down = []
+    came_up = []
+    for site, check_result in check_results:
+        previous_status = site.status
+        current_status = check_result['status']
+        if previous_status == 'up' and current_status == 'down':
+            went_down.append((site, check_result))
+        elif previous_status == 'down' and current_status == 'up':
+            came_up.append((site, check_result))
+    return went_down, came_up
+
+
+def apply_incident_transitions(went_down, came_up, checked_at):
+    """
+    Open incidents for sites that went down and resolve them for sites that
+    came back up, using one lookup plus bulk writes.
+
+    Returns:
+        tuple(created_incidents, resolved_incidents)
+    """
+    if not went_down and not came_up:
+        return [], []
+
+    site_ids = [site.id for site, _ in went_down] + [site.id for site, _ in came_up]
+    ongoing_by_site = {}
+    for incident in Incident.objects.filter(site_id__in=site_ids, status='ongoing').order_by('started_at'):
+        # Keep the oldest ongoing incident per site (matches .first() on the old per-site path)
+        ongoing_by_site.setdefault(incident.site_id, incident)
+
+    new_incidents = []
+    for site, check_result in went_down:
+        if site.id in ongoing_by_site:
+            continue
+        new_incidents.append(Incident(
+            site=site,
+            status='ongoing',
+            started_at=checked_at,
+            root_cause=check_result.get('error_message') or 'Site is down',
+            impact='full_outage',
+            metadata={
+                'status_code': check_result.get('status_code'),
+                'response_time': check_result['response_time'],
+            }
+        ))
+
+    resolved_incidents = []
+    for site, _ in came_up:
+        incident = ongoing_by_site.get(site.id)
+        if not incident:
+            continue
+        incident.site = site
+        duration_seconds = (checked_at - incident.started_at).total_seconds()
+        incident.status = 'resolved'
+        incident.resolved_at = checked_at
+        incident.duration_minutes = int(duration_seconds / 60)
+        incident.resolution_steps = 'Site recovered automatically'
+        incident.updated_at = checked_at
+        resolved_incidents.append(incident)
+
+    batch_size = _get_batch_size()
+    if new_incidents:
+        Incident.objects.bulk_create(new_incidents, batch_size=batch_size)
+    if resolved_incidents:
+        Incident.objects.bulk_update(resolved_incidents, INCIDENT_RESOLVE_FIELDS, batch_size=batch_size)
+
+    return new_incidents, resolved_incidents
+
+
+def persist_check_results(check_results, checked_at=None):
+    """
+    Persist one tick's check results in bulk.
+
+    Args:
+        check_results: list of (MonitoredSite, check_result dict) tuples
+        checked_at: Timestamp recorded as the sites' last_check (default: now)
+
+    Returns:
+        dict with sites_up, sites_down, incidents_created, incidents_resolved
+    """
+    summary = {
+        'sites_up': 0,
+        'sites_down': 0,
+        'incidents_created': 0,
+        'incidents_resolved': 0,
+    }
+    if not check_results:
+        return summary
+
+    checked_at = checked_at or timezone.now()
+    batch_size = _get_batch_size()
+
+    # Transitions must be read before the new status is applied to the sites
+    went_down, came_up = detect_transitions(check_results)
+
+    status_checks = []
+    sites = []
+    for site, check_result in check_results:
+        status_checks.append(build_status_check(site, check_result))
+        apply_check_to_site(site, check_result, checked_at)
+        sites.append(site)
+
+        if check_result['status'] == 'up':
+            summary['sites_up'] += 1
+        else:
+            summary['sites_down'] += 1
+
+    with transaction.atomic():
+        StatusCheck.objects.bulk_create(status_checks, batch_size=batch_size)
+        MonitoredSite.objects.bulk_update(sites, SITE_UPDATE_FIELDS, batch_size=batch_size)
+        created, resolved = apply_incident_transitions(went_down, came_up, checked_at)
+
+    for incident in created:
+        logger.info(f'[CheckMonitoredSites] Created incident for {incident.site.url}')
+    for incident in resolved:
+        logger.info(f'[CheckMonitoredSites] Resolved incident for {incident.site.url}')
+
+    summary['incidents_created'] = len(created)
+    summary['incidents_resolved'] = len(resolved)
+    return summary
@@ -0,0 +1,260 @@
+"""
+Concurrent probe engine for monitored site checks.
+
+Runs check_site_status for a batch of sites on a bounded thread pool so a
+handful of slow or dead hosts no longer stalls the whole beat tick.
+
+- One pooled requests.Session per host (keep-alive connection reuse)
+- Global concurrency cap (worker count) and per-host concurrency cap
+- Per-tick deadline: sites that have not finished in time are returned as
+  deferred instead of holding up the results of the others; the caller
+  decides when they are probed again (monitored sites wait for their claim
+  lease to expire, see monitoring.utils.get_sites_to_check)
+- Sessions still used by probes abandoned at the deadline are closed once
+  those probes finish on their own request timeout, not under them
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from monitoring.utils import check_site_status, normalize_url
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+
+DEFAULT_MAX_WORKERS = 50
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_TICK_DEADLINE = 50.0
+
+
+def get_host_key(url):
+    """
+    Return the host key (lowercased netloc) used for pooling and per-host limits.
+
+    Args:
+        url: Site URL (may or may not have protocol)
+
+    Returns:
+        Host key string ('' for unparseable URLs)
+    """
+    normalized_url = normalize_url(url)
+    if not normalized_url:
+        return ''
+    return urlparse(normalized_url).netloc.lower()
+
+
+def interleave_by_host(sites):
+    """
+    Reorder sites round-robin across hosts.
+
+    Submitting sites host by host means that a block of sites on one host
+    would fill the pool with workers waiting on that host's semaphore.
+    Interleaving keeps every worker busy on a different host where possible.
+
+    Args:
+        sites: Iterable of objects with a ``url`` attribute
+
+    Returns:
+        List of sites in interleaved order
+    """
+    buckets = OrderedDict()
+    for site in sites:
+        buckets.setdefault(get_host_key(site.url), deque()).append(site)
+
+    ordered = []
+    while buckets:
+        for host in list(buckets.keys()):
+            bucket = buckets[host]
+            ordered.append(bucket.popleft())
+            if not bucket:
+                del buckets[host]
+    return ordered
+
+
+class ProbeEngine:
+    """
+    Bounded, connection-reusing executor for site status probes.
+
+    Usage:
+        with ProbeEngine() as engine:
+            results, deferred = engine.probe(sites)
+
+    ``results`` is a list of ``(site, check_result)`` tuples in input order,
+    where ``check_result`` is the dict returned by check_site_status.
+    ``deferred`` lists the sites that did not finish before the deadline.
+    """
+
+    def __init__(self, max_workers=None, per_host_limit=None, tick_deadline=None, timeout=10):
+        self.max_workers = max_workers or getattr(
+            settings, 'MONITORING_PROBE_MAX_WORKERS', DEFAULT_MAX_WORKERS
+        )
+        self.per_host_limit = per_host_limit or getattr(
+            settings, 'MONITORING_PROBE_PER_HOST_LIMIT', DEFAULT_PER_HOST_LIMIT
+        )
+        self.tick_deadline = tick_deadline or getattr(
+            settings, 'MONITORING_TICK_DEADLINE_SECONDS', DEFAULT_TICK_DEADLINE
+        )
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._host_semaphores = {}
+        self._abandoned = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _get_session(self, host):
+        """Get (or create) the pooled session for a host."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_limit)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _get_semaphore(self, host):
+        """Get (or create) the concurrency limiter for a host."""
+        with self._lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+
+    def probe_url(self, url, headers=None):
+        """
+        Probe a single URL, respecting the per-host concurrency cap.
+
+        Args:
+            url: URL to probe
+            headers: Optional extra request headers
+
+        Returns:
+            check_site_status result dict
+        """
+        host = get_host_key(url)
+        with self._get_semaphore(host):
+            return check_site_status(
+                url, timeout=self.timeout, session=self._get_session(host), headers=headers
+            )
+
+    def probe(self, sites, headers_for=None):
+        """
+        Probe all sites concurrently within the tick deadline.
+
+        Args:
+            sites: Iterable of objects with a ``url`` attribute (MonitoredSite,
+                DiscoveredLink)
+            headers_for: Optional callable returning extra request headers for a site
+
+        Returns:
+            tuple(results, deferred) - see class docstring
+        """
+        sites = list(sites)
+        if not sites:
+            return [], []
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(sites)),
+            thread_name_prefix='site-probe'
+        )
+        futures = {}
+        try:
+            for site in interleave_by_host(sites):
+                headers = headers_for(site) if headers_for else None
+                futures[id(site)] = executor.submit(self.probe_url, site.url, headers)
+            done, _ = wait(futures.values(), timeout=self.tick_deadline)
+        finally:
+            # Drop anything still queued; in-flight probes finish on their own timeout
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        with self._lock:
+            self._abandoned.extend(future for future in futures.values() if future not in done)
+
+        results = []
+        deferred = []
+        for site in sites:
+            future = futures[id(site)]
+            if future not in done:
+                deferred.append(site)
+                continue
+            try:
+                check_result = future.result()
+            except Exception as e:
+                check_result = {
+                    'status': 'down',
+                    'response_time': 0,
+                    'status_code': None,
+                    'error_message': f'Check error: {str(e)}',
+                    'metadata': {'error': True}
+                }
+            results.append((site, check_result))
+
+        if deferred:
+            logger.warning(
+                f'[ProbeEngine] Tick deadline of {self.tick_deadline}s reached, '
+                f'deferring {len(deferred)} of {len(sites)} sites'
+            )
+
+        return results, deferred
+
+    def close(self):
+        """
+        Close all pooled sessions.
+
+        Sessions are closed right away unless probes abandoned at a tick
+        deadline are still running; they are then closed when the last of
+        those probes finishes.
+        """
+        with self._lock:
+            abandoned = [future for future in self._abandoned if not future.done()]
+            self._abandoned = []
+        if not abandoned:
+            self._close_sessions()
+            return
+
+        remaining = [len(abandoned)]
+        remaining_lock = threading.Lock()
+
+        def _on_done(_future):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self._close_sessions()
+
+        for future in abandoned:
+            future.add_done_callback(_on_done)
+
+    def _close_sessions(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._host_semaphores.clear()
+
+
+def probe_sites(sites, headers_for=None, **engine_options):
+    """
+    Convenience wrapper: probe sites with a short-lived ProbeEngine.
+
+    Returns:
+        tuple(results, deferred) - see ProbeEngine
+    """
+    with ProbeEngine(**engine_options) as engine:
+        return engine.probe(sites, headers_for=headers_for)
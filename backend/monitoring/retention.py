@@ -0,0 +1,491 @@
+"""
+Retention and time partitioning for raw monitoring checks (StatusCheck, LinkCheck).
+
+Both tables can be converted to native PostgreSQL range partitioning on
+checked_at (``python manage.py manage_monitoring_partitions --convert``).
+Once a table is partitioned:
+
+- partitions (daily or weekly) are created ahead of time; a DEFAULT
+  partition catches rows past them (e.g. when maintenance did not run) and
+  those rows are moved into their partition once it is created
+- partitions that lie entirely before the longest retention window are
+  dropped, which is O(1) and leaves no dead tuples or index bloat behind
+
+Retention is MONITORING_RETENTION_DAYS unless the site owner's active plan
+sets SubscriptionPlan.monitoring_retention_days. Rows of sites on shorter
+retention tiers, and all expired rows of a table that is not partitioned
+yet, are removed with chunked raw-SQL deletes (no ORM cascade collection,
+short transactions).
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from monitoring.models import StatusCheck, LinkCheck, DiscoveredLink
+from users.models import MonitoredSite
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_PARTITION_INTERVAL = 'daily'
+DEFAULT_PARTITIONS_AHEAD = 7
+DEFAULT_DELETE_CHUNK_SIZE = 5000
+
+PARTITION_INTERVALS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+}
+
+_UPPER_BOUND_RE = re.compile(r"TO \((?:'([^']+)'|MAXVALUE)\)")
+
+
+def get_retention_models():
+    return [StatusCheck, LinkCheck]
+
+
+def get_default_retention_days():
+    return getattr(settings, 'MONITORING_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def get_partition_interval():
+    interval = getattr(settings, 'MONITORING_PARTITION_INTERVAL', DEFAULT_PARTITION_INTERVAL)
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f'MONITORING_PARTITION_INTERVAL must be one of {", ".join(PARTITION_INTERVALS)}')
+    return interval
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _timestamp_literal(value):
+    return "'" + value.astimezone(dt_timezone.utc).isoformat() + "'"
+
+
+def period_start(value, interval=None):
+    """
+    Start (UTC midnight, Monday for weekly) of the partition period containing value.
+    """
+    interval = interval or get_partition_interval()
+    value = value.astimezone(dt_timezone.utc)
+    start = datetime(value.year, value.month, value.day, tzinfo=dt_timezone.utc)
+    if interval == 'weekly':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y%m%d}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+# ---------------------------------------------------------------------------
+# Partition introspection and maintenance
+# ---------------------------------------------------------------------------
+
+def is_partitioned(model):
+    """
+    True if the model's table is a PostgreSQL partitioned table.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(model):
+    """
+    List the partitions of a partitioned table.
+
+    Returns:
+        List of (partition name, upper bound datetime or None for MAXVALUE)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            ORDER BY child.relname
+            """,
+            [model._meta.db_table]
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _UPPER_BOUND_RE.search(bound or '')
+        upper = None
+        if match and match.group(1):
+            upper = datetime.fromisoformat(match.group(1))
+        partitions.append((name, upper))
+    return partitions
+
+
+def create_default_partition(model):
+    """
+    Create the DEFAULT partition, which receives rows no range partition covers.
+    """
+    table = model._meta.db_table
+    name = default_partition_name(table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {_quote(name)} PARTITION OF {_quote(table)} DEFAULT')
+    return name
+
+
+def _table_exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
+
+
+def create_partition(model, start, end):
+    """
+    Create the partition for [start, end).
+
+    PostgreSQL refuses a new range that rows in the DEFAULT partition fall
+    into, so such rows are moved into the new partition before it is
+    attached, in the same transaction.
+    """
+    table = model._meta.db_table
+    name = partition_name(table, start)
+    default = default_partition_name(table)
+    bounds = f'FOR VALUES FROM ({_timestamp_literal(start)}) TO ({_timestamp_literal(end)})'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if _table_exists(cursor, name):
+            return name
+        stray = False
+        if _table_exists(cursor, default):
+            cursor.execute(
+                f'SELECT 1 FROM {_quote(default)} WHERE checked_at >= %s AND checked_at < %s LIMIT 1', [start, end]
+            )
+            stray = cursor.fetchone() is not None
+        if not stray:
+            cursor.execute(f'CREATE TABLE {_quote(name)} PARTITION OF {_quote(table)} {bounds}')
+            return name
+
+        cursor.execute(
+            f'CREATE TABLE {_quote(name)} (LIKE {_quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {_quote(default)} WHERE checked_at >= %s AND checked_at < %s RETURNING *) '
+            f'INSERT INTO {_quote(name)} SELECT * FROM moved',
+            [start, end]
+        )
+        moved = cursor.rowcount
+        # Attaching builds the partition's indexes and foreign keys from the parent
+        cursor.execute(f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(name)} {bounds}')
+    logger.warning(f'[MonitoringPartitions] Moved {moved} rows of {table} from {default} into {name}')
+    return name
+
+
+def ensure_future_partitions(model, ahead=None, now=None):
+    """
+    Create partitions so that the next ``ahead`` periods can receive rows.
+
+    New partitions start at the highest existing upper bound, so they never
+    overlap the legacy partition created by the conversion. The DEFAULT
+    partition is created too if missing, and rows left in it beyond the new
+    partitions are logged as a warning.
+
+    Returns:
+        List of created partition names
+    """
+    interval = get_partition_interval()
+    step = PARTITION_INTERVALS[interval]
+    ahead = ahead if ahead is not None else getattr(settings, 'MONITORING_PARTITIONS_AHEAD', DEFAULT_PARTITIONS_AHEAD)
+    now = now or timezone.now()
+
+    upper_bounds = [upper for _, upper in list_partitions(model) if upper is not None]
+    start = max(upper_bounds) if upper_bounds else period_start(now, interval)
+    horizon = period_start(now, interval) + step * (ahead + 1)
+
+    default = create_default_partition(model)
+    created = []
+    while start < horizon:
+        end = period_start(start + step, interval)
+        created.append(create_partition(model, start, end))
+        start = end
+    if created:
+        logger.info(f'[MonitoringPartitions] Created {len(created)} partitions for {model._meta.db_table}')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {_quote(default)}')
+        stray = cursor.fetchone()[0]
+    if stray:
+        logger.warning(
+            f'[MonitoringPartitions] {stray} rows of {model._meta.db_table} are in {default}, '
+            f'past the partitions created up to {start:%Y-%m-%d}'
+        )
+    return created
+
+
+def drop_expired_partitions(model, cutoff):
+    """
+    Drop partitions whose upper bound is at or before cutoff.
+
+    Returns:
+        List of dropped partition names
+    """
+    dropped = []
+    for name, upper in list_partitions(model):
+        if upper is None or upper > cutoff:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {_quote(name)}')
+        dropped.append(name)
+    if dropped:
+        logger.info(f'[MonitoringPartitions] Dropped {len(dropped)} expired partitions of {model._meta.db_table}')
+    return dropped
+
+
+def convert_to_partitioned(model, ahead=None, now=None):
+    """
+    Convert an existing table into a range-partitioned table on checked_at.
+
+    The current table is kept as-is and attached as the ``<table>_legacy``
+    partition covering everything before the next period boundary, so no
+    rows are copied; it is dropped like any other partition once all of it
+    has expired. Runs in one transaction under an ACCESS EXCLUSIVE lock;
+    attaching validates the legacy rows and rebuilds the primary key on
+    them as (id, checked_at), so run it in a maintenance window.
+
+    Returns:
+        List of created future partition names
+    """
+    if connection.vendor != 'postgresql':
+        raise RuntimeError('Partitioning requires PostgreSQL')
+    if is_partitioned(model):
+        return []
+
+    table = model._meta.db_table
+    legacy = f'{table}_legacy'
+    sequence = f'{table}_id_seq'
+    now = now or timezone.now()
+    interval = get_partition_interval()
+    boundary = period_start(now, interval) + PARTITION_INTERVALS[interval]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Deferred FK checks pending in an outer transaction would block the ALTERs
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE')
+
+        cursor.execute(
+            """
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = %s
+            """,
+            [table]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')
+            """,
+            [table]
+        )
+        constraints = cursor.fetchall()
+        primary_key_names = {name for name, contype, _ in constraints if contype == 'p'}
+        foreign_keys = [(name, definition) for name, contype, definition in constraints if contype == 'f']
+
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {_quote(table)}')
+        next_id_floor = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        old_sequence = cursor.fetchone()[0]
+        if old_sequence:
+            cursor.execute(f'SELECT last_value FROM {old_sequence}')
+            next_id_floor = max(next_id_floor, cursor.fetchone()[0])
+
+        # Move the current table (and its index names) out of the way
+        cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}')
+        for position, (index_name, _) in enumerate(indexes):
+            if index_name in primary_key_names:
+                # Partitions take the parent's (id, checked_at) primary key instead
+                cursor.execute(f'ALTER TABLE {_quote(legacy)} DROP CONSTRAINT {_quote(index_name)}')
+            else:
+                cursor.execute(f'ALTER INDEX {_quote(index_name)} RENAME TO {_quote(f"{legacy}_{position}_idx")}')
+
+        # Partitions cannot carry their own identity column; ids come from a
+        # plain sequence owned by the partitioned table instead
+        cursor.execute(f'ALTER TABLE {_quote(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {_quote(legacy)} ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'DROP SEQUENCE IF EXISTS {_quote(sequence)}')
+
+        cursor.execute(
+            f'CREATE TABLE {_quote(table)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE (checked_at)'
+        )
+        cursor.execute(f'CREATE SEQUENCE {_quote(sequence)} OWNED BY {_quote(table)}.id')
+        cursor.execute('SELECT setval(%s, %s)', [sequence, max(next_id_floor, 1)])
+        cursor.execute(f"ALTER TABLE {_quote(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(table + "_pkey")} PRIMARY KEY (id, checked_at)')
+
+        # Recreate the secondary indexes under their original names; attaching
+        # reuses the legacy table's equivalent indexes instead of rebuilding them
+        for index_name, index_definition in indexes:
+            if index_name not in primary_key_names:
+                cursor.execute(index_definition)
+        for constraint_name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(constraint_name)} {definition}')
+
+        cursor.execute(
+            f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(legacy)} '
+            f'FOR VALUES FROM (MINVALUE) TO ({_timestamp_literal(boundary)})'
+        )
+        created = ensure_future_partitions(model, ahead=ahead, now=now)
+
+    logger.info(f'[MonitoringPartitions] Converted {table} to range partitioning on checked_at')
+    return created
+
+
+# ---------------------------------------------------------------------------
+# Retention
+# ---------------------------------------------------------------------------
+
+def get_retention_overrides():
+    """
+    Resolve sites whose owner's active plan overrides the default retention.
+
+    Returns:
+        dict mapping retention days -> set of site ids (default-retention sites are omitted)
+    """
+    default_days = get_default_retention_days()
+    try:
+        from financials.models import SubscriptionPlan, UserSubscription
+        plan_days = dict(SubscriptionPlan.objects.filter(
+            monitoring_retention_days__isnull=False
+        ).exclude(
+            monitoring_retention_days=default_days
+        ).values_list('plan_name', 'monitoring_retention_days'))
+        if not plan_days:
+            return {}
+
+        user_days = {}
+        for user_id, plan_name in UserSubscription.objects.filter(
+            status='active',
+            plan_name__in=list(plan_days.keys())
+        ).values_list('user_id', 'plan_name'):
+            # Users with several active subscriptions keep the longest retention
+            user_days[user_id] = max(user_days.get(user_id, 0), plan_days[plan_name])
+    except Exception as e:
+        logger.warning(f'[MonitoringRetention] Could not resolve plan retention, using the default for all sites: {str(e)}')
+        return {}
+
+    overrides = {}
+    for site_id, user_id in MonitoredSite.objects.filter(
+        user_id__in=list(user_days.keys())
+    ).values_list('id', 'user_id'):
+        overrides.setdefault(user_days[user_id], set()).add(site_id)
+    return overrides
+
+
+def _site_condition(model, exclude):
+    if model is LinkCheck:
+        condition = f'link_id IN (SELECT id FROM {_quote(DiscoveredLink._meta.db_table)} WHERE site_id = ANY(%s))'
+    else:
+        condition = 'site_id = ANY(%s)'
+    return f'NOT ({condition})' if exclude else condition
+
+
+def chunked_delete(model, cutoff, site_ids=None, exclude_site_ids=None, chunk_size=None):
+    """
+    Delete rows older than cutoff in short, bounded transactions.
+
+    Args:
+        model: StatusCheck or LinkCheck
+        cutoff: Rows with checked_at before this are deleted
+        site_ids: Only delete rows of these sites
+        exclude_site_ids: Never delete rows of these sites
+        chunk_size: Rows per DELETE statement (default: MONITORING_RETENTION_DELETE_CHUNK_SIZE)
+
+    Returns:
+        Number of rows deleted
+    """
+    chunk_size = chunk_size or getattr(settings, 'MONITORING_RETENTION_DELETE_CHUNK_SIZE', DEFAULT_DELETE_CHUNK_SIZE)
+    table = _quote(model._meta.db_table)
+
+    conditions = ['checked_at < %s']
+    params = [cutoff]
+    if site_ids is not None:
+        if not site_ids:
+            return 0
+        conditions.append(_site_condition(model, exclude=False))
+        params.append(list(site_ids))
+    if exclude_site_ids:
+        conditions.append(_site_condition(model, exclude=True))
+        params.append(list(exclude_site_ids))
+
+    sql = (
+        f'DELETE FROM {table} WHERE id IN ('
+        f'SELECT id FROM {table} WHERE {" AND ".join(conditions)} LIMIT %s)'
+    )
+
+    deleted = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params + [chunk_size])
+            batch = cursor.rowcount
+        deleted += batch
+        if batch < chunk_size:
+            return deleted
+
+
+def apply_retention(default_days=None, now=None):
+    """
+    Enforce retention on StatusCheck and LinkCheck.
+
+    - rows older than the longest retention tier: dropped with their
+      partitions, or chunk-deleted while the table is not partitioned
+    - rows of sites on shorter tiers: chunk-deleted per tier
+
+    Args:
+        default_days: Retention for sites without a plan override (default: MONITORING_RETENTION_DAYS)
+        now: Reference time (default: now)
+
+    Returns:
+        dict mapping table name -> {'partitions_dropped': n, 'deleted': n}
+    """
+    now = now or timezone.now()
+    default_days = default_days or get_default_retention_days()
+    overrides = {days: site_ids for days, site_ids in get_retention_overrides().items() if days != default_days}
+    longest = max([default_days] + list(overrides.keys()))
+    longest_cutoff = now - timedelta(days=longest)
+
+    result = {}
+    for model in get_retention_models():
+        table = model._meta.db_table
+        stats = {'partitions_dropped': 0, 'deleted': 0}
+
+        if is_partitioned(model):
+            stats['partitions_dropped'] = len(drop_expired_partitions(model, longest_cutoff))
+            ensure_future_partitions(model, now=now)
+        else:
+            stats['deleted'] += chunked_delete(model, longest_cutoff)
+
+        for days in sorted(set([default_days] + list(overrides.keys()))):
+            if days >= longest:
+                continue
+            cutoff = now - timedelta(days=days)
+            if days == default_days:
+                # Default tier: everyone except sites on other tiers
+                exclude = set().union(*overrides.values()) if overrides else set()
+                stats['deleted'] += chunked_delete(model, cutoff, exclude_site_ids=exclude)
+            else:
+                stats['deleted'] += chunked_delete(model, cutoff, site_ids=overrides[days])
+
+        logger.info(f'[MonitoringRetention] {table}: {stats}')
+        result[table] = stats
+    return result
@@ -0,0 +1,115 @@
+"""
+Sharding helpers for fanning monitored site checks out across Celery workers.
+
+The beat task claims the due sites, splits them into fixed-size shards and
+dispatches one check_site_shard sub-task per shard (as a chord), so check
+throughput scales with the number of workers consuming the shard queues.
+"""
+
+import logging
+from django.conf import settings
+
+logger = logging.getLogger('pagerodeo.jobs')
+
+
+DEFAULT_SHARD_SIZE = 200
+
+# Summary counters returned by each shard and summed by the chord callback
+SUMMARY_COUNTERS = [
+    'sites_checked',
+    'sites_deferred',
+    'sites_up',
+    'sites_down',
+    'incidents_created',
+    'incidents_resolved',
+]
+
+
+def get_shard_size():
+    return getattr(settings, 'MONITORING_SHARD_SIZE', DEFAULT_SHARD_SIZE)
+
+
+def shard_sites(sites, shard_size=None):
+    """
+    Split sites into fixed-size shards by site id hash.
+
+    Sites are bucketed by ``id % shard_count`` so a site lands in the same
+    shard position while the due set is stable, and every shard holds at
+    most ``shard_size`` sites.
+
+    Args:
+        sites: List of MonitoredSite instances
+        shard_size: Maximum sites per shard (default: MONITORING_SHARD_SIZE)
+
+    Returns:
+        List of lists of site ids (empty shards are dropped)
+    """
+    shard_size = shard_size or get_shard_size()
+    if not sites:
+        return []
+
+    shard_count = -(-len(sites) // shard_size)
+    shards = [[] for _ in range(shard_count)]
+    overflow = []
+    for site in sorted(sites, key=lambda s: s.id):
+        shard = shards[site.id % shard_count]
+        if len(shard) < shard_size:
+            shard.append(site.id)
+        else:
+            overflow.append(site.id)
+
+    # Skewed id distributions can overfill a bucket; spill into the emptiest shards
+    for site_id in overflow:
+        min(shards, key=len).append(site_id)
+
+    return [shard for shard in shards if shard]
+
+
+def get_shard_queues():
+    """
+    Resolve the Celery queues shards are routed to.
+
+    - MONITORING_SHARD_QUEUES, if set, is used as-is
+    - otherwise, with MONITORING_SHARD_BY_REGION, one queue per active
+      multilocation.Location that has a healthy runner: ``monitoring.<region_code>``
+    - otherwise the default queue (``[None]``)
+
+    Returns:
+        Non-empty list of queue names (None = default queue)
+    """
+    queues = list(getattr(settings, 'MONITORING_SHARD_QUEUES', []) or [])
+    if queues:
+        return queues
+
+    if getattr(settings, 'MONITORING_SHARD_BY_REGION', False):
+        try:
+            from multilocation.models import Location
+            region_codes = Location.objects.filter(
+                status='active',
+                runner_health__status='ok',
+            ).values_list('region_code', flat=True).distinct().order_by('region_code')
+            queues = [f'monitoring.{region_code}' for region_code in region_codes]
+        except Exception as e:
+            logger.warning(f'[CheckMonitoredSites] Could not resolve region queues, using default queue: {str(e)}')
+            queues = []
+
+    return queues or [None]
+
+
+def empty_summary():
+    summary = {'status': 'success'}
+    summary.update({counter: 0 for counter in SUMMARY_COUNTERS})
+    return summary
+
+
+def merge_summaries(summaries):
+    """
+    Sum per-shard summary dicts into one check_monitored_sites summary.
+    """
+    merged = empty_summary()
+    for summary in summaries:
+        if not isinstance(summary, dict):
+            continue
+        for counter in SUMMARY_COUNTERS:
+            merged[counter] += summary.get(counter, 0)
+    return merged
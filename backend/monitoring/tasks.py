@@ -3,15 +3,20 @@ Celery tasks for monitoring site checks and data management.
 """
 
 import logging
-from datetime import timedelta
+from datetime import date, timedelta
 from django.utils import timezone
-from monitoring.models import StatusCheck, LinkCheck, Incident, ResponseTimeHistory, DiscoveredLink
+from monitoring.models import StatusCheck, LinkCheck, Incident
 from monitoring.utils import (
-    check_site_status,
     detect_incident,
     get_sites_to_check,
     normalize_url
 )
+from monitoring.probe_engine import probe_sites
+from monitoring.persistence import persist_check_results
+from monitoring.link_checks import get_conditional_headers, get_links_to_check, persist_link_check_results
+from monitoring.aggregation import aggregate_date_range, reaggregate_late_checks
+from monitoring.retention import apply_retention
+from monitoring.sharding import empty_summary, get_shard_queues, merge_summaries, shard_sites
 from users.models import MonitoredSite
 
 logger = logging.getLogger('pagerodeo.jobs')
@@ -36,6 +41,11 @@ def check_monitored_sites():
     """
     Check all monitored sites that are due for checking.
     Runs every minute via Celery Beat.
+    
+    Due sites are claimed here and, when there is more than one shard's
+    worth, fanned out to check_site_shard sub-tasks as a chord whose callback
+    (aggregate_site_check_results) builds the summary. Otherwise the sites
+    are checked inline and the summary is returned directly.
     """
     logger.info('[CheckMonitoredSites] Starting site checks')
     
@@ -44,27 +54,110 @@ def check_monitored_sites():
     
     if total_sites == 0:
         logger.info('[CheckMonitoredSites] No sites to check')
-        return {
-        'status': 'success',
-        'sites_checked': 0,
-        'sites_up': 0,
-        'sites_down': 0,
-        'incidents_created': 0,
-        'incidents_resolved': 0
-    }
+        return empty_summary()
+    
+    shards = shard_sites(sites_to_check)
+    if CELERY_AVAILABLE and len(shards) > 1:
+        try:
+            return _dispatch_site_shards(shards)
+        except Exception as e:
+            # Broker unavailable (e.g. run_monitoring_check without Celery) - check inline
+            logger.error(f'[CheckMonitoredSites] Shard dispatch failed, checking inline: {str(e)}', exc_info=True)
     
     logger.info(f'[CheckMonitoredSites] Checking {total_sites} sites')
+    result = _check_sites(sites_to_check)
+    logger.info(f'[CheckMonitoredSites] Completed: {result}')
+    return result
+
+
+@shared_task(name='monitoring.tasks.check_site_shard')
+def check_site_shard(site_ids):
+    """
+    Check one shard of already-claimed monitored sites.
+    Dispatched by check_monitored_sites.
+    """
+    sites = list(MonitoredSite.objects.filter(id__in=site_ids))
+    logger.info(f'[CheckSiteShard] Checking {len(sites)} sites')
+    return _check_sites(sites)
+
+
+@shared_task(name='monitoring.tasks.aggregate_site_check_results')
+def aggregate_site_check_results(shard_results):
+    """
+    Chord callback: merge per-shard summaries into one check_monitored_sites summary.
+    """
+    result = merge_summaries(shard_results)
+    result['shards'] = len(shard_results)
+    logger.info(f'[CheckMonitoredSites] Completed: {result}')
+    return result
+
+
+def _dispatch_site_shards(shards):
+    """
+    Fan shards out as check_site_shard sub-tasks, routed round-robin across
+    the configured shard queues, with aggregate_site_check_results as callback.
+    """
+    from celery import chord
+    
+    queues = get_shard_queues()
+    signatures = []
+    for index, shard in enumerate(shards):
+        signature = check_site_shard.s(shard)
+        queue = queues[index % len(queues)]
+        if queue:
+            signature = signature.set(queue=queue)
+        signatures.append(signature)
+    
+    chord(signatures)(aggregate_site_check_results.s())
     
+    sites_dispatched = sum(len(shard) for shard in shards)
+    logger.info(f'[CheckMonitoredSites] Dispatched {sites_dispatched} sites in {len(shards)} shards')
+    return {
+        'status': 'dispatched',
+        'shards': len(shards),
+        'sites_dispatched': sites_dispatched,
+    }
+
+
+def _check_sites(sites):
+    """
+    Probe and persist a batch of claimed sites; returns the summary dict.
+    """
+    # Probe all sites concurrently. Sites that miss the tick deadline are not
+    # persisted: they keep the next_check_at lease written when they were
+    # claimed and are due again after MONITORING_CHECK_LEASE_SECONDS
+    check_results, deferred_sites = probe_sites(sites, timeout=10)
+    
+    # Persist the whole batch in bulk; fall back to per-site writes if it fails
+    try:
+        summary = persist_check_results(check_results)
+    except Exception as e:
+        logger.error(f'[CheckMonitoredSites] Bulk persistence failed, falling back to per-site writes: {str(e)}', exc_info=True)
+        summary = _persist_check_results_individually(check_results)
+    
+    return {
+        'status': 'success',
+        'sites_checked': len(check_results),
+        'sites_deferred': len(deferred_sites),
+        'sites_up': summary['sites_up'],
+        'sites_down': summary['sites_down'],
+        'incidents_created': summary['incidents_created'],
+        'incidents_resolved': summary['incidents_resolved']
+    }
+
+
+def _persist_check_results_individually(check_results):
+    """
+    Per-site persistence path, used when the bulk write for a tick fails.
+    Each site is saved on its own so one bad row cannot lose the whole tick.
+    """
     sites_up = 0
     sites_down = 0
     incidents_created = 0
     incidents_resolved = 0
     
-    for site in sites_to_check:
+    for site, check_result in check_results:
         try:
-            # Perform status check
-            check_result = check_site_status(site.url, timeout=10)
-            
             # Create StatusCheck record
             status_check = StatusCheck.objects.create(
                 site=site,
@@ -79,6 +172,7 @@ def check_monitored_sites():
             site.status = check_result['status']
             site.response_time = check_result['response_time']
             site.last_check = timezone.now()
+            site.schedule_next_check(site.last_check)
             site.error_message = check_result.get('error_message', '')
             
             # Update SSL info if available
@@ -118,22 +212,18 @@ def check_monitored_sites():
                 )
                 site.status = 'down'
                 site.last_check = timezone.now()
+                site.schedule_next_check(site.last_check)
                 site.error_message = f'Check error: {str(e)}'
                 site.save()
             except Exception as save_error:
                 logger.error(f'[CheckMonitoredSites] Failed to save check result for {site.url}: {str(save_error)}')
     
-    result = {
-        'status': 'success',
-        'sites_checked': total_sites,
+    return {
         'sites_up': sites_up,
         'sites_down': sites_down,
         'incidents_created': incidents_created,
         'incidents_resolved': incidents_resolved
     }
-    
-    logger.info(f'[CheckMonitoredSites] Completed: {result}')
-    return result
 
 
 @shared_task(name='monitoring.tasks.check_discovered_pages')
@@ -141,18 +231,15 @@ def check_discovered_pages():
     """
     Check all discovered pages/links that are due for checking.
     Runs every 15 minutes via Celery Beat.
+    
+    Links still fresh per their cached Cache-Control max-age are skipped;
+    the rest are revalidated with conditional HEAD requests. The number of
+    links per pass adapts to the due backlog (see monitoring.link_checks).
     """
     logger.info('[CheckDiscoveredPages] Starting page checks')
     
-    # Get all discovered links that need checking
-    # Check pages that haven't been checked in the last 15 minutes (or use page_check_interval from settings)
-    cutoff_time = timezone.now() - timedelta(minutes=15)
-    
-    links_to_check = DiscoveredLink.objects.filter(
-        last_checked__lt=cutoff_time
-    ).select_related('site')[:100]  # Limit to 100 per run to avoid overload
-    
-    total_links = links_to_check.count()
+    links_to_check, due_count = get_links_to_check()
+    total_links = len(links_to_check)
     
     if total_links == 0:
         logger.info('[CheckDiscoveredPages] No pages to check')
@@ -160,59 +247,34 @@ def check_discovered_pages():
             'status': 'success',
             'pages_checked': 0,
             'pages_ok': 0,
-            'pages_error': 0
+            'pages_error': 0,
+            'pages_not_modified': 0,
+            'pages_due': 0,
+            'pages_deferred': 0
         }
     
-    logger.info(f'[CheckDiscoveredPages] Checking {total_links} pages')
+    logger.info(f'[CheckDiscoveredPages] Checking {total_links} of {due_count} due pages')
     
-    pages_ok = 0
-    pages_error = 0
+    check_results, deferred_links = probe_sites(links_to_check, headers_for=get_conditional_headers, timeout=10)
     
-    for link in links_to_check:
-        try:
-            # Perform status check
-            check_result = check_site_status(link.url, timeout=10)
-            
-            # Create LinkCheck record
-            link_check = LinkCheck.objects.create(
-                link=link,
-                status=check_result.get('status_code', 0),
-                status_text='OK' if check_result['status'] == 'up' else check_result.get('error_message', 'Error'),
-                response_time=check_result['response_time'],
-                error_message=check_result.get('error_message', ''),
-                metadata=check_result.get('metadata', {})
-            )
-            
-            # Update DiscoveredLink
-            link.current_status = check_result.get('status_code')
-            link.current_status_text = link_check.status_text
-            link.last_checked = timezone.now()
-            link.save()
-            
-            if check_result['status'] == 'up':
-                pages_ok += 1
-            else:
-                pages_error += 1
-            
-            logger.debug(f'[CheckDiscoveredPages] Checked {link.path}: {check_result.get("status_code", "N/A")}')
-            
-        except Exception as e:
-            logger.error(f'[CheckDiscoveredPages] Error checking {link.url}: {str(e)}', exc_info=True)
-            pages_error += 1
-            # Update link with error
-            try:
-                link.current_status = None
-                link.current_status_text = f'Check error: {str(e)}'
-                link.last_checked = timezone.now()
-                link.save()
-            except Exception as save_error:
-                logger.error(f'[CheckDiscoveredPages] Failed to save check result for {link.url}: {str(save_error)}')
+    try:
+        summary = persist_link_check_results(check_results)
+    except Exception as e:
+        logger.error(f'[CheckDiscoveredPages] Failed to save check results: {str(e)}', exc_info=True)
+        summary = {
+            'pages_ok': 0,
+            'pages_error': len(check_results),
+            'pages_not_modified': 0,
+        }
     
     result = {
         'status': 'success',
-        'pages_checked': total_links,
-        'pages_ok': pages_ok,
-        'pages_error': pages_error
+        'pages_checked': len(check_results),
+        'pages_ok': summary['pages_ok'],
+        'pages_error': summary['pages_error'],
+        'pages_not_modified': summary['pages_not_modified'],
+        'pages_due': due_count,
+        'pages_deferred': len(deferred_links)
     }
     
     logger.info(f'[CheckDiscoveredPages] Completed: {result}')
@@ -220,124 +282,41 @@ def check_discovered_pages():
 
 
 @shared_task(name='monitoring.tasks.aggregate_response_time_history')
-def aggregate_response_time_history():
+def aggregate_response_time_history(start_date=None, end_date=None):
     """
     Aggregate StatusCheck records into ResponseTimeHistory for efficient chart queries.
     Runs daily at 2 AM via Celery Beat.
+    
+    With no arguments, rolls up yesterday and re-aggregates earlier days that
+    received late-arriving checks. With start_date/end_date (ISO dates,
+    inclusive), backfills that range instead.
     """
     logger.info('[AggregateResponseTimeHistory] Starting aggregation')
     
-    from django.db.models import Avg, Min, Max, Count, Percentile
+    if start_date:
+        start = date.fromisoformat(str(start_date))
+        end = date.fromisoformat(str(end_date)) if end_date else start
+        aggregated_count = aggregate_date_range(start, end)
+        result = {
+            'status': 'success',
+            'aggregated_records': aggregated_count,
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat()
+        }
+        logger.info(f'[AggregateResponseTimeHistory] Completed: {result}')
+        return result
     
     # Get yesterday's date
     yesterday = timezone.now().date() - timedelta(days=1)
     
-    # Get all monitored sites
-    sites = MonitoredSite.objects.all()
-    
-    aggregated_count = 0
-    
-    for site in sites:
-        try:
-            # Get all checks for yesterday
-            checks = StatusCheck.objects.filter(
-                site=site,
-                checked_at__date=yesterday
-            )
-            
-            if not checks.exists():
-                continue
-            
-            # Calculate hourly aggregates
-            from django.db.models.functions import TruncHour
-            
-            hourly_data = checks.annotate(
-                hour=TruncHour('checked_at')
-            ).values('hour').annotate(
-                avg_response_time=Avg('response_time'),
-                min_response_time=Min('response_time'),
-                max_response_time=Max('response_time'),
-                check_count=Count('id')
-            )
-            
-            for hour_data in hourly_data:
-                hour = hour_data['hour'].hour if hasattr(hour_data['hour'], 'hour') else None
-                
-                # Calculate percentiles (approximate)
-                hour_checks = checks.filter(
-                    checked_at__hour=hour
-                ).values_list('response_time', flat=True)
-                
-                sorted_times = sorted(hour_checks)
-                count = len(sorted_times)
-                
-                if count > 0:
-                    p50_index = int(count * 0.5)
-                    p95_index = int(count * 0.95)
-                    p99_index = int(count * 0.99) if count > 1 else 0
-                    
-                    p50 = sorted_times[p50_index] if p50_index < count else sorted_times[-1]
-                    p95 = sorted_times[p95_index] if p95_index < count else sorted_times[-1]
-                    p99 = sorted_times[p99_index] if p99_index < count else sorted_times[-1]
-                    
-                    # Create or update ResponseTimeHistory record
-                    ResponseTimeHistory.objects.update_or_create(
-                        site=site,
-                        date=yesterday,
-                        hour=hour,
-                        defaults={
-                            'p50': float(p50),
-                            'p95': float(p95),
-                            'p99': float(p99) if p99_index < count else None,
-                            'avg': float(hour_data['avg_response_time']),
-                            'min_response_time': int(hour_data['min_response_time']),
-                            'max_response_time': int(hour_data['max_response_time']),
-                            'check_count': hour_data['check_count']
-                        }
-                    )
-                    aggregated_count += 1
-            
-            # Also create daily aggregate (hour=None)
-            daily_avg = checks.aggregate(
-                avg_response_time=Avg('response_time'),
-                min_response_time=Min('response_time'),
-                max_response_time=Max('response_time'),
-                check_count=Count('id')
-            )
-            
-            if daily_avg['check_count'] > 0:
-                sorted_daily = sorted(checks.values_list('response_time', flat=True))
-                count = len(sorted_daily)
-                p50_index = int(count * 0.5)
-                p95_index = int(count * 0.95)
-                p99_index = int(count * 0.99) if count > 1 else 0
-                
-                p50 = sorted_daily[p50_index] if p50_index < count else sorted_daily[-1]
-                p95 = sorted_daily[p95_index] if p95_index < count else sorted_daily[-1]
-                p99 = sorted_daily[p99_index] if p99_index < count else sorted_daily[-1]
-                
-                ResponseTimeHistory.objects.update_or_create(
-                    site=site,
-                    date=yesterday,
-                    hour=None,
-                    defaults={
-                        'p50': float(p50),
-                        'p95': float(p95),
-                        'p99': float(p99) if p99_index < count else None,
-                        'avg': float(daily_avg['avg_response_time']),
-                        'min_response_time': int(daily_avg['min_response_time']),
-                        'max_response_time': int(daily_avg['max_response_time']),
-                        'check_count': daily_avg['check_count']
-                    }
-                )
-                aggregated_count += 1
-            
-        except Exception as e:
-            logger.error(f'[AggregateResponseTimeHistory] Error aggregating for {site.url}: {str(e)}', exc_info=True)
+    # Catch up older days first so yesterday's fresh rollup does not move the watermark past them
+    reaggregated_count = reaggregate_late_checks(before=yesterday)
+    aggregated_count = aggregate_date_range(yesterday, yesterday)
     
     result = {
         'status': 'success',
         'aggregated_records': aggregated_count,
+        'reaggregated_records': reaggregated_count,
         'date': yesterday.isoformat()
     }
     
@@ -348,20 +327,23 @@ def aggregate_response_time_history():
 @shared_task(name='monitoring.tasks.cleanup_monitoring_data')
 def cleanup_monitoring_data():
     """
-    Clean up old monitoring data (older than 30 days).
+    Enforce retention on raw monitoring data and resolve stale incidents.
     Runs daily at 3 AM via Celery Beat.
+    
+    StatusCheck and LinkCheck rows are kept for MONITORING_RETENTION_DAYS, or
+    for the site owner's plan retention. Partitioned tables drop expired
+    partitions (and get future ones created); otherwise rows are deleted in chunks.
     """
     logger.info('[CleanupMonitoringData] Starting cleanup')
     
-    cutoff_date = timezone.now() - timedelta(days=30)
-    
-    # Delete old StatusCheck records
-    deleted_checks = StatusCheck.objects.filter(checked_at__lt=cutoff_date).delete()[0]
-    logger.info(f'[CleanupMonitoringData] Deleted {deleted_checks} old StatusCheck records')
-    
-    # Delete old LinkCheck records
-    deleted_link_checks = LinkCheck.objects.filter(checked_at__lt=cutoff_date).delete()[0]
-    logger.info(f'[CleanupMonitoringData] Deleted {deleted_link_checks} old LinkCheck records')
+    retention = apply_retention()
+    deleted_checks = retention[StatusCheck._meta.db_table]['deleted']
+    deleted_link_checks = retention[LinkCheck._meta.db_table]['deleted']
+    dropped_partitions = sum(stats['partitions_dropped'] for stats in retention.values())
+    logger.info(
+        f'[CleanupMonitoringData] Deleted {deleted_checks} StatusCheck and {deleted_link_checks} LinkCheck records, '
+        f'dropped {dropped_partitions} partitions'
+    )
     
     # Resolve old ongoing incidents (older than 7 days)
     old_cutoff = timezone.now() - timedelta(days=7)
@@ -378,6 +360,7 @@ def cleanup_monitoring_data():
         'status': 'success',
         'deleted_checks': deleted_checks,
         'deleted_link_checks': deleted_link_checks,
+        'dropped_partitions': dropped_partitions,
         'resolved_incidents': resolved_incidents
     }
     
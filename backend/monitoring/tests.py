@@ -0,0 +1,551 @@
+"""
+Tests for monitoring app
+"""
+import threading
+import time as time_module
+import pytest
+from datetime import datetime, time, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from monitoring.aggregation import aggregate_day, reaggregate_late_checks
+from monitoring.history import get_site_history, get_uptime_summary, lttb_downsample, select_resolution
+from monitoring.link_checks import get_check_budget, get_fresh_until, get_links_to_check, persist_link_check_results
+from monitoring.models import StatusCheck, Incident, ResponseTimeHistory, DiscoveredLink, LinkCheck
+from monitoring.persistence import persist_check_results
+from monitoring.probe_engine import ProbeEngine
+from monitoring.retention import (
+    apply_retention, convert_to_partitioned, ensure_future_partitions, is_partitioned, list_partitions
+)
+from monitoring.sharding import merge_summaries, shard_sites
+from monitoring.utils import get_sites_to_check
+from users.models import MonitoredSite
+
+
+def make_result(status, status_code=200, response_time=120):
+    return {
+        'status': status,
+        'response_time': response_time,
+        'status_code': status_code if status == 'up' else 503,
+        'error_message': '' if status == 'up' else 'HTTP 503',
+        'metadata': {'ssl': True, 'ssl_valid': True},
+    }
+
+
+@pytest.fixture
+def monitoring_user(django_user_model):
+    return django_user_model.objects.create_user(username='monitor', password='testpass123')
+
+
+def create_sites(user, count, status):
+    MonitoredSite.objects.bulk_create([
+        MonitoredSite(user=user, url=f'https://{status}-{index}.example.com', status=status)
+        for index in range(count)
+    ])
+    return list(MonitoredSite.objects.filter(user=user, url__startswith=f'https://{status}-'))
+
+
+@pytest.mark.django_db
+class TestBulkPersistence:
+    """Test the batched persistence stage of check_monitored_sites"""
+    
+    def _tick_queries(self, user, count):
+        """Persist a tick where a third of the sites go down, a third recover and a third stay up"""
+        MonitoredSite.objects.filter(user=user).delete()
+        going_down = create_sites(user, count, 'up')
+        recovering = create_sites(user, count, 'down')
+        for site in recovering:
+            Incident.objects.create(site=site, status='ongoing', started_at=site.created_at)
+        
+        check_results = (
+            [(site, make_result('down')) for site in going_down]
+            + [(site, make_result('up')) for site in recovering]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            summary = persist_check_results(check_results)
+        
+        assert summary['incidents_created'] == count
+        assert summary['incidents_resolved'] == count
+        return len(queries)
+    
+    def test_constant_queries_per_tick(self, monitoring_user):
+        """Test that the number of queries does not grow with the number of sites"""
+        small = self._tick_queries(monitoring_user, 2)
+        large = self._tick_queries(monitoring_user, 40)
+        assert small == large
+    
+    def test_transitions_and_writes(self, monitoring_user):
+        """Test that checks, site fields and incidents are written for a tick"""
+        up_site, down_site, new_site = create_sites(monitoring_user, 3, 'up')
+        down_site.status = 'down'
+        new_site.status = 'checking'
+        incident = Incident.objects.create(site=down_site, status='ongoing', started_at=down_site.created_at)
+        
+        summary = persist_check_results([
+            (up_site, make_result('down')),
+            (down_site, make_result('up')),
+            (new_site, make_result('down')),
+        ])
+        
+        assert summary == {'sites_up': 1, 'sites_down': 2, 'incidents_created': 1, 'incidents_resolved': 1}
+        assert StatusCheck.objects.count() == 3
+        assert Incident.objects.get(site=up_site).status == 'ongoing'
+        assert not Incident.objects.filter(site=new_site).exists()
+        incident.refresh_from_db()
+        assert incident.status == 'resolved'
+        assert incident.resolved_at is not None
+        
+        up_site.refresh_from_db()
+        assert up_site.status == 'down'
+        assert up_site.error_message == 'HTTP 503'
+        assert up_site.last_check is not None
+
+
+@pytest.mark.django_db
+class TestDueSiteSelection:
+    """Test next_check_at based due-site selection"""
+    
+    def test_claims_only_due_sites(self, monitoring_user):
+        """Test that only due sites are returned and are leased away from other workers"""
+        now = timezone.now()
+        due, not_due = create_sites(monitoring_user, 2, 'up')
+        MonitoredSite.objects.filter(id=due.id).update(next_check_at=now - timedelta(minutes=1))
+        MonitoredSite.objects.filter(id=not_due.id).update(next_check_at=now + timedelta(minutes=5))
+        
+        assert [site.id for site in get_sites_to_check()] == [due.id]
+        # The claimed site is leased, so an overlapping sweep does not pick it up again
+        assert get_sites_to_check() == []
+    
+    def test_persisted_check_reschedules_site(self, monitoring_user):
+        """Test that persisting a check writes next_check_at from check_interval"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        checked_at = timezone.now()
+        persist_check_results([(site, make_result('up'))], checked_at=checked_at)
+        
+        site.refresh_from_db()
+        assert site.next_check_at == checked_at + timedelta(minutes=site.check_interval)
+
+    def test_per_tenant_cap(self, monitoring_user, django_user_model):
+        """Test that a large tenant cannot claim more than its share of a sweep"""
+        other_user = django_user_model.objects.create_user(username='other', password='testpass123')
+        create_sites(monitoring_user, 5, 'up')
+        create_sites(other_user, 1, 'up')
+        MonitoredSite.objects.update(next_check_at=timezone.now() - timedelta(minutes=1))
+        
+        claimed = get_sites_to_check(per_tenant_limit=2)
+        
+        assert sorted(site.user_id for site in claimed) == sorted([monitoring_user.id] * 2 + [other_user.id])
+
+
+class TestSharding:
+    """Test splitting due sites into shards for check_site_shard sub-tasks"""
+    
+    def test_fixed_size_shards(self):
+        """Test that every site lands in exactly one shard of at most shard_size sites"""
+        sites = [MonitoredSite(id=site_id) for site_id in range(1, 1002)]
+        shards = shard_sites(sites, shard_size=100)
+        
+        assert len(shards) == 11
+        assert all(len(shard) <= 100 for shard in shards)
+        assert sorted(site_id for shard in shards for site_id in shard) == list(range(1, 1002))
+    
+    def test_skewed_ids_respect_shard_size(self):
+        """Test that ids sharing a hash bucket still spill into other shards"""
+        sites = [MonitoredSite(id=site_id * 4) for site_id in range(1, 101)]
+        shards = shard_sites(sites, shard_size=25)
+        
+        assert len(shards) == 4
+        assert all(len(shard) == 25 for shard in shards)
+    
+    def test_merge_summaries(self):
+        """Test that shard summaries add up to the check_monitored_sites summary"""
+        merged = merge_summaries([
+            {'status': 'success', 'sites_checked': 3, 'sites_up': 2, 'sites_down': 1, 'incidents_created': 1},
+            {'status': 'success', 'sites_checked': 2, 'sites_deferred': 1, 'sites_up': 2, 'incidents_resolved': 1},
+        ])
+        
+        assert merged == {
+            'status': 'success',
+            'sites_checked': 5,
+            'sites_deferred': 1,
+            'sites_up': 4,
+            'sites_down': 1,
+            'incidents_created': 1,
+            'incidents_resolved': 1,
+        }
+
+
+class TestProbeEngine:
+    """Test the per-tick probe engine"""
+    
+    def test_sessions_outlive_abandoned_probes(self, monkeypatch):
+        """Test that a probe abandoned at the deadline keeps its session open until it finishes"""
+        release = threading.Event()
+        closed = []
+        seen = {}
+        
+        def slow_check(url, timeout, session, headers):
+            release.wait(5)
+            seen['closed_mid_probe'] = session in closed
+            return make_result('up')
+        
+        monkeypatch.setattr('monitoring.probe_engine.check_site_status', slow_check)
+        monkeypatch.setattr('requests.Session.close', lambda session: closed.append(session))
+        sites = [MonitoredSite(url='https://slow.example.com')]
+        with ProbeEngine(tick_deadline=0.05) as engine:
+            results, deferred = engine.probe(sites)
+        
+        assert results == []
+        assert deferred == sites
+        assert closed == []
+        
+        release.set()
+        for _ in range(100):
+            if closed:
+                break
+            time_module.sleep(0.01)
+        assert seen['closed_mid_probe'] is False
+        assert len(closed) == 1
+
+
+@pytest.mark.django_db
+class TestResponseTimeAggregation:
+    """Test set-based ResponseTimeHistory rollups"""
+    
+    def _add_checks(self, site, day, hour, response_times):
+        checks = StatusCheck.objects.bulk_create([
+            StatusCheck(site=site, status='up', response_time=response_time)
+            for response_time in response_times
+        ])
+        checked_at = timezone.make_aware(datetime.combine(day, time(hour=hour)))
+        StatusCheck.objects.filter(id__in=[check.id for check in checks]).update(checked_at=checked_at)
+    
+    def test_hourly_and_daily_rollups(self, monitoring_user):
+        """Test percentiles and counts for hourly and daily rows, and idempotent re-runs"""
+        site_a, site_b = create_sites(monitoring_user, 2, 'up')
+        day = timezone.now().date() - timedelta(days=1)
+        self._add_checks(site_a, day, 1, [100, 200, 300, 400, 500])
+        self._add_checks(site_a, day, 2, [1000])
+        self._add_checks(site_b, day, 1, [50])
+        
+        assert aggregate_day(day) == 5
+        assert aggregate_day(day) == 5
+        assert ResponseTimeHistory.objects.count() == 5
+        
+        hourly = ResponseTimeHistory.objects.get(site=site_a, date=day, hour=1)
+        assert hourly.p50 == 300
+        assert hourly.p95 == pytest.approx(480)
+        assert hourly.min_response_time == 100
+        assert hourly.max_response_time == 500
+        assert hourly.check_count == 5
+        
+        daily = ResponseTimeHistory.objects.get(site=site_a, date=day, hour__isnull=True)
+        assert daily.check_count == 6
+        assert daily.p50 == 350
+        assert daily.avg == pytest.approx(2500 / 6)
+    
+    def test_late_checks_are_reaggregated(self, monitoring_user):
+        """Test that checks added after a day was rolled up trigger an incremental re-aggregation"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        day = timezone.now().date() - timedelta(days=2)
+        self._add_checks(site, day, 3, [100])
+        aggregate_day(day)
+        
+        self._add_checks(site, day, 3, [300])
+        assert reaggregate_late_checks() == 2
+        assert ResponseTimeHistory.objects.get(site=site, date=day, hour=3).check_count == 2
+        assert reaggregate_late_checks() == 0
+    
+    def test_late_checks_not_hidden_by_later_rollups(self, monitoring_user):
+        """Test that rolling up a newer day does not hide late checks for an older day"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        older = timezone.now().date() - timedelta(days=3)
+        newer = older + timedelta(days=1)
+        self._add_checks(site, older, 3, [100])
+        aggregate_day(older)
+        
+        self._add_checks(site, older, 3, [300])
+        self._add_checks(site, newer, 3, [200])
+        aggregate_day(newer)
+        
+        assert reaggregate_late_checks() == 2
+        assert ResponseTimeHistory.objects.get(site=site, date=older, hour=3).check_count == 2
+        assert reaggregate_late_checks() == 0
+
+
+class TestHistoryResolution:
+    """Test chart resolution selection and downsampling"""
+    
+    def test_select_resolution(self):
+        """Test that the window span picks raw, hourly or daily"""
+        end = timezone.now()
+        assert select_resolution(end - timedelta(hours=24), end, max_points=500) == 'raw'
+        assert select_resolution(end - timedelta(days=7), end, max_points=500) == 'hourly'
+        assert select_resolution(end - timedelta(days=90), end, max_points=500) == 'daily'
+        # A slow check interval keeps a longer window on raw data
+        assert select_resolution(end - timedelta(days=7), end, max_points=500, check_interval=60) == 'raw'
+    
+    def test_lttb_keeps_extremes_and_endpoints(self):
+        """Test that downsampling keeps first/last points and never drops spikes"""
+        points = [{'response_time': 100 + (index % 7)} for index in range(1000)]
+        points[437]['response_time'] = 9000
+        points[711]['response_time'] = 1
+        
+        sampled = lttb_downsample(points, 50)
+        
+        assert len(sampled) <= 50
+        assert sampled[0] is points[0]
+        assert sampled[-1] is points[-1]
+        assert points[437] in sampled
+        assert points[711] in sampled
+        assert lttb_downsample(points[:10], 50) == points[:10]
+    
+    def test_lttb_keeps_min_and_max_sharing_a_bucket(self):
+        """Test that a min and max in the same bucket are both kept, in time order"""
+        points = [{'response_time': 100 + (index % 7)} for index in range(1000)]
+        points[500]['response_time'] = 9000
+        points[501]['response_time'] = 1
+        
+        sampled = lttb_downsample(points, 50)
+        
+        assert len(sampled) <= 50
+        assert sampled.index(points[500]) + 1 == sampled.index(points[501])
+        assert len(lttb_downsample(points[495:505], 3)) == 3
+
+
+@pytest.mark.django_db
+class TestSiteHistory:
+    """Test chart data and uptime served from rollups"""
+    
+    def _add_check(self, site, checked_at, status='up', response_time=100):
+        check = StatusCheck.objects.create(site=site, status=status, response_time=response_time)
+        StatusCheck.objects.filter(id=check.id).update(checked_at=checked_at)
+    
+    def test_rollups_with_live_tail(self, monitoring_user):
+        """Test that daily points come from rollups plus on-the-fly buckets for unaggregated days"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        today = timezone.now().date()
+        midday = lambda day: timezone.make_aware(datetime.combine(day, time(hour=12)))
+        rolled_day = today - timedelta(days=3)
+        self._add_check(site, midday(rolled_day), 'up', 100)
+        self._add_check(site, midday(rolled_day), 'down', 0)
+        aggregate_day(rolled_day)
+        self._add_check(site, midday(today - timedelta(days=1)), 'up', 300)
+        
+        start = timezone.make_aware(datetime.combine(today - timedelta(days=5), time.min))
+        resolution, points = get_site_history(site, start, timezone.now(), resolution='daily')
+        
+        assert resolution == 'daily'
+        assert [point['check_count'] for point in points] == [2, 1]
+        assert [point['status'] for point in points] == ['down', 'up']
+        assert points[1]['response_time'] == 300
+    
+    def test_raw_history_is_downsampled(self, monitoring_user):
+        """Test that raw history is capped at max_points"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        now = timezone.now()
+        StatusCheck.objects.bulk_create([
+            StatusCheck(site=site, status='up', response_time=100 + index) for index in range(200)
+        ])
+        
+        resolution, points = get_site_history(site, now - timedelta(hours=1), now + timedelta(minutes=1), max_points=20)
+        
+        assert resolution == 'raw'
+        assert len(points) <= 20
+        assert points[-1]['response_time'] == 299
+    
+    def test_uptime_summary_in_two_queries(self, monitoring_user):
+        """Test that all uptime periods come from one check aggregate and one incident aggregate"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        now = timezone.now()
+        self._add_check(site, now - timedelta(hours=1), 'up')
+        self._add_check(site, now - timedelta(hours=2), 'down')
+        self._add_check(site, now - timedelta(days=3), 'up')
+        self._add_check(site, now - timedelta(days=20), 'up')
+        Incident.objects.create(site=site, status='resolved', started_at=now - timedelta(hours=2))
+        
+        with CaptureQueriesContext(connection) as queries:
+            summary = get_uptime_summary(site, now=now)
+        
+        assert len(queries) == 2
+        assert summary['total_checks_24h'] == 2
+        assert summary['uptime_24h'] == 50.0
+        assert summary['total_checks_7d'] == 3
+        assert summary['failed_checks_30d'] == 1
+        assert summary['uptime_30d'] == 75.0
+        assert summary['incidents_24h'] == 1
+
+
+@pytest.mark.django_db
+class TestRetention:
+    """Test chunked retention deletes and partition maintenance"""
+    
+    def _add_check(self, site, checked_at):
+        check = StatusCheck.objects.create(site=site, status='up', response_time=100)
+        StatusCheck.objects.filter(id=check.id).update(checked_at=checked_at)
+    
+    def test_chunked_delete_honours_plan_retention(self, monitoring_user, django_user_model, settings):
+        """Test that sites on a longer-retention plan keep rows the default tier deletes"""
+        from financials.models import SubscriptionPlan, UserSubscription
+        settings.MONITORING_RETENTION_DAYS = 30
+        settings.MONITORING_RETENTION_DELETE_CHUNK_SIZE = 2
+        SubscriptionPlan.objects.create(
+            plan_name='Manager', display_name='Manager', price_monthly=10, price_yearly=100,
+            monitoring_retention_days=90
+        )
+        pro_user = django_user_model.objects.create_user(username='pro', password='testpass123')
+        UserSubscription.objects.create(user=pro_user, plan_name='Manager', start_date=timezone.now().date())
+        (default_site,) = create_sites(monitoring_user, 1, 'up')
+        (pro_site,) = create_sites(pro_user, 1, 'up')
+        now = timezone.now()
+        for site in (default_site, pro_site):
+            for days in (1, 45, 46, 47, 120):
+                self._add_check(site, now - timedelta(days=days))
+        
+        result = apply_retention(now=now)
+        
+        assert result[StatusCheck._meta.db_table] == {'partitions_dropped': 0, 'deleted': 5}
+        assert StatusCheck.objects.filter(site=default_site).count() == 1
+        assert StatusCheck.objects.filter(site=pro_site).count() == 4
+    
+    def test_partitioned_table_drops_expired_partitions(self, monitoring_user, settings):
+        """Test conversion to range partitioning and O(1) expiry by dropping partitions"""
+        settings.MONITORING_PARTITION_INTERVAL = 'daily'
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        self._add_check(site, timezone.now() - timedelta(days=3))
+        
+        created = convert_to_partitioned(StatusCheck, ahead=3)
+        
+        assert is_partitioned(StatusCheck)
+        assert len(created) == 3
+        names = [name for name, _ in list_partitions(StatusCheck)]
+        assert f'{StatusCheck._meta.db_table}_legacy' in names
+        
+        # The ORM keeps working against the partitioned table
+        self._add_check(site, timezone.now() + timedelta(days=3))
+        assert StatusCheck.objects.filter(site=site).count() == 2
+        
+        result = apply_retention(default_days=30, now=timezone.now() + timedelta(days=33))
+        
+        assert result[StatusCheck._meta.db_table]['partitions_dropped'] == 3
+        assert StatusCheck.objects.filter(site=site).count() == 1
+        assert f'{StatusCheck._meta.db_table}_legacy' not in [name for name, _ in list_partitions(StatusCheck)]
+    
+    def test_rows_past_created_partitions_kept(self, monitoring_user, settings):
+        """Test that checks past the pre-created partitions land in the default partition and are moved out later"""
+        settings.MONITORING_PARTITION_INTERVAL = 'daily'
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        convert_to_partitioned(StatusCheck, ahead=3)
+        default = f'{StatusCheck._meta.db_table}_default'
+        assert default in [name for name, _ in list_partitions(StatusCheck)]
+        
+        later = timezone.now() + timedelta(days=30)
+        self._add_check(site, later)
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {default}')
+            assert cursor.fetchone()[0] == 1
+            
+            created = ensure_future_partitions(StatusCheck, ahead=1, now=later)
+            cursor.execute(f'SELECT COUNT(*) FROM {default}')
+            assert cursor.fetchone()[0] == 0
+        
+        assert len(created) == 28
+        assert StatusCheck.objects.filter(site=site, checked_at=later).count() == 1
+
+
+@pytest.mark.django_db
+class TestLinkRevalidation:
+    """Test conditional revalidation of discovered links"""
+    
+    def _create_links(self, site, count, **fields):
+        DiscoveredLink.objects.bulk_create([
+            DiscoveredLink(site=site, url=f'{site.url}/page-{index}', path=f'/page-{index}', **fields)
+            for index in range(count)
+        ])
+        return list(DiscoveredLink.objects.filter(site=site).order_by('id'))
+    
+    def test_fresh_until_from_cache_control(self):
+        """Test that max-age minus Age sets the freshness window and no-cache disables it"""
+        now = timezone.now()
+        assert get_fresh_until({'cache_control': 'public, max-age=600', 'age': '100'}, now) == now + timedelta(seconds=500)
+        assert get_fresh_until({'cache_control': 'max-age=600, no-cache'}, now) is None
+        assert get_fresh_until({'cache_control': ''}, now) is None
+        assert get_fresh_until({'cache_control': 'max-age=31536000'}, now) == now + timedelta(days=1)
+    
+    def test_adaptive_budget(self, settings):
+        """Test that the budget drains the backlog within the window, clamped to min/max"""
+        settings.MONITORING_LINK_CHECK_MIN_BUDGET = 100
+        settings.MONITORING_LINK_CHECK_MAX_BUDGET = 2000
+        settings.MONITORING_LINK_RECHECK_WINDOW_HOURS = 24
+        assert get_check_budget(50) == 100
+        assert get_check_budget(96 * 500) == 500
+        assert get_check_budget(10 ** 7) == 2000
+    
+    def test_skips_fresh_links_and_prioritises_changes(self, monitoring_user):
+        """Test that fresh links are skipped and recently changed links come first"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        now = timezone.now()
+        stale, fresh, changed, unchecked = self._create_links(site, 4)
+        DiscoveredLink.objects.filter(id=stale.id).update(last_checked=now - timedelta(hours=3))
+        DiscoveredLink.objects.filter(id=fresh.id).update(
+            last_checked=now - timedelta(hours=3), fresh_until=now + timedelta(hours=1)
+        )
+        DiscoveredLink.objects.filter(id=changed.id).update(
+            last_checked=now - timedelta(hours=1), status_changed_at=now - timedelta(hours=1)
+        )
+        
+        links, due_count = get_links_to_check(now=now)
+        
+        assert due_count == 3
+        assert [link.id for link in links] == [changed.id, unchecked.id, stale.id]
+        
+        links, _ = get_links_to_check(now=now, budget=1)
+        assert [link.id for link in links] == [changed.id]
+    
+    def test_bulk_persist_with_validators(self, monitoring_user):
+        """Test that 304s keep the status, validators are stored and writes are batched"""
+        (site,) = create_sites(monitoring_user, 1, 'up')
+        checked_at = timezone.now()
+        links = self._create_links(
+            site, 3, current_status=200, current_status_text='OK',
+            last_checked=checked_at - timedelta(hours=1), etag='"v1"'
+        )
+        not_modified, changed, broken = links
+        
+        with CaptureQueriesContext(connection) as queries:
+            summary = persist_link_check_results([
+                (not_modified, {
+                    'status': 'up', 'status_code': 304, 'response_time': 20, 'error_message': '', 'metadata': {},
+                    'cache_headers': {'etag': '', 'last_modified': 'x' * 100, 'cache_control': 'max-age=300'},
+                }),
+                (changed, {
+                    'status': 'up', 'status_code': 200, 'response_time': 40, 'error_message': '', 'metadata': {},
+                    'cache_headers': {'etag': '"v2"', 'last_modified': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+                }),
+                (broken, {
+                    'status': 'down', 'status_code': 404, 'response_time': 30, 'error_message': 'HTTP 404', 'metadata': {},
+                }),
+            ], checked_at=checked_at)
+        
+        assert len(queries) <= 4
+        assert summary == {'pages_ok': 2, 'pages_error': 1, 'pages_not_modified': 1}
+        
+        not_modified.refresh_from_db()
+        assert not_modified.current_status == 200
+        assert not_modified.etag == '"v1"'
+        assert not_modified.last_modified == 'x' * 64
+        assert not_modified.fresh_until == checked_at + timedelta(seconds=300)
+        assert not_modified.status_changed_at is None
+        
+        changed.refresh_from_db()
+        assert changed.etag == '"v2"'
+        assert changed.last_modified == 'Wed, 21 Oct 2015 07:28:00 GMT'
+        
+        broken.refresh_from_db()
+        assert broken.current_status == 404
+        assert broken.etag == ''
+        assert broken.status_changed_at == checked_at
+        
+        assert LinkCheck.objects.filter(link__site=site).count() == 3
+        assert LinkCheck.objects.get(link=not_modified).metadata['not_modified'] is True
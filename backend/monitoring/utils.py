@@ -4,9 +4,13 @@ Utility functions for monitoring site checks and incident detection.
 
 import time
 import requests
+from datetime import timedelta
 from urllib.parse import urlparse
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from monitoring.models import StatusCheck, Incident
 from users.models import MonitoredSite
 
@@ -33,13 +37,15 @@ def normalize_url(url):
     return url
 
 
-def check_site_status(site_url, timeout=10):
+def check_site_status(site_url, timeout=10, session=None, headers=None):
     """
     Perform HTTP HEAD request to check site status.
     
     Args:
         site_url: URL to check
         timeout: Request timeout in seconds (default: 10)
+        session: Optional requests.Session to reuse pooled connections
+        headers: Optional extra request headers (e.g. conditional request validators)
     
     Returns:
         dict with keys:
@@ -48,6 +54,8 @@ def check_site_status(site_url, timeout=10):
             - status_code: HTTP status code (if available)
             - error_message: Error description (if failed)
             - metadata: Additional info (headers, SSL, etc.)
+            - cache_headers: ETag, Last-Modified, Cache-Control and Age response
+              headers (only on responses; not persisted with the check)
     """
     normalized_url = normalize_url(site_url)
     if not normalized_url:
@@ -64,13 +72,17 @@ def check_site_status(site_url, timeout=10):
     
     try:
         # Perform HEAD request with timeout
-        response = requests.head(
+        http = session if session is not None else requests
+        request_headers = {
+            'User-Agent': 'PageRodeo-Monitor/1.0'
+        }
+        if headers:
+            request_headers.update(headers)
+        response = http.head(
             normalized_url,
             timeout=timeout,
             allow_redirects=True,
-            headers={
-                'User-Agent': 'PageRodeo-Monitor/1.0'
-            }
+            headers=request_headers
         )
         
         response_time_ms = int((time.time() - start_time) * 1000)
@@ -105,7 +117,13 @@ def check_site_status(site_url, timeout=10):
             'response_time': response_time_ms,
             'status_code': status_code,
             'error_message': error_message,
-            'metadata': metadata
+            'metadata': metadata,
+            'cache_headers': {
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', ''),
+                'cache_control': response.headers.get('Cache-Control', ''),
+                'age': response.headers.get('Age', ''),
+            }
         }
         
     except requests.exceptions.Timeout:
@@ -230,7 +248,7 @@ def detect_incident(site, current_status_check):
 
 def should_check_site(site):
     """
-    Determine if a site should be checked based on its check_interval.
+    Determine if a site should be checked based on its next_check_at.
     
     Args:
         site: MonitoredSite instance
@@ -238,31 +256,64 @@ def should_check_site(site):
     Returns:
         bool: True if site should be checked, False otherwise
     """
-    if not site.last_check:
-        # Never checked before, should check
+    if not site.next_check_at:
+        # Never scheduled, should check
         return True
     
-    # Calculate next check time
-    from datetime import timedelta
-    next_check_time = site.last_check + timedelta(minutes=site.check_interval)
-    
     # Check if current time is past next check time
-    return timezone.now() >= next_check_time
+    return timezone.now() >= site.next_check_at
 
 
-def get_sites_to_check():
+def get_sites_to_check(limit=None, per_tenant_limit=None):
     """
-    Get all monitored sites that are due for checking.
+    Claim the monitored sites that are due for checking.
+    
+    Due sites are selected with a single indexed range query on next_check_at
+    (SELECT ... FOR UPDATE SKIP LOCKED ... LIMIT), and their next_check_at is
+    pushed forward by a short lease in the same transaction. Several beat
+    workers can therefore sweep concurrently without checking a site twice;
+    the real next_check_at is written when the check result is persisted.
+    
+    Args:
+        limit: Maximum number of sites to claim (default: MONITORING_DUE_SITES_LIMIT)
+        per_tenant_limit: Maximum sites claimed per user in one sweep so a single
+            large tenant cannot crowd out the others
+            (default: MONITORING_TENANT_MAX_SITES_PER_TICK, 0 = no cap)
     
     Returns:
-        QuerySet of MonitoredSite instances that need checking
+        List of MonitoredSite instances that need checking
     """
-    sites = MonitoredSite.objects.filter(
-        # Only check active sites (not deleted)
-    ).select_related('user')
+    limit = limit or getattr(settings, 'MONITORING_DUE_SITES_LIMIT', 1000)
+    if per_tenant_limit is None:
+        per_tenant_limit = getattr(settings, 'MONITORING_TENANT_MAX_SITES_PER_TICK', 0)
+    lease_seconds = getattr(settings, 'MONITORING_CHECK_LEASE_SECONDS', 120)
+    now = timezone.now()
+    
+    due_sites = MonitoredSite.objects.filter(next_check_at__lte=now)
+    
+    if per_tenant_limit:
+        # Rank each tenant's due sites by lateness and keep the first N per tenant
+        fair_ids = list(
+            due_sites.annotate(
+                tenant_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('user_id')],
+                    order_by=F('next_check_at').asc(),
+                )
+            ).filter(tenant_rank__lte=per_tenant_limit)
+            .order_by('next_check_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        due_sites = due_sites.filter(id__in=fair_ids)
     
-    # Filter sites that are due for checking
-    sites_to_check = [site for site in sites if should_check_site(site)]
+    with transaction.atomic():
+        sites_to_check = list(
+            due_sites.select_for_update(skip_locked=True)
+            .order_by('next_check_at')[:limit]
+        )
+        if sites_to_check:
+            MonitoredSite.objects.filter(
+                id__in=[site.id for site in sites_to_check]
+            ).update(next_check_at=now + timedelta(seconds=lease_seconds))
     
     return sites_to_check
-
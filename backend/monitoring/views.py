@@ -12,6 +12,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from monitoring.models import StatusCheck, Incident, LinkCheck, DiscoveredLink
+from monitoring.history import DEFAULT_MAX_POINTS, UPTIME_PERIODS, get_site_history, get_uptime_summary
 from users.models import MonitoredSite
 import logging
 
@@ -28,8 +29,11 @@ def site_history(request, site_id):
     - start_date: Start date in YYYY-MM-DD format (optional)
     - end_date: End date in YYYY-MM-DD format (optional)
     - days: Number of days to look back (default: 30)
+    - max_points: Target maximum number of points (default: 500)
+    - resolution: 'auto', 'raw', 'hourly' or 'daily' (default: 'auto')
     
-    Returns array of check records for charts.
+    Returns array of check records for charts. Long ranges are served from
+    ResponseTimeHistory rollups; raw ranges are downsampled to max_points.
     """
     try:
         # Get site (must belong to user)
@@ -39,6 +43,11 @@ def site_history(request, site_id):
         days = int(request.query_params.get('days', 30))
         end_date_str = request.query_params.get('end_date')
         start_date_str = request.query_params.get('start_date')
+        resolution = request.query_params.get('resolution', 'auto')
+        try:
+            max_points = int(request.query_params.get('max_points', DEFAULT_MAX_POINTS))
+        except ValueError:
+            return Response({'error': 'Invalid max_points. Use an integer.'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Calculate date range
         if end_date_str:
@@ -60,28 +69,15 @@ def site_history(request, site_id):
             start_datetime = end_datetime - timedelta(days=days-1)
             start_datetime = timezone.make_aware(timezone.datetime.combine(start_datetime.date(), timezone.datetime.min.time()))
         
-        # Query StatusCheck records
-        checks = StatusCheck.objects.filter(
-            site=site,
-            checked_at__gte=start_datetime,
-            checked_at__lte=end_datetime
-        ).order_by('checked_at')
-        
-        # Serialize data
-        data = []
-        for check in checks:
-            data.append({
-                'checked_at': check.checked_at.isoformat(),
-                'status': check.status,
-                'response_time': check.response_time,
-                'status_code': check.status_code,
-                'error_message': check.error_message if check.error_message else None,
-            })
+        resolution, data = get_site_history(
+            site, start_datetime, end_datetime, max_points=max_points, resolution=resolution
+        )
         
         return Response({
             'success': True,
             'data': data,
             'count': len(data),
+            'resolution': resolution,
             'start_date': start_datetime.date().isoformat(),
             'end_date': end_datetime.date().isoformat()
         }, status=status.HTTP_200_OK)
@@ -111,50 +107,13 @@ def site_uptime(request, site_id):
         
         period = request.query_params.get('period', 'all')
         
-        # Calculate time ranges
-        now = timezone.now()
-        periods = {
-            '24h': now - timedelta(hours=24),
-            '7d': now - timedelta(days=7),
-            '30d': now - timedelta(days=30),
-        }
-        
-        result = {}
-        
         if period == 'all':
-            periods_to_calc = ['24h', '7d', '30d']
+            periods_to_calc = list(UPTIME_PERIODS.keys())
         else:
             periods_to_calc = [period]
         
-        for p in periods_to_calc:
-            cutoff = periods[p]
-            checks = StatusCheck.objects.filter(
-                site=site,
-                checked_at__gte=cutoff
-            )
-            
-            total_checks = checks.count()
-            if total_checks == 0:
-                result[f'uptime_{p}'] = 100.0
-                result[f'total_checks_{p}'] = 0
-                result[f'successful_checks_{p}'] = 0
-                result[f'failed_checks_{p}'] = 0
-            else:
-                successful_checks = checks.filter(status='up').count()
-                failed_checks = total_checks - successful_checks
-                uptime_percentage = (successful_checks / total_checks) * 100.0
-                
-                result[f'uptime_{p}'] = round(uptime_percentage, 3)
-                result[f'total_checks_{p}'] = total_checks
-                result[f'successful_checks_{p}'] = successful_checks
-                result[f'failed_checks_{p}'] = failed_checks
-            
-            # Count incidents in period
-            incidents = Incident.objects.filter(
-                site=site,
-                started_at__gte=cutoff
-            ).count()
-            result[f'incidents_{p}'] = incidents
+        # One conditional aggregate covers every requested period
+        result = get_uptime_summary(site, periods_to_calc)
         
         result['success'] = True
         return Response(result, status=status.HTTP_200_OK)
@@ -242,8 +201,15 @@ def site_stats(request, site_id):
             checked_at__gte=cutoff
         )
         
-        # Calculate statistics
-        total_checks = checks.count()
+        # Calculate statistics in one pass
+        stats = checks.aggregate(
+            total_checks=Count('id'),
+            successful_checks=Count('id', filter=Q(status='up')),
+            avg_response_time=Avg('response_time'),
+            min_response_time=Min('response_time'),
+            max_response_time=Max('response_time')
+        )
+        total_checks = stats['total_checks']
         
         if total_checks == 0:
             return Response({
@@ -256,14 +222,7 @@ def site_stats(request, site_id):
                 'incident_count': 0
             }, status=status.HTTP_200_OK)
         
-        stats = checks.aggregate(
-            avg_response_time=Avg('response_time'),
-            min_response_time=Min('response_time'),
-            max_response_time=Max('response_time')
-        )
-        
-        successful_checks = checks.filter(status='up').count()
-        uptime_percentage = (successful_checks / total_checks) * 100.0
+        uptime_percentage = (stats['successful_checks'] / total_checks) * 100.0
         
         incident_count = Incident.objects.filter(
             site=site,
@@ -5,9 +5,9 @@ from .models import PerformanceAnalysis, PerformanceHistory, NetworkRequest, Res
 @admin.register(PerformanceAnalysis)
 class PerformanceAnalysisAdmin(admin.ModelAdmin):
     list_display = ('url', 'device', 'performance_score', 'lcp', 'fid', 'cls', 'analyzed_at', 'user')
-    list_filter = ('device', 'performance_score', 'analyzed_at', 'is_baseline')
+    list_filter = ('device', 'performance_score', 'analyzed_at', 'is_baseline', 'parse_status')
     search_fields = ('url', 'user__username', 'user__email')
-    readonly_fields = ('analyzed_at', 'score_change', 'lcp_change')
+    readonly_fields = ('analyzed_at', 'score_change', 'lcp_change', 'parse_status', 'parse_attempts', 'parse_error', 'parsed_at')
     date_hierarchy = 'analyzed_at'
     ordering = ('-analyzed_at',)
     
@@ -30,6 +30,9 @@ class PerformanceAnalysisAdmin(admin.ModelAdmin):
         ('Historical Tracking', {
             'fields': ('is_baseline', 'baseline_id', 'score_change', 'lcp_change')
         }),
+        ('Detailed Data Parsing', {
+            'fields': ('parse_status', 'parse_attempts', 'parse_error', 'parsed_at')
+        }),
         ('Additional Data', {
             'fields': ('resources', 'recommendations', 'full_results'),
             'classes': ('collapse',)
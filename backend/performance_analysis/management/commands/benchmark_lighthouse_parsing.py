@@ -0,0 +1,107 @@
+"""
+Django management command to benchmark Lighthouse detailed-data parsing.
+
+Scales up the fixture from test_performance_with_full_json (network requests
+and traceEvents are replicated with distinct URLs/timestamps), runs
+parse_detailed_data and reports total latency and inserted rows per second.
+``--per-row`` also runs the previous strategy (one INSERT per row) for
+comparison. Benchmark rows are deleted afterwards.
+
+Usage:
+    python manage.py benchmark_lighthouse_parsing
+    python manage.py benchmark_lighthouse_parsing --scales 1 100 1000 --per-row
+"""
+
+import copy
+import io
+import time
+from contextlib import redirect_stdout
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from core.management.commands.test_performance_with_full_json import TEST_URL, build_full_lighthouse_json
+from performance_analysis.models import PerformanceAnalysis, NetworkRequest, ResourceBreakdown, PerformanceTimelineEvent
+from performance_analysis.parsers import dispatcher, network_parser, resource_parser, timeline_parser
+
+
+def build_scaled_lighthouse_json(scale):
+    """
+    Replicate the fixture's networkRequests and traceEvents ``scale`` times.
+    """
+    lighthouse_json = build_full_lighthouse_json()
+    lighthouse_result = lighthouse_json['lighthouseResult']
+    base_requests = lighthouse_result['networkRequests']
+    base_events = lighthouse_result['traceEvents']
+
+    requests = []
+    events = []
+    for copy_index in range(scale):
+        for request in base_requests:
+            request = copy.deepcopy(request)
+            if copy_index:
+                request['url'] = f"{request['url']}?v={copy_index}"
+            requests.append(request)
+        for event in base_events:
+            event = copy.deepcopy(event)
+            event['ts'] = event['ts'] + copy_index * 2000000
+            events.append(event)
+
+    lighthouse_result['networkRequests'] = requests
+    lighthouse_result['traceEvents'] = events
+    return lighthouse_json
+
+
+def _save_per_row(model, instances, **kwargs):
+    """Previous strategy: one INSERT per row."""
+    for instance in instances:
+        instance.save(force_insert=True)
+    return instances
+
+
+class Command(BaseCommand):
+    help = 'Benchmark parse_detailed_data (bulk inserts vs. per-row inserts) on scaled Lighthouse fixtures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', nargs='+', type=int, default=[1, 100, 1000],
+                            help='Fixture replication factors (default: 1 100 1000)')
+        parser.add_argument('--per-row', action='store_true',
+                            help='Also run the previous one-INSERT-per-row strategy')
+
+    def handle(self, *args, **options):
+        for scale in options['scales']:
+            full_results = build_scaled_lighthouse_json(scale)
+            self._run('bulk', scale, full_results)
+            if options['per_row']:
+                with mock.patch.object(network_parser, 'bulk_create_tolerant', _save_per_row), \
+                        mock.patch.object(resource_parser, 'bulk_create_tolerant', _save_per_row), \
+                        mock.patch.object(timeline_parser, 'bulk_create_tolerant', _save_per_row):
+                    self._run('per-row', scale, full_results)
+
+    def _run(self, mode, scale, full_results):
+        analysis = PerformanceAnalysis.objects.create(
+            url=TEST_URL,
+            performance_score=0,
+            lcp=0,
+            fid=0,
+            cls=0,
+            full_results=full_results,
+        )
+        try:
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                dispatcher.parse_detailed_data(analysis)
+            elapsed = time.perf_counter() - start
+
+            rows = (
+                NetworkRequest.objects.filter(performance_analysis=analysis).count()
+                + ResourceBreakdown.objects.filter(performance_analysis=analysis).count()
+                + PerformanceTimelineEvent.objects.filter(performance_analysis=analysis).count()
+            )
+            self.stdout.write(
+                f'{mode:<8} scale={scale:>6}  rows={rows:>7}  time={elapsed:8.3f}s  '
+                f'rate={rows / elapsed:10.1f} rows/s'
+            )
+        finally:
+            analysis.delete()
+
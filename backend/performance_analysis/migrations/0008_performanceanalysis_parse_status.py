@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+def mark_existing_parsed(apps, schema_editor):
+    # Analyses saved before background parsing were parsed inline
+    PerformanceAnalysis = apps.get_model('performance_analysis', 'PerformanceAnalysis')
+    PerformanceAnalysis.objects.update(parse_status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance_analysis', '0007_alter_performancetimelineevent_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performanceanalysis',
+            name='parse_attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of times parsing was attempted'),
+        ),
+        migrations.AddField(
+            model_name='performanceanalysis',
+            name='parse_error',
+            field=models.TextField(blank=True, default='', help_text='Error from the last failed parse attempt'),
+        ),
+        migrations.AddField(
+            model_name='performanceanalysis',
+            name='parse_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', help_text='Status of the background parse of full_results into detail tables', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='performanceanalysis',
+            name='parsed_at',
+            field=models.DateTimeField(blank=True, help_text='When detailed data was last parsed successfully', null=True),
+        ),
+        migrations.RunPython(mark_existing_parsed, migrations.RunPython.noop),
+    ]
@@ -27,6 +27,13 @@ class PerformanceAnalysis(models.Model):
         ('tablet', 'Tablet'),
     ]
     
+    PARSE_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
     # URL and user association
     url = models.URLField(max_length=2048, db_index=True, help_text='URL that was analyzed')
     user = models.ForeignKey(
@@ -190,6 +197,29 @@ class PerformanceAnalysis(models.Model):
         help_text='Change in LCP from previous analysis (seconds)'
     )
     
+    # Detailed data parsing (network requests, resources, timeline events)
+    parse_status = models.CharField(
+        max_length=20,
+        choices=PARSE_STATUS_CHOICES,
+        default='pending',
+        db_index=True,
+        help_text='Status of the background parse of full_results into detail tables'
+    )
+    parse_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Number of times parsing was attempted'
+    )
+    parse_error = models.TextField(
+        blank=True,
+        default='',
+        help_text='Error from the last failed parse attempt'
+    )
+    parsed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When detailed data was last parsed successfully'
+    )
+    
     # Timestamps
     analyzed_at = models.DateTimeField(
         auto_now_add=True,
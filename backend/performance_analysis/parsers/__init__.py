@@ -6,6 +6,7 @@ Public API for parsing Lighthouse data.
 
 from .dispatcher import parse_detailed_data
 from .base_normalizer import normalize_lighthouse_json
+from .context import LighthouseParseContext
 
 # Individual parsers (for advanced usage)
 from .network_parser import parse_network_requests
@@ -18,6 +19,7 @@ from .timeline_parser import parse_timeline_events
 __all__ = [
     'parse_detailed_data',
     'normalize_lighthouse_json',
+    'LighthouseParseContext',
     'parse_network_requests',
     'parse_resource_breakdown',
     'parse_category_scores',
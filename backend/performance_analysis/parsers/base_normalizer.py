@@ -7,6 +7,24 @@ Handles variations in JSON structure from different sources.
 import json
 from typing import Optional, Dict, Any
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads_json(raw: Any) -> Any:
+    """
+    Decode a JSON document, using orjson when it is installed.
+    
+    Raises:
+        json.JSONDecodeError (orjson's error is a subclass)
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 
 def normalize_lighthouse_json(raw: Any) -> Optional[Dict[str, Any]]:
     """
@@ -32,7 +50,7 @@ def normalize_lighthouse_json(raw: Any) -> Optional[Dict[str, Any]]:
     # Handle string input
     if isinstance(raw, str):
         try:
-            raw = json.loads(raw)
+            raw = loads_json(raw)
         except json.JSONDecodeError:
             print("[NormalizeLighthouse] Failed to parse JSON string")
             return None
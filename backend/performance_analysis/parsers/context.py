@@ -0,0 +1,157 @@
+"""
+Shared parse context for Lighthouse data.
+
+The raw report is decoded and normalized once, and the lookups every parser
+needs (audits, network requests, trace events, per-URL audit items) are
+resolved once and shared, instead of each parser re-decoding full_results
+and walking the same fallback chains.
+"""
+
+from typing import Any, Dict, List, Optional
+from .base_normalizer import loads_json, normalize_lighthouse_json
+
+
+# Audits whose details.items[] are matched against network requests by URL
+UNUSED_CSS_AUDITS = ('unused-css-rules', 'unused-css')
+UNUSED_JS_AUDITS = ('unused-javascript',)
+UNMINIFIED_CSS_AUDITS = ('unminified-css',)
+UNMINIFIED_JS_AUDITS = ('unminified-javascript',)
+INEFFICIENT_IMAGE_AUDITS = ('uses-optimized-images', 'modern-image-formats')
+CACHE_TTL_AUDITS = ('uses-long-cache-ttl',)
+
+
+class LighthouseParseContext:
+    """
+    Lighthouse report decoded once and indexed for all parsers.
+
+    Attributes:
+        raw: Decoded report as stored (may wrap lighthouseResult)
+        lighthouse_result: Normalized lighthouseResult dict (None if invalid)
+        audits: lighthouse_result['audits'] (empty dict if missing)
+    """
+
+    def __init__(self, lighthouse_data: Any):
+        if isinstance(lighthouse_data, (str, bytes)):
+            try:
+                lighthouse_data = loads_json(lighthouse_data)
+            except ValueError as e:
+                print(f"[LighthouseParseContext] Error parsing JSON string: {e}")
+                lighthouse_data = None
+        self.raw = lighthouse_data
+
+        lighthouse_result = normalize_lighthouse_json(lighthouse_data) if lighthouse_data else None
+        self.lighthouse_result = lighthouse_result if isinstance(lighthouse_result, dict) else None
+
+        audits = self.lighthouse_result.get('audits') if self.lighthouse_result else None
+        self.audits = audits if isinstance(audits, dict) else {}
+
+        self._network_requests = None
+        self._requests_by_url = None
+        self._trace_events = None
+        self._audit_items_by_url = {}
+
+    @classmethod
+    def from_data(cls, lighthouse_data: Any) -> 'LighthouseParseContext':
+        """
+        Return lighthouse_data if it already is a context, otherwise build one.
+        """
+        if isinstance(lighthouse_data, cls):
+            return lighthouse_data
+        return cls(lighthouse_data)
+
+    @property
+    def network_requests(self) -> List[Dict[str, Any]]:
+        """
+        Network requests, from the first location that has any:
+        lighthouseResult.networkRequests, audits['network-requests'].details.items,
+        loadingExperience.networkRequests.
+        """
+        if self._network_requests is None:
+            requests = []
+            if self.lighthouse_result:
+                requests = self.lighthouse_result.get('networkRequests') or []
+                if not requests:
+                    details = (self.audits.get('network-requests') or {}).get('details') or {}
+                    requests = details.get('items') or []
+                if not requests:
+                    loading_experience = self.lighthouse_result.get('loadingExperience') or {}
+                    requests = loading_experience.get('networkRequests') or []
+            self._network_requests = requests if isinstance(requests, list) else []
+        return self._network_requests
+
+    @property
+    def requests_by_url(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Network requests keyed by URL (the first request wins for repeated URLs).
+        """
+        if self._requests_by_url is None:
+            index = {}
+            for request in self.network_requests:
+                if isinstance(request, dict):
+                    url = request.get('url')
+                    if url and url not in index:
+                        index[url] = request
+            self._requests_by_url = index
+        return self._requests_by_url
+
+    @property
+    def trace_events(self) -> List[Dict[str, Any]]:
+        """
+        traceEvents from lighthouseResult, a nested lighthouseResult, or the raw report.
+        """
+        if self._trace_events is None:
+            events = []
+            if self.lighthouse_result:
+                events = self.lighthouse_result.get('traceEvents') or []
+                if not events:
+                    nested_lhr = self.lighthouse_result.get('lighthouseResult')
+                    if isinstance(nested_lhr, dict):
+                        events = nested_lhr.get('traceEvents') or []
+            if not events and isinstance(self.raw, dict):
+                if 'lighthouseResult' in self.raw:
+                    lhr = self.raw.get('lighthouseResult')
+                    if isinstance(lhr, dict):
+                        events = lhr.get('traceEvents') or []
+                elif 'traceEvents' in self.raw:
+                    events = self.raw.get('traceEvents') or []
+            self._trace_events = events if isinstance(events, list) else []
+        return self._trace_events
+
+    def audit_items_by_url(self, audit_ids) -> Dict[str, Dict[str, Any]]:
+        """
+        details.items[] of the first non-empty audit in audit_ids, keyed by URL.
+
+        Built once per audit group and cached, so per-request lookups are O(1).
+
+        Args:
+            audit_ids: Tuple of alternative audit ids (e.g. UNUSED_CSS_AUDITS)
+        """
+        audit_ids = tuple(audit_ids)
+        if audit_ids not in self._audit_items_by_url:
+            audit = {}
+            for audit_id in audit_ids:
+                audit = self.audits.get(audit_id) or {}
+                if audit:
+                    break
+            index = {}
+            details = audit.get('details') if isinstance(audit, dict) else None
+            if isinstance(details, dict):
+                for item in details.get('items') or []:
+                    if isinstance(item, dict):
+                        item_url = item.get('url', '')
+                        if item_url:
+                            index[item_url] = item
+            self._audit_items_by_url[audit_ids] = index
+        return self._audit_items_by_url[audit_ids]
+
+
+def get_parse_context(lighthouse_data: Any) -> Optional[LighthouseParseContext]:
+    """
+    Shared context for lighthouse_data, or None if it has no usable lighthouseResult.
+    """
+    if not lighthouse_data:
+        return None
+    context = LighthouseParseContext.from_data(lighthouse_data)
+    if not context.lighthouse_result:
+        return None
+    return context
@@ -4,18 +4,32 @@ Main dispatcher for parsing Lighthouse data.
 Orchestrates all parsing operations in the correct order.
 """
 
-from ..models import PerformanceAnalysis
-from .base_normalizer import normalize_lighthouse_json
+from django.db import InterfaceError, OperationalError, transaction
+from ..models import PerformanceAnalysis, NetworkRequest, ResourceBreakdown, PerformanceTimelineEvent
+from .context import LighthouseParseContext
 from .category_parser import parse_category_scores
 from .config_parser import parse_config_environment
 from .audit_parser import parse_audit_details
 from .network_parser import parse_network_requests
 from .resource_parser import parse_resource_breakdown
 from .timeline_parser import parse_timeline_events
-from .timeline_parser import parse_timeline_events
 
 
-def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
+# Connection-level errors are re-raised instead of being logged per parser,
+# so a background run can be retried
+TRANSIENT_DB_ERRORS = (OperationalError, InterfaceError)
+
+
+def delete_parsed_children(performance_analysis: PerformanceAnalysis) -> None:
+    """
+    Delete the rows a previous parse created, so a re-parse replaces them.
+    """
+    NetworkRequest.objects.filter(performance_analysis=performance_analysis).delete()
+    ResourceBreakdown.objects.filter(performance_analysis=performance_analysis).delete()
+    PerformanceTimelineEvent.objects.filter(performance_analysis=performance_analysis).delete()
+
+
+def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> dict:
     """
     Parse all detailed data from PerformanceAnalysis.full_results and populate related tables.
     
@@ -27,8 +41,16 @@ def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
     - Resource breakdown (resource categorization)
     - Timeline events (performance timeline)
     
+    Parsing is idempotent: the analysis row is locked and the network request,
+    resource breakdown and timeline rows of an earlier parse are replaced in
+    the same transaction, so re-running never duplicates them.
+    
     Args:
         performance_analysis: PerformanceAnalysis instance to parse data for
+        
+    Returns:
+        dict with network_requests, resource_breakdowns and timeline_events
+        counts and the list of parsers that failed
     """
     full_results = performance_analysis.full_results
     
@@ -38,23 +60,27 @@ def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
     
     if not full_results:
         print("[ParseDetailedData] No full_results to parse")
-        return
+        return _summary(0, 0, 0, [])
     
-    # Normalize the JSON structure (handles string conversion and lighthouseResult extraction)
-    lighthouse_result = normalize_lighthouse_json(full_results)
+    # Decode and normalize once (string conversion, lighthouseResult extraction,
+    # network request and per-URL audit indexes); every parser shares the context
+    context = LighthouseParseContext(full_results)
+    lighthouse_result = context.lighthouse_result
     if not lighthouse_result:
         print("[ParseDetailedData] Failed to normalize full_results")
-        return
+        return _summary(0, 0, 0, ['normalize'])
     
     print(f"[ParseDetailedData] Normalized lighthouse_result keys: {list(lighthouse_result.keys())[:20] if isinstance(lighthouse_result, dict) else 'Not a dict'}")
-    if isinstance(lighthouse_result, dict) and 'audits' in lighthouse_result:
-        audits = lighthouse_result['audits']
-        print(f"[ParseDetailedData] audits keys (first 10): {list(audits.keys())[:10] if isinstance(audits, dict) else 'Not a dict'}")
+    if context.audits:
+        print(f"[ParseDetailedData] audits keys (first 10): {list(context.audits.keys())[:10]}")
     
     # Track results for each parser
     category_scores_ok = False
     config_env_ok = False
     audit_details_ok = False
+    network_ok = False
+    resource_ok = False
+    timeline_ok = False
     network_count = 0
     resource_count = 0
     timeline_count = 0
@@ -64,6 +90,8 @@ def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
         parse_category_scores(performance_analysis, lighthouse_result)
         category_scores_ok = True
         print(f"[ParseDetailedData] [OK] Category scores parsed")
+    except TRANSIENT_DB_ERRORS:
+        raise
     except Exception as e:
         print(f"[ParseDetailedData] [ERROR] Failed to parse category scores: {e}")
         import traceback
@@ -74,6 +102,8 @@ def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
         parse_config_environment(performance_analysis, lighthouse_result)
         config_env_ok = True
         print(f"[ParseDetailedData] [OK] Config/environment parsed")
+    except TRANSIENT_DB_ERRORS:
+        raise
     except Exception as e:
         print(f"[ParseDetailedData] [ERROR] Failed to parse config/environment: {e}")
         import traceback
@@ -84,40 +114,61 @@ def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
         parse_audit_details(performance_analysis, lighthouse_result)
         audit_details_ok = True
         print(f"[ParseDetailedData] [OK] Audit details parsed")
+    except TRANSIENT_DB_ERRORS:
+        raise
     except Exception as e:
         print(f"[ParseDetailedData] [ERROR] Failed to parse audit details: {e}")
         import traceback
         traceback.print_exc()
     
-    # Parse network requests (waterfall chart data)
-    try:
-        network_requests = parse_network_requests(performance_analysis, full_results)
-        network_count = len(network_requests)
-        print(f"[ParseDetailedData] [OK] Created {network_count} NetworkRequest records (waterfall data)")
-    except Exception as e:
-        print(f"[ParseDetailedData] [ERROR] Failed to parse network requests: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    # Parse resource breakdown (resource categorization)
-    try:
-        resource_breakdowns = parse_resource_breakdown(performance_analysis, full_results)
-        resource_count = len(resource_breakdowns)
-        print(f"[ParseDetailedData] [OK] Created {resource_count} ResourceBreakdown records")
-    except Exception as e:
-        print(f"[ParseDetailedData] [ERROR] Failed to parse resource breakdown: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    # Parse timeline events (performance timeline)
-    try:
-        timeline_events = parse_timeline_events(performance_analysis, full_results)
-        timeline_count = len(timeline_events)
-        print(f"[ParseDetailedData] [OK] Created {timeline_count} PerformanceTimelineEvent records")
-    except Exception as e:
-        print(f"[ParseDetailedData] [ERROR] Failed to parse timeline events: {e}")
-        import traceback
-        traceback.print_exc()
+    # Row-heavy tables are replaced in one transaction; each parser runs in its
+    # own savepoint so a failing parser does not discard the others' rows. The
+    # row lock serializes concurrent parses of the same analysis.
+    with transaction.atomic():
+        PerformanceAnalysis.objects.select_for_update().filter(pk=performance_analysis.pk).first()
+        delete_parsed_children(performance_analysis)
+        
+        # Parse network requests (waterfall chart data)
+        try:
+            with transaction.atomic():
+                network_requests = parse_network_requests(performance_analysis, context)
+            network_count = len(network_requests)
+            network_ok = True
+            print(f"[ParseDetailedData] [OK] Created {network_count} NetworkRequest records (waterfall data)")
+        except TRANSIENT_DB_ERRORS:
+            raise
+        except Exception as e:
+            print(f"[ParseDetailedData] [ERROR] Failed to parse network requests: {e}")
+            import traceback
+            traceback.print_exc()
+        
+        # Parse resource breakdown (resource categorization)
+        try:
+            with transaction.atomic():
+                resource_breakdowns = parse_resource_breakdown(performance_analysis, context)
+            resource_count = len(resource_breakdowns)
+            resource_ok = True
+            print(f"[ParseDetailedData] [OK] Created {resource_count} ResourceBreakdown records")
+        except TRANSIENT_DB_ERRORS:
+            raise
+        except Exception as e:
+            print(f"[ParseDetailedData] [ERROR] Failed to parse resource breakdown: {e}")
+            import traceback
+            traceback.print_exc()
+        
+        # Parse timeline events (performance timeline)
+        try:
+            with transaction.atomic():
+                timeline_events = parse_timeline_events(performance_analysis, context)
+            timeline_count = len(timeline_events)
+            timeline_ok = True
+            print(f"[ParseDetailedData] [OK] Created {timeline_count} PerformanceTimelineEvent records")
+        except TRANSIENT_DB_ERRORS:
+            raise
+        except Exception as e:
+            print(f"[ParseDetailedData] [ERROR] Failed to parse timeline events: {e}")
+            import traceback
+            traceback.print_exc()
     
     # Verify data went to correct tables
     print(f"[ParseDetailedData] ========================================")
@@ -132,4 +183,24 @@ def parse_detailed_data(performance_analysis: PerformanceAnalysis) -> None:
     print(f"[ParseDetailedData] ========================================")
     
     print(f"[ParseDetailedData] Parsing completed for PerformanceAnalysis {performance_analysis.id}")
+    
+    failed = [
+        name for name, ok in (
+            ('category_scores', category_scores_ok),
+            ('config_environment', config_env_ok),
+            ('audit_details', audit_details_ok),
+            ('network_requests', network_ok),
+            ('resource_breakdown', resource_ok),
+            ('timeline_events', timeline_ok),
+        ) if not ok
+    ]
+    return _summary(network_count, resource_count, timeline_count, failed)
+
 
+def _summary(network_count, resource_count, timeline_count, failed):
+    return {
+        'network_requests': network_count,
+        'resource_breakdowns': resource_count,
+        'timeline_events': timeline_count,
+        'failed': failed,
+    }
@@ -4,7 +4,12 @@ Helper utilities for parsing Lighthouse data.
 Shared functions used across multiple parsers.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from django.db import DatabaseError, transaction
+
+
+# Rows per INSERT statement when flushing parsed rows
+BULK_CREATE_BATCH_SIZE = 1000
 
 
 def safe_get(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
@@ -76,3 +81,41 @@ def extract_timing_breakdown(timing: Dict[str, Any]) -> Dict[str, Optional[float
         'receive_time': receive_time,
     }
 
+
+
+def bulk_create_tolerant(model, instances: List[Any], log_prefix: str = '[BulkCreate]', batch_size: int = BULK_CREATE_BATCH_SIZE) -> List[Any]:
+    """
+    Insert unsaved model instances with batched bulk_create, keeping per-row error tolerance.
+    
+    Each batch is inserted inside a savepoint. If the database rejects a batch
+    (e.g. a value too long for its column), that batch is retried row by row
+    and only the offending rows are skipped, as with the old per-row create().
+    
+    Args:
+        model: Model class of the instances
+        instances: Unsaved model instances
+        log_prefix: Prefix for log lines
+        batch_size: Rows per INSERT statement
+        
+    Returns:
+        List of saved instances (primary keys set)
+    """
+    created = []
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        try:
+            with transaction.atomic():
+                created.extend(model.objects.bulk_create(batch))
+            continue
+        except DatabaseError as e:
+            print(f"{log_prefix} [WARN] Batch insert failed, retrying {len(batch)} rows individually: {e}")
+        
+        for offset, instance in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    instance.save(force_insert=True)
+                created.append(instance)
+            except DatabaseError as e:
+                instance.pk = None
+                print(f"{log_prefix} [ERROR] Error saving row {start + offset}: {e}")
+    return created
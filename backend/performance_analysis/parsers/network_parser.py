@@ -6,53 +6,31 @@ Extracts waterfall chart data from Lighthouse results.
 
 from typing import List
 from ..models import NetworkRequest
-from .base_normalizer import normalize_lighthouse_json
+from .context import get_parse_context
+from .helpers import bulk_create_tolerant
 
 
 def parse_network_requests(performance_analysis, lighthouse_data):
     """
     Parse network requests from Lighthouse data and create NetworkRequest objects.
     
+    Rows are built in memory and inserted with batched bulk_create; a request
+    that cannot be parsed or saved is skipped without affecting the others.
+    
     Args:
         performance_analysis: PerformanceAnalysis instance
-        lighthouse_data: Raw Lighthouse JSON data
+        lighthouse_data: Raw Lighthouse JSON data or a shared LighthouseParseContext
         
     Returns:
         List of created NetworkRequest objects
     """
-    if not lighthouse_data:
-        print("[ParseNetworkRequests] No lighthouse_data")
-        return []
-    
-    # Normalize the JSON structure
-    lighthouse_result = normalize_lighthouse_json(lighthouse_data)
-    if not lighthouse_result or not isinstance(lighthouse_result, dict):
-        print("[ParseNetworkRequests] Failed to normalize lighthouse_data or result is not a dict")
+    # Decoding and the networkRequests fallback chain are resolved once in the shared context
+    context = get_parse_context(lighthouse_data)
+    if context is None:
+        print("[ParseNetworkRequests] No lighthouse_data or result is not a dict")
         return []
     
-    # DEBUG: Log the structure we're working with
-    print(f"[ParseNetworkRequests] lighthouse_result keys: {list(lighthouse_result.keys())[:20]}")
-    
-    # Try multiple possible locations for network requests
-    network_requests_data = lighthouse_result.get('networkRequests', [])
-    print(f"[ParseNetworkRequests] Checked lighthouseResult.networkRequests: {len(network_requests_data) if network_requests_data else 0} found")
-    
-    # If not found, try in audits
-    if not network_requests_data:
-        audits = lighthouse_result.get('audits', {})
-        print(f"[ParseNetworkRequests] Checking audits, available audit keys: {list(audits.keys())[:10] if isinstance(audits, dict) else 'Not a dict'}")
-        network_audit = audits.get('network-requests', {})
-        if network_audit:
-            details = network_audit.get('details', {})
-            network_requests_data = details.get('items', [])
-            print(f"[ParseNetworkRequests] Found in audits['network-requests']['details']['items']: {len(network_requests_data)}")
-    
-    # If still not found, try in loadingExperience
-    if not network_requests_data:
-        loading_experience = lighthouse_result.get('loadingExperience', {})
-        network_requests_data = loading_experience.get('networkRequests', [])
-        print(f"[ParseNetworkRequests] Checked loadingExperience.networkRequests: {len(network_requests_data) if network_requests_data else 0} found")
-    
+    network_requests_data = context.network_requests
     print(f"[ParseNetworkRequests] Final count: {len(network_requests_data)} network requests")
     
     if not network_requests_data:
@@ -110,9 +88,9 @@ def parse_network_requests(performance_analysis, lighthouse_data):
             initiator_type = initiator.get('type') if isinstance(initiator, dict) else None
             initiator_url = initiator.get('url') if isinstance(initiator, dict) else None
             
-            # Create NetworkRequest record (waterfall chart data)
+            # Build NetworkRequest record (waterfall chart data)
             # Mapping: Google JSON field -> Model field
-            network_request = NetworkRequest.objects.create(
+            network_request = NetworkRequest(
                 performance_analysis=performance_analysis,
                 audit_report=audit_report,  # Direct link to audit report
                 # Basic Info: networkRequests[].url -> url
@@ -172,6 +150,8 @@ def parse_network_requests(performance_analysis, lighthouse_data):
             print(traceback.format_exc())
             continue
     
+    network_requests = bulk_create_tolerant(NetworkRequest, network_requests, log_prefix='[ParseNetworkRequests]')
+    
     print(f"[ParseNetworkRequests] [OK] Successfully created {len(network_requests)} NetworkRequest records")
     return network_requests
 
@@ -6,144 +6,74 @@ Extracts resource categorization and optimization opportunities.
 
 from typing import List
 from ..models import ResourceBreakdown
-from .base_normalizer import normalize_lighthouse_json
+from .context import (
+    get_parse_context,
+    UNUSED_CSS_AUDITS,
+    UNUSED_JS_AUDITS,
+    UNMINIFIED_CSS_AUDITS,
+    UNMINIFIED_JS_AUDITS,
+    INEFFICIENT_IMAGE_AUDITS,
+    CACHE_TTL_AUDITS,
+)
+from .helpers import bulk_create_tolerant
 
 
 def parse_resource_breakdown(performance_analysis, lighthouse_data):
     """
     Parse resource breakdown from Lighthouse data.
     
+    Rows are built in memory and inserted with batched bulk_create; a resource
+    that cannot be parsed or saved is skipped without affecting the others.
+    
     Args:
         performance_analysis: PerformanceAnalysis instance
-        lighthouse_data: Raw Lighthouse JSON data
+        lighthouse_data: Raw Lighthouse JSON data or a shared LighthouseParseContext
         
     Returns:
         List of created ResourceBreakdown objects
     """
-    if not lighthouse_data:
-        return []
-    
-    # Normalize the JSON structure
-    lighthouse_result = normalize_lighthouse_json(lighthouse_data)
-    if not lighthouse_result or not isinstance(lighthouse_result, dict):
-        print("[ParseResourceBreakdown] Failed to normalize lighthouse_data or result is not a dict")
+    # Decoding, the networkRequests fallback chain and the per-URL audit
+    # indexes are resolved once in the shared context
+    context = get_parse_context(lighthouse_data)
+    if context is None:
+        print("[ParseResourceBreakdown] No lighthouse_data or result is not a dict")
         return []
     
-    audits = lighthouse_result.get('audits', {})
-    
     # Get audit_report from performance_analysis for direct linking
     audit_report = performance_analysis.audit_report
     
-    # Get resource data from various audits
     resource_breakdowns = []
     
-    # DEBUG: Log structure
-    print(f"[ParseResourceBreakdown] lighthouse_result keys: {list(lighthouse_result.keys())[:20] if isinstance(lighthouse_result, dict) else 'Not a dict'}")
-    
-    # Parse from network requests - try multiple locations
-    network_requests_data = lighthouse_result.get('networkRequests', [])
-    print(f"[ParseResourceBreakdown] Checked lighthouseResult.networkRequests: {len(network_requests_data) if network_requests_data else 0} found")
-    
-    # If not found, try in audits
-    if not network_requests_data:
-        audits = lighthouse_result.get('audits', {})
-        network_audit = audits.get('network-requests', {})
-        if network_audit:
-            details = network_audit.get('details', {})
-            network_requests_data = details.get('items', [])
-            print(f"[ParseResourceBreakdown] Found in audits['network-requests']['details']['items']: {len(network_requests_data)}")
-    
+    network_requests_data = context.network_requests
     if not network_requests_data:
         print("[ParseResourceBreakdown] No network requests data found - cannot create resource breakdowns")
         return []
     
     print(f"[ParseResourceBreakdown] Processing {len(network_requests_data)} network requests for resource breakdown")
     
-    # Build lookup maps from audits for optimization flags
-    # These audits have details.items[] with url matching
-    unused_css_map = {}  # url -> {wastedBytes, wastedMs}
-    unused_js_map = {}  # url -> {wastedBytes, wastedMs}
-    unminified_css_map = {}  # url -> True
-    unminified_js_map = {}  # url -> True
-    inefficient_images_map = {}  # url -> {wastedBytes}
-    cache_lifetime_map = {}  # url -> cacheLifetime
-    
-    # Extract from unused-css audit
-    unused_css_audit = audits.get('unused-css-rules', {}) or audits.get('unused-css', {})
-    if unused_css_audit and isinstance(unused_css_audit.get('details'), dict):
-        items = unused_css_audit['details'].get('items', [])
-        for item in items:
-            item_url = item.get('url', '')
-            if item_url:
-                unused_css_map[item_url] = {
-                    'wastedBytes': item.get('wastedBytes'),
-                    'wastedMs': item.get('wastedMs')
-                }
-    
-    # Extract from unused-javascript audit
-    unused_js_audit = audits.get('unused-javascript', {})
-    if unused_js_audit and isinstance(unused_js_audit.get('details'), dict):
-        items = unused_js_audit['details'].get('items', [])
-        for item in items:
-            item_url = item.get('url', '')
-            if item_url:
-                unused_js_map[item_url] = {
-                    'wastedBytes': item.get('wastedBytes'),
-                    'wastedMs': item.get('wastedMs')
-                }
-    
-    # Extract from unminified-css audit
-    unminified_css_audit = audits.get('unminified-css', {})
-    if unminified_css_audit and isinstance(unminified_css_audit.get('details'), dict):
-        items = unminified_css_audit['details'].get('items', [])
-        for item in items:
-            item_url = item.get('url', '')
-            if item_url:
-                unminified_css_map[item_url] = True
-    
-    # Extract from unminified-javascript audit
-    unminified_js_audit = audits.get('unminified-javascript', {})
-    if unminified_js_audit and isinstance(unminified_js_audit.get('details'), dict):
-        items = unminified_js_audit['details'].get('items', [])
-        for item in items:
-            item_url = item.get('url', '')
-            if item_url:
-                unminified_js_map[item_url] = True
-    
-    # Extract from uses-optimized-images or modern-image-formats audit
-    inefficient_images_audit = audits.get('uses-optimized-images', {}) or audits.get('modern-image-formats', {})
-    if inefficient_images_audit and isinstance(inefficient_images_audit.get('details'), dict):
-        items = inefficient_images_audit['details'].get('items', [])
-        for item in items:
-            item_url = item.get('url', '')
-            if item_url:
-                inefficient_images_map[item_url] = {
-                    'wastedBytes': item.get('wastedBytes')
-                }
-    
-    # Extract from uses-long-cache-ttl audit
-    cache_audit = audits.get('uses-long-cache-ttl', {})
-    if cache_audit and isinstance(cache_audit.get('details'), dict):
-        items = cache_audit['details'].get('items', [])
-        for item in items:
-            item_url = item.get('url', '')
-            if item_url:
-                cache_lifetime_map[item_url] = item.get('cacheLifetime', item.get('cacheTTL'))
+    # Optimization flags come from audits whose details.items[] match requests by URL
+    unused_css_map = context.audit_items_by_url(UNUSED_CSS_AUDITS)
+    unused_js_map = context.audit_items_by_url(UNUSED_JS_AUDITS)
+    unminified_css_map = context.audit_items_by_url(UNMINIFIED_CSS_AUDITS)
+    unminified_js_map = context.audit_items_by_url(UNMINIFIED_JS_AUDITS)
+    inefficient_images_map = context.audit_items_by_url(INEFFICIENT_IMAGE_AUDITS)
+    cache_lifetime_map = context.audit_items_by_url(CACHE_TTL_AUDITS)
+    
+    # Map resource type to category
+    category_map = {
+        'Document': 'document',
+        'Script': 'script',
+        'Stylesheet': 'stylesheet',
+        'Image': 'image',
+        'Font': 'font',
+        'Media': 'media',
+    }
     
     for idx, request in enumerate(network_requests_data):
         try:
             url = request.get('url', '')
             resource_type = request.get('resourceType', 'other')
             
-            # Map resource type to category
-            category_map = {
-                'Document': 'document',
-                'Script': 'script',
-                'Stylesheet': 'stylesheet',
-                'Image': 'image',
-                'Font': 'font',
-                'Media': 'media',
-            }
             category = category_map.get(resource_type, 'other')
             
             # Size: networkRequests[].transferSize -> transfer_size
@@ -176,7 +106,8 @@ def parse_resource_breakdown(performance_analysis, lighthouse_data):
             wasted_bytes = unused_css_data.get('wastedBytes') or unused_js_data.get('wastedBytes') or inefficient_image_data.get('wastedBytes')
             wasted_ms = unused_css_data.get('wastedMs') or unused_js_data.get('wastedMs')
             # Optimization: From uses-long-cache-ttl audit -> cache_lifetime
-            cache_lifetime = cache_lifetime_map.get(url)
+            cache_item = cache_lifetime_map.get(url)
+            cache_lifetime = cache_item.get('cacheLifetime', cache_item.get('cacheTTL')) if cache_item else None
             
             # Load time: Calculate from timing
             timing = request.get('timing', {})
@@ -184,7 +115,7 @@ def parse_resource_breakdown(performance_analysis, lighthouse_data):
             end_time = request.get('endTime') or timing.get('endTime', 0)
             load_time = (end_time - start_time) * 1000 if (start_time and end_time) else None  # Convert to ms
             
-            breakdown = ResourceBreakdown.objects.create(
+            breakdown = ResourceBreakdown(
                 performance_analysis=performance_analysis,
                 audit_report=audit_report,  # Direct link to audit report
                 # Basic Info: networkRequests[].url -> url
@@ -230,6 +161,8 @@ def parse_resource_breakdown(performance_analysis, lighthouse_data):
             print(traceback.format_exc())
             continue
     
+    resource_breakdowns = bulk_create_tolerant(ResourceBreakdown, resource_breakdowns, log_prefix='[ParseResourceBreakdown]')
+    
     print(f"[ParseResourceBreakdown] [OK] Successfully created {len(resource_breakdowns)} ResourceBreakdown records")
     return resource_breakdowns
 
@@ -6,7 +6,8 @@ Extracts trace events for performance timeline visualization.
 
 from typing import List
 from ..models import PerformanceTimelineEvent
-from .base_normalizer import normalize_lighthouse_json
+from .context import get_parse_context
+from .helpers import bulk_create_tolerant
 
 
 def parse_timeline_events(performance_analysis, lighthouse_data):
@@ -17,21 +18,19 @@ def parse_timeline_events(performance_analysis, lighthouse_data):
     1. Audit milestones (First Paint, FCP, LCP, DOM Content Loaded, Load Complete) - ALWAYS available
     2. traceEvents (if available in JSON) - may not be available from PageSpeed API
     
+    Events are built in memory and inserted with batched bulk_create, so large
+    traces no longer cost one INSERT per event.
+    
     Args:
         performance_analysis: PerformanceAnalysis instance
-        lighthouse_data: Raw Lighthouse JSON data
+        lighthouse_data: Raw Lighthouse JSON data or a shared LighthouseParseContext
         
     Returns:
         List of created PerformanceTimelineEvent objects
     """
-    if not lighthouse_data:
-        print("[ParseTimelineEvents] No lighthouse_data")
-        return []
-    
-    # Normalize the JSON structure
-    lighthouse_result = normalize_lighthouse_json(lighthouse_data)
-    if not lighthouse_result or not isinstance(lighthouse_result, dict):
-        print("[ParseTimelineEvents] Failed to normalize lighthouse_data or result is not a dict")
+    context = get_parse_context(lighthouse_data)
+    if context is None:
+        print("[ParseTimelineEvents] No lighthouse_data or result is not a dict")
         return []
     
     # Get audit_report from performance_analysis for direct linking
@@ -40,7 +39,7 @@ def parse_timeline_events(performance_analysis, lighthouse_data):
     sequence = 0
     
     # Get audits for milestone events (these are what the frontend displays)
-    audits = lighthouse_result.get('audits', {})
+    audits = context.audits
     
     # Define timeline milestones that match what's displayed in the frontend
     timeline_milestones = [
@@ -87,7 +86,7 @@ def parse_timeline_events(performance_analysis, lighthouse_data):
             timestamp_us = timestamp_ms * 1000  # Convert to microseconds
             
             try:
-                timeline_event = PerformanceTimelineEvent.objects.create(
+                timeline_event = PerformanceTimelineEvent(
                     performance_analysis=performance_analysis,
                     audit_report=audit_report,
                     name=milestone['name'],
@@ -108,32 +107,26 @@ def parse_timeline_events(performance_analysis, lighthouse_data):
                 timeline_events.append(timeline_event)
                 sequence += 1
             except Exception as e:
-                print(f"[ParseTimelineEvents] [ERROR] Error creating milestone {milestone['name']}: {e}")
+                print(f"[ParseTimelineEvents] [ERROR] Error building milestone {milestone['name']}: {e}")
                 continue
     
-    print(f"[ParseTimelineEvents] Created {len(timeline_events)} timeline milestone events from audits")
+    print(f"[ParseTimelineEvents] Built {len(timeline_events)} timeline milestone events from audits")
     
     # Also try to parse traceEvents if available (may not be in PageSpeed API response)
-    trace_events = lighthouse_result.get('traceEvents', [])
-    
-    # If not found, check if it's nested in lighthouseResult
-    if not trace_events and 'lighthouseResult' in lighthouse_result:
-        nested_lhr = lighthouse_result.get('lighthouseResult', {})
-        if isinstance(nested_lhr, dict):
-            trace_events = nested_lhr.get('traceEvents', [])
-    
-    # If still not found, check the original lighthouse_data
-    if not trace_events and isinstance(lighthouse_data, dict):
-        if 'lighthouseResult' in lighthouse_data:
-            lhr = lighthouse_data.get('lighthouseResult', {})
-            if isinstance(lhr, dict):
-                trace_events = lhr.get('traceEvents', [])
-        elif 'traceEvents' in lighthouse_data:
-            trace_events = lighthouse_data.get('traceEvents', [])
+    trace_events = context.trace_events
     
     # Parse traceEvents if available
     if trace_events:
         print(f"[ParseTimelineEvents] Found {len(trace_events)} traceEvents, parsing...")
+        # Map category
+        category_map = {
+            'navigation': 'navigation',
+            'paint': 'paint',
+            'measure': 'measure',
+            'mark': 'mark',
+            'script': 'script',
+            'layout': 'layout',
+        }
         for event in trace_events:
             try:
                 name = event.get('name', '')
@@ -145,18 +138,9 @@ def parse_timeline_events(performance_analysis, lighthouse_data):
                 tid = event.get('tid')
                 args = event.get('args', {})
                 
-                # Map category
-                category_map = {
-                    'navigation': 'navigation',
-                    'paint': 'paint',
-                    'measure': 'measure',
-                    'mark': 'mark',
-                    'script': 'script',
-                    'layout': 'layout',
-                }
                 mapped_category = category_map.get(category.split(',')[0] if ',' in category else category, 'other')
                 
-                timeline_event = PerformanceTimelineEvent.objects.create(
+                timeline_event = PerformanceTimelineEvent(
                     performance_analysis=performance_analysis,
                     audit_report=audit_report,
                     name=name,
@@ -175,6 +159,8 @@ def parse_timeline_events(performance_analysis, lighthouse_data):
                 print(f"[ParseTimelineEvents] [ERROR] Error parsing traceEvent {sequence}: {e}")
                 continue
     
+    timeline_events = bulk_create_tolerant(PerformanceTimelineEvent, timeline_events, log_prefix='[ParseTimelineEvents]')
+    
     print(f"[ParseTimelineEvents] [OK] Successfully created {len(timeline_events)} PerformanceTimelineEvent records total")
     return timeline_events
 
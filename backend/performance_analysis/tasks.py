@@ -1,61 +1,136 @@
 """
 Background tasks for performance analysis processing.
 
-Currently DISABLED - parsing runs synchronously.
-Enable Celery when ready for production scaling.
+save_performance_analysis stores the analysis and returns; the detailed parse
+of full_results (network requests, resources, timeline events) runs in the
+parse_performance_details task. Parses of different analyses are independent,
+so throughput scales with the number of workers consuming the queue.
 """
 
-# Celery task for parsing detailed performance data
-# DISABLED until single-site parsing is verified
-# Uncomment when ready to enable background processing
-
-# from celery import shared_task
-# from .models import PerformanceAnalysis
-# from .parsers import parse_detailed_data
-# import logging
-# 
-# logger = logging.getLogger(__name__)
-# 
-# @shared_task(bind=True, max_retries=3)
-# def parse_performance_details(self, analysis_id):
-#     """
-#     Background task to parse detailed performance data.
-#     
-#     Runs asynchronously - doesn't block HTTP request.
-#     Automatically retries up to 3 times on failure.
-#     
-#     Args:
-#         analysis_id: ID of PerformanceAnalysis to parse
-#     """
-#     try:
-#         analysis = PerformanceAnalysis.objects.get(id=analysis_id)
-#         
-#         logger.info(f"[Celery] Starting parse for PerformanceAnalysis {analysis_id}")
-#         parse_detailed_data(analysis)
-#         logger.info(f"[Celery] Successfully parsed PerformanceAnalysis {analysis_id}")
-#         
-#         return {
-#             'status': 'success',
-#             'analysis_id': analysis_id,
-#             'network_requests': analysis.network_requests.count(),
-#             'resource_breakdowns': analysis.resource_breakdowns.count(),
-#             'timeline_events': analysis.timeline_events.count(),
-#         }
-#         
-#     except PerformanceAnalysis.DoesNotExist:
-#         logger.error(f"[Celery] PerformanceAnalysis {analysis_id} not found")
-#         raise
-#         
-#     except Exception as exc:
-#         logger.error(f"[Celery] Error parsing PerformanceAnalysis {analysis_id}: {exc}")
-#         # Retry with exponential backoff
-#         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
-
-# For now, use synchronous parsing (see views.py)
-# When ready to enable Celery:
-# 1. Install: pip install celery redis
-# 2. Configure Celery in core/celery.py and settings.py
-# 3. Uncomment this file
-# 4. Update views.py to use: parse_performance_details.delay(analysis.id)
-# 5. Run: celery -A core worker --loglevel=info
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import PerformanceAnalysis
+from .parsers import parse_detailed_data
+from .parsers.dispatcher import TRANSIENT_DB_ERRORS
 
+logger = logging.getLogger(__name__)
+
+# Try to import Celery, fallback to no-op if not available
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    # Celery not installed - create a dummy decorator
+    CELERY_AVAILABLE = False
+    def shared_task(*args, **kwargs):
+        def decorator(func):
+            # Return function unchanged if Celery not available
+            return func
+        return decorator
+    logger.warning('Celery not available. Performance analyses will be parsed inline.')
+
+
+PARSE_MAX_RETRIES = getattr(settings, 'PERFORMANCE_PARSE_MAX_RETRIES', 3)
+PARSE_RETRY_BACKOFF_SECONDS = getattr(settings, 'PERFORMANCE_PARSE_RETRY_BACKOFF_SECONDS', 60)
+PARSE_RETRY_BACKOFF_MAX_SECONDS = 60 * 60
+
+
+def get_retry_countdown(retries):
+    """
+    Exponential backoff for parse retries: base * 2^retries, capped at one hour.
+    """
+    return min(PARSE_RETRY_BACKOFF_SECONDS * (2 ** retries), PARSE_RETRY_BACKOFF_MAX_SECONDS)
+
+
+def run_parse(analysis_id, final_attempt=True):
+    """
+    Parse one analysis and record the outcome in its parse_status.
+
+    Transient database errors are re-raised so the caller can retry; the
+    analysis goes back to 'pending' unless this is the final attempt.
+
+    Args:
+        analysis_id: ID of PerformanceAnalysis to parse
+        final_attempt: Mark the analysis 'failed' (not 'pending') on a transient error
+
+    Returns:
+        dict with status, analysis_id and the parse summary
+    """
+    analysis = PerformanceAnalysis.objects.filter(id=analysis_id).first()
+    if analysis is None:
+        logger.error(f"[ParsePerformanceDetails] PerformanceAnalysis {analysis_id} not found")
+        return {'status': 'not_found', 'analysis_id': analysis_id}
+
+    analyses = PerformanceAnalysis.objects.filter(id=analysis_id)
+    analyses.update(parse_status='processing', parse_attempts=F('parse_attempts') + 1)
+
+    try:
+        summary = parse_detailed_data(analysis)
+    except TRANSIENT_DB_ERRORS as exc:
+        logger.warning(f"[ParsePerformanceDetails] Transient error parsing PerformanceAnalysis {analysis_id}: {exc}")
+        analyses.update(parse_status='failed' if final_attempt else 'pending', parse_error=str(exc))
+        raise
+    except Exception as exc:
+        logger.exception(f"[ParsePerformanceDetails] Error parsing PerformanceAnalysis {analysis_id}: {exc}")
+        analyses.update(parse_status='failed', parse_error=str(exc))
+        return {'status': 'failed', 'analysis_id': analysis_id, 'error': str(exc)}
+
+    if summary['failed']:
+        error = f"Failed parsers: {', '.join(summary['failed'])}"
+        analyses.update(parse_status='failed', parse_error=error, parsed_at=timezone.now())
+        logger.warning(f"[ParsePerformanceDetails] PerformanceAnalysis {analysis_id} parsed with errors: {error}")
+        return {'status': 'failed', 'analysis_id': analysis_id, **summary}
+
+    analyses.update(parse_status='completed', parse_error='', parsed_at=timezone.now())
+    logger.info(f"[ParsePerformanceDetails] Parsed PerformanceAnalysis {analysis_id}")
+    return {'status': 'success', 'analysis_id': analysis_id, **summary}
+
+
+@shared_task(
+    bind=True,
+    name='performance_analysis.tasks.parse_performance_details',
+    max_retries=PARSE_MAX_RETRIES,
+    acks_late=True,
+)
+def parse_performance_details(self, analysis_id):
+    """
+    Background task to parse detailed performance data.
+
+    Idempotent: a re-run (retry, redelivery after a worker crash) replaces the
+    detail rows of the previous run instead of duplicating them. Transient
+    database errors are retried with exponential backoff.
+
+    Args:
+        analysis_id: ID of PerformanceAnalysis to parse
+    """
+    try:
+        return run_parse(analysis_id, final_attempt=self.request.retries >= self.max_retries)
+    except TRANSIENT_DB_ERRORS as exc:
+        raise self.retry(exc=exc, countdown=get_retry_countdown(self.request.retries))
+
+
+def schedule_parse(analysis):
+    """
+    Queue the detailed parse of an analysis once the current transaction commits.
+
+    Falls back to parsing inline when Celery is not installed or the broker
+    cannot be reached, so detail rows are still created.
+    """
+    analysis_id = analysis.id
+
+    def dispatch():
+        if CELERY_AVAILABLE:
+            try:
+                parse_performance_details.delay(analysis_id)
+                return
+            except Exception as e:
+                logger.warning(f"[ParsePerformanceDetails] Could not queue parse of PerformanceAnalysis {analysis_id}, parsing inline: {str(e)}")
+        try:
+            run_parse(analysis_id)
+        except TRANSIENT_DB_ERRORS as e:
+            logger.error(f"[ParsePerformanceDetails] Inline parse of PerformanceAnalysis {analysis_id} failed: {str(e)}")
+
+    transaction.on_commit(dispatch)
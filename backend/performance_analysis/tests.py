@@ -0,0 +1,190 @@
+"""
+Tests for performance_analysis app
+"""
+import json
+import pytest
+from django.db import OperationalError
+from rest_framework.test import APIClient
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.management.commands.test_performance_with_full_json import TEST_URL
+from performance_analysis.management.commands.benchmark_lighthouse_parsing import build_scaled_lighthouse_json
+from performance_analysis.models import PerformanceAnalysis, NetworkRequest, ResourceBreakdown, PerformanceTimelineEvent
+from performance_analysis.parsers import parse_detailed_data, parse_network_requests, LighthouseParseContext
+from performance_analysis.parsers import base_normalizer, context as parse_context
+from performance_analysis import tasks
+
+
+def create_analysis(full_results):
+    return PerformanceAnalysis.objects.create(
+        url=TEST_URL,
+        performance_score=85,
+        lcp=2.5,
+        fid=50,
+        cls=0.1,
+        full_results=full_results,
+    )
+
+
+@pytest.mark.django_db
+class TestBulkParsing:
+    """Test bulk inserts in the Lighthouse detailed-data parsers"""
+    
+    def _parse_queries(self, scale):
+        analysis = create_analysis(build_scaled_lighthouse_json(scale))
+        with CaptureQueriesContext(connection) as queries:
+            parse_detailed_data(analysis)
+        return analysis, len(queries)
+    
+    def test_rows_are_created(self):
+        """Test that every network request, resource and trace event is stored"""
+        analysis, _ = self._parse_queries(3)
+        
+        assert NetworkRequest.objects.filter(performance_analysis=analysis).count() == 12
+        assert ResourceBreakdown.objects.filter(performance_analysis=analysis).count() == 12
+        assert PerformanceTimelineEvent.objects.filter(performance_analysis=analysis).count() == 18
+        stylesheet = ResourceBreakdown.objects.get(performance_analysis=analysis, url='https://example.com/style.css')
+        assert stylesheet.unused_css is True
+        assert stylesheet.wasted_bytes == 15000
+        sequences = list(NetworkRequest.objects.filter(performance_analysis=analysis).order_by('sequence').values_list('sequence', flat=True))
+        assert sequences == list(range(12))
+    
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that 100x more rows does not mean more INSERT statements"""
+        _, small = self._parse_queries(1)
+        _, large = self._parse_queries(100)
+        
+        assert large == small
+    
+    def test_bad_row_is_skipped(self):
+        """Test that a row the database rejects is skipped and the rest are saved"""
+        full_results = build_scaled_lighthouse_json(1)
+        full_results['lighthouseResult']['networkRequests'][1]['statusCode'] = 2 ** 40
+        analysis = create_analysis(full_results)
+        
+        created = parse_network_requests(analysis, full_results)
+        
+        assert len(created) == 3
+        assert all(request.pk for request in created)
+        assert NetworkRequest.objects.filter(performance_analysis=analysis).count() == 3
+
+
+@pytest.mark.django_db
+class TestParseContext:
+    """Test the shared Lighthouse parse context"""
+    
+    def test_string_results_are_decoded_once(self, monkeypatch):
+        """Test that a JSON string is decoded once for all parsers"""
+        calls = []
+        loads = base_normalizer.loads_json
+        
+        def counting_loads(raw):
+            calls.append(raw)
+            return loads(raw)
+        
+        monkeypatch.setattr(base_normalizer, 'loads_json', counting_loads)
+        monkeypatch.setattr(parse_context, 'loads_json', counting_loads)
+        analysis = create_analysis(json.dumps(build_scaled_lighthouse_json(3)))
+        
+        parse_detailed_data(analysis)
+        
+        assert len(calls) == 1
+        assert NetworkRequest.objects.filter(performance_analysis=analysis).count() == 12
+        assert ResourceBreakdown.objects.filter(performance_analysis=analysis).count() == 12
+        assert PerformanceTimelineEvent.objects.filter(performance_analysis=analysis).count() == 18
+    
+    def test_indexes(self):
+        """Test the network request and per-URL audit indexes"""
+        full_results = build_scaled_lighthouse_json(1)
+        context = LighthouseParseContext(json.dumps(full_results))
+        
+        assert context.network_requests == full_results['lighthouseResult']['networkRequests']
+        assert 'https://example.com/style.css' in context.requests_by_url
+        unused_css = context.audit_items_by_url(parse_context.UNUSED_CSS_AUDITS)
+        assert unused_css['https://example.com/style.css']['wastedBytes'] == 15000
+        assert context.audit_items_by_url(parse_context.UNUSED_CSS_AUDITS) is unused_css
+        assert LighthouseParseContext.from_data(context) is context
+    
+    def test_invalid_json(self):
+        """Test that an undecodable report yields an empty context"""
+        context = LighthouseParseContext('{not json')
+        
+        assert context.lighthouse_result is None
+        assert context.network_requests == []
+        assert context.trace_events == []
+
+
+@pytest.mark.django_db
+class TestBackgroundParsing:
+    """Test the parse_performance_details task and parse status tracking"""
+    
+    def test_save_returns_before_parsing(self, monkeypatch, django_capture_on_commit_callbacks):
+        """Test that saving queues the parse instead of running it inline"""
+        queued = []
+        monkeypatch.setattr(tasks.parse_performance_details, 'delay', queued.append)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            response = APIClient().post('/api/analysis/performance/', {
+                'url': TEST_URL,
+                'performance_score': 85,
+                'lcp': 2.5,
+                'fid': 50,
+                'cls': 0.1,
+                'full_results': build_scaled_lighthouse_json(1),
+            }, format='json')
+        
+        assert response.status_code == 201
+        assert response.data['parse_status'] == 'pending'
+        assert queued == [response.data['id']]
+        assert NetworkRequest.objects.filter(performance_analysis_id=response.data['id']).count() == 0
+    
+    def test_reparse_replaces_rows(self):
+        """Test that running the parse twice does not duplicate detail rows"""
+        analysis = create_analysis(build_scaled_lighthouse_json(3))
+        
+        tasks.run_parse(analysis.id)
+        result = tasks.run_parse(analysis.id)
+        
+        assert result['status'] == 'success'
+        assert NetworkRequest.objects.filter(performance_analysis=analysis).count() == 12
+        assert ResourceBreakdown.objects.filter(performance_analysis=analysis).count() == 12
+        assert PerformanceTimelineEvent.objects.filter(performance_analysis=analysis).count() == 18
+        analysis.refresh_from_db()
+        assert analysis.parse_status == 'completed'
+        assert analysis.parse_attempts == 2
+        assert analysis.parsed_at is not None
+    
+    def test_transient_errors_are_retried(self, monkeypatch):
+        """Test that a transient database error is retried and then marked failed"""
+        analysis = create_analysis(build_scaled_lighthouse_json(1))
+        
+        def fail(performance_analysis):
+            raise OperationalError('connection lost')
+        
+        monkeypatch.setattr(tasks, 'parse_detailed_data', fail)
+        with pytest.raises(OperationalError):
+            tasks.run_parse(analysis.id, final_attempt=False)
+        analysis.refresh_from_db()
+        assert analysis.parse_status == 'pending'
+        
+        tasks.parse_performance_details.apply(args=(analysis.id,))
+        analysis.refresh_from_db()
+        assert analysis.parse_status == 'failed'
+        assert analysis.parse_attempts == 1 + 1 + tasks.PARSE_MAX_RETRIES
+        assert 'connection lost' in analysis.parse_error
+        assert tasks.get_retry_countdown(0) < tasks.get_retry_countdown(2) <= tasks.PARSE_RETRY_BACKOFF_MAX_SECONDS
+    
+    def test_parse_status_endpoint(self):
+        """Test polling the parse status"""
+        analysis = create_analysis(build_scaled_lighthouse_json(1))
+        client = APIClient()
+        
+        pending = client.get(f'/api/analysis/performance/{analysis.id}/parse-status/')
+        tasks.run_parse(analysis.id)
+        completed = client.get(f'/api/analysis/performance/{analysis.id}/parse-status/')
+        
+        assert pending.data['parse_status'] == 'pending'
+        assert 'counts' not in pending.data
+        assert completed.data['parse_status'] == 'completed'
+        assert completed.data['counts']['network_requests'] == 4
+        assert client.get('/api/analysis/performance/0/parse-status/').status_code == 404
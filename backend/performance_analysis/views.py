@@ -10,7 +10,7 @@ from django.conf import settings
 import traceback
 from core.analysis_utils import get_user_from_request, get_audit_report
 from .models import PerformanceAnalysis
-from .parsers import parse_detailed_data
+from .tasks import schedule_parse
 
 
 @api_view(['POST'])
@@ -95,22 +95,10 @@ def save_performance_analysis(request):
             print(f"[SavePerformance] full_results type: {type(analysis.full_results)}")
             print(f"[SavePerformance] Has lighthouseResult: {'lighthouseResult' in analysis.full_results if isinstance(analysis.full_results, dict) else False}")
         
-        # Parse and save detailed data (network requests, resources, timeline events)
-        # 
-        # CURRENT: Synchronous parsing (works for single-site testing)
-        # TODO: When ready for production scaling, move to Celery background task:
-        #   from .tasks import parse_performance_details
-        #   parse_performance_details.delay(analysis.id)  # Non-blocking
-        #   return Response(...)  # Return immediately
-        #
-        try:
-            parse_detailed_data(analysis)
-            print(f"[SavePerformance] Detailed data parsing completed")
-        except Exception as parse_error:
-            print(f"[SavePerformance] Error parsing detailed data: {parse_error}")
-            import traceback
-            print(traceback.format_exc())
-            # Don't fail the request if parsing fails
+        # Detailed data (network requests, resources, timeline events) is parsed
+        # by the parse_performance_details Celery task once this request commits;
+        # poll /api/analysis/performance/<id>/parse-status/ for progress
+        schedule_parse(analysis)
         
         print(f"[SavePerformance] Returning success response")
         print("="*60)
@@ -118,6 +106,7 @@ def save_performance_analysis(request):
         return Response({
             'success': True,
             'id': analysis.id,
+            'parse_status': analysis.parse_status,
             'message': 'Performance analysis saved successfully'
         }, status=status.HTTP_201_CREATED)
         
@@ -132,6 +121,44 @@ def save_performance_analysis(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_parse_status(request, analysis_id):
+    """
+    Get the status of the background parse for a performance analysis.
+    
+    Example:
+    GET /api/analysis/performance/{id}/parse-status/
+    
+    parse_status is one of pending, processing, completed or failed; row
+    counts for the detail tables are included once parsing has finished.
+    """
+    analysis = PerformanceAnalysis.objects.filter(id=analysis_id).only(
+        'id', 'parse_status', 'parse_attempts', 'parse_error', 'parsed_at'
+    ).first()
+    if analysis is None:
+        return Response({
+            'success': False,
+            'error': f'Performance analysis with ID {analysis_id} not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    response_data = {
+        'success': True,
+        'id': analysis.id,
+        'parse_status': analysis.parse_status,
+        'parse_attempts': analysis.parse_attempts,
+        'parse_error': analysis.parse_error or None,
+        'parsed_at': analysis.parsed_at.isoformat() if analysis.parsed_at else None,
+    }
+    if analysis.parse_status in ('completed', 'failed'):
+        response_data['counts'] = {
+            'network_requests': analysis.network_requests.count(),
+            'resource_breakdowns': analysis.resource_breakdowns.count(),
+            'timeline_events': analysis.timeline_events.count(),
+        }
+    return Response(response_data)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_full_lighthouse_json(request, analysis_id):
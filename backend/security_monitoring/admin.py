@@ -3,7 +3,7 @@ Django Admin for Security Monitoring
 """
 
 from django.contrib import admin
-from .models import SecurityScan, SecurityFinding, SecurityScanSchedule, SecurityTool
+from .models import SecurityScan, SecurityFinding, SecurityScanSchedule, SecurityTool, ScanResultCache, ZapDaemonLease
 
 
 @admin.register(SecurityScan)
@@ -36,3 +36,18 @@ class SecurityToolAdmin(admin.ModelAdmin):
     list_filter = ['tool_type', 'status', 'is_active']
     search_fields = ['name', 'description']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(ScanResultCache)
+class ScanResultCacheAdmin(admin.ModelAdmin):
+    list_display = ['tool', 'target', 'status', 'completed_at', 'expires_at']
+    list_filter = ['tool', 'status']
+    search_fields = ['target']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(ZapDaemonLease)
+class ZapDaemonLeaseAdmin(admin.ModelAdmin):
+    list_display = ['api_url', 'holder', 'lease_expires_at', 'scans', 'updated_at']
+    search_fields = ['api_url', 'holder']
+    readonly_fields = ['updated_at']
@@ -9,6 +9,7 @@ from django.contrib.auth.models import User
 from security_monitoring.models import SecurityScan, SecurityFinding
 from security_monitoring.utils import execute_security_scan
 import logging
+import shutil
 
 logger = logging.getLogger(__name__)
 
@@ -188,13 +189,12 @@ class Command(BaseCommand):
         
         if 'port_scan' in implemented_scans:
             self.stdout.write('[CHECK] Checking Nmap availability...', ending=' ')
-            try:
-                import nmap
+            from security_monitoring.tools.nmap_scanner import get_nmap_path
+            if shutil.which(get_nmap_path()):
                 self.stdout.write(self.style.SUCCESS('[OK] Nmap is available'))
-            except ImportError:
-                self.stdout.write(self.style.WARNING('[WARN] python-nmap not installed'))
-                self.stdout.write(self.style.WARNING('   Install with: pip install python-nmap'))
-                self.stdout.write(self.style.WARNING('   Also ensure Nmap binary is installed'))
+            else:
+                self.stdout.write(self.style.WARNING('[WARN] Nmap binary not found'))
+                self.stdout.write(self.style.WARNING('   Install Nmap and ensure it is in PATH or set NMAP_PATH'))
         
         # Create and execute scans
         self.stdout.write(self.style.SUCCESS('\n[RUN] Creating and executing scans...\n'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_monitoring', '0006_securityaudit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityscan',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='securityscan',
+            index=models.Index(fields=['status', 'scan_type', 'lease_expires_at'], name='sec_scan_lease_idx'),
+        ),
+    ]
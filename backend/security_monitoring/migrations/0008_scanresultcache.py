@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_monitoring', '0007_securityscan_orchestration_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanResultCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('tool', models.CharField(max_length=50)),
+                ('target', models.CharField(max_length=500)),
+                ('config_hash', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('ready', 'Ready')], default='running', max_length=20)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Scan Result Cache',
+                'verbose_name_plural': 'Scan Result Cache',
+                'indexes': [models.Index(fields=['expires_at'], name='sec_cache_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_monitoring', '0008_scanresultcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityscan',
+            name='progress',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_monitoring', '0009_securityscan_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZapDaemonLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('api_url', models.CharField(max_length=255, unique=True)),
+                ('holder', models.CharField(blank=True, default='', max_length=255)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'ZAP Daemon Lease',
+                'verbose_name_plural': 'ZAP Daemon Leases',
+            },
+        ),
+    ]
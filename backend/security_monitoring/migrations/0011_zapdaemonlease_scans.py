@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_monitoring', '0010_zapdaemonlease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zapdaemonlease',
+            name='scans',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -3,6 +3,7 @@ Security Monitoring Models
 """
 
 from django.db import models
+from django.db.models import Count, Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -47,25 +48,21 @@ class SecurityAudit(models.Model):
         return f"Security Audit: {self.target_url} ({self.status})"
     
     def update_statistics(self):
-        """Update statistics from related scans and findings"""
-        scans = self.scans.all()
-        self.total_scans = scans.count()
-        self.completed_scans = scans.filter(status='completed').count()
-        self.failed_scans = scans.filter(status='failed').count()
-        
-        # Get all findings from scans in this audit
-        findings = SecurityFinding.objects.filter(scan__audit=self)
-        self.total_findings = findings.count()
-        self.critical_findings = findings.filter(severity='critical').count()
-        self.high_findings = findings.filter(severity='high').count()
-        self.medium_findings = findings.filter(severity='medium').count()
-        self.low_findings = findings.filter(severity='low').count()
-        self.informational_findings = findings.filter(severity='informational').count()
-        self.save(update_fields=[
-            'total_scans', 'completed_scans', 'failed_scans',
-            'total_findings', 'critical_findings', 'high_findings',
-            'medium_findings', 'low_findings', 'informational_findings'
-        ])
+        """Update statistics from related scans and findings with one conditional aggregate"""
+        totals = SecurityScan.objects.filter(audit=self).aggregate(
+            total_scans=Count('id', distinct=True),
+            completed_scans=Count('id', distinct=True, filter=Q(status='completed')),
+            failed_scans=Count('id', distinct=True, filter=Q(status='failed')),
+            total_findings=Count('findings'),
+            critical_findings=Count('findings', filter=Q(findings__severity='critical')),
+            high_findings=Count('findings', filter=Q(findings__severity='high')),
+            medium_findings=Count('findings', filter=Q(findings__severity='medium')),
+            low_findings=Count('findings', filter=Q(findings__severity='low')),
+            informational_findings=Count('findings', filter=Q(findings__severity='informational')),
+        )
+        for field, value in totals.items():
+            setattr(self, field, value)
+        self.save(update_fields=list(totals))
 
 
 class SecurityScan(models.Model):
@@ -98,6 +95,9 @@ class SecurityScan(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     tool_used = models.CharField(max_length=100, blank=True)  # e.g., 'OWASP ZAP', 'Nmap', 'amass'
     scan_config = models.JSONField(default=dict)  # Tool-specific configuration
+    attempts = models.IntegerField(default=0)  # Times claimed by the audit orchestrator
+    lease_expires_at = models.DateTimeField(null=True, blank=True)  # Claimed scans not finished by then are requeued
+    progress = models.JSONField(default=dict, blank=True)  # Live progress of streaming tools: items, percent, findings, partial
     audit = models.ForeignKey('SecurityAudit', on_delete=models.SET_NULL, null=True, blank=True, related_name='scans')
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='security_scans')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -111,6 +111,7 @@ class SecurityScan(models.Model):
             models.Index(fields=['status', '-created_at'], name='sec_scan_status_idx'),
             models.Index(fields=['scan_type', '-created_at'], name='sec_scan_type_idx'),
             models.Index(fields=['target_url', '-created_at'], name='sec_scan_target_idx'),
+            models.Index(fields=['status', 'scan_type', 'lease_expires_at'], name='sec_scan_lease_idx'),
         ]
     
     def __str__(self):
@@ -242,3 +243,56 @@ class SecurityTool(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.get_status_display()})"
+
+
+class ScanResultCache(models.Model):
+    """
+    Shared result of a tool run, keyed by (tool, normalized target, config hash).
+    A 'running' row marks an in-flight run that identical requests wait for.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('ready', 'Ready'),
+    ]
+    
+    cache_key = models.CharField(max_length=64, unique=True)  # sha256 of tool, target and config hash
+    tool = models.CharField(max_length=50)  # e.g., 'nmap', 'amass', 'headers'
+    target = models.CharField(max_length=500)  # Normalized URL or host
+    config_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    result = models.JSONField(null=True, blank=True)  # Tool result dict
+    lease_expires_at = models.DateTimeField(null=True, blank=True)  # While running: when the run is presumed lost
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)  # Result is served from cache until then
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Scan Result Cache'
+        verbose_name_plural = 'Scan Result Cache'
+        indexes = [
+            models.Index(fields=['expires_at'], name='sec_cache_expires_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tool}: {self.target} ({self.status})"
+
+
+class ZapDaemonLease(models.Model):
+    """
+    Cluster-wide lease of a shared ZAP daemon, held by one scan at a time.
+    The holder renews lease_expires_at while its scan runs, so the daemon is
+    freed when the holder's process dies instead of staying leased forever.
+    """
+    api_url = models.CharField(max_length=255, unique=True)  # Prefixed with the host for daemons of a host pool
+    holder = models.CharField(max_length=255, blank=True, default='')  # host:pid:token of the leasing scan; empty when free
+    lease_expires_at = models.DateTimeField(null=True, blank=True)  # The lease is void after this time
+    scans = models.PositiveIntegerField(default=0)  # Scans served since the daemon was last restarted
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'ZAP Daemon Lease'
+        verbose_name_plural = 'ZAP Daemon Leases'
+    
+    def __str__(self):
+        return f"{self.api_url} ({self.holder or 'free'})"
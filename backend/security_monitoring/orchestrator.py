@@ -0,0 +1,266 @@
+"""
+Dependency-aware scheduling of the scans in a security audit.
+
+Scans of an audit are no longer run one after another. Each time the audit
+advances, every pending scan whose dependencies are done is claimed and
+dispatched (see security_monitoring.tasks), so quick checks such as
+headers_check and ssl_check do not wait behind nmap or ZAP runs.
+
+- SCAN_DEPENDENCIES: scans that must finish (completed or failed) first
+- SCAN_TOOL_GROUPS / SECURITY_SCAN_TOOL_LIMITS: at most N running scans per
+  external tool across all workers, enforced when a scan is claimed
+- Claimed scans hold a lease; scans whose worker went away are returned to
+  pending (or failed after SECURITY_SCAN_MAX_ATTEMPTS) by the resume sweep
+- Standalone scans (no audit) are queued by setting scheduled_at and go
+  through the same claim, so the tool limits cover them too (see due_scans)
+"""
+
+import logging
+import zlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import SecurityAudit, SecurityScan
+
+logger = logging.getLogger(__name__)
+
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+# Scan type -> scan types of the same audit that must finish first
+SCAN_DEPENDENCIES = {
+    'vulnerability_scan': ['port_scan'],  # Targets the services port_scan found
+    'sql_injection': ['dast'],            # Reuses the pages and parameters ZAP crawled
+    'cms_scan': ['headers_check'],        # Platform fingerprint from response headers
+}
+
+# Scan type -> external tool whose concurrency is limited cluster-wide
+SCAN_TOOL_GROUPS = {
+    'dast': 'zap',
+    'port_scan': 'nmap',
+    'dns_discovery': 'amass',
+}
+
+DEFAULT_TOOL_LIMITS = {
+    'zap': 2,
+    'nmap': 4,
+    'amass': 2,
+}
+
+# How long a claimed scan may run before the resume sweep takes it back
+DEFAULT_LEASE_SECONDS = 15 * 60
+DEFAULT_TOOL_LEASE_SECONDS = {
+    'zap': 2 * 60 * 60,
+    'nmap': 60 * 60,
+    'amass': 30 * 60,
+}
+
+# Seconds from a scan task's soft time limit (the scan fails cleanly) to its
+# hard limit (the worker process is killed), and from the hard limit to the
+# end of the lease
+TIME_LIMIT_GRACE_SECONDS = 60
+
+DEFAULT_MAX_ATTEMPTS = 2
+
+
+def get_tool_group(scan_type):
+    """External tool group of a scan type, or None for unlimited built-in checks."""
+    return SCAN_TOOL_GROUPS.get(scan_type)
+
+
+def get_group_scan_types(group):
+    return [scan_type for scan_type, tool in SCAN_TOOL_GROUPS.items() if tool == group]
+
+
+def get_tool_limit(group):
+    limits = getattr(settings, 'SECURITY_SCAN_TOOL_LIMITS', DEFAULT_TOOL_LIMITS)
+    return limits.get(group, DEFAULT_TOOL_LIMITS.get(group))
+
+
+def get_lease_seconds(scan_type):
+    group = get_tool_group(scan_type)
+    leases = getattr(settings, 'SECURITY_SCAN_LEASE_SECONDS', DEFAULT_TOOL_LEASE_SECONDS)
+    return leases.get(group, DEFAULT_LEASE_SECONDS) if group else DEFAULT_LEASE_SECONDS
+
+
+def get_time_limits(scan_type):
+    """
+    Celery (soft_time_limit, time_limit) of the task running a scan.
+
+    Derived from the scan's lease instead of the global task limits, so a
+    ZAP or nmap run is not killed half-way, and a killed task is taken back
+    by the resume sweep shortly after instead of holding its tool slot.
+    """
+    time_limit = max(get_lease_seconds(scan_type) - TIME_LIMIT_GRACE_SECONDS, 3 * TIME_LIMIT_GRACE_SECONDS)
+    return time_limit - TIME_LIMIT_GRACE_SECONDS, time_limit
+
+
+def get_cache_wait_seconds(scan_type):
+    """Longest a scan waits for an identical in-flight tool run, ending before its soft time limit."""
+    soft_time_limit, _ = get_time_limits(scan_type)
+    return soft_time_limit - TIME_LIMIT_GRACE_SECONDS
+
+
+def _lock_tool_group(group):
+    """
+    Serialize claims for one tool group until the end of the transaction,
+    so two workers cannot both see a free slot.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [zlib.crc32(f'security_scan:{group}'.encode())])
+
+
+def get_ready_scans(scans):
+    """
+    Pending scans whose dependencies within the audit have all finished.
+
+    Dependencies on scan types that are not part of the audit are ignored.
+
+    Args:
+        scans: All SecurityScan objects of one audit
+
+    Returns:
+        List of ready SecurityScan objects, in id order
+    """
+    unfinished_types = {scan.scan_type for scan in scans if scan.status not in TERMINAL_STATUSES}
+    return [
+        scan for scan in sorted(scans, key=lambda scan: scan.id)
+        if scan.status == 'pending'
+        and not unfinished_types.intersection(SCAN_DEPENDENCIES.get(scan.scan_type, []))
+    ]
+
+
+def claim_scan(scan, now=None):
+    """
+    Mark a pending scan as running if its tool has a free slot.
+
+    Args:
+        scan: SecurityScan to claim
+
+    Returns:
+        bool: True if the scan was claimed and should be dispatched
+    """
+    now = now or timezone.now()
+    group = get_tool_group(scan.scan_type)
+
+    with transaction.atomic():
+        if group:
+            _lock_tool_group(group)
+            running = SecurityScan.objects.filter(
+                status='running',
+                scan_type__in=get_group_scan_types(group),
+                lease_expires_at__gt=now,
+            ).count()
+            if running >= get_tool_limit(group):
+                logger.info(f"[SecurityAudit] Scan {scan.id} waiting for a free {group} slot ({running} running)")
+                return False
+
+        claimed = SecurityScan.objects.filter(id=scan.id, status='pending').update(
+            status='running',
+            attempts=F('attempts') + 1,
+            lease_expires_at=now + timedelta(seconds=get_lease_seconds(scan.scan_type)),
+        )
+    if claimed:
+        scan.status = 'running'
+    return bool(claimed)
+
+
+def claim_ready_scans(audit, scan_finished=False, now=None):
+    """
+    Start an audit if needed and claim every scan that can run now.
+
+    Statistics are recomputed once per call when scan states changed: a
+    scan finished (scan_finished) or new scans were claimed.
+
+    Returns:
+        tuple(claimed_scan_ids, finished) - finished is True when all scans
+        of the audit are done and the audit was marked completed
+    """
+    scans = list(audit.scans.only('id', 'scan_type', 'status'))
+
+    if audit.status == 'pending':
+        audit.status = 'running'
+        audit.started_at = timezone.now()
+        audit.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    if all(scan.status in TERMINAL_STATUSES for scan in scans):
+        complete_audit(audit)
+        return [], True
+
+    claimed = [scan.id for scan in get_ready_scans(scans) if claim_scan(scan, now=now)]
+    if claimed or scan_finished:
+        audit.update_statistics()
+    return claimed, False
+
+
+def complete_audit(audit):
+    """Mark an audit completed and record its final statistics."""
+    updated = SecurityAudit.objects.filter(id=audit.id).exclude(status='completed').update(
+        status='completed',
+        completed_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        audit.update_statistics()
+        logger.info(f"[SecurityAudit] Completed audit {audit.id}")
+
+
+def release_scan(scan_id):
+    """Drop the lease of a scan whose run has finished."""
+    SecurityScan.objects.filter(id=scan_id).update(lease_expires_at=None)
+
+
+def expire_stale_scans(now=None):
+    """
+    Return running scans with an expired lease to pending, or fail them once
+    they have used up SECURITY_SCAN_MAX_ATTEMPTS.
+
+    Returns:
+        dict with requeued and failed counts
+    """
+    now = now or timezone.now()
+    max_attempts = getattr(settings, 'SECURITY_SCAN_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    stale = SecurityScan.objects.filter(status='running', lease_expires_at__lte=now)
+
+    failed = stale.filter(attempts__gte=max_attempts).update(status='failed', lease_expires_at=None, completed_at=now)
+    requeued = stale.update(status='pending', lease_expires_at=None)
+    if failed or requeued:
+        logger.warning(f"[SecurityAudit] Expired scan leases: {requeued} requeued, {failed} failed")
+    return {'requeued': requeued, 'failed': failed}
+
+
+def active_audit_ids():
+    """Audits that still have scans to schedule."""
+    return SecurityAudit.objects.filter(status__in=['pending', 'running']).values_list('id', flat=True)
+
+
+def audits_waiting_for_tool(group):
+    """Active audits with a pending scan of the given tool group."""
+    return (
+        SecurityScan.objects.filter(
+            Q(audit__status__in=['pending', 'running']),
+            status='pending',
+            scan_type__in=get_group_scan_types(group),
+        )
+        .order_by('audit_id')
+        .values_list('audit_id', flat=True)
+        .distinct()
+    )
+
+
+def due_scans(scan_types=None, now=None):
+    """
+    Standalone pending scans whose scheduled_at has passed, oldest first.
+
+    Args:
+        scan_types: Only these scan types (default: all)
+    """
+    now = now or timezone.now()
+    scans = SecurityScan.objects.filter(audit__isnull=True, status='pending', scheduled_at__lte=now)
+    if scan_types is not None:
+        scans = scans.filter(scan_type__in=scan_types)
+    return scans.only('id', 'scan_type', 'status').order_by('scheduled_at', 'id')
@@ -0,0 +1,241 @@
+"""
+Shared result cache for security tool runs.
+
+Tool results are stored in ScanResultCache, keyed by (tool, normalized
+target, config hash), so a host scanned minutes ago by another audit or user
+is not scanned again:
+
+- Successful results are served for the tool's TTL (SECURITY_SCAN_CACHE_TTLS);
+  a TTL of 0 disables caching for that tool
+- force_fresh skips cached results but still joins an in-flight run
+- Single-flight: the first request for a key marks it running and runs the
+  tool; identical requests on any worker wait for that run's result instead
+  of starting their own subprocess. A run whose worker died is taken over
+  once its lease expires; a caller that cannot wait that long passes
+  max_wait and gets ScanCacheWaitTimeout instead.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import zlib
+from datetime import timedelta
+from urllib.parse import urlparse, urlunparse
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import ScanResultCache
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a successful result is reused, per tool
+DEFAULT_CACHE_TTLS = {
+    'headers': 15 * 60,
+    'ssl': 60 * 60,
+    'dns': 60 * 60,
+    'nmap': 6 * 60 * 60,
+    'amass': 24 * 60 * 60,
+    'zap': 0,  # Application state changes between runs; only coalesce concurrent runs
+}
+
+# Seconds before an in-flight run is presumed lost and may be taken over
+DEFAULT_RUN_LEASE_SECONDS = {
+    'headers': 2 * 60,
+    'ssl': 2 * 60,
+    'dns': 5 * 60,
+    'nmap': 60 * 60,
+    'amass': 30 * 60,
+    'zap': 2 * 60 * 60,
+}
+
+DEFAULT_POLL_SECONDS = 2
+
+# Tools that scan a URL; the others scan the host
+URL_TOOLS = {'headers', 'zap'}
+
+# scan_config keys that control caching, not the scan itself
+CACHE_CONTROL_KEYS = {'force_fresh'}
+
+# Expired rows are kept this long before pruning
+PRUNE_AFTER = timedelta(hours=1)
+
+
+class ScanCacheWaitTimeout(Exception):
+    """An identical in-flight run did not finish within max_wait."""
+
+
+def get_cache_ttl(tool):
+    ttls = getattr(settings, 'SECURITY_SCAN_CACHE_TTLS', DEFAULT_CACHE_TTLS)
+    return ttls.get(tool, DEFAULT_CACHE_TTLS.get(tool, 0))
+
+
+def normalize_target(tool, target):
+    """
+    Canonical form of a scan target for cache keys.
+
+    URL tools keep scheme, host, port, path and query (fragment dropped);
+    host tools use the lowercased hostname, plus an explicit port for ssl.
+    """
+    parsed = urlparse(target if '://' in target else f'https://{target}')
+    host = (parsed.hostname or target).rstrip('.').lower()
+    port = parsed.port
+    if tool in URL_TOOLS:
+        netloc = f'{host}:{port}' if port else host
+        return urlunparse((parsed.scheme.lower(), netloc, parsed.path or '/', '', parsed.query, ''))
+    if tool == 'ssl' and port:
+        return f'{host}:{port}'
+    return host
+
+
+def get_config_hash(config):
+    """sha256 of a tool configuration, independent of key order."""
+    config = {key: value for key, value in (config or {}).items() if key not in CACHE_CONTROL_KEYS}
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_cache_key(tool, target, config_hash):
+    return hashlib.sha256(f'{tool}\n{target}\n{config_hash}'.encode()).hexdigest()
+
+
+def _lock_cache_key(cache_key):
+    """Serialize claims of one cache key until the end of the transaction."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [zlib.crc32(f'scan_cache:{cache_key}'.encode())])
+
+
+def _claim(cache_key, tool, target, config_hash, force_fresh):
+    """
+    Decide how to serve a request.
+
+    Returns:
+        tuple(action, entry) - action is 'hit' (entry holds a fresh result),
+        'wait' (another run is in flight) or 'run' (this caller runs the tool)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        _lock_cache_key(cache_key)
+        entry = ScanResultCache.objects.select_for_update().filter(cache_key=cache_key).first()
+        if entry is not None:
+            if entry.status == 'running' and entry.lease_expires_at and entry.lease_expires_at > now:
+                return 'wait', entry
+            if not force_fresh and entry.status == 'ready' and entry.expires_at and entry.expires_at > now:
+                return 'hit', entry
+
+        lease_seconds = getattr(settings, 'SECURITY_SCAN_CACHE_LEASE_SECONDS', DEFAULT_RUN_LEASE_SECONDS).get(
+            tool, DEFAULT_RUN_LEASE_SECONDS.get(tool, 600)
+        )
+        entry, _ = ScanResultCache.objects.update_or_create(
+            cache_key=cache_key,
+            defaults={
+                'tool': tool,
+                'target': target[:500],
+                'config_hash': config_hash,
+                'status': 'running',
+                'lease_expires_at': now + timedelta(seconds=lease_seconds),
+            }
+        )
+        return 'run', entry
+
+
+def _store(entry, result):
+    """Publish a finished run to waiters, and to later requests if it is cacheable."""
+    now = timezone.now()
+    ttl = get_cache_ttl(entry.tool)
+    cacheable = ttl > 0 and bool(result.get('success', True))
+    ScanResultCache.objects.filter(id=entry.id).update(
+        status='ready',
+        result=result,
+        lease_expires_at=None,
+        completed_at=now,
+        expires_at=now + timedelta(seconds=ttl) if cacheable else now,
+        updated_at=now,
+    )
+
+
+def _abandon(entry):
+    """Release a run that raised, so a waiter can take over."""
+    ScanResultCache.objects.filter(id=entry.id, status='running').update(
+        status='ready',
+        lease_expires_at=None,
+        expires_at=timezone.now(),
+    )
+
+
+def run_cached(tool, target, config, runner, force_fresh=False, max_wait=None):
+    """
+    Return the result of ``runner()`` for (tool, target, config), reusing a
+    cached or in-flight run when possible.
+
+    Args:
+        tool: Tool name (key of SECURITY_SCAN_CACHE_TTLS)
+        target: URL or host being scanned
+        config: Dict of options that change the tool's result
+        runner: Callable with no arguments that runs the tool and returns its result dict
+        force_fresh: Ignore cached results (an in-flight run is still joined)
+        max_wait: Seconds to wait for an in-flight run before raising
+            ScanCacheWaitTimeout (default: until its lease expires)
+
+    Returns:
+        The tool's result dict
+    """
+    target = normalize_target(tool, target)
+    config_hash = get_config_hash(config)
+    cache_key = get_cache_key(tool, target, config_hash)
+    poll_seconds = getattr(settings, 'SECURITY_SCAN_CACHE_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+    waiting_since = None
+    wait_deadline = None
+
+    while True:
+        action, entry = _claim(cache_key, tool, target, config_hash, force_fresh)
+        if action == 'hit':
+            logger.info(f"[ScanCache] {tool} result for {target} served from cache")
+            return entry.result
+        if action == 'run':
+            break
+
+        # Another worker is running the same scan: wait for its result
+        if waiting_since is None:
+            waiting_since = timezone.now()
+            wait_deadline = time.monotonic() + max_wait if max_wait is not None else None
+        logger.info(f"[ScanCache] Waiting for in-flight {tool} run on {target}")
+        while True:
+            if wait_deadline is not None and time.monotonic() >= wait_deadline:
+                raise ScanCacheWaitTimeout(f'In-flight {tool} run on {target} did not finish within {max_wait}s')
+            time.sleep(poll_seconds)
+            entry = ScanResultCache.objects.filter(id=entry.id).only(
+                'status', 'result', 'lease_expires_at', 'completed_at'
+            ).first()
+            if entry is None or entry.status != 'running':
+                break
+            if entry.lease_expires_at and entry.lease_expires_at <= timezone.now():
+                break
+        if entry is not None and entry.status == 'ready' and entry.result is not None \
+                and entry.completed_at and entry.completed_at >= waiting_since:
+            return entry.result
+        # The run was lost or failed without a result; try to run it here
+
+    try:
+        result = runner()
+    except Exception:
+        _abandon(entry)
+        raise
+    _store(entry, result)
+    return result
+
+
+def prune_scan_result_cache(now=None):
+    """
+    Delete cached results that expired, and runs whose lease expired, more
+    than PRUNE_AFTER ago.
+
+    Returns:
+        Number of deleted rows
+    """
+    cutoff = (now or timezone.now()) - PRUNE_AFTER
+    deleted, _ = ScanResultCache.objects.filter(status='ready', expires_at__lt=cutoff).delete()
+    lost, _ = ScanResultCache.objects.filter(status='running', lease_expires_at__lt=cutoff).delete()
+    return deleted + lost
@@ -5,6 +5,7 @@ Serializers for Security Monitoring
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import SecurityAudit, SecurityScan, SecurityFinding, SecurityScanSchedule, SecurityTool
+from .tools.dns_discovery import WORDLISTS
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -55,9 +56,9 @@ class SecurityScanSerializer(serializers.ModelSerializer):
             'id', 'scan_type', 'target_url', 'status', 'scheduled_at',
             'started_at', 'completed_at', 'tool_used', 'scan_config',
             'created_by', 'created_by_name', 'created_at', 'updated_at',
-            'findings_count'
+            'findings_count', 'progress'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'findings_count']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'findings_count', 'progress']
     
     def get_findings_count(self, obj):
         return obj.findings.count()
@@ -87,6 +88,16 @@ class SecurityScanCreateSerializer(serializers.ModelSerializer):
             return {}
         if not isinstance(value, dict):
             return {}
+        wordlist = value.get('wordlist')
+        if wordlist:
+            # Only registered wordlist names or inline labels; never a server-side path
+            if isinstance(wordlist, str):
+                if wordlist not in WORDLISTS:
+                    raise serializers.ValidationError(
+                        f"Unknown wordlist '{wordlist}'. Available: {', '.join(sorted(WORDLISTS))}"
+                    )
+            elif not (isinstance(wordlist, list) and all(isinstance(label, str) for label in wordlist)):
+                raise serializers.ValidationError('wordlist must be a wordlist name or a list of subdomain labels')
         return value
     
     def validate_tool_used(self, value):
@@ -186,10 +197,15 @@ class SecurityAuditCreateSerializer(serializers.ModelSerializer):
         required=False,
         help_text='List of scan types to run. Use ["all"] to run all available scans.'
     )
+    force_fresh = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text='Run every tool again instead of reusing recent cached results.'
+    )
     
     class Meta:
         model = SecurityAudit
-        fields = ['target_url', 'scan_types']
+        fields = ['target_url', 'scan_types', 'force_fresh']
     
     def validate_scan_types(self, value):
         """Validate scan types"""
@@ -0,0 +1,226 @@
+"""
+Background tasks for security audits.
+
+An audit is advanced (advance_audit) when it is created, whenever one of its
+scans finishes, and by the resume_security_audits sweep. Each advance claims
+the scans that are ready and have a free tool slot and runs each one as a
+run_security_audit_scan task, so independent scans run concurrently on the
+workers. Audit progress lives in the database, so a restarted worker or beat
+picks up where the previous one stopped.
+
+Standalone scans started from the API are queued with schedule_scan and
+claimed the same way, so they share the per-tool concurrency limits.
+"""
+
+import logging
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import SecurityAudit, SecurityScan
+from .orchestrator import (
+    active_audit_ids,
+    audits_waiting_for_tool,
+    claim_ready_scans,
+    claim_scan,
+    due_scans,
+    expire_stale_scans,
+    get_group_scan_types,
+    get_time_limits,
+    get_tool_group,
+    release_scan,
+)
+from .scan_cache import prune_scan_result_cache
+from .tools.zap_pool import get_zap_pool
+from .utils import execute_security_scan
+
+logger = logging.getLogger(__name__)
+
+# Try to import Celery, fallback to no-op if not available
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    # Celery not installed - create a dummy decorator
+    CELERY_AVAILABLE = False
+    def shared_task(*args, **kwargs):
+        def decorator(func):
+            # Return function unchanged if Celery not available
+            return func
+        return decorator
+    logger.warning('Celery not available. Security audit scans will run in background threads.')
+
+if CELERY_AVAILABLE:
+    from celery.signals import worker_process_init
+
+    @worker_process_init.connect
+    def warm_zap_pool(**kwargs):
+        """Join (or start) the host's ZAP daemon pool with each worker process, off the scan path"""
+        if getattr(settings, 'ZAP_POOL_WARM_ON_START', False):
+            threading.Thread(target=get_zap_pool().warm, daemon=True).start()
+
+
+def advance_audit(audit_id, scan_finished=False):
+    """
+    Claim and dispatch every scan of an audit that can run now.
+    
+    Args:
+        audit_id: ID of SecurityAudit to advance
+        scan_finished: True when called because one of its scans finished
+
+    Returns:
+        dict with the number of scans dispatched and whether the audit finished
+    """
+    audit = SecurityAudit.objects.filter(id=audit_id).first()
+    if audit is None:
+        logger.error(f"[SecurityAudit] Audit {audit_id} not found")
+        return {'status': 'not_found', 'audit_id': audit_id}
+    if audit.status in ('completed', 'failed'):
+        return {'status': audit.status, 'audit_id': audit_id, 'dispatched': 0}
+
+    claimed, finished = claim_ready_scans(audit, scan_finished=scan_finished)
+    for scan_id in claimed:
+        _dispatch_scan(scan_id)
+    if claimed:
+        logger.info(f"[SecurityAudit] Audit {audit_id}: dispatched scans {claimed}")
+    return {
+        'status': 'completed' if finished else 'running',
+        'audit_id': audit_id,
+        'dispatched': len(claimed),
+    }
+
+
+def start_due_scans(scan_types=None):
+    """
+    Claim and dispatch queued standalone scans, oldest first, until their
+    tools run out of free slots.
+
+    Returns:
+        int: Number of scans dispatched
+    """
+    started = 0
+    full_groups = set()
+    for scan in due_scans(scan_types):
+        group = get_tool_group(scan.scan_type)
+        if group in full_groups:
+            continue
+        if claim_scan(scan):
+            _dispatch_scan(scan.id)
+            started += 1
+        elif group:
+            full_groups.add(group)
+    return started
+
+
+def run_audit_scan(scan_id):
+    """
+    Run one claimed scan, then advance its audit and start any audit or
+    standalone scan waiting for the same tool.
+    """
+    scan = SecurityScan.objects.filter(id=scan_id).only('id', 'status', 'scan_type', 'audit_id').first()
+    if scan is None:
+        logger.error(f"[SecurityAudit] Scan {scan_id} not found")
+        return {'status': 'not_found', 'scan_id': scan_id}
+
+    # A redelivered task for a scan that already finished only advances the audit
+    if scan.status == 'running':
+        try:
+            execute_security_scan(scan_id)
+        except Exception as e:
+            # execute_security_scan has already marked the scan failed
+            logger.error(f"[SecurityAudit] Error executing scan {scan_id}: {str(e)}")
+        release_scan(scan_id)
+
+    if scan.audit_id:
+        advance_audit(scan.audit_id, scan_finished=True)
+
+    # Wake audits whose scans were queued behind this tool's concurrency limit
+    group = get_tool_group(scan.scan_type)
+    if group:
+        for audit_id in audits_waiting_for_tool(group):
+            if audit_id != scan.audit_id:
+                advance_audit(audit_id)
+        start_due_scans(get_group_scan_types(group))
+
+    status = SecurityScan.objects.filter(id=scan_id).values_list('status', flat=True).first()
+    return {'status': status, 'scan_id': scan_id}
+
+
+@shared_task(name='security_monitoring.tasks.run_security_audit_scan', acks_late=True)
+def run_security_audit_scan(scan_id):
+    """
+    Run one claimed scan (of an audit, or a queued standalone scan).
+
+    Args:
+        scan_id: ID of SecurityScan to run
+    """
+    return run_audit_scan(scan_id)
+
+
+@shared_task(name='security_monitoring.tasks.resume_security_audits')
+def resume_security_audits():
+    """
+    Periodic task: take back scans whose worker went away, advance every
+    audit that still has scans to run, start queued standalone scans that
+    have a free tool slot and prune expired cached tool results.
+    """
+    expired = expire_stale_scans()
+    audit_ids = list(active_audit_ids())
+    for audit_id in audit_ids:
+        advance_audit(audit_id)
+    started = start_due_scans()
+    pruned = prune_scan_result_cache()
+    return {
+        'status': 'success',
+        'audits_advanced': len(audit_ids),
+        'scans_started': started,
+        'cache_pruned': pruned,
+        **expired,
+    }
+
+
+def _dispatch_scan(scan_id):
+    if CELERY_AVAILABLE:
+        # Per-tool limits: the global task limits would kill long ZAP and nmap runs
+        scan_type = SecurityScan.objects.filter(id=scan_id).values_list('scan_type', flat=True).first()
+        soft_time_limit, time_limit = get_time_limits(scan_type)
+        try:
+            run_security_audit_scan.apply_async(
+                args=[scan_id], soft_time_limit=soft_time_limit, time_limit=time_limit
+            )
+            return
+        except Exception as e:
+            logger.warning(f"[SecurityAudit] Could not queue scan {scan_id}, running it in a thread: {str(e)}")
+    threading.Thread(target=run_audit_scan, args=(scan_id,), daemon=True).start()
+
+
+def schedule_audit(audit):
+    """
+    Start orchestrating an audit once the current transaction commits.
+
+    Scans are dispatched to Celery, or to background threads when Celery is
+    not installed or the broker cannot be reached; the resume sweep covers
+    scans whose process exits.
+    """
+    audit_id = audit.id
+    transaction.on_commit(lambda: advance_audit(audit_id))
+
+
+def schedule_scan(scan):
+    """
+    Queue a standalone scan to run now and start it once the current
+    transaction commits if its tool has a free slot.
+
+    A scan that has to wait stays pending until a scan of the same tool
+    finishes or the resume sweep finds a free slot. Retried scans start
+    over with a fresh attempt count.
+    """
+    now = timezone.now()
+    SecurityScan.objects.filter(id=scan.id).update(
+        status='pending', scheduled_at=now, attempts=0, lease_expires_at=None
+    )
+    scan.status = 'pending'
+    scan.scheduled_at = now
+    group = get_tool_group(scan.scan_type)
+    scan_types = get_group_scan_types(group) if group else [scan.scan_type]
+    transaction.on_commit(lambda: start_due_scans(scan_types))
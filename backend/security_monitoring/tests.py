@@ -1,3 +1,527 @@
-from django.test import TestCase
+"""
+Tests for security_monitoring app
+"""
+import asyncio
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from security_monitoring import scan_cache, tasks
+from security_monitoring.utils import execute_security_scan
+from security_monitoring.models import SecurityAudit, SecurityScan, SecurityFinding, ScanResultCache, ZapDaemonLease
+from security_monitoring.serializers import SecurityScanCreateSerializer
+from security_monitoring.orchestrator import claim_scan, expire_stale_scans, get_lease_seconds, get_ready_scans, get_time_limits
+from security_monitoring.tools import dns_discovery, nmap_scanner, zap_pool
+from security_monitoring.tools.streaming import ProcessTimeout
+from security_monitoring.tools.zap_pool import ZapPool, ZapPoolTimeout, ZapPoolUnavailable
 
-# Create your tests here.
+
+def create_audit(scan_types, **scan_fields):
+    audit = SecurityAudit.objects.create(target_url='https://example.com', total_scans=len(scan_types))
+    SecurityScan.objects.bulk_create([
+        SecurityScan(audit=audit, scan_type=scan_type, target_url='https://example.com', **scan_fields)
+        for scan_type in scan_types
+    ])
+    return audit
+
+
+@pytest.mark.django_db
+class TestAuditStatistics:
+    """Test audit statistics aggregation"""
+
+    def test_update_statistics_single_query(self):
+        """Test that statistics are computed with one aggregate plus the save"""
+        audit = create_audit(['headers_check', 'ssl_check', 'port_scan'])
+        scans = list(audit.scans.order_by('id'))
+        SecurityScan.objects.filter(id=scans[0].id).update(status='completed')
+        SecurityScan.objects.filter(id=scans[1].id).update(status='failed')
+        for severity in ['critical', 'high', 'high', 'low']:
+            SecurityFinding.objects.create(scan=scans[0], title=severity, description='', severity=severity)
+
+        with CaptureQueriesContext(connection) as queries:
+            audit.update_statistics()
+
+        assert len(queries) == 2
+        audit.refresh_from_db()
+        assert (audit.total_scans, audit.completed_scans, audit.failed_scans) == (3, 1, 1)
+        assert (audit.total_findings, audit.critical_findings, audit.high_findings, audit.low_findings) == (4, 1, 2, 1)
+
+
+@pytest.mark.django_db
+class TestAuditOrchestration:
+    """Test dependency-aware scan scheduling"""
+
+    def test_ready_scans_wait_for_dependencies(self):
+        """Test that a scan only becomes ready once its dependencies finished"""
+        audit = create_audit(['port_scan', 'vulnerability_scan', 'headers_check'])
+        ready = get_ready_scans(list(audit.scans.all()))
+        assert {scan.scan_type for scan in ready} == {'port_scan', 'headers_check'}
+
+        audit.scans.filter(scan_type='port_scan').update(status='failed')
+        ready = get_ready_scans(list(audit.scans.all()))
+        assert {scan.scan_type for scan in ready} == {'vulnerability_scan', 'headers_check'}
+
+    def test_claim_respects_tool_limit(self, settings):
+        """Test that a tool's running scans are capped across audits"""
+        settings.SECURITY_SCAN_TOOL_LIMITS = {'zap': 1, 'nmap': 4, 'amass': 2}
+        first = create_audit(['dast']).scans.get()
+        second = create_audit(['dast']).scans.get()
+
+        assert claim_scan(first) is True
+        assert claim_scan(second) is False
+
+        first.refresh_from_db()
+        assert first.status == 'running'
+        assert first.attempts == 1
+        assert first.lease_expires_at is not None
+
+    def test_expired_leases_requeued_or_failed(self, settings):
+        """Test that scans of a lost worker are retried, then failed"""
+        settings.SECURITY_SCAN_MAX_ATTEMPTS = 2
+        expired = timezone.now() - timedelta(minutes=1)
+        audit = create_audit(['port_scan', 'dast'], status='running', lease_expires_at=expired)
+        audit.scans.filter(scan_type='dast').update(attempts=2)
+        audit.scans.filter(scan_type='port_scan').update(attempts=1)
+
+        assert expire_stale_scans() == {'requeued': 1, 'failed': 1}
+        assert audit.scans.get(scan_type='port_scan').status == 'pending'
+        assert audit.scans.get(scan_type='dast').status == 'failed'
+
+    def test_time_limits_follow_tool_lease(self, settings):
+        """Test that scan tasks outlive the global task limits and end before their lease"""
+        for scan_type in ['dast', 'port_scan', 'headers_check']:
+            soft_time_limit, time_limit = get_time_limits(scan_type)
+            assert soft_time_limit < time_limit < get_lease_seconds(scan_type)
+        assert get_time_limits('dast')[1] > settings.CELERY_TASK_TIME_LIMIT
+
+    def test_advance_audit_runs_to_completion(self, monkeypatch):
+        """Test that finishing scans dispatches their dependents and completes the audit"""
+        dispatched = []
+        monkeypatch.setattr(tasks, '_dispatch_scan', dispatched.append)
+        audit = create_audit(['port_scan', 'vulnerability_scan'])
+        port_scan = audit.scans.get(scan_type='port_scan')
+        vulnerability_scan = audit.scans.get(scan_type='vulnerability_scan')
+
+        tasks.advance_audit(audit.id)
+        assert dispatched == [port_scan.id]
+
+        SecurityScan.objects.filter(id=port_scan.id).update(status='completed')
+        tasks.advance_audit(audit.id, scan_finished=True)
+        assert dispatched == [port_scan.id, vulnerability_scan.id]
+
+        SecurityScan.objects.filter(id=vulnerability_scan.id).update(status='completed')
+        result = tasks.advance_audit(audit.id, scan_finished=True)
+
+        audit.refresh_from_db()
+        assert result['status'] == 'completed'
+        assert audit.status == 'completed'
+        assert audit.completed_scans == 2
+
+    def test_standalone_scans_share_tool_limits(self, monkeypatch, settings, django_capture_on_commit_callbacks):
+        """Test that scans started outside an audit wait for a free tool slot"""
+        settings.SECURITY_SCAN_TOOL_LIMITS = {'zap': 1, 'nmap': 4, 'amass': 2}
+        dispatched = []
+        monkeypatch.setattr(tasks, '_dispatch_scan', dispatched.append)
+        audit_scan = create_audit(['dast']).scans.get()
+        assert claim_scan(audit_scan) is True
+
+        scan = SecurityScan.objects.create(scan_type='dast', target_url='https://example.com', status='failed', attempts=2)
+        with django_capture_on_commit_callbacks(execute=True):
+            tasks.schedule_scan(scan)
+        scan.refresh_from_db()
+        assert (scan.status, scan.attempts) == ('pending', 0)
+        assert dispatched == []
+
+        SecurityScan.objects.filter(id=audit_scan.id).update(status='completed', lease_expires_at=None)
+        assert tasks.resume_security_audits()['scans_started'] == 1
+        scan.refresh_from_db()
+        assert dispatched == [scan.id]
+        assert (scan.status, scan.attempts) == ('running', 1)
+
+
+
+@pytest.mark.django_db
+class TestScanResultCache:
+    """Test the shared tool result cache"""
+
+    def make_runner(self, result=None):
+        calls = []
+
+        def runner():
+            calls.append(1)
+            return result or {'success': True, 'findings': [{'title': 'Open port 22'}]}
+        return runner, calls
+
+    def test_result_reused_for_same_target(self):
+        """Test that an equivalent target and config is served from cache"""
+        runner, calls = self.make_runner()
+        first = scan_cache.run_cached('nmap', 'https://Example.com/login', {'scan_options': '-F'}, runner)
+        second = scan_cache.run_cached('nmap', 'example.com.', {'scan_options': '-F'}, runner)
+        other_config = scan_cache.run_cached('nmap', 'example.com', {'scan_options': '-p-'}, runner)
+
+        assert first == second
+        assert other_config == first
+        assert len(calls) == 2
+
+    def test_force_fresh_and_failures_not_cached(self):
+        """Test that force_fresh reruns the tool and failed results are not reused"""
+        runner, calls = self.make_runner()
+        scan_cache.run_cached('headers', 'https://example.com', {}, runner)
+        scan_cache.run_cached('headers', 'https://example.com', {}, runner, force_fresh=True)
+        assert len(calls) == 2
+
+        failing, failed_calls = self.make_runner({'success': False, 'error': 'TIMEOUT', 'findings': []})
+        scan_cache.run_cached('ssl', 'https://example.com', {}, failing)
+        scan_cache.run_cached('ssl', 'https://example.com', {}, failing)
+        assert len(failed_calls) == 2
+
+    def test_waits_for_in_flight_run(self, monkeypatch):
+        """Test that an identical request joins the in-flight run instead of running the tool"""
+        target = scan_cache.normalize_target('amass', 'example.com')
+        config_hash = scan_cache.get_config_hash({})
+        entry = ScanResultCache.objects.create(
+            cache_key=scan_cache.get_cache_key('amass', target, config_hash),
+            tool='amass', target=target, config_hash=config_hash, status='running',
+            lease_expires_at=timezone.now() + timedelta(minutes=30),
+        )
+
+        def finish_run(seconds):
+            # The other worker publishes its result while this one polls
+            ScanResultCache.objects.filter(id=entry.id).update(
+                status='ready', result={'success': True, 'subdomains': ['www.example.com']},
+                completed_at=timezone.now(), lease_expires_at=None,
+                expires_at=timezone.now() + timedelta(hours=1),
+            )
+        monkeypatch.setattr(scan_cache.time, 'sleep', finish_run)
+
+        runner, calls = self.make_runner()
+        result = scan_cache.run_cached('amass', 'https://example.com', {}, runner)
+
+        assert calls == []
+        assert result['subdomains'] == ['www.example.com']
+
+    def test_wait_bounded_by_max_wait(self, monkeypatch):
+        """Test that a waiter gives up before its task time limit instead of polling until the lease expires"""
+        target = scan_cache.normalize_target('nmap', 'example.com')
+        config_hash = scan_cache.get_config_hash({})
+        ScanResultCache.objects.create(
+            cache_key=scan_cache.get_cache_key('nmap', target, config_hash),
+            tool='nmap', target=target, config_hash=config_hash, status='running',
+            lease_expires_at=timezone.now() + timedelta(minutes=60),
+        )
+        clock = [0.0]
+        monkeypatch.setattr(scan_cache.time, 'monotonic', lambda: clock[0])
+        monkeypatch.setattr(scan_cache.time, 'sleep', lambda seconds: clock.__setitem__(0, clock[0] + seconds))
+
+        runner, calls = self.make_runner()
+        with pytest.raises(scan_cache.ScanCacheWaitTimeout):
+            scan_cache.run_cached('nmap', 'example.com', {}, runner, max_wait=30)
+        assert calls == []
+        assert 30 <= clock[0] < 35
+
+
+NMAP_XML = """<?xml version="1.0"?>
+<!DOCTYPE nmaprun>
+<nmaprun scanner="nmap" args="nmap -oX - example.com">
+<taskprogress task="Service scan" time="1700000000" percent="50.00" remaining="30"/>
+<host><status state="up"/><address addr="93.184.216.34" addrtype="ipv4"/><ports>
+<port protocol="tcp" portid="22"><state state="open"/><service name="ssh" product="OpenSSH" version="7.4 legacy"/></port>
+<port protocol="tcp" portid="3306"><state state="open"/><service name="mysql"/></port>
+<port protocol="tcp" portid="443"><state state="open"/><service name="https"/></port>
+"""
+
+
+@pytest.mark.django_db
+class TestStreamingIngest:
+    """Test streaming nmap ingestion into findings"""
+
+    def test_parse_nmap_xml_incrementally(self):
+        """Test that ports are yielded before the document is complete"""
+        events = []
+        # The truncated document only fails once every complete element was yielded
+        with pytest.raises(nmap_scanner.ET.ParseError):
+            for event in nmap_scanner.iter_nmap_events(NMAP_XML.splitlines(True)):
+                events.append(event)
+        assert events[0] == ('progress', {'task': 'Service scan', 'percent': 50.0})
+        assert [data['port'] for event, data in events if event == 'port'] == [22, 3306, 443]
+
+    @pytest.mark.parametrize('interrupt', [ProcessTimeout('nmap exceeded 1200s'), nmap_scanner.SoftTimeLimitExceeded()])
+    def test_findings_streamed_and_kept_on_timeout(self, monkeypatch, settings, interrupt):
+        """Test that findings are saved while nmap runs and survive a timeout or the task soft time limit"""
+        settings.SECURITY_FINDING_BATCH_SIZE = 1
+        scan = SecurityScan.objects.create(scan_type='port_scan', target_url='https://example.com', status='running')
+        saved_before_timeout = []
+
+        class FakeProcess:
+            returncode = None
+            stderr_tail = ''
+
+            def __init__(self, cmd, timeout):
+                self.cmd = cmd
+
+            def __iter__(self):
+                yield from NMAP_XML.splitlines(True)
+                saved_before_timeout.append(scan.findings.count())
+                raise interrupt
+
+        monkeypatch.setattr(nmap_scanner, 'StreamingProcess', FakeProcess)
+        monkeypatch.setattr(nmap_scanner.socket, 'gethostbyname', lambda hostname: '93.184.216.34')
+        execute_security_scan(scan.id)
+
+        scan.refresh_from_db()
+        titles = list(scan.findings.order_by('id').values_list('title', flat=True))
+        assert saved_before_timeout == [3]
+        assert titles == [
+            'Risky Port Open: SSH (22)',
+            'Potentially Outdated Service: ssh',
+            'Risky Port Open: MySQL (3306)',
+            'Nmap Scan Timeout',
+        ]
+        assert scan.status == 'completed'
+        assert scan.progress['partial'] is True
+        assert scan.progress['items'] == 3
+        assert scan.progress['findings'] == 4
+
+class TestDNSDiscovery:
+    """Test concurrent subdomain discovery"""
+
+    @pytest.fixture(autouse=True)
+    def fake_dns(self, monkeypatch):
+        """Resolve from a zone dict with 50ms per lookup and count the lookups"""
+        self.zone = {'example.com': ['93.184.216.34'], 'www.example.com': ['93.184.216.34'], 'api.example.com': ['10.0.0.1']}
+        self.lookups = []
+
+        async def resolve(name, resolver):
+            self.lookups.append(name)
+            await asyncio.sleep(0.05)
+            if name in self.zone:
+                return self.zone[name], 300
+            if '*.example.com' in self.zone:
+                return self.zone['*.example.com'], 300
+            return [], 300
+
+        monkeypatch.setattr(dns_discovery, '_resolve_uncached', resolve)
+        monkeypatch.setattr(dns_discovery, '_make_resolver', lambda: None)
+        dns_discovery.clear_dns_cache()
+        yield
+        dns_discovery.clear_dns_cache()
+
+    def test_wordlist_resolved_concurrently(self):
+        """Test that a wordlist pass costs about one lookup, not the serial sum"""
+        started = time.monotonic()
+        result = dns_discovery.discover_dns_subdomains('https://example.com/path')
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 0.5  # 75 serial lookups would take ~3.75s
+        assert result['success'] is True
+        assert result['ip_addresses'] == ['93.184.216.34']
+        assert result['subdomains'] == ['www.example.com', 'api.example.com']
+        assert result['summary'] == {'total_subdomains': 2, 'ip_addresses': 1}
+        assert result['findings'][0]['evidence']['count'] == 2
+
+    def test_answers_cached(self):
+        """Test that a repeated pass is served from the answer cache"""
+        dns_discovery.discover_dns_subdomains('example.com', wordlist=['www', 'nope'])
+        first_pass = len(self.lookups)
+        result = dns_discovery.discover_dns_subdomains('example.com', wordlist=['www', 'nope'])
+
+        # Only the random wildcard probes are looked up again
+        assert len(self.lookups) - first_pass == dns_discovery.WILDCARD_PROBES
+        assert result['subdomains'] == ['www.example.com']
+
+    def test_wildcard_skips_wordlist(self):
+        """Test that a wildcard record short-circuits the brute-force"""
+        self.zone['*.example.com'] = ['198.51.100.7']
+        result = dns_discovery.discover_dns_subdomains('example.com')
+
+        assert len(self.lookups) == 1 + dns_discovery.WILDCARD_PROBES
+        assert result['subdomains'] == []
+        assert result['findings'][0]['evidence']['wildcard_addresses'] == ['198.51.100.7']
+
+    def test_load_wordlist_from_file(self, tmp_path, settings):
+        """Test that the configured wordlist file is read with comments, blanks and duplicates removed"""
+        wordlist = tmp_path / 'subdomains.txt'
+        wordlist.write_text('www\n# staging hosts\nStaging  # old\n\nwww\n')
+        settings.DNS_DISCOVERY_WORDLIST = str(wordlist)
+        assert dns_discovery.load_wordlist() == ['www', 'staging']
+
+    def test_scan_config_cannot_read_files(self):
+        """Test that a file path in scan_config is rejected instead of read"""
+        with pytest.raises(ValueError):
+            dns_discovery.load_wordlist('/etc/passwd')
+
+        result = dns_discovery.discover_dns_subdomains('example.com', wordlist='/etc/passwd')
+        assert result['success'] is False
+        assert self.lookups == []
+
+        serializer = SecurityScanCreateSerializer(data={
+            'scan_type': 'dns_discovery', 'target_url': 'https://example.com', 'scan_config': {'wordlist': '/etc/passwd'},
+        })
+        assert not serializer.is_valid()
+        assert 'scan_config' in serializer.errors
+
+
+
+class ZapStubHandler(BaseHTTPRequestHandler):
+    """Minimal ZAP JSON API: version, newSession, newContext, includeInContext"""
+
+    def do_GET(self):
+        self.server.calls.append(self.path)
+        if not self.server.healthy:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path.startswith('/JSON/core/view/version/'):
+            body = {'version': '2.14.0'}
+        elif self.path.startswith('/JSON/context/action/newContext/'):
+            body = {'contextId': '1'}
+        else:
+            body = {'Result': 'OK'}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestZapPool:
+    """Test the ZAP daemon pool against local stub daemons"""
+
+    @pytest.fixture
+    def stubs(self):
+        servers = []
+        for _ in range(2):
+            server = ThreadingHTTPServer(('127.0.0.1', 0), ZapStubHandler)
+            server.calls = []
+            server.healthy = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+        yield servers
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    def make_pool(self, stubs, **options):
+        urls = [f'http://127.0.0.1:{server.server_address[1]}' for server in stubs]
+        return ZapPool(api_urls=urls, health_check_seconds=0, **options)
+
+    def test_leases_isolated_and_queued(self, stubs):
+        """Test that each scan gets its own daemon and session, and waits when all are busy"""
+        pool = self.make_pool(stubs)
+        with pool.lease('scan-a', 'https://a.example.com') as first:
+            with pool.lease('scan-b', 'https://b.example.com') as second:
+                assert first.api_url != second.api_url
+                with pytest.raises(ZapPoolTimeout):
+                    pool.acquire(timeout=0.2)
+
+                waiter = {}
+                thread = threading.Thread(target=lambda: waiter.update(daemon=pool.acquire(timeout=5)))
+                thread.start()
+            thread.join(timeout=5)
+            assert waiter['daemon'].api_url == second.api_url
+            pool.release(waiter['daemon'])
+
+        calls = stubs[0].calls + stubs[1].calls
+        assert any('newSession' in call and 'name=scan-a' in call for call in calls)
+        assert any('newContext' in call and 'contextName=scan-b' in call for call in calls)
+        assert any('includeInContext' in call and 'b%5C.example%5C.com' in call for call in calls)
+
+    def test_unhealthy_daemon_skipped(self, stubs):
+        """Test that a daemon failing its health check is not leased"""
+        stubs[0].healthy = False
+        pool = self.make_pool(stubs)
+        for _ in range(3):
+            with pool.lease('scan', 'https://example.com') as lease:
+                assert lease.api_url.endswith(str(stubs[1].server_address[1]))
+
+        stubs[1].healthy = False
+        pool = self.make_pool(stubs)
+        with pytest.raises(ZapPoolUnavailable):
+            pool.acquire(timeout=1)
+
+    def test_shared_daemons_leased_across_processes(self, stubs, monkeypatch):
+        """Test that a shared daemon leased by another worker process is not leased again"""
+        held = {f'http://127.0.0.1:{stubs[0].server_address[1]}'}
+        released = []
+
+        def try_lock(api_url, holder, lease_seconds):
+            if api_url in held:
+                return False
+            held.add(api_url)
+            return True
+
+        def unlock(api_url, holder):
+            held.discard(api_url)
+            released.append(api_url)
+
+        monkeypatch.setattr(zap_pool, 'try_lock_daemon', try_lock)
+        monkeypatch.setattr(zap_pool, 'unlock_daemon', unlock)
+        pool = self.make_pool(stubs, shared=True)
+        with pool.lease('scan', 'https://example.com') as lease:
+            assert lease.api_url.endswith(str(stubs[1].server_address[1]))
+            # Both daemons are now leased somewhere in the cluster
+            with pytest.raises(ZapPoolTimeout):
+                pool.acquire(timeout=0.2)
+        assert released == [lease.api_url]
+
+    def test_spawned_daemons_started_once_per_host(self, stubs, tmp_path, monkeypatch):
+        """Test that only the first worker process on a host starts ZAP daemons and the others lease them"""
+        urls = [f'http://127.0.0.1:{server.server_address[1]}' for server in stubs]
+        started = []
+
+        class FakeProcess:
+            def poll(self):
+                return None
+
+            def terminate(self):
+                pass
+
+            def wait(self, timeout=None):
+                pass
+
+        def spawn(pool, port=None):
+            started.append(port)
+            return zap_pool.ZapDaemon(urls[len(started) - 1], process=FakeProcess(), host='worker-host')
+
+        monkeypatch.setattr(ZapPool, '_spawn', spawn)
+        owner = ZapPool(size=2, zap_path='zap.sh', host_dir=str(tmp_path), health_check_seconds=0)
+        other = ZapPool(size=2, zap_path='zap.sh', host_dir=str(tmp_path), health_check_seconds=0)
+        try:
+            owner.warm()
+            other.warm()
+            assert len(started) == 2
+            assert [daemon.api_url for daemon in other._daemons] == urls
+            assert not any(daemon.managed for daemon in other._daemons)
+            with other.lease('scan', 'https://example.com') as lease:
+                assert lease.api_url in urls
+        finally:
+            other.shutdown()
+            owner.shutdown()
+        assert not (tmp_path / zap_pool.HOST_DAEMONS_FILE).exists()
+
+    @pytest.mark.django_db
+    def test_daemon_lease_expires_unless_renewed(self):
+        """Test that a lease of a worker that went away expires, and a renewed one does not"""
+        url = 'http://zap.internal:8080'
+        assert zap_pool.try_lock_daemon(url, 'worker-a', 300) is True
+        assert zap_pool.try_lock_daemon(url, 'worker-b', 300) is False
+        assert zap_pool.renew_daemon_lease(url, 'worker-a', 300) is True
+
+        ZapDaemonLease.objects.filter(api_url=url).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        assert zap_pool.try_lock_daemon(url, 'worker-b', 300) is True
+        assert zap_pool.renew_daemon_lease(url, 'worker-a', 300) is False
+
+        # Only the current holder can release it
+        zap_pool.unlock_daemon(url, 'worker-a')
+        assert ZapDaemonLease.objects.get(api_url=url).holder == 'worker-b'
+        zap_pool.unlock_daemon(url, 'worker-b')
+        assert zap_pool.try_lock_daemon(url, 'worker-a', 300) is True
@@ -12,7 +12,7 @@ try:
 except ImportError:
     DNS_DISCOVERY_AVAILABLE = False
     # Create a fallback function
-    def discover_dns_subdomains(domain: str):
+    def discover_dns_subdomains(domain: str, wordlist=None):
         return {
             'success': False,
             'domain': domain,
@@ -48,7 +48,7 @@ try:
     NMAP_AVAILABLE = True
 except ImportError:
     NMAP_AVAILABLE = False
-    def run_nmap_scan(target_url: str, scan_options: str = None):
+    def run_nmap_scan(target_url: str, scan_options: str = None, on_batch=None, timeout: float = None):
         return {
             'success': False,
             'target': target_url,
@@ -63,7 +63,7 @@ try:
     AMASS_AVAILABLE = True
 except ImportError:
     AMASS_AVAILABLE = False
-    def run_amass_scan(target_url: str, scan_config: dict = None):
+    def run_amass_scan(target_url: str, scan_config: dict = None, on_batch=None, timeout: float = None):
         return {
             'success': False,
             'domain': target_url,
@@ -1,6 +1,8 @@
 """
 Amass DNS/Subdomain Discovery Integration
-Uses subprocess to call amass binary for subdomain enumeration
+Uses subprocess to call amass binary for subdomain enumeration; its JSON
+lines are read as they are written, so progress is reported while amass
+runs and a timeout keeps the subdomains found so far
 """
 
 import logging
@@ -10,27 +12,82 @@ import os
 from typing import Dict, List
 from urllib.parse import urlparse
 from django.conf import settings
+from .streaming import BatchEmitter, ProcessTimeout, StreamingProcess
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_TIMEOUT = 300  # 5 minutes
+
+RISKY_SUBDOMAIN_WORDS = ['admin', 'test', 'staging', 'dev', 'backup', 'old', 'legacy']
+
+
 def get_amass_path():
     """Get amass executable path from settings or environment"""
     return getattr(settings, 'AMASS_PATH', os.environ.get('AMASS_PATH', 'amass'))
 
 
-def run_amass_scan(target_url: str, scan_config: dict = None) -> Dict:
+def get_subdomain_findings(domain: str, target_url: str, subdomains: List[str]) -> List[Dict]:
+    """Findings for the (sorted, unique) subdomains amass discovered."""
+    findings = []
+    if len(subdomains) > 0:
+        findings.append({
+            'title': f'Discovered {len(subdomains)} Subdomains',
+            'description': f'Amass discovered {len(subdomains)} unique subdomains for {domain}',
+            'severity': 'informational',
+            'affected_url': domain,
+            'evidence': {
+                'subdomains': subdomains[:50],  # Limit to first 50 for evidence
+                'total_count': len(subdomains)
+            },
+            'remediation': 'Review discovered subdomains for security implications. Ensure all subdomains are properly secured.'
+        })
+        
+        # Check for common risky subdomains
+        found_risky = get_risky_subdomains(subdomains)
+        if found_risky:
+            findings.append({
+                'title': f'Potentially Risky Subdomains Found',
+                'description': f'Found {len(found_risky)} subdomains with potentially risky names: {", ".join(found_risky[:10])}',
+                'severity': 'medium',
+                'affected_url': domain,
+                'evidence': {
+                    'risky_subdomains': found_risky
+                },
+                'remediation': 'Review and secure or remove risky subdomains. Ensure they are not exposing sensitive information.'
+            })
+    else:
+        findings.append({
+            'title': 'No Subdomains Discovered',
+            'description': f'Amass did not discover any subdomains for {domain}',
+            'severity': 'informational',
+            'affected_url': target_url,
+            'remediation': 'This may indicate good security practices, or amass may need additional configuration for deeper scanning.'
+        })
+    return findings
+
+
+def get_risky_subdomains(subdomains: List[str]) -> List[str]:
+    return [s for s in subdomains if any(risky in s.lower() for risky in RISKY_SUBDOMAIN_WORDS)]
+
+
+def run_amass_scan(target_url: str, scan_config: dict = None, on_batch=None, timeout: float = None) -> Dict:
     """
     Run amass DNS/subdomain discovery scan
     
     Args:
         target_url: Target URL or domain
         scan_config: Additional configuration (optional)
+        on_batch: Optional callable(findings, progress) called with the number
+            of subdomains found while amass runs (see streaming.BatchEmitter)
+        timeout: Seconds before amass is stopped (default: SECURITY_AMASS_TIMEOUT)
         
     Returns:
-        Dict with scan results and findings
+        Dict with scan results and findings. On timeout, success is False,
+        partial is True and findings cover the subdomains found so far.
     """
     findings = []
+    timeout = timeout or getattr(settings, 'SECURITY_AMASS_TIMEOUT', DEFAULT_TIMEOUT)
     
     try:
         # Parse target to get domain
@@ -84,82 +141,54 @@ def run_amass_scan(target_url: str, scan_config: dict = None) -> Dict:
         
         logger.info(f"[Amass] Running command: {' '.join(cmd)}")
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
+        emitter = BatchEmitter(
+            on_batch,
+            batch_size=getattr(settings, 'SECURITY_FINDING_BATCH_SIZE', 50),
+            flush_seconds=getattr(settings, 'SECURITY_STREAM_FLUSH_SECONDS', 5)
         )
+        process = StreamingProcess(cmd, timeout=timeout)
         
-        if result.returncode != 0:
+        # Parse JSON lines as amass writes them
+        seen = set()
+        timed_out = False
+        try:
+            for line in process:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'name' in data and data['name'] not in seen:
+                    seen.add(data['name'])
+                    emitter.add(items=len(seen))
+        except ProcessTimeout:
+            timed_out = True
+            logger.error(f"[Amass] Scan timeout for {target_url} after {timeout}s, keeping {len(seen)} subdomains")
+        emitter.flush()
+        
+        if not timed_out and process.returncode != 0:
             return {
                 'success': False,
                 'domain': domain,
                 'error': 'AMASS_SCAN_FAILED',
-                'error_message': result.stderr or 'Amass scan failed',
+                'error_message': process.stderr_tail or 'Amass scan failed',
                 'findings': [{
                     'title': 'Amass Scan Failed',
-                    'description': f'Amass scan failed: {result.stderr}',
+                    'description': f'Amass scan failed: {process.stderr_tail}',
                     'severity': 'informational',
                     'affected_url': target_url,
                     'remediation': 'Check amass installation and network connectivity'
                 }]
             }
         
-        # Parse JSON output
-        subdomains = []
-        if result.stdout:
-            for line in result.stdout.strip().split('\n'):
-                if line.strip():
-                    try:
-                        data = json.loads(line)
-                        if 'name' in data:
-                            subdomains.append(data['name'])
-                    except json.JSONDecodeError:
-                        continue
-        
         # Remove duplicates and sort
-        subdomains = sorted(list(set(subdomains)))
+        subdomains = sorted(seen)
         
         # Create findings for discovered subdomains
-        if len(subdomains) > 0:
-            findings.append({
-                'title': f'Discovered {len(subdomains)} Subdomains',
-                'description': f'Amass discovered {len(subdomains)} unique subdomains for {domain}',
-                'severity': 'informational',
-                'affected_url': domain,
-                'evidence': {
-                    'subdomains': subdomains[:50],  # Limit to first 50 for evidence
-                    'total_count': len(subdomains)
-                },
-                'remediation': 'Review discovered subdomains for security implications. Ensure all subdomains are properly secured.'
-            })
-            
-            # Check for common risky subdomains
-            risky_subdomains = ['admin', 'test', 'staging', 'dev', 'backup', 'old', 'legacy']
-            found_risky = [s for s in subdomains if any(risky in s.lower() for risky in risky_subdomains)]
-            
-            if found_risky:
-                findings.append({
-                    'title': f'Potentially Risky Subdomains Found',
-                    'description': f'Found {len(found_risky)} subdomains with potentially risky names: {", ".join(found_risky[:10])}',
-                    'severity': 'medium',
-                    'affected_url': domain,
-                    'evidence': {
-                        'risky_subdomains': found_risky
-                    },
-                    'remediation': 'Review and secure or remove risky subdomains. Ensure they are not exposing sensitive information.'
-                })
-        else:
-            findings.append({
-                'title': 'No Subdomains Discovered',
-                'description': f'Amass did not discover any subdomains for {domain}',
-                'severity': 'informational',
-                'affected_url': target_url,
-                'remediation': 'This may indicate good security practices, or amass may need additional configuration for deeper scanning.'
-            })
+        findings.extend(get_subdomain_findings(domain, target_url, subdomains))
         
-        return {
+        result = {
             'success': True,
             'domain': domain,
             'target_url': target_url,
@@ -167,23 +196,39 @@ def run_amass_scan(target_url: str, scan_config: dict = None) -> Dict:
             'findings': findings,
             'summary': {
                 'total_subdomains': len(subdomains),
-                'risky_subdomains': len(found_risky) if 'found_risky' in locals() else 0
+                'risky_subdomains': len(get_risky_subdomains(subdomains))
             }
         }
+        if timed_out:
+            findings.append({
+                'title': 'Amass Scan Timeout',
+                'description': f'Amass scan exceeded the {int(timeout)}s timeout. Results cover the {len(subdomains)} subdomains found before it was stopped.',
+                'severity': 'informational',
+                'affected_url': target_url,
+                'remediation': 'Try running amass with passive mode or increase SECURITY_AMASS_TIMEOUT'
+            })
+            result.update({
+                'success': False,
+                'partial': True,
+                'error': 'AMASS_TIMEOUT',
+                'error_message': f'Amass scan timed out after {int(timeout)}s',
+            })
+        return result
         
     except subprocess.TimeoutExpired:
-        logger.error(f"[Amass] Scan timeout for {target_url}")
+        # Only the version check runs with subprocess.run; enum timeouts keep partial results above
+        logger.error(f"[Amass] Version check timeout for {target_url}")
         return {
             'success': False,
             'domain': domain if 'domain' in locals() else target_url,
             'error': 'AMASS_TIMEOUT',
-            'error_message': 'Amass scan timed out after 5 minutes',
+            'error_message': 'Amass did not respond to the version check',
             'findings': [{
                 'title': 'Amass Scan Timeout',
-                'description': 'Amass scan exceeded timeout limit. The domain may have many subdomains or network issues.',
+                'description': 'Amass did not respond to the version check within 5 seconds.',
                 'severity': 'informational',
                 'affected_url': target_url,
-                'remediation': 'Try running amass with passive mode or increase timeout'
+                'remediation': 'Check the amass installation and AMASS_PATH'
             }]
         }
     except Exception as e:
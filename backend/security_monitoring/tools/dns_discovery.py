@@ -1,14 +1,32 @@
 """
 DNS Discovery Tool
 Discovers subdomains and DNS records (placeholder for amass integration)
+
+Subdomain candidates are resolved concurrently on an asyncio event loop
+(dnspython's async resolver, or the loop's getaddrinfo when dnspython is not
+installed), so a wordlist pass takes about one resolver round trip per
+DNS_DISCOVERY_CONCURRENCY names instead of one timeout per missing name.
+
+- Answers (including NXDOMAIN) are cached in-process for their TTL
+- A wildcard DNS record is detected up front and skips the wordlist pass,
+  since every candidate would resolve
+- Wordlists are pluggable: a registered name or a list of labels; a file path
+  is only read from the DNS_DISCOVERY_WORDLIST setting, never from scan input
 """
 
+import asyncio
+import secrets
 import socket
 import logging
-from typing import Dict, List
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
+from django.conf import settings
 
 try:
+    import dns.asyncresolver
+    import dns.exception
     import dns.resolver
     DNS_AVAILABLE = True
 except ImportError:
@@ -17,54 +35,219 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-def discover_dns_subdomains(domain: str) -> Dict:
+COMMON_SUBDOMAINS = ['www', 'mail', 'ftp', 'webmail', 'smtp', 'pop', 'ns1', 'cpanel', 'whm', 'autodiscover', 'autoconfig', 'm', 'imap', 'test', 'ns', 'blog', 'pop3', 'dev', 'www2', 'admin', 'forum', 'news', 'vpn', 'ns2', 'mail2', 'new', 'mysql', 'old', 'lists', 'support', 'mobile', 'mx', 'static', 'docs', 'beta', 'shop', 'sql', 'secure', 'demo', 'cp', 'calendar', 'wiki', 'web', 'media', 'email', 'images', 'img', 'www1', 'intranet', 'portal', 'video', 'sip', 'dns2', 'api', 'cdn', 'stats', 'dns1', 'ns3', 'sms', 'wap', 'my', 'svn', 'mail1', 'sites', 'proxy', 'ads', 'host', 'crm', 'cms', 'backup', 'mx1']
+
+# Named wordlists selectable with wordlist='<name>'
+WORDLISTS = {
+    'common': COMMON_SUBDOMAINS,
+}
+
+DEFAULT_CONCURRENCY = 100
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_NEGATIVE_TTL = 300    # NXDOMAIN / no answer
+DEFAULT_FALLBACK_TTL = 60     # socket answers carry no TTL
+MAX_CACHE_TTL = 3600
+MAX_CACHE_ENTRIES = 50000
+
+# Random labels resolved to detect a wildcard record
+WILDCARD_PROBES = 2
+
+# name -> (expires_at monotonic, addresses); an empty list is a cached negative answer
+_answer_cache: Dict[str, Tuple[float, List[str]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _get_cached(name: str) -> Optional[List[str]]:
+    with _cache_lock:
+        entry = _answer_cache.get(name)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _answer_cache[name]
+            return None
+        return entry[1]
+
+
+def _set_cached(name: str, addresses: List[str], ttl: float):
+    ttl = min(ttl, MAX_CACHE_TTL)
+    if ttl <= 0:
+        return
+    now = time.monotonic()
+    with _cache_lock:
+        if len(_answer_cache) >= MAX_CACHE_ENTRIES:
+            for key in [key for key, (expires_at, _) in _answer_cache.items() if expires_at <= now]:
+                del _answer_cache[key]
+            if len(_answer_cache) >= MAX_CACHE_ENTRIES:
+                _answer_cache.clear()
+        _answer_cache[name] = (now + ttl, addresses)
+
+
+def clear_dns_cache():
+    """Drop all cached DNS answers."""
+    with _cache_lock:
+        _answer_cache.clear()
+
+
+def load_wordlist(wordlist=None) -> List[str]:
+    """
+    Resolve a wordlist argument to a list of subdomain labels.
+
+    Args:
+        wordlist: Name registered in WORDLISTS, list of labels, or None for
+            the DNS_DISCOVERY_WORDLIST setting (default: 'common'), which may
+            also be the path of a file with one label per line ('#' comments
+            allowed)
+
+    Returns:
+        Deduplicated, lowercased labels in their original order
+
+    Raises:
+        ValueError: wordlist is a string that is not a registered name. Scan
+            configs are user input, so they never name a file to read.
+    """
+    if not wordlist:
+        configured = _setting('DNS_DISCOVERY_WORDLIST', '') or 'common'
+        if configured in WORDLISTS:
+            labels = WORDLISTS[configured]
+        else:
+            with open(configured, encoding='utf-8') as wordlist_file:
+                labels = [line.split('#', 1)[0] for line in wordlist_file]
+    elif isinstance(wordlist, str):
+        if wordlist not in WORDLISTS:
+            raise ValueError(f"Unknown wordlist '{wordlist}' (available: {', '.join(sorted(WORDLISTS))})")
+        labels = WORDLISTS[wordlist]
+    else:
+        labels = [label for label in wordlist if isinstance(label, str)]
+
+    seen = set()
+    result = []
+    for label in labels:
+        label = label.strip().strip('.').lower()
+        if label and label not in seen:
+            seen.add(label)
+            result.append(label)
+    return result
+
+
+async def _resolve_uncached(name: str, resolver) -> Tuple[List[str], float]:
+    """
+    Resolve the A records of a name.
+
+    Returns:
+        tuple(addresses, ttl) - addresses is empty when the name does not exist
+
+    Raises:
+        Exception on timeouts and resolver failures (not cached)
+    """
+    if resolver is not None:
+        try:
+            answer = await resolver.resolve(name, 'A')
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return [], _setting('DNS_DISCOVERY_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+        return sorted({rdata.to_text() for rdata in answer}), answer.rrset.ttl
+
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(name, None, family=socket.AF_INET, type=socket.SOCK_STREAM),
+            timeout=_setting('DNS_DISCOVERY_TIMEOUT', DEFAULT_TIMEOUT)
+        )
+    except socket.gaierror:
+        return [], _setting('DNS_DISCOVERY_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+    return sorted({info[4][0] for info in infos}), DEFAULT_FALLBACK_TTL
+
+
+async def _resolve(name: str, resolver, semaphore: asyncio.Semaphore) -> List[str]:
+    """Cached, concurrency-bounded A lookup; failures resolve to no addresses."""
+    name = name.lower()
+    cached = _get_cached(name)
+    if cached is not None:
+        return cached
+    async with semaphore:
+        try:
+            addresses, ttl = await _resolve_uncached(name, resolver)
+        except Exception as e:
+            logger.debug(f"Error checking {name}: {str(e)}")
+            return []
+    _set_cached(name, addresses, ttl)
+    return addresses
+
+
+def _make_resolver():
+    if not DNS_AVAILABLE:
+        return None
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = _setting('DNS_DISCOVERY_TIMEOUT', DEFAULT_TIMEOUT)
+    return resolver
+
+
+async def _discover(domain: str, labels: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Resolve the domain, probe for a wildcard record and, if there is none,
+    every candidate subdomain in one concurrent batch.
+
+    Returns:
+        tuple(ip_addresses, wildcard_addresses, discovered_subdomains)
+    """
+    resolver = _make_resolver()
+    semaphore = asyncio.Semaphore(_setting('DNS_DISCOVERY_CONCURRENCY', DEFAULT_CONCURRENCY))
+
+    probes = [f"{secrets.token_hex(8)}.{domain}" for _ in range(WILDCARD_PROBES)]
+    ip_addresses, *probe_answers = await asyncio.gather(
+        _resolve(domain, resolver, semaphore),
+        *(_resolve(name, resolver, semaphore) for name in probes)
+    )
+    wildcard_addresses = sorted({address for answer in probe_answers for address in answer})
+    if wildcard_addresses:
+        return ip_addresses, wildcard_addresses, []
+
+    candidates = [f"{label}.{domain}" for label in labels]
+    answers = await asyncio.gather(*(_resolve(name, resolver, semaphore) for name in candidates))
+    discovered = [name for name, addresses in zip(candidates, answers) if addresses]
+    return ip_addresses, [], discovered
+
+
+def discover_dns_subdomains(domain: str, wordlist=None) -> Dict:
     """
     Discover subdomains for a given domain
-    
+
     Args:
         domain: Domain name to discover subdomains for
-        
+        wordlist: Subdomain labels to try (see load_wordlist)
+
     Returns:
         Dict with discovered subdomains and DNS records
     """
     findings = []
     subdomains = []
-    
+
     try:
         # Remove protocol if present
         parsed = urlparse(domain if '://' in domain else f'https://{domain}')
-        domain = parsed.hostname or domain
-        
-        # Basic DNS resolution
-        ip_addresses = []
-        if DNS_AVAILABLE:
-            try:
-                answers = dns.resolver.resolve(domain, 'A')
-                ip_addresses = [str(rdata) for rdata in answers]
-            except Exception as e:
-                logger.warning(f"DNS resolution failed for {domain}: {str(e)}")
-        else:
-            try:
-                ip_addresses = [socket.gethostbyname(domain)]
-            except Exception as e:
-                logger.warning(f"DNS resolution failed for {domain}: {str(e)}")
-        
-        # Try common subdomains
-        common_subdomains = ['www', 'mail', 'ftp', 'webmail', 'smtp', 'pop', 'ns1', 'cpanel', 'whm', 'autodiscover', 'autoconfig', 'm', 'imap', 'test', 'ns', 'blog', 'pop3', 'dev', 'www2', 'admin', 'forum', 'news', 'vpn', 'ns2', 'mail2', 'new', 'mysql', 'old', 'lists', 'support', 'mobile', 'mx', 'static', 'docs', 'beta', 'shop', 'sql', 'secure', 'demo', 'cp', 'calendar', 'wiki', 'web', 'media', 'email', 'images', 'img', 'www1', 'intranet', 'portal', 'video', 'sip', 'dns2', 'api', 'cdn', 'stats', 'dns1', 'ns3', 'sms', 'wap', 'my', 'svn', 'mail1', 'sites', 'proxy', 'ads', 'host', 'crm', 'cms', 'backup', 'mx1']
-        
-        discovered = []
-        for subdomain in common_subdomains:
-            try:
-                test_domain = f"{subdomain}.{domain}"
-                socket.gethostbyname(test_domain)
-                discovered.append(test_domain)
-                subdomains.append(test_domain)
-            except socket.gaierror:
-                pass  # Subdomain doesn't exist
-            except Exception as e:
-                logger.debug(f"Error checking {test_domain}: {str(e)}")
-        
-        if len(discovered) > 0:
+        domain = (parsed.hostname or domain).rstrip('.')
+
+        labels = load_wordlist(wordlist)
+        ip_addresses, wildcard_addresses, discovered = asyncio.run(_discover(domain, labels))
+        if not ip_addresses:
+            logger.warning(f"DNS resolution failed for {domain}")
+        subdomains.extend(discovered)
+
+        if wildcard_addresses:
+            findings.append({
+                'title': 'Wildcard DNS Record',
+                'description': f'Every subdomain of {domain} resolves, so subdomain brute-forcing was skipped',
+                'severity': 'informational',
+                'affected_url': domain,
+                'evidence': {
+                    'wildcard_addresses': wildcard_addresses,
+                },
+                'remediation': 'Review whether a wildcard DNS record is required; it exposes every hostname under the domain'
+            })
+        elif len(discovered) > 0:
             findings.append({
                 'title': f'Discovered {len(discovered)} Subdomains',
                 'description': f'Found {len(discovered)} subdomains for {domain}',
@@ -85,7 +268,7 @@ def discover_dns_subdomains(domain: str) -> Dict:
                 'evidence': {'note': 'Using basic socket-based DNS resolution'},
                 'remediation': 'Install dnspython for better DNS discovery: pip install dnspython'
             })
-        
+
         return {
             'success': True,
             'domain': domain,
@@ -97,7 +280,7 @@ def discover_dns_subdomains(domain: str) -> Dict:
                 'ip_addresses': len(ip_addresses)
             }
         }
-        
+
     except Exception as e:
         logger.error(f"Error discovering DNS for {domain}: {str(e)}")
         return {
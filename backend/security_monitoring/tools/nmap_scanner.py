@@ -1,24 +1,52 @@
 """
 Nmap Port Scanner Integration
-Uses python-nmap for port and service discovery
+Runs the nmap binary with XML output on stdout and parses it incrementally,
+so open ports are reported as nmap writes them and a timeout keeps the
+ports found so far
 """
 
 import logging
+import shlex
 import socket
-from typing import Dict, List
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Tuple
 from urllib.parse import urlparse
 from django.conf import settings
 import os
+from .streaming import BatchEmitter, ProcessTimeout, StreamingProcess
 
 logger = logging.getLogger(__name__)
 
-# Try to import python-nmap
 try:
-    import nmap
-    NMAP_AVAILABLE = True
+    from celery.exceptions import SoftTimeLimitExceeded
 except ImportError:
-    NMAP_AVAILABLE = False
-    logger.warning("python-nmap not installed. Nmap scanning will not be available.")
+    class SoftTimeLimitExceeded(Exception):
+        """Never raised without Celery."""
+
+
+# Default scan options: -Pn (skip ping), -sV (version detection), --open (only open ports)
+DEFAULT_SCAN_OPTIONS = '-Pn -sV --open'
+# Below the port_scan task soft time limit (orchestrator.get_time_limits) so nmap is normally stopped by its own timeout
+DEFAULT_TIMEOUT = 20 * 60
+
+RISKY_PORTS = {
+    21: 'FTP',
+    22: 'SSH',
+    23: 'Telnet',
+    25: 'SMTP',
+    80: 'HTTP',
+    135: 'RPC',
+    139: 'NetBIOS',
+    445: 'SMB',
+    1433: 'MSSQL',
+    3306: 'MySQL',
+    3389: 'RDP',
+    5432: 'PostgreSQL',
+    5900: 'VNC',
+    8080: 'HTTP-Proxy',
+    8443: 'HTTPS-Alt'
+}
+HIGH_RISK_PORTS = [22, 3389, 1433, 3306, 5432]
 
 
 def get_nmap_path():
@@ -54,34 +82,116 @@ def get_nmap_path():
     return 'nmap'
 
 
-def run_nmap_scan(target_url: str, scan_options: str = None) -> Dict:
+def iter_nmap_events(lines: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Parse nmap XML output (-oX -) incrementally.
+
+    Yields:
+        ('port', port_info) for every port element, as soon as it is complete
+        ('host', {'address': ...}) when a host element is complete
+        ('progress', {'task': ..., 'percent': ...}) for --stats-every updates
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    depth = 0
+    address = None
+    for line in lines:
+        parser.feed(line)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if elem.tag == 'address' and elem.get('addrtype') in ('ipv4', 'ipv6'):
+                address = elem.get('addr')
+            elif elem.tag == 'port':
+                state = elem.find('state')
+                service = elem.find('service')
+                yield 'port', {
+                    'port': int(elem.get('portid')),
+                    'protocol': elem.get('protocol'),
+                    'state': state.get('state') if state is not None else 'unknown',
+                    'name': service.get('name', 'unknown') if service is not None else 'unknown',
+                    'product': service.get('product', '') if service is not None else '',
+                    'version': service.get('version', '') if service is not None else '',
+                }
+                elem.clear()
+            elif elem.tag == 'host':
+                yield 'host', {'address': address}
+                address = None
+            elif elem.tag == 'taskprogress':
+                try:
+                    percent = float(elem.get('percent'))
+                except (TypeError, ValueError):
+                    percent = None
+                yield 'progress', {'task': elem.get('task'), 'percent': percent}
+            if depth == 1:
+                # Drop finished top-level elements so memory does not grow with the scan
+                root.remove(elem)
+    parser.close()
+
+
+def get_port_findings(hostname: str, port_entry: Dict) -> List[Dict]:
+    """Findings for one open port."""
+    findings = []
+    port = port_entry['port']
+    service_name = port_entry['service']
+    version = port_entry['version']
+
+    # Check for risky ports
+    if port in RISKY_PORTS:
+        findings.append({
+            'title': f'Risky Port Open: {RISKY_PORTS[port]} ({port})',
+            'description': f'Port {port} ({RISKY_PORTS[port]}) is open and accessible. This service may pose security risks if not properly secured.',
+            'severity': 'high' if port in HIGH_RISK_PORTS else 'medium',
+            'affected_url': f"{hostname}:{port}",
+            'evidence': {
+                'port': port,
+                'protocol': port_entry['protocol'],
+                'service': service_name,
+                'product': port_entry['product'],
+                'version': version
+            },
+            'remediation': f'Secure or disable {RISKY_PORTS[port]} service on port {port}. Use firewall rules to restrict access if needed.'
+        })
+
+    # Check for outdated/banner information
+    if version and any(v in version.lower() for v in ['old', 'deprecated', 'legacy']):
+        findings.append({
+            'title': f'Potentially Outdated Service: {service_name}',
+            'description': f'Service {service_name} on port {port} may be using an outdated version: {version}',
+            'severity': 'medium',
+            'affected_url': f"{hostname}:{port}",
+            'evidence': {
+                'port': port,
+                'service': service_name,
+                'version': version
+            },
+            'remediation': 'Update service to latest secure version'
+        })
+    return findings
+
+
+def run_nmap_scan(target_url: str, scan_options: str = None, on_batch=None, timeout: float = None) -> Dict:
     """
     Run nmap port scan on target
     
     Args:
         target_url: Target URL or hostname
         scan_options: Custom nmap options (optional)
+        on_batch: Optional callable(findings, progress) called with new findings
+            and scan progress while nmap runs (see streaming.BatchEmitter)
+        timeout: Seconds before nmap is stopped (default: SECURITY_NMAP_TIMEOUT)
         
     Returns:
-        Dict with scan results and findings
+        Dict with scan results and findings. On timeout (or when the Celery
+        soft time limit interrupts the scan), success is False, partial is
+        True and the results found so far are included.
     """
     findings = []
     
-    if not NMAP_AVAILABLE:
-        return {
-            'success': False,
-            'target': target_url,
-            'error': 'NMAP_UNAVAILABLE',
-            'error_message': 'python-nmap not installed. Install with: pip install python-nmap',
-            'findings': [{
-                'title': 'Nmap Not Available',
-                'description': 'python-nmap library not installed',
-                'severity': 'informational',
-                'affected_url': target_url,
-                'remediation': 'Install python-nmap: pip install python-nmap'
-            }]
-        }
-    
     try:
         # Parse target
         parsed = urlparse(target_url if '://' in target_url else f'https://{target_url}')
@@ -107,174 +217,130 @@ def run_nmap_scan(target_url: str, scan_options: str = None) -> Dict:
         
         logger.info(f"[Nmap] Scanning {hostname} ({ip_address})")
         
-        # Get nmap executable path
         nmap_path = get_nmap_path()
+        scan_opts = scan_options or DEFAULT_SCAN_OPTIONS
+        cmd = [nmap_path, *shlex.split(scan_opts), '-oX', '-', '--stats-every', '10s', hostname]
+        timeout = timeout or getattr(settings, 'SECURITY_NMAP_TIMEOUT', DEFAULT_TIMEOUT)
+        process = StreamingProcess(cmd, timeout=timeout)
+        emitter = BatchEmitter(
+            on_batch,
+            batch_size=getattr(settings, 'SECURITY_FINDING_BATCH_SIZE', 50),
+            flush_seconds=getattr(settings, 'SECURITY_STREAM_FLUSH_SECONDS', 5)
+        )
         
-        # If nmap is in tools directory, add it to PATH temporarily
-        original_path = os.environ.get('PATH', '')
-        path_modified = False
-        if nmap_path != 'nmap' and os.path.exists(nmap_path):
-            # Add the directory containing nmap to PATH
-            nmap_dir = os.path.dirname(nmap_path)
-            if nmap_dir not in original_path:
-                path_separator = ';' if os.name == 'nt' else ':'
-                os.environ['PATH'] = f"{nmap_dir}{path_separator}{original_path}"
-                path_modified = True
-                logger.info(f"[Nmap] Added {nmap_dir} to PATH")
-        
+        open_ports = []
+        services = []
+        hosts_seen = 0
+        timed_out = False
+        stopped_by = f'the {int(timeout)}s timeout'
         try:
-            # Initialize nmap scanner - python-nmap will find nmap in PATH
-            # If we have a custom path, we can also try to set it directly
-            if nmap_path != 'nmap' and os.path.exists(nmap_path):
-                # Try to set the nmap path directly if python-nmap supports it
-                try:
-                    nm = nmap.PortScanner()
-                    # Set the nmap path if the library supports it
-                    if hasattr(nm, 'nmap_path'):
-                        nm.nmap_path = nmap_path
-                    elif hasattr(nm, '_nmap_path'):
-                        nm._nmap_path = nmap_path
-                except Exception as e:
-                    logger.warning(f"[Nmap] Could not set custom path, using PATH: {str(e)}")
-                    nm = nmap.PortScanner()
-            else:
-                nm = nmap.PortScanner()
-            
-            # Default scan options: -Pn (skip ping), -sV (version detection), --open (only open ports)
-            scan_opts = scan_options or '-Pn -sV --open'
-            
-            # Run scan
-            nm.scan(hostname, arguments=scan_opts)
-            
-            if hostname not in nm.all_hosts():
+            for event, data in iter_nmap_events(process):
+                if event == 'port' and data['state'] == 'open':
+                    service_info = data['name']
+                    if data['product']:
+                        service_info += f" ({data['product']}"
+                        if data['version']:
+                            service_info += f" {data['version']}"
+                        service_info += ")"
+                    port_entry = {
+                        'port': data['port'],
+                        'protocol': data['protocol'],
+                        'service': data['name'],
+                        'product': data['product'],
+                        'version': data['version'],
+                        'info': service_info
+                    }
+                    open_ports.append(port_entry)
+                    services.append(service_info)
+                    port_findings = get_port_findings(hostname, port_entry)
+                    findings.extend(port_findings)
+                    emitter.add(port_findings, items=len(open_ports))
+                elif event == 'host':
+                    hosts_seen += 1
+                    emitter.add(hosts=hosts_seen)
+                elif event == 'progress':
+                    emitter.add(**data)
+        except (ProcessTimeout, SoftTimeLimitExceeded) as e:
+            # Leaving iter_nmap_events kills nmap either way
+            timed_out = True
+            if isinstance(e, SoftTimeLimitExceeded):
+                stopped_by = 'the worker task time limit'
+            logger.error(f"[Nmap] Scan for {target_url} stopped by {stopped_by}, keeping {len(open_ports)} open ports")
+        except ET.ParseError as e:
+            if not open_ports:
+                raise
+            logger.error(f"[Nmap] Truncated XML output for {target_url}: {str(e)}")
+        emitter.flush()
+        
+        if not timed_out and hosts_seen == 0:
+            if process.returncode:
                 return {
                     'success': False,
                     'target': target_url,
-                    'error': 'NMAP_SCAN_FAILED',
-                    'error_message': 'Nmap scan did not return results for target',
-                    'findings': []
+                    'error': 'NMAP_ERROR',
+                    'error_message': process.stderr_tail,
+                    'findings': [{
+                        'title': 'Nmap Scan Error',
+                        'description': f'Nmap scan failed: {process.stderr_tail}',
+                        'severity': 'informational',
+                        'affected_url': target_url,
+                        'remediation': 'Check nmap installation and permissions'
+                    }]
                 }
-            
-                # Process results
-            open_ports = []
-            services = []
-            risky_ports = {
-            21: 'FTP',
-            22: 'SSH',
-            23: 'Telnet',
-            25: 'SMTP',
-            80: 'HTTP',
-            135: 'RPC',
-            139: 'NetBIOS',
-            445: 'SMB',
-            1433: 'MSSQL',
-            3306: 'MySQL',
-            3389: 'RDP',
-            5432: 'PostgreSQL',
-            5900: 'VNC',
-            8080: 'HTTP-Proxy',
-            8443: 'HTTPS-Alt'
-        }
-        
-            for host in nm.all_hosts():
-                for proto in nm[host].all_protocols():
-                    ports = nm[host][proto].keys()
-                    for port in ports:
-                        port_info = nm[host][proto][port]
-                        state = port_info['state']
-                        
-                        if state == 'open':
-                            service_name = port_info.get('name', 'unknown')
-                            product = port_info.get('product', '')
-                            version = port_info.get('version', '')
-                            service_info = f"{service_name}"
-                            if product:
-                                service_info += f" ({product}"
-                                if version:
-                                    service_info += f" {version}"
-                                service_info += ")"
-                            
-                            open_ports.append({
-                                'port': port,
-                                'protocol': proto,
-                                'service': service_name,
-                                'product': product,
-                                'version': version,
-                                'info': service_info
-                            })
-                            
-                            services.append(service_info)
-                            
-                            # Check for risky ports
-                            if port in risky_ports:
-                                findings.append({
-                                    'title': f'Risky Port Open: {risky_ports[port]} ({port})',
-                                    'description': f'Port {port} ({risky_ports[port]}) is open and accessible. This service may pose security risks if not properly secured.',
-                                    'severity': 'high' if port in [22, 3389, 1433, 3306, 5432] else 'medium',
-                                    'affected_url': f"{hostname}:{port}",
-                                    'evidence': {
-                                        'port': port,
-                                        'protocol': proto,
-                                        'service': service_name,
-                                        'product': product,
-                                        'version': version
-                                    },
-                                    'remediation': f'Secure or disable {risky_ports[port]} service on port {port}. Use firewall rules to restrict access if needed.'
-                                })
-                            
-                            # Check for outdated/banner information
-                            if version and any(v in version.lower() for v in ['old', 'deprecated', 'legacy']):
-                                findings.append({
-                                    'title': f'Potentially Outdated Service: {service_name}',
-                                    'description': f'Service {service_name} on port {port} may be using an outdated version: {version}',
-                                    'severity': 'medium',
-                                    'affected_url': f"{hostname}:{port}",
-                                    'evidence': {
-                                        'port': port,
-                                        'service': service_name,
-                                        'version': version
-                                    },
-                                    'remediation': 'Update service to latest secure version'
-                                })
-            
-            # Summary
-            summary = {
-                'hostname': hostname,
-                'ip_address': ip_address,
-                'open_ports_count': len(open_ports),
-                'services_count': len(set(services)),
-                'risky_ports_count': len([p for p in open_ports if p['port'] in risky_ports])
-            }
-            
             return {
-                'success': True,
+                'success': False,
                 'target': target_url,
-                'hostname': hostname,
-                'ip_address': ip_address,
-                'open_ports': open_ports,
-                'findings': findings,
-                'summary': summary
+                'error': 'NMAP_SCAN_FAILED',
+                'error_message': 'Nmap scan did not return results for target',
+                'findings': []
             }
         
-        finally:
-            # Restore original PATH after all operations complete
-            if path_modified:
-                os.environ['PATH'] = original_path
-                logger.info(f"[Nmap] Restored original PATH")
+        # Summary
+        summary = {
+            'hostname': hostname,
+            'ip_address': ip_address,
+            'open_ports_count': len(open_ports),
+            'services_count': len(set(services)),
+            'risky_ports_count': len([p for p in open_ports if p['port'] in RISKY_PORTS])
+        }
+        
+        result = {
+            'success': True,
+            'target': target_url,
+            'hostname': hostname,
+            'ip_address': ip_address,
+            'open_ports': open_ports,
+            'findings': findings,
+            'summary': summary
+        }
+        if timed_out:
+            findings.append({
+                'title': 'Nmap Scan Timeout',
+                'description': f'Nmap scan exceeded {stopped_by}. Results cover the {len(open_ports)} open ports found before it was stopped.',
+                'severity': 'informational',
+                'affected_url': target_url,
+                'remediation': 'Narrow the port range in scan options or increase SECURITY_NMAP_TIMEOUT'
+            })
+            result.update({
+                'success': False,
+                'partial': True,
+                'error': 'NMAP_TIMEOUT',
+                'error_message': f'Nmap scan stopped by {stopped_by}',
+            })
+        return result
         
-    except nmap.PortScannerError as e:
-        logger.error(f"[Nmap] PortScanner error: {str(e)}")
+    except FileNotFoundError:
         return {
             'success': False,
             'target': target_url,
-            'error': 'NMAP_ERROR',
-            'error_message': str(e),
+            'error': 'NMAP_NOT_FOUND',
+            'error_message': f'nmap executable not found at: {get_nmap_path()}',
             'findings': [{
-                'title': 'Nmap Scan Error',
-                'description': f'Nmap scan failed: {str(e)}',
+                'title': 'Nmap Not Installed',
+                'description': 'nmap executable not found. Install nmap and ensure it is in PATH or set NMAP_PATH environment variable.',
                 'severity': 'informational',
                 'affected_url': target_url,
-                'remediation': 'Check nmap installation and permissions'
+                'remediation': 'Install nmap from https://nmap.org/download.html'
             }]
         }
     except Exception as e:
@@ -286,4 +352,3 @@ def run_nmap_scan(target_url: str, scan_options: str = None) -> Dict:
             'error_message': str(e),
             'findings': []
         }
-
@@ -0,0 +1,165 @@
+"""
+Streaming subprocess helpers for long-running scanners (nmap, amass)
+
+Output is consumed line by line while the tool runs instead of being
+buffered until it exits, so results can be reported in batches and whatever
+arrived before a timeout is kept.
+"""
+
+import logging
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Lines buffered between the reader thread and the consumer; a slow consumer
+# blocks the reader, which in turn blocks the tool on its pipe
+MAX_PENDING_LINES = 1000
+
+# stderr lines kept for error messages
+STDERR_TAIL_LINES = 50
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_SECONDS = 5
+
+
+class ProcessTimeout(Exception):
+    """The process did not finish before its deadline and was killed."""
+
+
+class StreamingProcess:
+    """
+    Run a command and iterate over its stdout lines as they are written.
+
+    Usage:
+        process = StreamingProcess([nmap_path, '-oX', '-', host], timeout=1800)
+        for line in process:
+            ...
+        process.returncode, process.stderr_tail
+
+    Iteration raises ProcessTimeout (after killing the process) once the
+    overall timeout has passed; lines read before that have been yielded.
+    """
+
+    def __init__(self, cmd: List[str], timeout: float):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.returncode = None
+        self._stderr = deque(maxlen=STDERR_TAIL_LINES)
+        self._process = None
+        self._stopped = threading.Event()
+
+    @property
+    def stderr_tail(self) -> str:
+        return ''.join(self._stderr).strip()
+
+    def _put(self, lines, item):
+        while not self._stopped.is_set():
+            try:
+                lines.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_stdout(self, lines):
+        for line in self._process.stdout:
+            if not self._put(lines, line):
+                return
+        self._put(lines, None)
+
+    def _read_stderr(self):
+        for line in self._process.stderr:
+            self._stderr.append(line)
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.timeout
+        # FileNotFoundError propagates so callers can report a missing binary
+        self._process = subprocess.Popen(
+            self.cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace',
+            bufsize=1,
+        )
+        lines = queue.Queue(maxsize=MAX_PENDING_LINES)
+        threading.Thread(target=self._read_stdout, args=(lines,), daemon=True).start()
+        stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        stderr_reader.start()
+
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ProcessTimeout(f'{self.cmd[0]} exceeded {self.timeout}s')
+                try:
+                    line = lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    break
+                yield line
+
+            try:
+                self.returncode = self._process.wait(timeout=max(deadline - time.monotonic(), 0.1))
+            except subprocess.TimeoutExpired:
+                raise ProcessTimeout(f'{self.cmd[0]} exceeded {self.timeout}s')
+        finally:
+            # Also reached when the consumer stops iterating early
+            self._stopped.set()
+            if self._process.poll() is None:
+                self._process.kill()
+                self._process.wait()
+                self.returncode = self._process.returncode
+            stderr_reader.join(timeout=1)
+
+
+class BatchEmitter:
+    """
+    Collects findings and progress from a streaming scan and hands them to
+    ``on_batch(findings, progress)`` every ``batch_size`` findings or
+    ``flush_seconds``, whichever comes first.
+
+    Findings passed to on_batch are, in order, a prefix of the scan's final
+    ``findings`` list, so a caller that persisted N of them only has to
+    persist ``result['findings'][N:]`` at the end.
+    """
+
+    def __init__(self, on_batch: Optional[Callable[[List[Dict], Dict], None]],
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_seconds: float = DEFAULT_FLUSH_SECONDS):
+        self.on_batch = on_batch
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.progress = {}
+        self._pending = []
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def add(self, findings: List[Dict] = None, **progress):
+        if findings:
+            self._pending.extend(findings)
+        if progress:
+            self.progress.update(progress)
+        self._dirty = True
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.on_batch is None or not self._dirty:
+            self._pending = []
+            return
+        findings, self._pending = self._pending, []
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        try:
+            self.on_batch(findings, dict(self.progress))
+        except Exception as e:
+            # Reporting must not abort the scan; the final result still carries every finding
+            logger.error(f"[Streaming] Error reporting batch of {len(findings)} findings: {str(e)}")
+            self.on_batch = None
@@ -0,0 +1,674 @@
+"""
+OWASP ZAP daemon pool
+
+Keeps warm ZAP daemons and leases one to each DAST scan, instead of probing
+for (and cold-starting) a daemon before every scan:
+
+- Spawned mode (ZAP_PATH set): one pool per host. The first worker process
+  to take the host lock (ZAP_POOL_DIR/pool.lock) starts ZAP_POOL_SIZE
+  daemons (default: SECURITY_SCAN_TOOL_LIMITS['zap']) on free local ports,
+  each with its own home directory, and publishes their URLs; the other
+  processes on the host lease the published daemons. The owner restarts a
+  daemon whose process exits; a daemon that has served
+  ZAP_POOL_MAX_SCANS_PER_DAEMON scans is shut down by its last leaser and
+  restarted on the same port. When the owner goes away, the next process
+  that finds no daemon answering takes the lock and starts new ones
+- External mode: the pool leases the daemons at ZAP_POOL_URLS (default:
+  ZAP_API_URL) and skips unhealthy ones until they answer again
+- In both modes several worker processes share the daemons, so a lease also
+  holds the daemon's ZapDaemonLease row, renewed while the scan runs; the
+  row expires if the worker dies, so a lost worker never keeps a daemon
+  leased
+- Each lease starts a new ZAP session and a context scoped to the target,
+  so alerts and history never leak between scans
+- When every daemon is busy, scans wait in FIFO order for up to
+  ZAP_POOL_WAIT_SECONDS
+
+Only the ZAP JSON API is used here (plain HTTP), so the pool can be tested
+against a local stub server.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): every worker process runs its own spawned pool
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_WAIT_SECONDS = 10 * 60
+DEFAULT_MAX_SCANS_PER_DAEMON = 25
+DEFAULT_HEALTH_CHECK_SECONDS = 30
+DEFAULT_START_TIMEOUT = 120
+DEFAULT_RETRY_SECONDS = 60
+DEFAULT_LEASE_SECONDS = 5 * 60
+API_TIMEOUT = 10
+# How often a scan re-checks shared daemons leased by other worker processes
+SHARED_POLL_SECONDS = 2
+# How often the owner of a host pool restarts daemons whose process exited
+WATCHDOG_SECONDS = 5
+HOST_LOCK_FILE = 'pool.lock'
+HOST_DAEMONS_FILE = 'daemons.json'
+
+
+class ZapPoolTimeout(Exception):
+    """No daemon became free before the lease wait timed out."""
+
+
+class ZapPoolUnavailable(Exception):
+    """The pool has no daemon that answers its API."""
+
+
+def new_lease_holder() -> str:
+    """Unique holder name of one lease: host, process and a random token."""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def try_lock_daemon(api_url: str, holder: str, lease_seconds: float) -> bool:
+    """
+    Take the cluster-wide lease of a shared daemon without waiting.
+
+    Succeeds when the daemon's lease is free or expired; the holder must
+    renew it (renew_daemon_lease) before lease_seconds pass.
+    """
+    from django.db.models import Q
+    from django.utils import timezone
+    from ..models import ZapDaemonLease
+    now = timezone.now()
+    ZapDaemonLease.objects.get_or_create(api_url=api_url)
+    return ZapDaemonLease.objects.filter(api_url=api_url).filter(
+        Q(holder='') | Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now)
+    ).update(holder=holder, lease_expires_at=now + timedelta(seconds=lease_seconds)) == 1
+
+
+def renew_daemon_lease(api_url: str, holder: str, lease_seconds: float) -> bool:
+    """Extend a held lease; False when it expired and was taken by someone else."""
+    from django.utils import timezone
+    from ..models import ZapDaemonLease
+    return ZapDaemonLease.objects.filter(api_url=api_url, holder=holder).update(
+        lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds)
+    ) == 1
+
+
+def unlock_daemon(api_url: str, holder: str):
+    from ..models import ZapDaemonLease
+    ZapDaemonLease.objects.filter(api_url=api_url, holder=holder).update(holder='', lease_expires_at=None)
+
+
+def count_daemon_scan(api_url: str) -> int:
+    """Record a scan served by a shared daemon; returns its scans since the last restart."""
+    from django.db.models import F
+    from ..models import ZapDaemonLease
+    ZapDaemonLease.objects.filter(api_url=api_url).update(scans=F('scans') + 1)
+    return ZapDaemonLease.objects.filter(api_url=api_url).values_list('scans', flat=True).first() or 0
+
+
+def reset_daemon_scans(api_url: str):
+    from ..models import ZapDaemonLease
+    ZapDaemonLease.objects.filter(api_url=api_url).update(scans=0)
+
+
+def is_daemon_leased(api_url: str) -> bool:
+    from django.utils import timezone
+    from ..models import ZapDaemonLease
+    return ZapDaemonLease.objects.filter(api_url=api_url, lease_expires_at__gt=timezone.now()).exclude(holder='').exists()
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, TypeError):
+        return isinstance(pid, int)
+    return True
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ZapDaemon:
+    """One ZAP daemon, either started by the pool (managed) or external."""
+
+    def __init__(self, api_url: str, api_key: str = None, process=None, home_dir: str = None, host: str = None):
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key
+        self.process = process
+        self.home_dir = home_dir
+        self.managed = process is not None
+        # Daemons of a host pool listen on loopback; their lease is per host
+        self.host = host
+        self.lease_key = f'{host} {self.api_url}' if host else self.api_url
+        self.restart_lock = threading.Lock()
+        self.scans = 0
+        self.checked_at = 0.0   # monotonic time of the last successful health check
+        self.retry_at = 0.0     # unhealthy daemons are skipped until then
+        self.holder = None      # name of the cluster-wide lease held (shared pools)
+        self.renewing = None    # Event that stops the lease renewal thread
+
+    def call(self, component: str, call_type: str, operation: str, **params) -> Dict:
+        """Call a ZAP JSON API endpoint, e.g. call('core', 'view', 'version')."""
+        headers = {}
+        if self.api_key:
+            params['apikey'] = self.api_key
+            headers['X-ZAP-API-Key'] = self.api_key
+        response = requests.get(
+            f'{self.api_url}/JSON/{component}/{call_type}/{operation}/',
+            params=params,
+            headers=headers,
+            timeout=API_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def is_alive(self) -> bool:
+        if self.managed and self.process.poll() is not None:
+            return False
+        try:
+            return bool(self.call('core', 'view', 'version').get('version'))
+        except (requests.RequestException, ValueError):
+            return False
+
+
+class ZapLease:
+    """A daemon leased to one scan, with that scan's session and context."""
+
+    def __init__(self, daemon: ZapDaemon, context_name: str, context_id: Optional[str]):
+        self.daemon = daemon
+        self.api_url = daemon.api_url
+        self.context_name = context_name
+        self.context_id = context_id
+
+
+class ZapPool:
+    """
+    Pool of warm ZAP daemons.
+
+    Usage:
+        with get_zap_pool().lease('scan-42', 'https://example.com') as lease:
+            zap.base = f'{lease.api_url}/JSON/'
+            zap.spider.scan(target, contextname=lease.context_name)
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, zap_path: str = None, api_urls: List[str] = None,
+                 api_key: str = None, wait_seconds: float = DEFAULT_WAIT_SECONDS,
+                 max_scans_per_daemon: int = DEFAULT_MAX_SCANS_PER_DAEMON,
+                 health_check_seconds: float = DEFAULT_HEALTH_CHECK_SECONDS,
+                 start_timeout: float = DEFAULT_START_TIMEOUT, retry_seconds: float = DEFAULT_RETRY_SECONDS,
+                 shared: bool = False, lease_seconds: float = DEFAULT_LEASE_SECONDS, host_dir: str = None):
+        self.size = size
+        self.zap_path = zap_path
+        self.api_urls = api_urls or []
+        self.api_key = api_key
+        self.wait_seconds = wait_seconds
+        self.max_scans_per_daemon = max_scans_per_daemon
+        self.health_check_seconds = health_check_seconds
+        self.start_timeout = start_timeout
+        self.retry_seconds = retry_seconds
+        # External daemons are also leased by other worker processes
+        self.shared = shared
+        self.lease_seconds = lease_seconds
+        # Spawned mode: where the host lock and the published daemon URLs live
+        self.host_dir = host_dir or os.path.join(tempfile.gettempdir(), 'zap-pool')
+        self._host_lock = None
+        self._stopping = threading.Event()
+
+        self._condition = threading.Condition()
+        self._daemons = []
+        self._idle = deque()
+        self._waiting = deque()
+        self._warm_started = False
+        self._warm_done = threading.Event()
+
+    @classmethod
+    def from_settings(cls, zap_path: str = None):
+        from ..orchestrator import get_tool_limit
+        from .zap_scanner import get_zap_api_key, get_zap_api_url
+        zap_path = getattr(settings, 'ZAP_PATH', '') or zap_path
+        return cls(
+            # No more daemons than DAST scans that may run at once
+            size=getattr(settings, 'ZAP_POOL_SIZE', 0) or get_tool_limit('zap') or DEFAULT_POOL_SIZE,
+            zap_path=zap_path,
+            api_urls=getattr(settings, 'ZAP_POOL_URLS', None) or [get_zap_api_url()],
+            api_key=get_zap_api_key(),
+            wait_seconds=getattr(settings, 'ZAP_POOL_WAIT_SECONDS', DEFAULT_WAIT_SECONDS),
+            max_scans_per_daemon=getattr(settings, 'ZAP_POOL_MAX_SCANS_PER_DAEMON', DEFAULT_MAX_SCANS_PER_DAEMON),
+            shared=True,
+            lease_seconds=getattr(settings, 'ZAP_POOL_LEASE_SECONDS', DEFAULT_LEASE_SECONDS),
+            host_dir=getattr(settings, 'ZAP_POOL_DIR', '') or None,
+        )
+
+    # Daemon lifecycle
+
+    def _spawn(self, port: int = None) -> ZapDaemon:
+        port = port or _free_port()
+        home_dir = tempfile.mkdtemp(prefix='zap-pool-')
+        cmd = [self.zap_path, '-daemon', '-host', '127.0.0.1', '-port', str(port), '-dir', home_dir]
+        cmd += ['-config', f'api.key={self.api_key}'] if self.api_key else ['-config', 'api.disablekey=true']
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=os.environ.copy())
+        logger.info(f"[ZapPool] Started ZAP daemon on port {port} (pid {process.pid})")
+        return ZapDaemon(f'http://127.0.0.1:{port}', self.api_key, process=process, home_dir=home_dir,
+                         host=socket.gethostname())
+
+    def _wait_until_alive(self, daemon: ZapDaemon) -> bool:
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline:
+            if daemon.is_alive():
+                daemon.checked_at = time.monotonic()
+                return True
+            if daemon.managed and daemon.process.poll() is not None:
+                return False
+            time.sleep(1)
+        return False
+
+    def _stop(self, daemon: ZapDaemon):
+        if not daemon.managed:
+            return
+        if daemon.process.poll() is None:
+            daemon.process.terminate()
+            try:
+                daemon.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                daemon.process.kill()
+                daemon.process.wait()
+        if daemon.home_dir:
+            shutil.rmtree(daemon.home_dir, ignore_errors=True)
+
+    def _restart(self, daemon: ZapDaemon) -> bool:
+        """
+        Replace a managed daemon's process with a fresh one on the same port,
+        so the URL published to the other processes stays valid.
+        """
+        with daemon.restart_lock:
+            return self._respawn(daemon)
+
+    def _respawn(self, daemon: ZapDaemon) -> bool:
+        self._stop(daemon)
+        fresh = self._spawn(urlparse(daemon.api_url).port)
+        daemon.process, daemon.home_dir = fresh.process, fresh.home_dir
+        daemon.scans = 0
+        return self._wait_until_alive(daemon)
+
+    def _watch(self):
+        """Owner of a host pool: restart daemons whose process exited, e.g. after a recycle."""
+        while not self._stopping.wait(WATCHDOG_SECONDS):
+            for daemon in list(self._daemons):
+                if not daemon.managed or not daemon.restart_lock.acquire(blocking=False):
+                    continue
+                try:
+                    if daemon.process.poll() is not None:
+                        logger.warning(f"[ZapPool] ZAP daemon at {daemon.api_url} exited, restarting it")
+                        if not self._respawn(daemon):
+                            daemon.retry_at = time.monotonic() + self.retry_seconds
+                except OSError as e:
+                    logger.error(f"[ZapPool] Could not restart ZAP daemon at {daemon.api_url}: {str(e)}")
+                finally:
+                    daemon.restart_lock.release()
+
+    # Host pool (spawned mode)
+
+    def _take_host_lock(self) -> bool:
+        """Become the process that starts this host's daemons, if none is."""
+        if self._host_lock is not None:
+            return True
+        if fcntl is None:
+            self._host_lock = True
+            return True
+        os.makedirs(self.host_dir, exist_ok=True)
+        lock_file = open(os.path.join(self.host_dir, HOST_LOCK_FILE), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held until this process exits; the kernel releases it if the process dies
+        self._host_lock = lock_file
+        return True
+
+    def _read_host_daemons(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.host_dir, HOST_DAEMONS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _publish_host_daemons(self, daemons: List[ZapDaemon]):
+        if fcntl is None:
+            return
+        path = os.path.join(self.host_dir, HOST_DAEMONS_FILE)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({'pid': os.getpid(), 'urls': [daemon.api_url for daemon in daemons]}, f)
+        os.replace(f'{path}.tmp', path)
+
+    def _stop_orphans(self):
+        """Shut down idle daemons left behind by a previous owner that died."""
+        published = self._read_host_daemons()
+        if fcntl is None or not published:
+            return
+        for url in published.get('urls', []):
+            orphan = ZapDaemon(url, self.api_key, host=socket.gethostname())
+            try:
+                if not is_daemon_leased(orphan.lease_key):
+                    orphan.call('core', 'action', 'shutdown')
+            except Exception:
+                pass
+
+    def _start_host_daemons(self) -> List[ZapDaemon]:
+        self._stop_orphans()
+        daemons = []
+        for _ in range(self.size):
+            try:
+                daemons.append(self._spawn())
+            except OSError as e:
+                logger.error(f"[ZapPool] Could not start ZAP from {self.zap_path}: {str(e)}")
+                break
+        self._publish_host_daemons(daemons)
+        if fcntl is not None:
+            threading.Thread(target=self._watch, daemon=True).start()
+        # Daemons boot in parallel; wait for each in turn
+        for daemon in daemons:
+            if not self._wait_until_alive(daemon):
+                logger.warning(f"[ZapPool] ZAP daemon at {daemon.api_url} did not come up")
+                daemon.retry_at = time.monotonic() + self.retry_seconds
+        return daemons
+
+    def _join_host_daemons(self) -> List[ZapDaemon]:
+        """Wait for the daemons published by the host's owner process."""
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            published = self._read_host_daemons()
+            if published and _pid_alive(published.get('pid')):
+                return [ZapDaemon(url, self.api_key, host=socket.gethostname()) for url in published.get('urls', [])]
+            if time.monotonic() >= deadline or self._take_host_lock():
+                # The owner went away before publishing; start the daemons here
+                return self._start_host_daemons() if self._host_lock else []
+            time.sleep(1)
+
+    def _host_daemons(self) -> List[ZapDaemon]:
+        if self._take_host_lock():
+            return self._start_host_daemons()
+        return self._join_host_daemons()
+
+    def _rejoin_host_pool(self) -> bool:
+        """
+        No daemon of the host pool answers: take over from an owner that went
+        away, or pick up the daemons a new owner published.
+
+        Returns:
+            True when the pool now has other daemons to try
+        """
+        if not self.zap_path or self._host_lock is not None:
+            return False
+        with self._condition:
+            known = {daemon.api_url for daemon in self._daemons}
+        daemons = self._host_daemons()
+        if not daemons or {daemon.api_url for daemon in daemons} == known:
+            return False
+        with self._condition:
+            self._daemons = daemons
+            self._idle = deque(daemons)
+            self._condition.notify_all()
+        return True
+
+    def warm(self):
+        """
+        Start (spawned mode) or register (external mode) every daemon once;
+        concurrent callers wait until the first one is done.
+        """
+        with self._condition:
+            started, self._warm_started = self._warm_started, True
+        if started:
+            self._warm_done.wait()
+            return
+
+        if self.zap_path:
+            daemons = self._host_daemons()
+        else:
+            daemons = [ZapDaemon(url, self.api_key) for url in self.api_urls]
+
+        with self._condition:
+            self._daemons.extend(daemons)
+            self._idle.extend(daemons)
+            self._condition.notify_all()
+        self._warm_done.set()
+
+    def shutdown(self):
+        self._stopping.set()
+        with self._condition:
+            daemons, self._daemons = self._daemons, []
+            self._idle.clear()
+        for daemon in daemons:
+            self._stop(daemon)
+        if self._host_lock not in (None, True):
+            # Graceful exit: the next owner starts fresh daemons instead of reaping these
+            try:
+                os.remove(os.path.join(self.host_dir, HOST_DAEMONS_FILE))
+            except OSError:
+                pass
+            self._host_lock.close()
+        self._host_lock = None
+
+    # Leasing
+
+    def _lock(self, daemon: ZapDaemon) -> bool:
+        if not self.shared:
+            return True
+        holder = new_lease_holder()
+        if not try_lock_daemon(daemon.lease_key, holder, self.lease_seconds):
+            return False
+        daemon.holder = holder
+        daemon.renewing = threading.Event()
+        threading.Thread(target=self._renew, args=(daemon.lease_key, holder, daemon.renewing), daemon=True).start()
+        return True
+
+    def _renew(self, api_url: str, holder: str, stop: threading.Event):
+        """Keep a lease alive until it is released (runs in its own thread)."""
+        from django.db import connection
+        try:
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not renew_daemon_lease(api_url, holder, self.lease_seconds):
+                        logger.warning(f"[ZapPool] Lost the lease of {api_url}")
+                        return
+                except Exception as e:
+                    logger.warning(f"[ZapPool] Could not renew the lease of {api_url}: {str(e)}")
+        finally:
+            connection.close()
+
+    def _unlock(self, daemon: ZapDaemon):
+        if daemon.holder is None:
+            return
+        holder, daemon.holder = daemon.holder, None
+        daemon.renewing.set()
+        try:
+            unlock_daemon(daemon.lease_key, holder)
+        except Exception as e:
+            logger.warning(f"[ZapPool] Could not release the lease of {daemon.api_url}: {str(e)}")
+
+    def _take(self, deadline: float) -> ZapDaemon:
+        """
+        Wait (FIFO) for an idle daemon that is not parked as unhealthy and,
+        for shared daemons, not leased by another worker process.
+        """
+        ticket = object()
+        with self._condition:
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if not self._daemons or all(daemon.retry_at > now for daemon in self._daemons):
+                        raise ZapPoolUnavailable('No ZAP daemon is answering')
+                    if self._waiting[0] is ticket:
+                        for daemon in self._idle:
+                            if daemon.retry_at <= now and self._lock(daemon):
+                                self._idle.remove(daemon)
+                                return daemon
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise ZapPoolTimeout(f'All {len(self._daemons)} ZAP daemons are busy')
+                    # Releases by other processes are not notified; poll for them
+                    poll = SHARED_POLL_SECONDS if self.shared else self.retry_seconds
+                    self._condition.wait(min(remaining, poll))
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+    def _put_back(self, daemon: ZapDaemon):
+        self._unlock(daemon)
+        with self._condition:
+            if daemon in self._daemons:
+                self._idle.append(daemon)
+            self._condition.notify_all()
+
+    def _ensure_healthy(self, daemon: ZapDaemon) -> bool:
+        if time.monotonic() - daemon.checked_at < self.health_check_seconds:
+            return True
+        if daemon.is_alive():
+            daemon.checked_at = time.monotonic()
+            return True
+        logger.warning(f"[ZapPool] ZAP daemon at {daemon.api_url} failed its health check")
+        return daemon.managed and self._restart(daemon)
+
+    def acquire(self, timeout: float = None) -> ZapDaemon:
+        """
+        Lease a healthy daemon, waiting while all are busy.
+
+        Raises:
+            ZapPoolTimeout: no daemon became free within timeout (default: wait_seconds)
+            ZapPoolUnavailable: no daemon answers its API
+        """
+        self.warm()
+        deadline = time.monotonic() + (self.wait_seconds if timeout is None else timeout)
+        while True:
+            try:
+                daemon = self._take(deadline)
+            except ZapPoolUnavailable:
+                if time.monotonic() < deadline and self._rejoin_host_pool():
+                    continue
+                raise
+            if self._ensure_healthy(daemon):
+                daemon.retry_at = 0.0
+                return daemon
+            daemon.retry_at = time.monotonic() + self.retry_seconds
+            self._put_back(daemon)
+
+    def release(self, daemon: ZapDaemon, failed: bool = False):
+        """Return a daemon to the pool, recycling it in the background when due."""
+        daemon.scans += 1
+        if daemon.host and daemon.holder:
+            # Scans of every process on the host count towards the recycle
+            try:
+                daemon.scans = count_daemon_scan(daemon.lease_key)
+            except Exception as e:
+                logger.warning(f"[ZapPool] Could not count the scan of {daemon.api_url}: {str(e)}")
+        if failed:
+            # Re-check before the next lease
+            daemon.checked_at = 0.0
+        if daemon.host and daemon.scans >= self.max_scans_per_daemon:
+            threading.Thread(target=self._recycle, args=(daemon,), daemon=True).start()
+        else:
+            self._put_back(daemon)
+
+    def _recycle(self, daemon: ZapDaemon):
+        """
+        Restart a daemon that served its scans, keeping it leased meanwhile.
+        A daemon started by another process is shut down through its API and
+        restarted by that process's watchdog.
+        """
+        logger.info(f"[ZapPool] Recycling ZAP daemon at {daemon.api_url} after {daemon.scans} scans")
+        if daemon.managed:
+            restarted = self._restart(daemon)
+        else:
+            try:
+                daemon.call('core', 'action', 'shutdown')
+            except (requests.RequestException, ValueError):
+                pass
+            deadline = time.monotonic() + self.start_timeout
+            while daemon.is_alive() and time.monotonic() < deadline:
+                time.sleep(1)
+            restarted = self._wait_until_alive(daemon)
+        if restarted:
+            daemon.scans = 0
+            if daemon.holder:
+                try:
+                    reset_daemon_scans(daemon.lease_key)
+                except Exception as e:
+                    logger.warning(f"[ZapPool] Could not reset the scans of {daemon.api_url}: {str(e)}")
+        else:
+            daemon.retry_at = time.monotonic() + self.retry_seconds
+        self._put_back(daemon)
+
+    def isolate(self, daemon: ZapDaemon, name: str, target_url: str) -> ZapLease:
+        """Start a new session and a context that only includes the target's origin."""
+        parsed = urlparse(target_url)
+        origin = f'{parsed.scheme}://{parsed.netloc}'
+        daemon.call('core', 'action', 'newSession', name=name, overwrite='true')
+        context = daemon.call('context', 'action', 'newContext', contextName=name)
+        daemon.call('context', 'action', 'includeInContext', contextName=name, regex=f'{re.escape(origin)}.*')
+        return ZapLease(daemon, name, context.get('contextId'))
+
+    @contextmanager
+    def lease(self, name: str, target_url: str, timeout: float = None):
+        """
+        Lease a daemon for one scan, isolated in its own session and context.
+
+        Args:
+            name: Session and context name (unique per scan)
+            target_url: URL being scanned; its origin is the context scope
+            timeout: Seconds to wait for a free daemon (default: wait_seconds)
+        """
+        daemon = self.acquire(timeout)
+        failed = False
+        try:
+            yield self.isolate(daemon, name, target_url)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(daemon, failed=failed)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_zap_pool(zap_path: str = None) -> ZapPool:
+    """
+    The worker process's view of the ZAP pool, created from settings on first
+    use; in spawned mode the daemons are shared by every process on the host.
+
+    Args:
+        zap_path: ZAP launcher to use when ZAP_PATH is not configured
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ZapPool.from_settings(zap_path=zap_path)
+            atexit.register(_pool.shutdown)
+        return _pool
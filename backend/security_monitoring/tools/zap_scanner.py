@@ -7,9 +7,11 @@ import logging
 import time
 import subprocess
 import os
+import uuid
 from typing import Dict, List
 from urllib.parse import urlparse
 from django.conf import settings
+from .zap_pool import ZapPoolTimeout, ZapPoolUnavailable, get_zap_pool
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +72,33 @@ def get_zap_api_key():
     return getattr(settings, 'ZAP_API_KEY', os.environ.get('ZAP_API_KEY', None))
 
 
+def get_zap_client(api_url):
+    """ZAP API client for the daemon at api_url"""
+    api_key = get_zap_api_key()
+    # Only pass apikey if it's set (ZAP allows localhost without API key by default)
+    zap = ZAPv2(apikey=api_key) if api_key else ZAPv2()
+    # Set the correct base URL (ZAPv2 defaults to http://zap/JSON/)
+    zap.base = f"{api_url}/JSON/"
+    return zap
+
+
+def get_zap_alerts(zap, target):
+    """Alerts for the target from the current session"""
+    try:
+        alerts = zap.core.alerts(baseurl=target)
+        logger.info(f"[ZAP] Retrieved {len(alerts)} alerts from ZAP")
+    except Exception as e:
+        logger.error(f"[ZAP] Error retrieving alerts: {str(e)}")
+        # Try to get alerts without baseurl filter (the session only holds this scan)
+        try:
+            alerts = zap.core.alerts()
+            logger.info(f"[ZAP] Retrieved {len(alerts)} alerts (without baseurl filter)")
+        except Exception as e2:
+            logger.error(f"[ZAP] Error retrieving alerts without filter: {str(e2)}")
+            alerts = []
+    return alerts
+
+
 def ensure_zap_running(zap_path=None, timeout=30):
     """
     Ensure ZAP is running in daemon mode
@@ -155,7 +184,7 @@ def run_zap_scan(target_url: str, scan_type: str = 'baseline', zap_path: str = N
     Args:
         target_url: Target URL to scan
         scan_type: 'baseline' or 'full' scan
-        zap_path: Path to ZAP executable (optional, for auto-start)
+        zap_path: Path to ZAP executable, used by the daemon pool when ZAP_PATH is not set
         
     Returns:
         Dict with scan results and findings
@@ -178,73 +207,36 @@ def run_zap_scan(target_url: str, scan_type: str = 'baseline', zap_path: str = N
         }
     
     try:
-        # Ensure ZAP is running
-        if not ensure_zap_running(zap_path):
-            return {
-                'success': False,
-                'url': target_url,
-                'error': 'ZAP_NOT_RUNNING',
-                'error_message': 'ZAP daemon is not running. Start ZAP with: zap.sh -daemon -host 0.0.0.0 -port 8080',
-                'findings': [{
-                    'title': 'ZAP Not Running',
-                    'description': 'OWASP ZAP daemon is not running. Start it before running scans.',
-                    'severity': 'informational',
-                    'affected_url': target_url,
-                    'remediation': 'Start ZAP: zap.sh -daemon -host 0.0.0.0 -port 8080'
-                }]
-            }
-        
-        # Initialize ZAP client
-        # ZAP allows connections without API key from localhost by default
-        api_key = get_zap_api_key()
-        api_url = get_zap_api_url()
-        
-        # Only pass apikey if it's set
-        if api_key:
-            zap = ZAPv2(apikey=api_key)
-        else:
-            zap = ZAPv2()
-        
-        # Set the correct base URL (ZAPv2 defaults to http://zap/JSON/)
-        zap.base = f"{api_url}/JSON/"
-        
         # Parse URL
         parsed = urlparse(target_url)
         target = f"{parsed.scheme}://{parsed.netloc}"
         
-        logger.info(f"[ZAP] Starting {scan_type} scan on {target}")
-        
-        # Spider the target
-        logger.info("[ZAP] Spidering target...")
-        spider_id = zap.spider.scan(target)
-        while int(zap.spider.status(spider_id)) < 100:
-            time.sleep(2)
-        logger.info("[ZAP] Spider completed")
-        
-        # Wait for passive scanning
-        time.sleep(5)
-        
-        # Run active scan if full scan
-        if scan_type == 'full':
-            logger.info("[ZAP] Running active scan...")
-            ascan_id = zap.ascan.scan(target)
-            while int(zap.ascan.status(ascan_id)) < 100:
-                time.sleep(5)
-            logger.info("[ZAP] Active scan completed")
-        
-        # Get alerts
-        try:
-            alerts = zap.core.alerts(baseurl=target)
-            logger.info(f"[ZAP] Retrieved {len(alerts)} alerts from ZAP")
-        except Exception as e:
-            logger.error(f"[ZAP] Error retrieving alerts: {str(e)}")
-            # Try to get alerts without baseurl filter
-            try:
-                alerts = zap.core.alerts()
-                logger.info(f"[ZAP] Retrieved {len(alerts)} alerts (without baseurl filter)")
-            except Exception as e2:
-                logger.error(f"[ZAP] Error retrieving alerts without filter: {str(e2)}")
-                alerts = []
+        # Lease a warm daemon from the pool; the scan runs in its own session and context
+        pool = get_zap_pool(zap_path)
+        with pool.lease(f'scan-{uuid.uuid4().hex[:12]}', target) as lease:
+            zap = get_zap_client(lease.api_url)
+            
+            logger.info(f"[ZAP] Starting {scan_type} scan on {target} (daemon {lease.api_url})")
+            
+            # Spider the target
+            logger.info("[ZAP] Spidering target...")
+            spider_id = zap.spider.scan(target, contextname=lease.context_name)
+            while int(zap.spider.status(spider_id)) < 100:
+                time.sleep(2)
+            logger.info("[ZAP] Spider completed")
+            
+            # Wait for passive scanning
+            time.sleep(5)
+            
+            # Run active scan if full scan
+            if scan_type == 'full':
+                logger.info("[ZAP] Running active scan...")
+                ascan_id = zap.ascan.scan(target, contextid=lease.context_id)
+                while int(zap.ascan.status(ascan_id)) < 100:
+                    time.sleep(5)
+                logger.info("[ZAP] Active scan completed")
+            
+            alerts = get_zap_alerts(zap, target)
         
         # Convert alerts to findings
         severity_map = {
@@ -292,6 +284,34 @@ def run_zap_scan(target_url: str, scan_type: str = 'baseline', zap_path: str = N
             'summary': summary
         }
         
+    except ZapPoolUnavailable:
+        return {
+            'success': False,
+            'url': target_url,
+            'error': 'ZAP_NOT_RUNNING',
+            'error_message': 'No ZAP daemon is running. Set ZAP_PATH so the pool can start daemons, or start ZAP with: zap.sh -daemon -host 0.0.0.0 -port 8080',
+            'findings': [{
+                'title': 'ZAP Not Running',
+                'description': 'OWASP ZAP daemon is not running. Start it before running scans.',
+                'severity': 'informational',
+                'affected_url': target_url,
+                'remediation': 'Set ZAP_PATH, or start ZAP: zap.sh -daemon -host 0.0.0.0 -port 8080'
+            }]
+        }
+    except ZapPoolTimeout as e:
+        return {
+            'success': False,
+            'url': target_url,
+            'error': 'ZAP_POOL_BUSY',
+            'error_message': str(e),
+            'findings': [{
+                'title': 'ZAP Scan Not Started',
+                'description': 'All ZAP daemons stayed busy for the whole wait period.',
+                'severity': 'informational',
+                'affected_url': target_url,
+                'remediation': 'Increase ZAP_POOL_SIZE or ZAP_POOL_WAIT_SECONDS'
+            }]
+        }
     except Exception as e:
         logger.error(f"[ZAP] Error scanning {target_url}: {str(e)}")
         return {
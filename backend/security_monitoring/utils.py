@@ -3,8 +3,13 @@ Utility functions for security scan execution
 """
 
 import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from .models import SecurityScan, SecurityFinding
+from .orchestrator import get_cache_wait_seconds, get_lease_seconds
+from .scan_cache import run_cached
 from .tools.http_headers import check_http_security_headers
 from .tools.ssl_checker import check_ssl_tls
 from .tools import discover_dns_subdomains, run_zap_scan, run_nmap_scan, run_amass_scan
@@ -12,6 +17,53 @@ from .tools import discover_dns_subdomains, run_zap_scan, run_nmap_scan, run_ama
 logger = logging.getLogger(__name__)
 
 
+def persist_findings(scan, findings_data):
+    """
+    Create SecurityFinding rows for a list of finding dicts in one transaction.
+    """
+    if not findings_data:
+        return
+    with transaction.atomic():
+        SecurityFinding.objects.bulk_create([
+            SecurityFinding(
+                scan=scan,
+                title=finding_data.get('title', 'Security Finding'),
+                description=finding_data.get('description', ''),
+                severity=finding_data.get('severity', 'medium'),
+                status='new',
+                affected_url=finding_data.get('affected_url', scan.target_url),
+                evidence=finding_data.get('evidence', {}),
+                remediation=finding_data.get('remediation', '')
+            )
+            for finding_data in findings_data
+        ], batch_size=getattr(settings, 'SECURITY_FINDING_BATCH_SIZE', 50))
+
+
+class ScanIngest:
+    """
+    on_batch callback for streaming tools (nmap, amass): writes each batch of
+    findings as it arrives and publishes progress on the SecurityScan.
+
+    Each batch also extends the orchestrator lease, so a long scan that is
+    still producing output is not taken back by the resume sweep.
+    """
+
+    def __init__(self, scan):
+        self.scan = scan
+        self.persisted = 0
+
+    def __call__(self, findings, progress):
+        persist_findings(self.scan, findings)
+        self.persisted += len(findings)
+
+        now = timezone.now()
+        self.scan.progress = {**progress, 'findings': self.persisted, 'updated_at': now.isoformat()}
+        SecurityScan.objects.filter(id=self.scan.id).update(progress=self.scan.progress, updated_at=now)
+        SecurityScan.objects.filter(id=self.scan.id, status='running', lease_expires_at__isnull=False).update(
+            lease_expires_at=now + timedelta(seconds=get_lease_seconds(self.scan.scan_type))
+        )
+
+
 def execute_security_scan(scan_id):
     """
     Execute a security scan using the appropriate tool.
@@ -30,32 +82,59 @@ def execute_security_scan(scan_id):
         logger.info(f"[SecurityScan] Starting scan {scan_id}: {scan.scan_type} on {scan.target_url}")
         
         findings_data = []
+        result = {}
+        scan_config = scan.scan_config or {}
+        # nmap and amass findings are written while the tool runs (see ScanIngest)
+        ingest = ScanIngest(scan)
+        # Tool results are shared across scans of the same target (see scan_cache)
+        force_fresh = bool(scan_config.get('force_fresh'))
+        # Stop waiting for another worker's run before this task's time limit
+        max_wait = get_cache_wait_seconds(scan.scan_type)
         
         # Execute scan based on type
         if scan.scan_type == 'headers_check':
-            result = check_http_security_headers(scan.target_url)
+            result = run_cached(
+                'headers', scan.target_url, {},
+                lambda: check_http_security_headers(scan.target_url),
+                force_fresh=force_fresh, max_wait=max_wait
+            )
             findings_data = result.get('findings', [])
             
         elif scan.scan_type == 'ssl_check':
-            result = check_ssl_tls(scan.target_url)
+            result = run_cached(
+                'ssl', scan.target_url, {},
+                lambda: check_ssl_tls(scan.target_url),
+                force_fresh=force_fresh, max_wait=max_wait
+            )
             findings_data = result.get('findings', [])
             
         elif scan.scan_type == 'dns_discovery':
             # Use amass for enhanced DNS discovery (fallback to basic if not available)
-            scan_config = scan.scan_config or {}
-            result = run_amass_scan(scan.target_url, scan_config=scan_config)
+            result = run_cached(
+                'amass', scan.target_url, scan_config,
+                lambda: run_amass_scan(scan.target_url, scan_config=scan_config, on_batch=ingest),
+                force_fresh=force_fresh, max_wait=max_wait
+            )
             if not result.get('success') and 'AMASS_NOT_FOUND' in result.get('error', ''):
                 # Fallback to basic DNS discovery
                 logger.info(f"[SecurityScan] Amass not found, using basic DNS discovery for {scan_id}")
-                result = discover_dns_subdomains(scan.target_url)
+                wordlist = scan_config.get('wordlist')
+                result = run_cached(
+                    'dns', scan.target_url, {'wordlist': wordlist},
+                    lambda: discover_dns_subdomains(scan.target_url, wordlist=wordlist),
+                    force_fresh=force_fresh, max_wait=max_wait
+                )
             findings_data = result.get('findings', [])
             
         elif scan.scan_type == 'dast':
             # Use OWASP ZAP for DAST scanning
-            scan_config = scan.scan_config or {}
             scan_type = scan_config.get('scan_type', 'baseline')  # 'baseline' or 'full'
             zap_path = scan_config.get('zap_path', None)
-            result = run_zap_scan(scan.target_url, scan_type=scan_type, zap_path=zap_path)
+            result = run_cached(
+                'zap', scan.target_url, {'scan_type': scan_type},
+                lambda: run_zap_scan(scan.target_url, scan_type=scan_type, zap_path=zap_path),
+                force_fresh=force_fresh, max_wait=max_wait
+            )
             
             # Check if scan failed
             if not result.get('success', True):
@@ -79,9 +158,12 @@ def execute_security_scan(scan_id):
             
         elif scan.scan_type == 'port_scan':
             # Use Nmap for port scanning
-            scan_config = scan.scan_config or {}
             scan_options = scan_config.get('scan_options', None)
-            result = run_nmap_scan(scan.target_url, scan_options=scan_options)
+            result = run_cached(
+                'nmap', scan.target_url, {'scan_options': scan_options},
+                lambda: run_nmap_scan(scan.target_url, scan_options=scan_options, on_batch=ingest),
+                force_fresh=force_fresh, max_wait=max_wait
+            )
             findings_data = result.get('findings', [])
             
         else:
@@ -93,23 +175,20 @@ def execute_security_scan(scan_id):
                 'affected_url': scan.target_url
             }]
         
-        # Create SecurityFinding records
-        for finding_data in findings_data:
-            SecurityFinding.objects.create(
-                scan=scan,
-                title=finding_data.get('title', 'Security Finding'),
-                description=finding_data.get('description', ''),
-                severity=finding_data.get('severity', 'medium'),
-                status='new',
-                affected_url=finding_data.get('affected_url', scan.target_url),
-                evidence=finding_data.get('evidence', {}),
-                remediation=finding_data.get('remediation', '')
-            )
+        # Create SecurityFinding records (streamed findings are already saved; they
+        # are a prefix of findings_data, which is complete for cached results)
+        persist_findings(scan, findings_data[ingest.persisted:])
         
-        # Update status to completed
+        # Update status to completed; partial when a streaming tool timed out
         scan.status = 'completed'
         scan.completed_at = timezone.now()
-        scan.save()
+        scan.progress = {
+            **scan.progress,
+            'findings': len(findings_data),
+            'partial': bool(result.get('partial')),
+            'updated_at': scan.completed_at.isoformat(),
+        }
+        scan.save(update_fields=['status', 'completed_at', 'progress', 'updated_at'])
         
         logger.info(f"[SecurityScan] Completed scan {scan_id} with {len(findings_data)} findings")
         
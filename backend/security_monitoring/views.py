@@ -19,7 +19,7 @@ from .serializers import (
     SecurityScanScheduleSerializer,
     SecurityToolSerializer
 )
-from .utils import execute_security_scan
+from .tasks import schedule_scan
 import logging
 
 logger = logging.getLogger(__name__)
@@ -112,17 +112,17 @@ def scans_list(request):
                 try:
                     scan = serializer.save()
                     
-                    # Auto-execute scan if not scheduled for future
+                    # Auto-run scan if not scheduled for future
                     auto_run = data.get('auto_run', True)  # Default to True for immediate execution
                     if auto_run and not scan.scheduled_at:
                         try:
-                            # Execute scan in background (synchronously for now)
-                            execute_security_scan(scan.id)
+                            # Runs on a worker within the per-tool limits (see tasks.schedule_scan)
+                            schedule_scan(scan)
                             scan.refresh_from_db()
-                            logger.info(f"[SecurityScan] Auto-executed scan {scan.id}")
+                            logger.info(f"[SecurityScan] Queued scan {scan.id}")
                         except Exception as exec_error:
-                            # If execution fails, scan remains in pending state
-                            logger.warning(f"[SecurityScan] Auto-execution failed for scan {scan.id}: {str(exec_error)}")
+                            # If queueing fails, scan remains in pending state
+                            logger.warning(f"[SecurityScan] Could not queue scan {scan.id}: {str(exec_error)}")
                             # Don't fail the creation, just log the warning
                     
                     response_serializer = SecurityScanSerializer(scan)
@@ -175,15 +175,15 @@ def run_scan(request, pk):
                 'detail': f'Scan {pk} has already been completed'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Execute the scan (this will update status to running, then completed/failed)
+        # Queue the scan; it is running once a worker has claimed a free slot for its tool
         try:
-            execute_security_scan(pk)
+            schedule_scan(scan)
             scan.refresh_from_db()
             serializer = SecurityScanSerializer(scan)
             return Response({
-                'message': 'Scan started successfully',
+                'message': 'Scan queued successfully',
                 'scan': serializer.data
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             import traceback
             error_trace = traceback.format_exc()
@@ -6,7 +6,6 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils import timezone
 from django.db import transaction
 from users.permission_classes import HasFeaturePermission
 from .models import SecurityAudit, SecurityScan, SecurityFinding
@@ -16,10 +15,9 @@ from .serializers import (
     SecurityScanSerializer,
     SecurityFindingSerializer
 )
-from .utils import execute_security_scan
+from .tasks import schedule_audit
 from django.conf import settings
 import logging
-import threading
 
 logger = logging.getLogger(__name__)
 
@@ -52,57 +50,6 @@ DEFAULT_SCAN_SEQUENCE = [
 ]
 
 
-def orchestrate_audit_scans(audit_id):
-    """
-    Background function to orchestrate and execute all scans for an audit
-    """
-    try:
-        audit = SecurityAudit.objects.get(id=audit_id)
-        audit.status = 'running'
-        audit.started_at = timezone.now()
-        audit.save()
-        
-        logger.info(f"[SecurityAudit] Starting orchestration for audit {audit_id}")
-        
-        # Get all scan types to run
-        scans_to_run = audit.scans.filter(status='pending').order_by('id')
-        
-        # Execute scans sequentially
-        for scan in scans_to_run:
-            try:
-                logger.info(f"[SecurityAudit] Executing scan {scan.id}: {scan.scan_type}")
-                execute_security_scan(scan.id)
-                scan.refresh_from_db()
-                
-                # Update audit statistics after each scan
-                audit.update_statistics()
-                
-            except Exception as e:
-                logger.error(f"[SecurityAudit] Error executing scan {scan.id}: {str(e)}")
-                scan.status = 'failed'
-                scan.save()
-                audit.update_statistics()
-        
-        # Mark audit as completed
-        audit.status = 'completed'
-        audit.completed_at = timezone.now()
-        audit.update_statistics()
-        audit.save()
-        
-        logger.info(f"[SecurityAudit] Completed audit {audit_id}")
-        
-    except SecurityAudit.DoesNotExist:
-        logger.error(f"[SecurityAudit] Audit {audit_id} not found")
-    except Exception as e:
-        logger.error(f"[SecurityAudit] Error orchestrating audit {audit_id}: {str(e)}")
-        try:
-            audit = SecurityAudit.objects.get(id=audit_id)
-            audit.status = 'failed'
-            audit.save()
-        except:
-            pass
-
-
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, HasFeaturePermission('security_monitoring.view')])
 def create_audit(request):
@@ -116,6 +63,7 @@ def create_audit(request):
         
         target_url = serializer.validated_data['target_url']
         scan_types = serializer.validated_data.get('scan_types', ['all'])
+        force_fresh = serializer.validated_data.get('force_fresh', False)
         
         # Determine which scan types to run
         if 'all' in scan_types:
@@ -130,28 +78,25 @@ def create_audit(request):
             created_by=request.user
         )
         
-        # Create scans for each scan type
-        created_scans = []
-        for scan_type in scan_types_to_run:
-            # Determine tool to use (will be auto-selected in execute_security_scan)
-            scan = SecurityScan.objects.create(
+        # Create scans for each scan type (tool is auto-selected in execute_security_scan)
+        created_scans = SecurityScan.objects.bulk_create([
+            SecurityScan(
                 scan_type=scan_type,
                 target_url=target_url,
                 status='pending',
                 audit=audit,
                 created_by=request.user,
-                scan_config={}
+                scan_config={'force_fresh': True} if force_fresh else {}
             )
-            created_scans.append(scan)
+            for scan_type in scan_types_to_run
+        ])
         
         # Update audit statistics
         audit.total_scans = len(created_scans)
         audit.save()
         
-        # Start orchestration in background thread
-        thread = threading.Thread(target=orchestrate_audit_scans, args=(audit.id,))
-        thread.daemon = True
-        thread.start()
+        # Independent scans are dispatched concurrently (see security_monitoring.orchestrator)
+        schedule_audit(audit)
         
         # Return audit with scans
         audit_serializer = SecurityAuditSerializer(audit)
@@ -181,13 +126,11 @@ def audit_detail(request, pk):
     Get security audit details with scans and findings
     """
     try:
+        # Statistics are kept up to date by the orchestrator on every scan state change
         audit = SecurityAudit.objects.get(pk=pk)
         
-        # Update statistics
-        audit.update_statistics()
-        
         audit_serializer = SecurityAuditSerializer(audit)
-        scans = audit.scans.all().order_by('created_at')
+        scans = audit.scans.all().order_by('created_at').prefetch_related('findings')
         scans_serializer = SecurityScanSerializer(scans, many=True)
         
         # Get findings grouped by category
@@ -0,0 +1,154 @@
+"""
+Django management command to benchmark the sitemap crawler engine.
+
+Serves a synthetic site from a local HTTP server (a homepage linking to
+sections, each section linking to its pages and a few siblings, plus the
+usual noise: assets, query strings, CMS archive links) and crawls it with
+the concurrent engine and, optionally, with a single worker. Both crawls
+must produce identical nodes and parent-child relationships.
+
+Usage:
+    python manage.py benchmark_sitemap_crawler
+    python manage.py benchmark_sitemap_crawler --pages 10000 --workers 16 --latency 0.02
+    python manage.py benchmark_sitemap_crawler --pages 500 --serial
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from users.sitemap_crawler import SitemapCrawler
+
+
+ORIGINAL_FETCH_DELAY = 0.5
+
+
+class SyntheticSiteHandler(BaseHTTPRequestHandler):
+    """Synthetic site: / -> /section-<i> -> /section-<i>/page-<j>."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    sections = 100
+    pages_per_section = 99
+    latency = 0.0
+    crawl_delay = None
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.path == '/robots.txt':
+            body = 'User-agent: *\nDisallow:\n'
+            if self.crawl_delay:
+                body += f'Crawl-delay: {self.crawl_delay}\n'
+            return self._respond(200, body, 'text/plain')
+
+        parts = [part for part in self.path.split('/') if part]
+        if not parts:
+            links = [f'/section-{i}' for i in range(self.sections)]
+            return self._respond(200, self._page('Home', links))
+        try:
+            section = int(parts[0].split('-')[1])
+            page = int(parts[1].split('-')[1]) if len(parts) > 1 else None
+        except (IndexError, ValueError):
+            return self._respond(404, self._page('Page not found', []))
+        if section >= self.sections or (page is not None and page >= self.pages_per_section) or len(parts) > 2:
+            return self._respond(404, self._page('Page not found', []))
+
+        if page is None:
+            links = [f'/section-{section}/page-{j}' for j in range(self.pages_per_section)]
+            return self._respond(200, self._page(f'Section {section}', links))
+        siblings = [
+            f'/section-{section}/page-{(page + offset) % self.pages_per_section}' for offset in (1, 2, 3)
+        ]
+        links = siblings + [f'/section-{(section + 1) % self.sections}', '/']
+        return self._respond(200, self._page(f'Section {section} page {page}', links))
+
+    def _page(self, title, links):
+        noise = [
+            '/static/site.css', '/static/logo.png', '/?ref=nav', '#top', 'mailto:info@example.com',
+            '/tag/news/', '/category/updates/', 'https://external.example.org/',
+        ]
+        anchors = ''.join(f'<a href="{href}">{href}</a>' for href in links + noise)
+        return f'<!DOCTYPE html><html><head><title>{title}</title></head><body><nav>{anchors}</nav></body></html>'
+
+    def _respond(self, status_code, body, content_type='text/html; charset=utf-8'):
+        payload = body.encode('utf-8')
+        try:
+            self.send_response(status_code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        return
+
+
+class SyntheticSiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the concurrent sitemap crawler against a local synthetic site'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=10000,
+                            help='Pages on the synthetic site and max_pages for the crawl (default: 10000)')
+        parser.add_argument('--workers', type=int, default=16,
+                            help='Concurrent fetch workers (default: 16)')
+        parser.add_argument('--rate', type=float, default=1000.0,
+                            help='Requests per second per host (default: 1000, i.e. effectively unthrottled)')
+        parser.add_argument('--latency', type=float, default=0.01,
+                            help='Simulated server latency per request in seconds (default: 0.01)')
+        parser.add_argument('--crawl-delay', type=float, default=None,
+                            help='Crawl-delay to advertise in robots.txt')
+        parser.add_argument('--serial', action='store_true',
+                            help='Also crawl with a single worker and check the output is identical')
+
+    def handle(self, *args, **options):
+        pages = max(2, options['pages'])
+        sections = max(1, int(pages ** 0.5))
+        handler = type('BenchmarkSiteHandler', (SyntheticSiteHandler,), {
+            'sections': sections,
+            'pages_per_section': max(1, (pages - 1) // sections - 1),
+            'latency': options['latency'],
+            'crawl_delay': options['crawl_delay'],
+        })
+        server = SyntheticSiteServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        start_url = f'http://127.0.0.1:{server.server_address[1]}/'
+
+        try:
+            self.stdout.write('=' * 60)
+            self.stdout.write('SITEMAP CRAWLER BENCHMARK')
+            self.stdout.write('=' * 60)
+            self.stdout.write(f'Site: {start_url} ({sections} sections, max_pages={pages})')
+
+            concurrent = self._run(f'{options["workers"]} workers', start_url, pages, options['workers'], options)
+            if options['serial']:
+                serial = self._run('1 worker', start_url, pages, 1, options)
+                identical = concurrent[0] == serial[0] and concurrent[1] == serial[1]
+                style = self.style.SUCCESS if identical else self.style.ERROR
+                self.stdout.write(style(f'Identical output: {identical}'))
+                self.stdout.write(
+                    f'Original serial crawl (+{ORIGINAL_FETCH_DELAY}s sleep per fetch), estimated: '
+                    f'{serial[2] + ORIGINAL_FETCH_DELAY * len(serial[0]):.1f}s'
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, label, start_url, pages, workers, options):
+        started = time.perf_counter()
+        with SitemapCrawler(max_pages=pages, max_depth=4, max_workers=workers,
+                            rate_per_host=options['rate'], burst=workers) as crawler:
+            nodes, parent_child_map = crawler.crawl(start_url)
+        elapsed = time.perf_counter() - started
+        rate = len(nodes) / elapsed if elapsed else 0
+        self.stdout.write(f'{label:>12}: {len(nodes)} pages in {elapsed:.2f}s ({rate:.0f} pages/s)')
+        return nodes, parent_child_map, elapsed
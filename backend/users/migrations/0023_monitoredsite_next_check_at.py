@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:46
+
+import datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import DurationField, ExpressionWrapper, F, Value
+
+
+def backfill_next_check_at(apps, schema_editor):
+    """Schedule already-checked sites from their last check; never-checked sites stay due now."""
+    MonitoredSite = apps.get_model('users', 'MonitoredSite')
+    interval = ExpressionWrapper(
+        F('check_interval') * Value(datetime.timedelta(minutes=1)),
+        output_field=DurationField(),
+    )
+    MonitoredSite.objects.filter(last_check__isnull=False).update(
+        next_check_at=F('last_check') + interval
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0022_remove_billingaddress_subscription_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monitoredsite',
+            name='next_check_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='When the site is next due for a status check'),
+        ),
+        migrations.RunPython(backfill_next_check_at, migrations.RunPython.noop),
+    ]
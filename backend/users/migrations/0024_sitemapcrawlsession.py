@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:15
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0023_monitoredsite_next_check_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapCrawlSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('start_url', models.TextField()),
+                ('max_pages', models.PositiveIntegerField(default=100)),
+                ('max_depth', models.PositiveSmallIntegerField(default=4)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], db_index=True, default='pending', max_length=16)),
+                ('frontier', models.JSONField(blank=True, default=list, help_text='Checkpointed (url, depth, parent_url) queue')),
+                ('pages_found', models.PositiveIntegerField(default=0)),
+                ('urls_visited', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last checkpoint written by the crawling worker', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sitemap_crawl_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SitemapCrawlPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('url', models.TextField()),
+                ('outcome', models.CharField(choices=[('success', 'Success'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='success', max_length=8)),
+                ('title', models.TextField(blank=True)),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('priority', models.FloatField(default=0)),
+                ('last_modified', models.TextField(blank=True)),
+                ('parent_url', models.TextField(blank=True, help_text='Logical parent in the sitemap hierarchy')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='users.sitemapcrawlsession')),
+            ],
+            options={
+                'ordering': ['session', 'sequence'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sitemapcrawlsession',
+            index=models.Index(fields=['status', 'heartbeat_at'], name='users_sitem_status_8ad3d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sitemapcrawlpage',
+            index=models.Index(fields=['session', 'sequence'], name='users_sitem_session_c16e47_idx'),
+        ),
+    ]
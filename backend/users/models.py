@@ -175,6 +175,7 @@ class MonitoredSite(models.Model):
     ssl_valid = models.BooleanField(null=True, blank=True)
     ssl_expires_in = models.IntegerField(null=True, blank=True)
     error_message = models.TextField(blank=True)
+    next_check_at = models.DateTimeField(default=timezone.now, db_index=True, help_text='When the site is next due for a status check')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -185,3 +186,99 @@ class MonitoredSite(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.url}"
 
+    def schedule_next_check(self, checked_at=None):
+        """Set next_check_at from the last check time and check_interval (no save)."""
+        from datetime import timedelta
+        base = checked_at or self.last_check or timezone.now()
+        self.next_check_at = base + timedelta(minutes=self.check_interval)
+        return self.next_check_at
+
+
+
+class SitemapCrawlSession(models.Model):
+    """
+    A background sitemap crawl.
+
+    The frontier is checkpointed together with each batch of crawled pages,
+    so a crawl interrupted by a worker restart resumes where it left off.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sitemap_crawl_sessions')
+    start_url = models.TextField()
+    max_pages = models.PositiveIntegerField(default=100)
+    max_depth = models.PositiveSmallIntegerField(default=4)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='pending', db_index=True)
+    frontier = models.JSONField(default=list, blank=True, help_text='Checkpointed (url, depth, parent_url) queue')
+    pages_found = models.PositiveIntegerField(default=0)
+    urls_visited = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text='Last checkpoint written by the crawling worker')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'heartbeat_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.start_url} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+
+class SitemapCrawlPage(models.Model):
+    """
+    One URL fetched by a SitemapCrawlSession, in crawl order.
+
+    Failed and skipped (non-content) URLs are kept so a resumed crawl does
+    not fetch them again; only 'success' rows are sitemap nodes.
+    """
+    OUTCOME_CHOICES = (
+        ('success', 'Success'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    )
+
+    session = models.ForeignKey(SitemapCrawlSession, on_delete=models.CASCADE, related_name='pages')
+    sequence = models.PositiveIntegerField()
+    url = models.TextField()
+    outcome = models.CharField(max_length=8, choices=OUTCOME_CHOICES, default='success')
+    title = models.TextField(blank=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    priority = models.FloatField(default=0)
+    last_modified = models.TextField(blank=True)
+    parent_url = models.TextField(blank=True, help_text='Logical parent in the sitemap hierarchy')
+
+    class Meta:
+        ordering = ['session', 'sequence']
+        indexes = [
+            models.Index(fields=['session', 'sequence']),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({self.outcome})"
+
+    def to_node(self):
+        """Sitemap node in the same shape as crawl_website() output."""
+        return {
+            'url': self.url,
+            'title': self.title,
+            'depth': self.depth,
+            'status': 'success',
+            'lastModified': self.last_modified,
+            'priority': self.priority,
+            'children': []
+        }
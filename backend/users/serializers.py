@@ -106,10 +106,11 @@ class MonitoredSiteSerializer(serializers.ModelSerializer):
             'ssl_valid',
             'ssl_expires_in',
             'error_message',
+            'next_check_at',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'next_check_at', 'created_at', 'updated_at']
 
 
 class MonitoredSiteUpdateSerializer(serializers.ModelSerializer):
@@ -127,4 +128,12 @@ class MonitoredSiteUpdateSerializer(serializers.ModelSerializer):
             'error_message',
         ]
 
+    def update(self, instance, validated_data):
+        # Keep the check schedule in step with interval or last-check edits
+        if 'check_interval' in validated_data or 'last_check' in validated_data:
+            instance.check_interval = validated_data.get('check_interval', instance.check_interval)
+            instance.last_check = validated_data.get('last_check', instance.last_check)
+            validated_data['next_check_at'] = instance.schedule_next_check()
+        return super().update(instance, validated_data)
+
 
@@ -0,0 +1,519 @@
+"""
+Concurrent crawler engine for sitemap generation.
+
+Replaces the serial BFS (one fetch at a time, fixed 0.5s sleep) with:
+
+- A bounded thread pool of fetch workers with one pooled requests.Session per host
+- Per-host token-bucket rate limiting, slowed down to the robots.txt Crawl-delay
+- A set-backed frontier/visited index (O(1) membership instead of scanning the queue)
+- lxml link and title extraction (BeautifulSoup's html.parser when lxml is missing)
+
+Fetches run concurrently but results are committed in frontier order, so the
+pages, depths and parent/child relationships are the same as the serial crawl.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from users.sitemap_views import (
+    calculate_priority,
+    calculate_url_depth,
+    determine_logical_parent,
+    normalize_url,
+)
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+    LXML_AVAILABLE = True
+except ImportError:
+    from bs4 import BeautifulSoup
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+USER_AGENT = 'Mozilla/5.0 (compatible; SitemapGenerator/1.0)'
+ROBOTS_USER_AGENT = 'SitemapGenerator'
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RATE_PER_HOST = 5.0
+DEFAULT_BURST = 5
+DEFAULT_TIMEOUT = 10
+
+SKIP_LINK_PREFIXES = ('#', 'mailto:', 'tel:', 'javascript:')
+
+# File extensions that shouldn't be in sitemaps
+SKIP_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.css', '.js', '.xml', '.txt',
+    '.zip', '.doc', '.docx', '.xls', '.xlsx',
+)
+
+# Non-page content (WordPress and general CMS patterns)
+SKIP_URL_PATTERNS = (
+    '/author/', '/authors/',
+    '/category/', '/categories/', '/cat/',
+    '/tag/', '/tags/',
+    '/archive/', '/archives/',
+    '/feed/', '/feeds/',
+    '/wp-admin/', '/wp-login/', '/wp-content/',
+    '/admin/', '/login/', '/register/',
+    '/search/', '/api/',
+    '/attachment/', '/attachments/',
+    '/media/', '/uploads/',
+    '/date/', '/year/', '/month/',
+    '/comments/', '/comment/',
+    '/rss/', '/atom/',
+)
+
+# Titles of pages that are clearly not content pages
+SKIP_TITLE_PATTERNS = (
+    'author:', 'category:', 'tag:', 'archive:',
+    'login', 'register', 'sign in', 'sign up',
+    'search results', '404', 'page not found',
+    'error', 'admin', 'dashboard',
+)
+
+
+def is_blog_content(url):
+    url_lower = url.lower()
+    return '/blog' in url_lower or '/post' in url_lower or '/article' in url_lower
+
+
+def is_skipped_title(title_text):
+    title_lower = title_text.lower()
+    return any(pattern in title_lower for pattern in SKIP_TITLE_PATTERNS)
+
+
+def extract_title_and_links(html):
+    """
+    Extract the page title and the href of every <a href> in document order.
+
+    Args:
+        html: Page HTML (str)
+
+    Returns:
+        tuple(title_text, hrefs); title_text is 'Untitled' when there is no <title>
+    """
+    if not LXML_AVAILABLE:
+        soup = BeautifulSoup(html, 'html.parser')
+        title = soup.find('title')
+        title_text = title.get_text().strip() if title else 'Untitled'
+        return title_text, [link['href'] for link in soup.find_all('a', href=True)]
+
+    if not html or not html.strip():
+        return 'Untitled', []
+    try:
+        document = lxml.html.fromstring(html)
+    except ValueError:
+        # Strings with an XML encoding declaration must be parsed as bytes
+        document = lxml.html.fromstring(html.encode('utf-8'))
+    except ParserError:
+        return 'Untitled', []
+
+    title = document.find('.//title')
+    title_text = title.text_content().strip() if title is not None else 'Untitled'
+    hrefs = [link.get('href') for link in document.iterfind('.//a[@href]')]
+    return title_text, hrefs
+
+
+def filter_links(hrefs, current_url, start_url, base_domain):
+    """
+    Resolve and filter hrefs found on current_url into crawlable page URLs.
+
+    Applies the same rules as the original crawler: HTTP(S) only, no files,
+    no query strings or fragments, no CMS/archive patterns, same domain.
+
+    Returns:
+        List of normalized URLs in document order (may contain duplicates)
+    """
+    urls = []
+    for href in hrefs:
+        # Skip non-HTTP links and fragments
+        if not href or href.startswith(SKIP_LINK_PREFIXES):
+            continue
+
+        absolute_url = urljoin(current_url, href)
+        parsed_link = urlparse(absolute_url)
+        if parsed_link.scheme not in ('http', 'https'):
+            continue
+        if parsed_link.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+
+        normalized_url = normalize_url(absolute_url)
+
+        # Skip URLs with query parameters
+        if '?' in absolute_url or '#' in absolute_url:
+            continue
+
+        # Don't filter the start URL too aggressively
+        normalized_lower = normalized_url.lower()
+        if normalized_url != start_url and any(pattern in normalized_lower for pattern in SKIP_URL_PATTERNS):
+            continue
+
+        # Only crawl links from the same domain
+        if parsed_link.netloc == base_domain:
+            urls.append(normalized_url)
+    return urls
+
+
+def parse_crawl_delay(lines, user_agent=ROBOTS_USER_AGENT):
+    """
+    Crawl-delay (seconds) for user_agent from robots.txt lines.
+
+    urllib.robotparser only accepts integer delays, so fractional values such
+    as ``Crawl-delay: 0.5`` are parsed here. A group naming the user agent
+    wins over the ``*`` group.
+
+    Returns:
+        float or None
+    """
+    delays = {}
+    agents = []
+    in_rules = False
+    for raw_line in lines:
+        line = raw_line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = (part.strip() for part in line.split(':', 1))
+        field = field.lower()
+        if field == 'user-agent':
+            if in_rules:
+                agents = []
+                in_rules = False
+            agents.append(value.lower())
+            continue
+        in_rules = True
+        if field == 'crawl-delay':
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for agent in agents:
+                delays.setdefault(agent, delay)
+
+    user_agent = user_agent.lower()
+    for agent, delay in delays.items():
+        if agent != '*' and agent in user_agent:
+            return delay
+    return delays.get('*')
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, up to ``capacity``.
+
+    acquire() reserves a token and sleeps until it is due, so concurrent
+    callers are spaced out at the bucket's rate instead of bursting together.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(float(capacity), 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SitemapCrawler:
+    """
+    Concurrent, politeness-aware sitemap crawler.
+
+    Usage:
+        with SitemapCrawler(max_pages=500) as crawler:
+            nodes, parent_child_map = crawler.crawl('https://example.com')
+    """
+
+    def __init__(self, max_pages=100, max_depth=4, max_workers=None, rate_per_host=None,
+                 burst=None, timeout=None, obey_robots_disallow=None, track_relationships=True):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_workers = max(1, max_workers or getattr(settings, 'SITEMAP_CRAWL_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+        self.rate_per_host = rate_per_host or getattr(settings, 'SITEMAP_CRAWL_RATE_PER_HOST', DEFAULT_RATE_PER_HOST)
+        self.burst = burst or getattr(settings, 'SITEMAP_CRAWL_BURST', DEFAULT_BURST)
+        self.timeout = timeout or getattr(settings, 'SITEMAP_CRAWL_TIMEOUT', DEFAULT_TIMEOUT)
+        if obey_robots_disallow is None:
+            obey_robots_disallow = getattr(settings, 'SITEMAP_CRAWL_OBEY_ROBOTS_DISALLOW', False)
+        self.obey_robots_disallow = obey_robots_disallow
+        # Sessions persist each node's parent instead of keeping the whole map in memory
+        self.track_relationships = track_relationships
+
+        self._sessions = {}
+        self._buckets = {}
+        self._robots = {}
+        self._lock = threading.Lock()
+        self._host_locks = {}
+
+        # Crawl state: frontier of (url, depth, parent_url), every URL ever
+        # queued (set-backed membership), and successfully fetched pages
+        self.frontier = deque()
+        self.seen = set()
+        self.visited = set()
+        self.parent_child_map = {}
+        self._in_flight = deque()
+        self.start_url = None
+        self.base_domain = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _get_host_lock(self, host):
+        with self._lock:
+            return self._host_locks.setdefault(host, threading.Lock())
+
+    def _get_session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                self._sessions[host] = session
+            return session
+
+    def _get_robots(self, scheme, host):
+        """
+        Fetch and cache robots.txt for a host.
+
+        Returns:
+            tuple(RobotFileParser or None, crawl_delay or None)
+        """
+        with self._get_host_lock(host):
+            if host in self._robots:
+                return self._robots[host]
+            robots, crawl_delay = None, None
+            try:
+                response = self._get_session(host).get(f'{scheme}://{host}/robots.txt', timeout=self.timeout)
+                if response.status_code == 200:
+                    lines = response.text.splitlines()
+                    robots = RobotFileParser()
+                    robots.parse(lines)
+                    crawl_delay = parse_crawl_delay(lines)
+            except requests.RequestException as e:
+                logger.debug(f'[SitemapCrawler] Could not fetch robots.txt for {host}: {str(e)}')
+            self._robots[host] = (robots, crawl_delay)
+            return self._robots[host]
+
+    def _get_bucket(self, scheme, host):
+        """
+        Per-host token bucket; a robots.txt Crawl-delay lowers the rate to one request per delay.
+        """
+        with self._lock:
+            bucket = self._buckets.get(host)
+        if bucket is not None:
+            return bucket
+
+        rate, burst = self.rate_per_host, self.burst
+        _, crawl_delay = self._get_robots(scheme, host)
+        if crawl_delay:
+            rate, burst = min(rate, 1.0 / crawl_delay), 1
+            logger.info(f'[SitemapCrawler] Using robots.txt Crawl-delay of {crawl_delay}s for {host}')
+
+        with self._lock:
+            return self._buckets.setdefault(host, TokenBucket(rate, burst))
+
+    def _fetch(self, url):
+        """
+        Fetch and parse one page (runs on a worker thread).
+
+        Returns:
+            dict with status_code, title, links and last_modified, or error
+        """
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        try:
+            self._get_bucket(parsed.scheme, host).acquire()
+            if self.obey_robots_disallow:
+                robots, _ = self._get_robots(parsed.scheme, host)
+                if robots is not None and not robots.can_fetch(ROBOTS_USER_AGENT, url):
+                    return {'error': 'Disallowed by robots.txt'}
+
+            response = self._get_session(host).get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                return {'status_code': response.status_code}
+
+            title_text, hrefs = extract_title_and_links(response.text)
+            return {
+                'status_code': 200,
+                'title': title_text,
+                'links': filter_links(hrefs, url, self.start_url, self.base_domain),
+                'last_modified': response.headers.get('last-modified', ''),
+            }
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _enqueue(self, url, parent_url):
+        # Depth follows the URL hierarchy, not discovery order
+        depth = calculate_url_depth(url, self.start_url)
+        if url in self.seen or depth > self.max_depth:
+            return
+        self.seen.add(url)
+        self.frontier.append((url, depth, parent_url))
+
+    def _commit(self, item, result):
+        """
+        Apply one fetch result in frontier order.
+
+        Returns:
+            tuple(outcome, node, logical_parent); outcome is 'success',
+            'skipped' (fetched, not a content page) or 'failed'
+        """
+        current_url, depth, parent_url = item
+        if 'error' in result:
+            logger.debug(f'[SitemapCrawler] Error crawling {current_url}: {result["error"]}')
+            return 'failed', None, None
+        if result['status_code'] != 200:
+            logger.debug(f'[SitemapCrawler] Failed to fetch {current_url}: Status {result["status_code"]}')
+            return 'failed', None, None
+
+        self.visited.add(current_url)
+        title_text = result['title']
+
+        # Skip pages that are clearly not content pages based on title,
+        # but never the starting URL (homepage) or blog content
+        if current_url != self.start_url and not is_blog_content(current_url) and is_skipped_title(title_text):
+            logger.debug(f'[SitemapCrawler] Skipping non-content page: {current_url} - {title_text}')
+            return 'skipped', None, None
+
+        node = {
+            'url': current_url,
+            'title': title_text,
+            'depth': depth,
+            'status': 'success',
+            'lastModified': result['last_modified'],
+            'priority': calculate_priority(current_url, depth),
+            'children': []
+        }
+
+        # Track parent-child relationship based on URL structure, not discovery order
+        # NEVER treat the homepage as a child of any other page
+        logical_parent = None
+        if parent_url and current_url != self.start_url:
+            logical_parent = determine_logical_parent(current_url, parent_url, self.start_url)
+            if logical_parent == current_url:  # Avoid self-reference
+                logical_parent = None
+            if logical_parent and self.track_relationships:
+                self.parent_child_map.setdefault(logical_parent, []).append(current_url)
+
+        if depth < self.max_depth:
+            for url in result['links']:
+                if url not in self.visited:
+                    self._enqueue(url, current_url)
+
+        return 'success', node, logical_parent
+
+    def restore(self, frontier, seen, visited):
+        """
+        Restore crawl state saved by a previous run (see pending_frontier()).
+
+        Args:
+            frontier: Iterable of (url, depth, parent_url) in crawl order
+            seen: URLs already queued, fetched or failed
+            visited: URLs fetched successfully (count towards max_pages)
+        """
+        self.frontier = deque(tuple(item) for item in frontier)
+        self.seen = set(seen)
+        self.seen.update(item[0] for item in self.frontier)
+        self.visited = set(visited)
+
+    def pending_frontier(self):
+        """
+        URLs still to be committed, in crawl order: fetches in flight, then the queue.
+        """
+        return [item for item, _ in self._in_flight] + list(self.frontier)
+
+    def iter_events(self, start_url):
+        """
+        Crawl from start_url, yielding (url, outcome, node, logical_parent) per fetched URL.
+
+        Up to max_workers pages are fetched at once. Results are committed in
+        frontier order (head first), so a page's links are queued exactly
+        where the serial BFS would have queued them. If restore() was called,
+        the crawl continues from the restored frontier.
+        """
+        self.start_url = normalize_url(start_url)
+        self.base_domain = urlparse(self.start_url).netloc
+        if not self.seen:
+            self.seen.add(self.start_url)
+            self.frontier.append((self.start_url, 0, None))
+
+        in_flight = self._in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sitemap-crawl') as executor:
+            while True:
+                # Keep the pool busy without fetching more pages than can still be used
+                while (self.frontier and len(in_flight) < self.max_workers
+                       and len(self.visited) + len(in_flight) < self.max_pages):
+                    item = self.frontier.popleft()
+                    in_flight.append((item, executor.submit(self._fetch, item[0])))
+
+                if not in_flight:
+                    break
+
+                item, future = in_flight[0]
+                outcome, node, logical_parent = self._commit(item, future.result())
+                in_flight.popleft()
+                yield item[0], outcome, node, logical_parent
+
+                if len(self.visited) >= self.max_pages:
+                    for _, pending in in_flight:
+                        pending.cancel()
+                    break
+
+    def iter_nodes(self, start_url):
+        """
+        Crawl from start_url, yielding sitemap nodes in the same order as the serial crawl.
+        """
+        for _, outcome, node, _ in self.iter_events(start_url):
+            if outcome == 'success':
+                yield node
+
+    def crawl(self, start_url):
+        """
+        Crawl from start_url.
+
+        Returns:
+            tuple(nodes, parent_child_map)
+        """
+        nodes = list(self.iter_nodes(start_url))
+        logger.info(f'[SitemapCrawler] Crawling completed. Found {len(nodes)} pages, visited {len(self.visited)} URLs.')
+        return nodes, self.parent_child_map
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def crawl_pages(start_url, max_pages=100, max_depth=4, **crawler_options):
+    """
+    Convenience wrapper: crawl start_url and return (nodes, parent_child_map).
+    """
+    with SitemapCrawler(max_pages=max_pages, max_depth=max_depth, **crawler_options) as crawler:
+        return crawler.crawl(start_url)
@@ -0,0 +1,264 @@
+"""
+Background, resumable sitemap crawls.
+
+A SitemapCrawlSession is crawled by users.tasks.run_sitemap_crawl_session.
+Crawled URLs are written as SitemapCrawlPage rows in batches, and each batch
+is committed together with a checkpoint of the crawl frontier. A crawl
+interrupted by a worker restart is picked up again (task redelivery or the
+resume_sitemap_crawl_sessions sweep) and continues from the last checkpoint
+without fetching committed pages again.
+
+Clients read the pages while the crawl runs via iter_session_events() (the
+NDJSON / SSE stream view) and rebuild the hierarchy incrementally with
+IncrementalHierarchy.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SitemapCrawlPage, SitemapCrawlSession
+from .sitemap_crawler import SitemapCrawler
+from .sitemap_views import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+CHECKPOINT_BATCH_SIZE = getattr(settings, 'SITEMAP_CRAWL_SESSION_BATCH_SIZE', 50)
+CHECKPOINT_INTERVAL_SECONDS = getattr(settings, 'SITEMAP_CRAWL_SESSION_FLUSH_SECONDS', 0.5)
+STALE_AFTER_SECONDS = getattr(settings, 'SITEMAP_CRAWL_SESSION_STALE_SECONDS', 120)
+STREAM_POLL_SECONDS = getattr(settings, 'SITEMAP_STREAM_POLL_SECONDS', 0.25)
+STREAM_MAX_SECONDS = getattr(settings, 'SITEMAP_STREAM_MAX_SECONDS', 300)
+STREAM_BATCH_SIZE = 500
+
+
+class IncrementalHierarchy:
+    """
+    Sitemap hierarchy built one node at a time, in crawl order.
+
+    Gives the same result as build_hierarchy_from_relationships() on the
+    complete crawl: the homepage and parentless pages are roots, children keep
+    crawl order, and pages whose logical parent never became a node are left
+    out. A child that arrives before its parent waits until the parent does.
+    """
+
+    def __init__(self, root_url):
+        self.root_url = root_url
+        self.roots = []
+        self._nodes = {}
+        self._waiting = {}
+
+    def add(self, node, parent_url=None):
+        url = node['url']
+        if url in self._nodes:
+            return
+        node.setdefault('children', [])
+        self._nodes[url] = node
+        node['children'][:0] = self._waiting.pop(url, [])
+
+        if parent_url and url != self.root_url:
+            parent = self._nodes.get(parent_url)
+            if parent is not None:
+                parent['children'].append(node)
+            else:
+                self._waiting.setdefault(parent_url, []).append(node)
+        elif url == self.root_url:
+            self.roots.insert(0, node)
+        else:
+            self.roots.append(node)
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+def claim_session(session_id):
+    """
+    Mark a session 'running' for this worker.
+
+    Returns None if the session is finished or another worker is still
+    checkpointing it (heartbeat younger than STALE_AFTER_SECONDS).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        session = SitemapCrawlSession.objects.select_for_update().filter(id=session_id).first()
+        if session is None or session.is_finished:
+            return None
+        if (session.status == 'running' and session.heartbeat_at
+                and session.heartbeat_at > now - timedelta(seconds=STALE_AFTER_SECONDS)):
+            return None
+        session.status = 'running'
+        session.heartbeat_at = now
+        session.save(update_fields=['status', 'heartbeat_at', 'updated_at'])
+    return session
+
+
+def _checkpoint(session, crawler, batch, pages_found):
+    """
+    Write a batch of pages and the frontier it leaves behind in one transaction.
+
+    Returns False if the session was cancelled (nothing is written then).
+    """
+    with transaction.atomic():
+        updated = SitemapCrawlSession.objects.filter(id=session.id, status='running').update(
+            frontier=[list(item) for item in crawler.pending_frontier()],
+            pages_found=F('pages_found') + pages_found,
+            urls_visited=len(crawler.visited),
+            heartbeat_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            return False
+        SitemapCrawlPage.objects.bulk_create(batch)
+    return True
+
+
+def run_crawl_session(session_id, **crawler_options):
+    """
+    Crawl a session to completion, resuming from its last checkpoint.
+
+    Args:
+        session_id: ID of SitemapCrawlSession to crawl
+        **crawler_options: Passed to SitemapCrawler (max_workers, rate_per_host, ...)
+
+    Returns:
+        dict with status, session_id and pages_found
+    """
+    session = claim_session(session_id)
+    if session is None:
+        return {'status': 'skipped', 'session_id': str(session_id)}
+
+    seen, visited = set(), set()
+    sequence = 0
+    for url, outcome, page_sequence in session.pages.values_list('url', 'outcome', 'sequence').iterator():
+        seen.add(url)
+        if outcome != 'failed':
+            visited.add(url)
+        sequence = max(sequence, page_sequence)
+    if seen:
+        logger.info(f'[SitemapCrawlSession] Resuming {session.id} after {len(seen)} URLs, {len(session.frontier)} queued')
+
+    batch, batch_pages = [], 0
+    last_checkpoint = 0.0
+    cancelled = False
+    try:
+        with SitemapCrawler(max_pages=session.max_pages, max_depth=session.max_depth,
+                            track_relationships=False, **crawler_options) as crawler:
+            if seen:
+                crawler.restore(session.frontier, seen, visited)
+            for url, outcome, node, logical_parent in crawler.iter_events(session.start_url):
+                sequence += 1
+                page = SitemapCrawlPage(session_id=session.id, sequence=sequence, url=url, outcome=outcome)
+                if node:
+                    page.title = node['title']
+                    page.depth = node['depth']
+                    page.priority = node['priority']
+                    page.last_modified = node['lastModified']
+                    page.parent_url = logical_parent or ''
+                    batch_pages += 1
+                batch.append(page)
+
+                # The first page is written at once, later ones in batches
+                if len(batch) >= CHECKPOINT_BATCH_SIZE or time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL_SECONDS:
+                    if not _checkpoint(session, crawler, batch, batch_pages):
+                        cancelled = True
+                        break
+                    batch, batch_pages = [], 0
+                    last_checkpoint = time.monotonic()
+
+            if not cancelled and batch and not _checkpoint(session, crawler, batch, batch_pages):
+                cancelled = True
+    except Exception as e:
+        logger.exception(f'[SitemapCrawlSession] Crawl {session.id} failed: {str(e)}')
+        SitemapCrawlSession.objects.filter(id=session.id, status='running').update(
+            status='failed', error_message=str(e), completed_at=timezone.now(), updated_at=timezone.now(),
+        )
+        return {'status': 'failed', 'session_id': str(session.id), 'error': str(e)}
+
+    if cancelled:
+        logger.info(f'[SitemapCrawlSession] Crawl {session.id} was cancelled')
+        return {'status': 'cancelled', 'session_id': str(session.id)}
+
+    SitemapCrawlSession.objects.filter(id=session.id, status='running').update(
+        status='completed', frontier=[], completed_at=timezone.now(), updated_at=timezone.now(),
+    )
+    session.refresh_from_db(fields=['pages_found'])
+    logger.info(f'[SitemapCrawlSession] Crawl {session.id} completed with {session.pages_found} pages')
+    return {'status': 'completed', 'session_id': str(session.id), 'pages_found': session.pages_found}
+
+
+def stale_sessions():
+    """
+    Sessions that should be running but have no live worker: running sessions
+    without a recent checkpoint and pending sessions that were never picked up.
+    """
+    cutoff = timezone.now() - timedelta(seconds=STALE_AFTER_SECONDS)
+    running = SitemapCrawlSession.objects.filter(status='running', heartbeat_at__lt=cutoff)
+    pending = SitemapCrawlSession.objects.filter(status='pending', created_at__lt=cutoff)
+    return running | pending
+
+
+def page_event(page):
+    """Stream payload for one crawled page."""
+    node = page.to_node()
+    node['parent_url'] = page.parent_url or None
+    return node
+
+
+def iter_session_events(session_id, after=0, poll_interval=None, max_seconds=None):
+    """
+    Yield (event, sequence, data) for a session's pages as they are crawled.
+
+    'node' events carry the page (with parent_url) and its sequence number, so
+    a client can reconnect with after=<last sequence>. The stream ends with a
+    'done' event once the session is finished, or 'timeout' after max_seconds.
+    """
+    poll_interval = STREAM_POLL_SECONDS if poll_interval is None else poll_interval
+    max_seconds = STREAM_MAX_SECONDS if max_seconds is None else max_seconds
+    deadline = time.monotonic() + max_seconds
+    last_sequence = after
+
+    while True:
+        # Read the status before the pages: once finished, no page can be missed
+        session = SitemapCrawlSession.objects.filter(id=session_id).values('status', 'pages_found', 'error_message').first()
+        if session is None:
+            yield 'error', None, {'error': 'Session not found'}
+            return
+
+        pages = list(
+            SitemapCrawlPage.objects
+            .filter(session_id=session_id, sequence__gt=last_sequence, outcome='success')
+            .order_by('sequence')[:STREAM_BATCH_SIZE]
+        )
+        for page in pages:
+            yield 'node', page.sequence, page_event(page)
+        if pages:
+            last_sequence = pages[-1].sequence
+            continue
+
+        if session['status'] in ('completed', 'failed', 'cancelled'):
+            yield 'done', last_sequence, {
+                'status': session['status'],
+                'total_pages': session['pages_found'],
+                'error': session['error_message'] or None,
+            }
+            return
+        if time.monotonic() >= deadline:
+            yield 'timeout', last_sequence, {'status': session['status']}
+            return
+        time.sleep(poll_interval)
+
+
+def build_session_hierarchy(session):
+    """
+    Hierarchy of the pages crawled so far, in the shape crawl_website() returns.
+    """
+    hierarchy = IncrementalHierarchy(normalize_url(session.start_url))
+    pages = session.pages.filter(outcome='success').order_by('sequence')
+    for page in pages.iterator(chunk_size=STREAM_BATCH_SIZE):
+        hierarchy.add(page.to_node(), page.parent_url or None)
+    return hierarchy.roots
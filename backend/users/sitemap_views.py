@@ -1,12 +1,31 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from django.http import JsonResponse
+from urllib.parse import urlparse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
-import time
-from collections import deque
+
+# Inline crawls hold a web worker; larger crawls need a background session
+SYNC_CRAWL_MAX_PAGES = 100
+SYNC_CRAWL_MAX_DEPTH = 4
+SESSION_CRAWL_MAX_DEPTH = 10
+
+def get_request_user(request):
+    """
+    The user of a request to a plain Django view: the session user, or the
+    owner of a valid JWT access token as accepted by the DRF views.
+    Returns None for anonymous requests.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
 
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
@@ -39,7 +58,28 @@ def generate_sitemap(request):
             url = 'https://' + url
         
         # Crawl the website
-        sitemap_data = crawl_website(url)
+        try:
+            max_pages = max(1, int(data.get('max_pages', SYNC_CRAWL_MAX_PAGES)))
+            max_depth = max(0, int(data.get('max_depth', SYNC_CRAWL_MAX_DEPTH)))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'max_pages and max_depth must be integers'}, status=400)
+        
+        # Background crawl: return at once, results are streamed from the session
+        if data.get('session'):
+            user = get_request_user(request)
+            if user is None:
+                return JsonResponse({'error': 'Authentication required for background crawls'}, status=401)
+            return start_sitemap_session(
+                user, url,
+                min(max_pages, settings.SITEMAP_CRAWL_MAX_PAGES_LIMIT),
+                min(max_depth, SESSION_CRAWL_MAX_DEPTH),
+            )
+        
+        sitemap_data = crawl_website(
+            url,
+            max_pages=min(max_pages, SYNC_CRAWL_MAX_PAGES),
+            max_depth=min(max_depth, SYNC_CRAWL_MAX_DEPTH),
+        )
         
         return JsonResponse({
             'success': True,
@@ -60,6 +100,113 @@ def generate_sitemap(request):
             'traceback': error_trace
         }, status=500)
 
+def start_sitemap_session(user, url, max_pages, max_depth):
+    """
+    Create a background crawl session owned by user and queue it
+    """
+    from users.models import SitemapCrawlSession
+    from users.tasks import schedule_crawl_session
+    
+    session = SitemapCrawlSession.objects.create(
+        user=user,
+        start_url=normalize_url(url),
+        max_pages=max_pages,
+        max_depth=max_depth,
+    )
+    schedule_crawl_session(session)
+    
+    return JsonResponse({
+        'success': True,
+        'session_id': str(session.id),
+        'status': session.status,
+        'stream_url': f'/api/sitemap/sessions/{session.id}/stream/',
+        'status_url': f'/api/sitemap/sessions/{session.id}/',
+    }, status=202)
+
+def get_owned_session(request, session_id):
+    """
+    The crawl session of the requesting user.
+
+    Returns:
+        tuple(session, error JsonResponse or None); sessions of other users
+        are reported as not found
+    """
+    from users.models import SitemapCrawlSession
+    
+    user = get_request_user(request)
+    if user is None:
+        return None, JsonResponse({'error': 'Authentication required'}, status=401)
+    session = SitemapCrawlSession.objects.filter(id=session_id, user=user).first()
+    if session is None:
+        return None, JsonResponse({'error': 'Session not found'}, status=404)
+    return session, None
+
+@require_http_methods(["GET"])
+def stream_sitemap_session(request, session_id):
+    """
+    Stream the pages of a crawl session as they are crawled
+    
+    NDJSON by default (one {"event", "id", "data"} object per line), or
+    Server-Sent Events with ?format=sse. Resume after a given page with
+    ?after=<id> or the Last-Event-ID header.
+    """
+    from users.sitemap_sessions import iter_session_events
+    
+    session, error = get_owned_session(request, session_id)
+    if error is not None:
+        return error
+    
+    try:
+        after = int(request.GET.get('after') or request.META.get('HTTP_LAST_EVENT_ID') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'after must be an integer'}, status=400)
+    
+    use_sse = request.GET.get('format') == 'sse'
+    
+    def render(events):
+        for event, event_id, data in events:
+            if use_sse:
+                id_line = f'id: {event_id}\n' if event_id is not None else ''
+                yield f'{id_line}event: {event}\ndata: {json.dumps(data)}\n\n'
+            else:
+                yield json.dumps({'event': event, 'id': event_id, 'data': data}) + '\n'
+    
+    response = StreamingHttpResponse(
+        render(iter_session_events(session_id, after=after)),
+        content_type='text/event-stream' if use_sse else 'application/x-ndjson',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+@require_http_methods(["GET"])
+def get_sitemap_session(request, session_id):
+    """
+    Status of a crawl session; ?include=hierarchy adds the sitemap crawled so far
+    """
+    from users.sitemap_sessions import build_session_hierarchy
+    
+    session, error = get_owned_session(request, session_id)
+    if error is not None:
+        return error
+    
+    result = {
+        'success': True,
+        'session_id': str(session.id),
+        'url': session.start_url,
+        'status': session.status,
+        'pages_found': session.pages_found,
+        'urls_visited': session.urls_visited,
+        'max_pages': session.max_pages,
+        'error': session.error_message or None,
+        'created_at': session.created_at.isoformat(),
+        'completed_at': session.completed_at.isoformat() if session.completed_at else None,
+    }
+    if request.GET.get('include') == 'hierarchy':
+        result['sitemap'] = build_session_hierarchy(session)
+        result['total_pages'] = count_pages(result['sitemap'])
+    return JsonResponse(result)
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def fetch_sitemap_xml(request):
@@ -116,163 +263,19 @@ def normalize_url(url):
 def crawl_website(start_url, max_pages=100, max_depth=4):
     """
     Crawl a website and generate sitemap structure
+    
+    Pages are fetched concurrently by users.sitemap_crawler.SitemapCrawler
+    (per-host rate limiting, robots.txt Crawl-delay); the resulting nodes and
+    parent-child relationships match the original serial crawl.
     """
+    from users.sitemap_crawler import crawl_pages
+    
     # Normalize the start URL
     start_url = normalize_url(start_url)
     
-    visited = set()
-    to_visit = deque([(start_url, 0, None)])  # (url, depth, parent_url)
-    sitemap = []
-    parent_child_map = {}  # Track actual parent-child relationships
-    base_domain = urlparse(start_url).netloc
+    sitemap, parent_child_map = crawl_pages(start_url, max_pages=max_pages, max_depth=max_depth)
     
-    while to_visit and len(visited) < max_pages:
-        current_url, depth, parent_url = to_visit.popleft()
-        
-        # Normalize the current URL
-        current_url = normalize_url(current_url)
-        
-        if current_url in visited or depth > max_depth:
-            continue
-            
-        try:
-            # Add delay to be respectful
-            time.sleep(0.5)
-            
-            print(f"Attempting to crawl: {current_url}")
-            response = requests.get(current_url, timeout=10, headers={
-                'User-Agent': 'Mozilla/5.0 (compatible; SitemapGenerator/1.0)'
-            })
-            
-            if response.status_code != 200:
-                print(f"Failed to fetch {current_url}: Status {response.status_code}")
-                continue
-                
-            visited.add(current_url)
-            
-            # Parse the page
-            soup = BeautifulSoup(response.text, 'html.parser')
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else 'Untitled'
-            
-            # Skip pages that are clearly not content pages based on title
-            # BUT NEVER skip the starting URL (homepage) or blog content
-            is_blog_content = '/blog' in current_url.lower() or '/post' in current_url.lower() or '/article' in current_url.lower()
-            
-            if current_url != start_url and not is_blog_content:
-                skip_title_patterns = [
-                    'author:', 'category:', 'tag:', 'archive:', 
-                    'login', 'register', 'sign in', 'sign up',
-                    'search results', '404', 'page not found',
-                    'error', 'admin', 'dashboard'
-                ]
-                
-                if any(pattern.lower() in title_text.lower() for pattern in skip_title_patterns):
-                    print(f"Skipping non-content page: {current_url} - {title_text}")
-                    continue
-            
-            # Log if we found blog content
-            if is_blog_content:
-                print(f"Found blog content: {current_url} - {title_text}")
-            
-            # Create sitemap node
-            node = {
-                'url': current_url,
-                'title': title_text,
-                'depth': depth,
-                'status': 'success',
-                'lastModified': response.headers.get('last-modified', ''),
-                'priority': calculate_priority(current_url, depth),
-                'children': []
-            }
-            
-            print(f"Crawled: {current_url} (depth {depth}) - {title_text} - Priority: {calculate_priority(current_url, depth)}")
-            if parent_url:
-                print(f"  └── Parent: {parent_url}")
-            
-            # Track parent-child relationship based on URL structure, not discovery order
-            # NEVER treat the homepage as a child of any other page
-            if parent_url and current_url != start_url:
-                # Determine the logical parent based on URL structure
-                logical_parent = determine_logical_parent(current_url, parent_url, start_url)
-                if logical_parent and logical_parent != current_url:  # Avoid self-reference
-                    if logical_parent not in parent_child_map:
-                        parent_child_map[logical_parent] = []
-                    parent_child_map[logical_parent].append(current_url)
-            
-            # Find links on the page
-            if depth < max_depth:
-                links = soup.find_all('a', href=True)
-                print(f"Found {len(links)} links on {current_url}")
-                for link in links:
-                    href = link['href']
-                    # Skip non-HTTP links and fragments
-                    if not href or href.startswith('#') or href.startswith('mailto:') or href.startswith('tel:') or href.startswith('javascript:'):
-                        continue
-                        
-                    absolute_url = urljoin(current_url, href)
-                    parsed_link = urlparse(absolute_url)
-                    
-                    # Skip non-HTTP schemes
-                    if parsed_link.scheme not in ['http', 'https']:
-                        continue
-                    
-                    # Skip common file extensions that shouldn't be in sitemaps
-                    path_lower = parsed_link.path.lower()
-                    skip_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.css', '.js', '.xml', '.txt', '.zip', '.doc', '.docx', '.xls', '.xlsx']
-                    if any(path_lower.endswith(ext) for ext in skip_extensions):
-                        continue
-                    
-                    # Skip non-page content (WordPress and general CMS patterns)
-                    skip_patterns = [
-                        '/author/', '/authors/',
-                        '/category/', '/categories/', '/cat/',
-                        '/tag/', '/tags/',
-                        '/archive/', '/archives/',
-                        '/feed/', '/feeds/',
-                        '/wp-admin/', '/wp-login/', '/wp-content/',
-                        '/admin/', '/login/', '/register/',
-                        '/search/', '/api/',
-                        '/attachment/', '/attachments/',
-                        '/media/', '/uploads/',
-                        '/date/', '/year/', '/month/',
-                        '/comments/', '/comment/',
-                        '/rss/', '/atom/'
-                    ]
-                    
-                    # Normalize URL using our function
-                    normalized_url = normalize_url(absolute_url)
-                    
-                    # Skip URLs with query parameters 
-                    if '?' in absolute_url or '#' in absolute_url:
-                        print(f"Filtered out URL with parameters: {absolute_url}")
-                        continue
-                    
-                    # Don't filter the start URL or its immediate children too aggressively
-                    if normalized_url != start_url and any(pattern in normalized_url.lower() for pattern in skip_patterns):
-                        print(f"Filtered out by pattern: {normalized_url}")
-                        continue
-                    
-                    # Log blog URLs specifically
-                    if '/blog' in normalized_url.lower() or '/post' in normalized_url.lower() or '/article' in normalized_url.lower():
-                        print(f"Found blog/post URL: {normalized_url}")
-                    
-                    # Only crawl links from the same domain
-                    if (parsed_link.netloc == base_domain and 
-                        normalized_url not in visited and
-                        not any(normalized_url == item[0] for item in to_visit)):
-                        
-                        # Calculate proper depth based on URL hierarchy, not just discovery order
-                        proper_depth = calculate_url_depth(normalized_url, start_url)
-                        to_visit.append((normalized_url, proper_depth, current_url))
-            
-            sitemap.append(node)
-            
-        except Exception as e:
-            print(f"Error crawling {current_url}: {e}")
-            continue
-    
-    print(f"Crawling completed. Found {len(sitemap)} pages, visited {len(visited)} URLs.")
+    print(f"Crawling completed. Found {len(sitemap)} pages.")
     
     # Initial deduplication step - remove duplicates before hierarchy building
     def deduplicate_flat_sitemap(nodes):
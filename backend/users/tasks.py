@@ -0,0 +1,75 @@
+"""
+Background tasks for the users app.
+
+Sitemap crawl sessions (users.sitemap_sessions) run in run_sitemap_crawl_session.
+The task is acknowledged late and checkpoints as it goes, so a crawl cut short
+by a worker restart is redelivered (or picked up by the
+resume_sitemap_crawl_sessions sweep) and continues where it stopped.
+"""
+
+import logging
+import threading
+from django.db import transaction
+from .sitemap_sessions import run_crawl_session, stale_sessions
+
+logger = logging.getLogger(__name__)
+
+# Try to import Celery, fallback to no-op if not available
+try:
+    from celery import shared_task
+    CELERY_AVAILABLE = True
+except ImportError:
+    # Celery not installed - create a dummy decorator
+    CELERY_AVAILABLE = False
+    def shared_task(*args, **kwargs):
+        def decorator(func):
+            # Return function unchanged if Celery not available
+            return func
+        return decorator
+    logger.warning('Celery not available. Sitemap crawl sessions will run in a background thread.')
+
+
+@shared_task(name='users.tasks.run_sitemap_crawl_session', acks_late=True)
+def run_sitemap_crawl_session(session_id):
+    """
+    Crawl a sitemap session to completion, resuming from its last checkpoint.
+
+    Args:
+        session_id: ID of SitemapCrawlSession to crawl
+    """
+    return run_crawl_session(session_id)
+
+
+@shared_task(name='users.tasks.resume_sitemap_crawl_sessions')
+def resume_sitemap_crawl_sessions():
+    """
+    Periodic task: requeue crawl sessions whose worker went away.
+    """
+    session_ids = list(stale_sessions().values_list('id', flat=True))
+    for session_id in session_ids:
+        logger.info(f'[SitemapCrawlSession] Requeueing stale crawl session {session_id}')
+        _dispatch(session_id)
+    return {'status': 'success', 'requeued': len(session_ids)}
+
+
+def _dispatch(session_id):
+    session_id = str(session_id)
+    if CELERY_AVAILABLE:
+        try:
+            run_sitemap_crawl_session.delay(session_id)
+            return
+        except Exception as e:
+            logger.warning(f'[SitemapCrawlSession] Could not queue crawl session {session_id}, crawling in a thread: {str(e)}')
+    threading.Thread(target=run_crawl_session, args=(session_id,), daemon=True).start()
+
+
+def schedule_crawl_session(session):
+    """
+    Queue a crawl session once the current transaction commits.
+
+    Falls back to a background thread when Celery is not installed or the
+    broker cannot be reached; the resume sweep still covers such crawls if
+    the process exits.
+    """
+    session_id = session.id
+    transaction.on_commit(lambda: _dispatch(session_id))
@@ -169,3 +169,233 @@ class TestMonitoredSites:
         assert data['url'] == 'https://example.com'
         assert data['name'] == 'Example Site'
         assert data['user'] == regular_user.id
+
+
+@pytest.fixture
+def site():
+    """Serve a synthetic site locally (see benchmark_sitemap_crawler)"""
+    import threading
+    from users.management.commands.benchmark_sitemap_crawler import SyntheticSiteHandler, SyntheticSiteServer
+    
+    handlers = {}
+    
+    def serve(sections=4, pages_per_section=5, crawl_delay=None):
+        handler = type('TestSiteHandler', (SyntheticSiteHandler,), {
+            'sections': sections,
+            'pages_per_section': pages_per_section,
+            'crawl_delay': crawl_delay,
+        })
+        server = SyntheticSiteServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        handlers[server] = handler
+        return f'http://127.0.0.1:{server.server_address[1]}/'
+    
+    yield serve
+    for server in handlers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestSitemapCrawler:
+    """Test the concurrent sitemap crawler engine"""
+    
+    def test_concurrent_output_matches_serial(self, site):
+        """Test that concurrent fetching yields the same nodes and hierarchy as one worker"""
+        from users.sitemap_crawler import crawl_pages
+        
+        start_url = site()
+        serial = crawl_pages(start_url, max_pages=100, max_workers=1, rate_per_host=1000)
+        concurrent = crawl_pages(start_url, max_pages=100, max_workers=8, rate_per_host=1000)
+        
+        assert concurrent == serial
+        nodes, parent_child_map = concurrent
+        assert len(nodes) == 1 + 4 + 4 * 5
+        assert nodes[0]['url'] == start_url.rstrip('/')
+        assert nodes[0]['priority'] == 1.0
+        assert parent_child_map[start_url.rstrip('/')] == [f'{start_url}section-{i}' for i in range(4)]
+    
+    def test_max_pages_is_respected(self, site):
+        """Test that the crawl stops at max_pages in frontier order"""
+        from users.sitemap_crawler import crawl_pages
+        
+        nodes, _ = crawl_pages(site(), max_pages=3, max_workers=8, rate_per_host=1000)
+        
+        assert [node['url'].rsplit('/', 1)[-1] for node in nodes[1:]] == ['section-0', 'section-1']
+    
+    def test_robots_crawl_delay_limits_rate(self, site):
+        """Test that a robots.txt Crawl-delay overrides the configured per-host rate"""
+        import time
+        from users.sitemap_crawler import crawl_pages
+        
+        started = time.monotonic()
+        nodes, _ = crawl_pages(site(sections=2, pages_per_section=1, crawl_delay=0.2), max_pages=4, max_workers=4, rate_per_host=1000)
+        
+        assert len(nodes) == 4
+        assert time.monotonic() - started >= 0.55
+    
+    def test_link_extraction_and_filtering(self):
+        """Test title extraction and the link filters"""
+        from users.sitemap_crawler import extract_title_and_links, filter_links
+        
+        title, hrefs = extract_title_and_links(
+            '<html><head><title> Docs </title></head><body>'
+            '<a href="/guide/">Guide</a><a href="/a.pdf">PDF</a><a href="/tag/x/">Tag</a>'
+            '<a href="/p?x=1">Query</a><a href="https://other.com/">Other</a><a>No href</a>'
+            '</body></html>'
+        )
+        
+        assert title == 'Docs'
+        assert filter_links(hrefs, 'https://example.com/docs', 'https://example.com', 'example.com') == [
+            'https://example.com/guide'
+        ]
+        assert extract_title_and_links('') == ('Untitled', [])
+
+
+@pytest.mark.django_db
+class TestSitemapRequestLimits:
+    """Test the crawl bounds of the public sitemap endpoint"""
+    
+    def test_inline_crawl_capped(self, api_client, monkeypatch):
+        """Test that synchronous crawls keep the 100-page bound whatever is requested"""
+        from users import sitemap_views
+        calls = []
+        monkeypatch.setattr(sitemap_views, 'crawl_website', lambda url, **kwargs: calls.append(kwargs) or [])
+        
+        response = api_client.post('/api/sitemap/', {'url': 'https://example.com', 'max_pages': 10000, 'max_depth': 10}, format='json')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert calls == [{'max_pages': 100, 'max_depth': 4}]
+    
+    def test_background_crawl_requires_authentication(self, authenticated_client, regular_user, monkeypatch):
+        """Test that only signed-in users can queue large background crawls"""
+        from django.test import Client
+        from users import tasks
+        from users.models import SitemapCrawlSession
+        monkeypatch.setattr(tasks, 'schedule_crawl_session', lambda session: None)
+        data = {'url': 'https://example.com', 'max_pages': 5000, 'session': True}
+        
+        response = Client().post('/api/sitemap/', data, content_type='application/json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert not SitemapCrawlSession.objects.exists()
+        
+        response = authenticated_client.post('/api/sitemap/', data, format='json')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        session = SitemapCrawlSession.objects.get()
+        assert (session.user, session.max_pages) == (regular_user, 5000)
+
+
+class WorkerKilled(BaseException):
+    """Simulates a worker process dying mid-crawl"""
+
+
+@pytest.mark.django_db
+class TestSitemapCrawlSessions:
+    """Test background, resumable sitemap crawl sessions"""
+    
+    @pytest.fixture(autouse=True)
+    def fast_crawl(self, settings, monkeypatch):
+        from users import sitemap_sessions
+        settings.SITEMAP_CRAWL_RATE_PER_HOST = 1000
+        monkeypatch.setattr(sitemap_sessions, 'CHECKPOINT_BATCH_SIZE', 4)
+        monkeypatch.setattr(sitemap_sessions, 'CHECKPOINT_INTERVAL_SECONDS', 60)
+    
+    def create_session(self, start_url, max_pages=100, user=None):
+        from users.models import SitemapCrawlSession
+        from users.sitemap_views import normalize_url
+        return SitemapCrawlSession.objects.create(start_url=normalize_url(start_url), max_pages=max_pages, user=user)
+    
+    def test_session_matches_synchronous_crawl(self, site):
+        """Test that a session crawl produces the same sitemap as crawl_website"""
+        from users.sitemap_sessions import build_session_hierarchy, run_crawl_session
+        from users.sitemap_views import crawl_website
+        
+        start_url = site()
+        session = self.create_session(start_url)
+        
+        result = run_crawl_session(session.id)
+        session.refresh_from_db()
+        
+        assert result['status'] == 'completed'
+        assert session.status == 'completed'
+        assert session.pages_found == 25
+        assert session.frontier == []
+        assert build_session_hierarchy(session) == crawl_website(start_url)
+    
+    def test_interrupted_session_resumes_from_checkpoint(self, site, monkeypatch):
+        """Test that a crawl killed mid-run resumes without refetching or duplicating pages"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from users import sitemap_sessions
+        from users.models import SitemapCrawlSession
+        from users.sitemap_views import crawl_website
+        
+        start_url = site()
+        session = self.create_session(start_url)
+        checkpoint = sitemap_sessions._checkpoint
+        calls = []
+        
+        def dying_checkpoint(*args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise WorkerKilled()
+            return checkpoint(*args)
+        
+        monkeypatch.setattr(sitemap_sessions, '_checkpoint', dying_checkpoint)
+        with pytest.raises(WorkerKilled):
+            sitemap_sessions.run_crawl_session(session.id)
+        monkeypatch.setattr(sitemap_sessions, '_checkpoint', checkpoint)
+        
+        session.refresh_from_db()
+        assert session.status == 'running'
+        assert session.pages.count() == 5
+        assert session.frontier
+        
+        # A live heartbeat keeps other workers away; a stale one is requeued
+        assert sitemap_sessions.run_crawl_session(session.id)['status'] == 'skipped'
+        SitemapCrawlSession.objects.filter(id=session.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        assert list(sitemap_sessions.stale_sessions().values_list('id', flat=True)) == [session.id]
+        assert sitemap_sessions.run_crawl_session(session.id)['status'] == 'completed'
+        
+        urls = list(session.pages.values_list('url', flat=True))
+        assert len(urls) == len(set(urls)) == 25
+        assert list(session.pages.values_list('sequence', flat=True)) == list(range(1, 26))
+        assert sitemap_sessions.build_session_hierarchy(session) == crawl_website(start_url)
+    
+    def test_stream_yields_nodes_then_done(self, site, regular_user):
+        """Test the session stream (NDJSON and resuming after an event id)"""
+        import json
+        from django.test import Client
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from users.sitemap_sessions import run_crawl_session
+        
+        session = self.create_session(site(), max_pages=5, user=regular_user)
+        run_crawl_session(session.id)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(regular_user).access_token}')
+        
+        response = client.get(f'/api/sitemap/sessions/{session.id}/stream/')
+        events = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert [event['event'] for event in events] == ['node'] * 5 + ['done']
+        assert events[0]['data']['parent_url'] is None
+        assert events[1]['data']['parent_url'] == events[0]['data']['url']
+        assert events[-1]['data'] == {'status': 'completed', 'total_pages': 5, 'error': None}
+        
+        response = client.get(f'/api/sitemap/sessions/{session.id}/stream/?format=sse', HTTP_LAST_EVENT_ID=str(events[3]['id']))
+        body = b''.join(response.streaming_content).decode()
+        assert body.count('event: node') == 1
+        assert body.startswith(f'id: {events[4]["id"]}\n')
+    
+    def test_sessions_visible_to_their_owner_only(self, regular_user, django_user_model):
+        """Test that the status and stream endpoints need the session's own user"""
+        from django.test import Client
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        session = self.create_session('https://example.com', user=regular_user)
+        other = django_user_model.objects.create_user(username='other', password='testpass123')
+        as_user = lambda user: Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        
+        for path in (f'/api/sitemap/sessions/{session.id}/', f'/api/sitemap/sessions/{session.id}/stream/'):
+            assert Client().get(path).status_code == 401
+            assert as_user(other).get(path).status_code == 404
+        assert as_user(regular_user).get(f'/api/sitemap/sessions/{session.id}/').json()['status'] == 'pending'
@@ -14,7 +14,7 @@ from .permission_views import (
     check_permissions, user_permissions, get_navigation,
     get_sidebar_matrix, update_sidebar_matrix
 )
-from .sitemap_views import generate_sitemap, fetch_sitemap_xml
+from .sitemap_views import generate_sitemap, fetch_sitemap_xml, get_sitemap_session, stream_sitemap_session
 from .views import (
     send_verification_email_endpoint, verify_email, 
     resend_verification_email, verification_status, check_verification_status_by_email,
@@ -47,6 +47,8 @@ urlpatterns = [
     path('api/monitor/sites/', monitored_site_list, name='monitored_site_list'),
     path('api/monitor/sites/<int:site_id>/', monitored_site_detail, name='monitored_site_detail'),
     path('api/sitemap/', generate_sitemap, name='generate_sitemap'),
+    path('api/sitemap/sessions/<uuid:session_id>/', get_sitemap_session, name='get_sitemap_session'),
+    path('api/sitemap/sessions/<uuid:session_id>/stream/', stream_sitemap_session, name='stream_sitemap_session'),
     path('api/sitemap-xml/', fetch_sitemap_xml, name='fetch_sitemap_xml'),
     
     # New user management endpoints
@@ -19,7 +19,7 @@ import { ReportCard } from "@/components/compliance/report-card";
 import { ReportDetailDrawer } from "@/components/compliance/report-detail-drawer";
 import { GenerateReportDialog } from "@/components/compliance/generate-report-dialog";
 import { Framework } from "@/lib/data/frameworks";
-import axios from "axios";
+import axios, { AxiosRequestConfig } from "axios";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL ?? (typeof window !== 'undefined' ? '' : 'http://localhost:8000');
 
@@ -125,26 +125,30 @@ export default function ComplianceReportsPage() {
 
   const handleDownload = async (reportId: string) => {
     const existing = reports.find((r) => r.id === reportId);
-    const existingUrl = existing?.downloadUrl || existing?.fileUrl;
-    if (existingUrl) {
-      window.open(existingUrl, "_blank", "noopener,noreferrer");
-      return;
-    }
 
     try {
       const token = localStorage.getItem("access_token");
       if (!token) throw new Error("Not authenticated");
       const baseUrl = API_BASE?.replace(/\/$/, '') || '';
       const url = `${baseUrl}/api/compliance/reports/${reportId}/download/`;
-      const response = await makeAuthenticatedRequest(url, token);
-      if (response?.data?.download_url) {
-        window.open(response.data.download_url, "_blank", "noopener,noreferrer");
-      } else {
-        alert("Report file is not available yet");
-      }
+      // The file is streamed by the API (with the export permission check), not served from a public URL
+      const response = await makeAuthenticatedRequest(url, token, { responseType: "blob" });
+      const extension = existing?.fileFormat === "readonly_link" ? "html" : existing?.fileFormat || "pdf";
+      const blobUrl = URL.createObjectURL(response.data);
+      const link = document.createElement("a");
+      link.href = blobUrl;
+      link.download = `${existing?.reportId || reportId}.${extension}`;
+      document.body.appendChild(link);
+      link.click();
+      link.remove();
+      URL.revokeObjectURL(blobUrl);
     } catch (err: any) {
       console.error("Download failed:", err);
-      alert(err.response?.data?.error || err.message || "Download failed");
+      if (err.response?.status === 404) {
+        alert("Report file is not available yet");
+      } else {
+        alert(err.message || "Download failed");
+      }
     }
   };
 
@@ -195,9 +199,10 @@ export default function ComplianceReportsPage() {
   };
 
   // Helper function to make authenticated request with retry
-  const makeAuthenticatedRequest = async (url: string, currentToken: string) => {
+  const makeAuthenticatedRequest = async (url: string, currentToken: string, config: AxiosRequestConfig = {}) => {
     try {
       return await axios.get(url, {
+        ...config,
         headers: { Authorization: `Bearer ${currentToken}` },
       });
     } catch (err: any) {
@@ -206,6 +211,7 @@ export default function ComplianceReportsPage() {
         const newToken = await refreshAccessToken();
         if (newToken) {
           return await axios.get(url, {
+            ...config,
             headers: { Authorization: `Bearer ${newToken}` },
           });
         }